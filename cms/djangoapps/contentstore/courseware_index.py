@@ -360,7 +360,7 @@ class CoursewareSearchIndexer(SearchIndexerBase):
     @classmethod
     def _fetch_top_level(cls, modulestore, structure_key):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_course(structure_key, depth=None)
+        return modulestore.get_course(structure_key, depth=None, prefetch_definitions=True)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
@@ -448,7 +448,7 @@ class LibrarySearchIndexer(SearchIndexerBase):
     @classmethod
     def _fetch_top_level(cls, modulestore, structure_key):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_library(structure_key, depth=None)
+        return modulestore.get_library(structure_key, depth=None, prefetch_definitions=True)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
@@ -136,6 +136,18 @@ ALLOWED_HOSTS = [
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 
 CACHES = ENV_TOKENS['CACHES']
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT', CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT
+)
+EMBARGO_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get('EMBARGO_LOCAL_CACHE_TIMEOUT', EMBARGO_LOCAL_CACHE_TIMEOUT)
+EMBARGO_IP_COUNTRY_CACHE_SIZE = ENV_TOKENS.get('EMBARGO_IP_COUNTRY_CACHE_SIZE', EMBARGO_IP_COUNTRY_CACHE_SIZE)
+COURSE_OVERVIEW_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_TIMEOUT', COURSE_OVERVIEW_CACHE_TIMEOUT)
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT', COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT
+)
+DISCUSSION_INDEX_CACHE_TIMEOUT = ENV_TOKENS.get('DISCUSSION_INDEX_CACHE_TIMEOUT', DISCUSSION_INDEX_CACHE_TIMEOUT)
+STATIC_REPLACE_CACHE_TIMEOUT = ENV_TOKENS.get('STATIC_REPLACE_CACHE_TIMEOUT', STATIC_REPLACE_CACHE_TIMEOUT)
+COURSE_STRUCTURE_CACHE_CODEC = ENV_TOKENS.get('COURSE_STRUCTURE_CACHE_CODEC', COURSE_STRUCTURE_CACHE_CODEC)
 # Cache used for location mapping -- called many times with the same key/value
 # in a given request.
 if 'loc_cache' not in CACHES:
@@ -192,6 +204,9 @@ ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
 COMPREHENSIVE_THEME_DIR = path(ENV_TOKENS.get('COMPREHENSIVE_THEME_DIR', COMPREHENSIVE_THEME_DIR))
 
+# Templates compiled by the compile_mako_templates management command
+MAKO_TEMPLATE_BUNDLE_DIR = ENV_TOKENS.get('MAKO_TEMPLATE_BUNDLE_DIR', MAKO_TEMPLATE_BUNDLE_DIR)
+
 #Timezone overrides
 TIME_ZONE = ENV_TOKENS.get('TIME_ZONE', TIME_ZONE)
 
@@ -295,6 +310,7 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
 )
 
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
@@ -225,6 +225,10 @@ GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
 # TODO: Move the Mako templating into a different engine in TEMPLATES below.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Directory of the templates compiled by the compile_mako_templates management
+# command. When set, templates are loaded from it, and their source files
+# aren't checked for changes.
+MAKO_TEMPLATE_BUNDLE_DIR = None
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -389,6 +393,13 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Assets too large for the django cache are kept in a local directory by the
+# StaticContentServer, if DIRECTORY is set, up to MAX_SIZE bytes.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 1024 * 1024 * 1024,
+}
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -420,6 +431,12 @@ MODULESTORE = {
     }
 }
 
+# How the split modulestore serializes the course structures it caches in the
+# 'course_structure_cache' cache: an encoding ('pickle', or 'compact', which
+# decodes blocks when they are first used) and a compressor ('zlib', or 'lz4'
+# if it's installed). Cached structures can be read whichever codec wrote them.
+COURSE_STRUCTURE_CACHE_CODEC = 'pickle+zlib'
+
 # Modulestore-level field override providers. These field override providers don't
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
@@ -489,6 +506,11 @@ STATICFILES_DIRS = [
     # ("book", ENV_ROOT / "book_images"),
 ]
 
+# How long, in seconds, each process keeps the urls that static urls in
+# course content resolve to, and the content it rewrote them in. Studio
+# doesn't keep them, so that authors see changes to assets at once.
+STATIC_REPLACE_CACHE_TIMEOUT = 0
+
 # Locale/Internationalization
 TIME_ZONE = 'America/New_York'  # http://en.wikipedia.org/wiki/List_of_tz_zones_by_name
 LANGUAGE_CODE = 'en'  # http://www.i18nguy.com/unicode/language-identifiers.html
@@ -511,6 +533,24 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
 
+# How long, in seconds, each process keeps the country access rules of the
+# restricted courses before checking the cache for changes.
+EMBARGO_LOCAL_CACHE_TIMEOUT = 5
+
+# How many IP addresses each process keeps the GeoIP country code of.
+EMBARGO_IP_COUNTRY_CACHE_SIZE = 10000
+
+##### Course overviews #####
+# How long, in seconds, course overviews are cached, and how long each process
+# keeps those it read before checking the cache for newer ones.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 60 * 60
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = 10
+
+##### Discussion index #####
+# How long, in seconds, the index of the discussion modules of a course is
+# cached. It is dropped from the cache when the course is published.
+DISCUSSION_INDEX_CACHE_TIMEOUT = 60 * 60
+
 ############################### PIPELINE #######################################
 
 PIPELINE_ENABLED = True
@@ -1148,6 +1188,12 @@ DATABASE_ROUTERS = [
     'openedx.core.lib.django_courseware_routers.StudentModuleHistoryExtendedRouter',
 ]
 
+############################ Configuration Models ##############################
+
+# How long, in seconds, each process uses the ConfigurationModel entries it
+# has read before checking whether any configuration was changed since.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 1
+
 ############################ OAUTH2 Provider ###################################
 
 # OpenID Connect issuer ID. Normally the URL of the authentication endpoint.
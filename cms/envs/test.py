@@ -176,6 +176,24 @@ CACHES = {
     },
 }
 
+# Check the configuration generation on every ConfigurationModel.current(), so
+# that tests which clear or mock the cache see configuration changes at once.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 0
+
+# Read the embargo rules from the cache, and look up IP addresses anew every
+# time, since tests clear the cache and mock GeoIP.
+EMBARGO_LOCAL_CACHE_TIMEOUT = 0
+EMBARGO_IP_COUNTRY_CACHE_SIZE = 0
+
+# Read course overviews from the database every time, since tests change the
+# courses and check the queries made.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 0
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = 0
+
+# Read discussion indexes from the database every time, since tests change the
+# courses and check the queries made.
+DISCUSSION_INDEX_CACHE_TIMEOUT = 0
+
 # hide ratelimit warnings while running tests
 filterwarnings('ignore', message='No request passed to the backend, unable to rate-limit')
 
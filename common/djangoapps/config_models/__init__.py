@@ -50,6 +50,10 @@ The current ``ConfigurationModel`` will be cached in the ``configuration`` djang
 or in the ``default`` cache if ``configuration`` doesn't exist. You can specify the cache
 timeout in each ``ConfigurationModel`` by setting the ``cache_timeout`` property.
 
+Each process also keeps the entries it has read, and uses them without going to the cache
+until a ``ConfigurationModel`` is saved. Saves made by other processes are noticed within
+``settings.CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT`` seconds.
+
 You can change the name of the cache key used by the ``ConfigurationModel`` by overriding
 the ``cache_key_name`` function.
 
@@ -1,16 +1,131 @@
 """
 Django Model baseclass for database-backed configuration.
 """
+import cPickle as pickle
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
 from django.db import connection, models
 from django.contrib.auth.models import User
 from django.core.cache import caches, InvalidCacheBackendError
 from django.utils.translation import ugettext_lazy as _
+from dogapi import dog_stats_api
 
 try:
     cache = caches['configuration']  # pylint: disable=invalid-name
 except InvalidCacheBackendError:
     from django.core.cache import cache
 
+# The configuration generation is a token in the cache which is replaced
+# whenever a configuration entry is saved.
+GENERATION_CACHE_KEY = 'configuration/generation'
+
+# The largest number of entries each process keeps in its LocalConfigurationCache.
+LOCAL_CACHE_MAX_SIZE = 10000
+
+
+class LocalConfigurationCache(object):
+    """
+    The configuration entries read from the cache by this process, which it
+    uses for as long as the configuration generation doesn't change.
+
+    The generation is read from the cache at most every
+    settings.CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT seconds, so changes saved
+    by other processes are seen at most that long after they're made.
+    Entries are kept pickled, so that every caller gets its own copy, just as
+    it would from the cache.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = None
+        self._generation_checked_at = None
+
+    def generation(self):
+        """
+        Returns the current configuration generation, or None if it can't be
+        known, in which case the local cache must not be used.
+        """
+        timeout = getattr(settings, 'CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT', 1)
+        now = time.time()
+        with self._lock:
+            if self._generation is not None and now - self._generation_checked_at < timeout:
+                return self._generation
+
+        generation = cache.get(GENERATION_CACHE_KEY)
+        if generation is None:
+            # The generation was never set, or was evicted. Either way,
+            # entries of any earlier generation may be stale.
+            cache.add(GENERATION_CACHE_KEY, uuid4().hex, None)
+            generation = cache.get(GENERATION_CACHE_KEY)
+        if not isinstance(generation, basestring):
+            generation = None
+
+        self._set_generation(generation, now)
+        return generation
+
+    def new_generation(self):
+        """
+        Starts a new configuration generation, which makes every process
+        stop using the entries it has.
+        """
+        generation = uuid4().hex
+        cache.set(GENERATION_CACHE_KEY, generation, None)
+        self._set_generation(generation, time.time())
+
+    def get(self, key, generation):
+        """
+        Returns the entry for `key` if it was read in `generation` and hasn't
+        expired, else None.
+        """
+        if generation is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        pickled_value, entry_generation, expires_at = entry
+        if entry_generation != generation or expires_at < time.time():
+            return None
+        return pickle.loads(pickled_value)
+
+    def set(self, key, value, generation, timeout):
+        """
+        Keeps `value` as the entry for `key`, read in `generation`, for
+        `timeout` seconds.
+        """
+        if generation is None:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if len(self._entries) >= LOCAL_CACHE_MAX_SIZE:
+                self._entries = {}
+            self._entries[key] = (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), generation, time.time() + timeout)
+
+    def clear(self):
+        """
+        Forgets all entries, and the generation.
+        """
+        with self._lock:
+            self._entries = {}
+            self._generation = None
+            self._generation_checked_at = None
+
+    def _set_generation(self, generation, checked_at):
+        """
+        Records the generation read from the cache at `checked_at`.
+        """
+        with self._lock:
+            if generation != self._generation:
+                self._entries = {}
+            self._generation = generation
+            self._generation_checked_at = checked_at
+
+
+local_cache = LocalConfigurationCache()  # pylint: disable=invalid-name
+
 
 class ConfigurationModelManager(models.Manager):
     """
@@ -99,6 +214,7 @@ class ConfigurationModel(models.Model):
         cache.delete(self.cache_key_name(*[getattr(self, key) for key in self.KEY_FIELDS]))
         if self.KEY_FIELDS:
             cache.delete(self.key_values_cache_key_name())
+        local_cache.new_generation()
 
     @classmethod
     def cache_key_name(cls, *args):
@@ -115,12 +231,21 @@ class ConfigurationModel(models.Model):
     @classmethod
     def current(cls, *args):
         """
-        Return the active configuration entry, either from cache,
-        from the database, or by creating a new empty entry (which is not
-        persisted).
+        Return the active configuration entry, either from the local cache
+        of this process, from cache, from the database, or by creating a new
+        empty entry (which is not persisted).
         """
-        cached = cache.get(cls.cache_key_name(*args))
+        cache_key = cls.cache_key_name(*args)
+        generation = local_cache.generation()
+        current = local_cache.get(cache_key, generation)
+        if current is not None:
+            cls._record_cache_result('local_hit')
+            return current
+
+        cached = cache.get(cache_key)
         if cached is not None:
+            local_cache.set(cache_key, cached, generation, cls.cache_timeout)
+            cls._record_cache_result('hit')
             return cached
 
         key_dict = dict(zip(cls.KEY_FIELDS, args))
@@ -129,9 +254,22 @@ class ConfigurationModel(models.Model):
         except IndexError:
             current = cls(**key_dict)
 
-        cache.set(cls.cache_key_name(*args), current, cls.cache_timeout)
+        cache.set(cache_key, current, cls.cache_timeout)
+        local_cache.set(cache_key, current, generation, cls.cache_timeout)
+        cls._record_cache_result('miss')
         return current
 
+    @classmethod
+    def _record_cache_result(cls, result):
+        """
+        Count where `current` found the entry of this model: in the local
+        cache of this process, in cache, or in the database.
+        """
+        dog_stats_api.increment(
+            'config_models.current',
+            tags=[u'model:{}'.format(cls.__name__), u'result:{}'.format(result)]
+        )
+
     @classmethod
     def is_enabled(cls):
         """Returns True if this feature is configured as enabled, else False."""
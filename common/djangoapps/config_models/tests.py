@@ -7,12 +7,13 @@ import ddt
 from django.contrib.auth.models import User
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 from rest_framework.test import APIRequestFactory
 
 from freezegun import freeze_time
 
 from mock import patch, Mock
-from config_models.models import ConfigurationModel
+from config_models.models import ConfigurationModel, GENERATION_CACHE_KEY, cache, local_cache
 from config_models.views import ConfigurationModelCurrentAPIView
 
 
@@ -295,6 +296,78 @@ class KeyedConfigurationModelTests(TestCase):
         self.assertEquals(ExampleKeyedConfig.key_values(), fake_result)
 
 
+@override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=60)
+class LocalConfigurationCacheTests(TestCase):
+    """
+    Tests of the local cache of ``ConfigurationModel.current``.
+    """
+    def setUp(self):
+        super(LocalConfigurationCacheTests, self).setUp()
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(local_cache.clear)
+        self.user = User()
+        self.user.save()
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+
+    def test_local_hit(self):
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+
+        with patch.object(cache, 'get', return_value=None) as mock_get:
+            self.assertEquals(ExampleConfig.current().string_field, 'first')
+            self.assertEquals(ExampleKeyedConfig.current('left', 'right').string_field, '')
+            self.assertEquals(ExampleKeyedConfig.current('left', 'right').string_field, '')
+        self.assertEquals(mock_get.call_count, 1)
+
+    def test_local_copies(self):
+        ExampleConfig.current().string_field = 'changed'
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+
+    def test_save(self):
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        ExampleConfig(changed_by=self.user, string_field='second').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'second')
+
+    def test_saved_in_other_process(self):
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+
+        # Saved in another process, which starts a new generation.
+        with patch.object(local_cache, 'new_generation'):
+            ExampleConfig(changed_by=self.user, string_field='second').save()
+        cache.set(GENERATION_CACHE_KEY, 'other', None)
+
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        with override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=0):
+            self.assertEquals(ExampleConfig.current().string_field, 'second')
+
+    def test_generation_evicted(self):
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        with patch.object(local_cache, 'new_generation'):
+            ExampleConfig(changed_by=self.user, string_field='second').save()
+        cache.clear()
+
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        with override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=0):
+            self.assertEquals(ExampleConfig.current().string_field, 'second')
+        self.assertIsNotNone(cache.get(GENERATION_CACHE_KEY))
+
+    @patch('config_models.models.dog_stats_api')
+    def test_cache_results_recorded(self, mock_dog_stats_api):
+        ExampleConfig.current()
+        cache.set(GENERATION_CACHE_KEY, 'other', None)
+        with override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=0):
+            ExampleConfig.current()
+        ExampleConfig.current()
+
+        self.assertEquals(
+            [call[1]['tags'][1] for call in mock_dog_stats_api.increment.call_args_list],
+            ['result:miss', 'result:hit', 'result:local_hit']
+        )
+        mock_dog_stats_api.increment.assert_called_with(
+            'config_models.current', tags=['model:ExampleConfig', 'result:local_hit']
+        )
+
+
 @ddt.ddt
 class ConfigurationModelAPITests(TestCase):
     """
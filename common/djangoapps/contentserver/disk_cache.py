@@ -0,0 +1,240 @@
+"""
+A bounded, on-disk LRU cache of asset content, keyed by content digest.
+
+Assets too large for the django cache are copied into a local directory the
+first time they're served, so that later requests read them from disk
+instead of from GridFS. Since files are named by the digest of their
+content, a changed asset is simply cached under a new name, and the stale
+file ages out of the cache.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContent, STREAM_DATA_CHUNK_SIZE
+
+log = logging.getLogger(__name__)
+
+# Assets are read from and written to disk in chunks of this many bytes.
+FILE_CHUNK_SIZE = 64 * STREAM_DATA_CHUNK_SIZE
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{32}$')
+
+_disk_caches = {}
+_disk_caches_lock = threading.Lock()
+
+
+def get_asset_disk_cache():
+    """
+    Returns the AssetDiskCache configured by settings.CONTENTSERVER_DISK_CACHE,
+    or None if there is no cache directory configured.
+    """
+    config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', {})
+    directory = config.get('DIRECTORY')
+    if not directory:
+        return None
+
+    key = (directory, config.get('MAX_SIZE'))
+    with _disk_caches_lock:
+        if key not in _disk_caches:
+            _disk_caches[key] = AssetDiskCache(*key)
+        return _disk_caches[key]
+
+
+class StaticContentFile(StaticContent):
+    """
+    An asset whose content is in a file of an AssetDiskCache.
+
+    This is also what is put in the django cache for large assets: only
+    their metadata, without the content. Each server looks up the content
+    in its own AssetDiskCache (see AssetDiskCache.get).
+
+    The file is opened by the AssetDiskCache, and stays open until the
+    StaticContentFile is dropped, so that the asset can still be read after
+    its file is evicted from the cache.
+    """
+    def __init__(self, content, path, asset_file=None):
+        super(StaticContentFile, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest
+        )
+        self.path = path
+        self._file = asset_file
+
+    def __getstate__(self):
+        # The open file only makes sense in this process.
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+    def open(self):
+        """
+        Returns the file of the asset, opened for reading from its start.
+        """
+        if self._file is None or self._file.closed:
+            self._file = open(self.path, 'rb')
+        self._file.seek(0)
+        return self._file
+
+    def stream_data(self):
+        asset_file = self.open()
+        while True:
+            chunk = asset_file.read(FILE_CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        asset_file = self.open()
+        asset_file.seek(first_byte)
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = asset_file.read(min(remaining, FILE_CHUNK_SIZE))
+            if len(chunk) == 0:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AssetDiskCache(object):
+    """
+    A directory of asset files, named by the md5 digest of their content,
+    holding at most `max_size` bytes.
+
+    Reading a file touches it, and the least recently touched files are
+    removed when the directory grows over `max_size`, so several processes
+    can share a directory. Each process keeps a running total of the size
+    of the directory, which it recomputes whenever it goes over `max_size`.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    def get(self, content):
+        """
+        Returns a StaticContentFile of `content`, or None if its content
+        isn't in the cache.
+        """
+        path = self._path(content.content_digest)
+        if path is None:
+            return None
+        try:
+            asset_file = open(path, 'rb')
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        return StaticContentFile(content, path, asset_file)
+
+    def can_add(self, content):
+        """
+        Returns whether `content` has a digest this cache can store it by.
+        """
+        return self._path(content.content_digest) is not None
+
+    def add(self, content):
+        """
+        Copies the content of `content` into the cache, and returns a
+        StaticContentFile of it.
+
+        Returns None if the content can't be cached. Unless can_add(content)
+        is false, `content` was read then, and it is not safe to read it again.
+        """
+        path = self._path(content.content_digest)
+        if path is None:
+            return None
+
+        temp_path = None
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            # The content is written to a temporary file first and then moved
+            # into place, so that no process ever reads a partial file.
+            digest = hashlib.md5()
+            length = 0
+            fd, temp_path = tempfile.mkstemp(prefix='.', dir=self.directory)
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    digest.update(chunk)
+                    length += len(chunk)
+                    temp_file.write(chunk)
+
+            if digest.hexdigest() != content.content_digest:
+                log.warning(
+                    u"Digest of content %s is %s, expected %s. Not caching it on disk.",
+                    unicode(content.location), digest.hexdigest(), content.content_digest
+                )
+                os.remove(temp_path)
+                return None
+
+            os.rename(temp_path, path)
+            # Open the file before it can be evicted.
+            asset_file = open(path, 'rb')
+        except (IOError, OSError):
+            log.exception(u"Could not cache content %s on disk.", unicode(content.location))
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        self._added(length)
+        return StaticContentFile(content, path, asset_file)
+
+    def _path(self, content_digest):
+        """
+        Returns the path of the file of content with `content_digest`, or
+        None if it's not a digest this cache can use.
+        """
+        if not content_digest or not DIGEST_RE.match(content_digest):
+            return None
+        return os.path.join(self.directory, content_digest)
+
+    def _added(self, length):
+        """
+        Accounts for a file of `length` bytes added to the directory, and
+        removes the least recently used files if it is over `max_size`.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += length
+            if self._size is None or self._size > self.max_size:
+                self._size = self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used files until the directory holds at
+        most `max_size` bytes, and returns the size of what's left.
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if not DIGEST_RE.match(name):
+                # A temporary file, still being written.
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # Removed by another process.
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+
+        size = sum(file_size for __, file_size, __ in files)
+        for __, file_size, name in sorted(files):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            size -= file_size
+        return size
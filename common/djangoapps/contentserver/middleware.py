@@ -2,13 +2,16 @@
 Middleware to serve assets.
 """
 
+import hashlib
 import logging
+from uuid import uuid4
 
 import datetime
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
     HttpResponseBadRequest, HttpResponseNotFound)
 from student.models import CourseEnrollment
+from contentserver.disk_cache import get_asset_disk_cache, StaticContentFile
 from contentserver.models import CourseAssetCacheTtlConfig
 
 from header_control import force_header_for_response
@@ -27,6 +30,12 @@ from xmodule.exceptions import NotFoundError
 log = logging.getLogger(__name__)
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Assets at least this large are not put in the django cache.
+MAX_CACHED_CONTENT_SIZE = 1048576
+
+# Requests for more byte ranges than this get the full content.
+MAX_BYTE_RANGES = 50
+
 
 class StaticContentServer(object):
     def is_asset_request(self, request):
@@ -60,12 +69,21 @@ class StaticContentServer(object):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
+            # if this asset has changed since then.  If-None-Match takes precedence over
+            # If-Modified-Since, see https://tools.ietf.org/html/rfc7232#section-6
+            etag = get_etag(content)
             last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag is not None and etag_matches(etag, request.META['HTTP_IF_NONE_MATCH']):
+                    response = HttpResponseNotModified()
+                    self.set_caching_headers(content, response)
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+                    response = HttpResponseNotModified()
+                    self.set_caching_headers(content, response)
+                    return response
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -73,12 +91,11 @@ class StaticContentServer(object):
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
+            # An If-Range which doesn't match the asset means the client wants all of it.
+            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.27
             response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if request.META.get('HTTP_RANGE') and if_range in (None, etag, last_modified_at_str):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -91,38 +108,51 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_BYTE_RANGES:
+                        # Don't let a client make us assemble an arbitrarily large response
+                        # from tiny ranges. We send back the full content.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
+                        satisfiable_ranges = [
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ]
+                        if not satisfiable_ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
+                        if len(satisfiable_ranges) == 1:
+                            first, last = satisfiable_ranges[0]
                             response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
+                            response['Content-Type'] = content.content_type
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a
+                            # multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_byteranges_response(content, satisfiable_ranges)
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if isinstance(content, StaticContentFile):
+                    # Let the server send the file without copying it through python, if it can.
+                    response = FileResponse(content.open())
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
@@ -152,6 +182,9 @@ class StaticContentServer(object):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -193,6 +226,12 @@ class StaticContentServer(object):
 
         # See if we can load this item from cache.
         content = get_cached_content(location)
+        if isinstance(content, StaticContentFile):
+            # Only the metadata of large assets is cached, their content is in the
+            # disk cache of each server.
+            disk_cache = get_asset_disk_cache()
+            content = disk_cache.get(content) if disk_cache is not None else None
+
         if content is None:
             # Not in cache, so just try and load it from the asset manager.
             try:
@@ -203,13 +242,96 @@ class StaticContentServer(object):
             # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
             # because it's the default for memcached and also we don't want to do too much
             # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+            if content.length is not None and content.length < MAX_CACHED_CONTENT_SIZE:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
+            else:
+                disk_cache = get_asset_disk_cache()
+                if disk_cache is not None and disk_cache.can_add(content):
+                    content_file = disk_cache.add(content)
+                    if content_file is not None:
+                        content = content_file
+                        set_cached_content(content)
+                    else:
+                        # The stream was consumed, start over.
+                        content = AssetManager.find(location, as_stream=True)
 
         return content
 
 
+def get_etag(content):
+    """
+    Returns the strong entity tag of an asset, from the digest of its
+    content, or None if its digest isn't known.
+    """
+    content_digest = getattr(content, 'content_digest', None)
+    if content_digest is None and getattr(content, 'data', None) is not None:
+        # Content cached before its digest was kept.
+        content_digest = hashlib.md5(content.data).hexdigest()
+    if content_digest is None:
+        return None
+    return '"{}"'.format(content_digest)
+
+
+def etag_matches(etag, header_value):
+    """
+    Returns whether an If-None-Match header value matches `etag`.
+
+    If-None-Match uses the weak comparison function, so a weak entity tag
+    matches the strong one with the same value.
+    See https://tools.ietf.org/html/rfc7232#section-3.2
+    """
+    if header_value.strip() == '*':
+        return True
+    for entity_tag in header_value.split(','):
+        entity_tag = entity_tag.strip()
+        if entity_tag.startswith('W/'):
+            entity_tag = entity_tag[2:]
+        if entity_tag == etag:
+            return True
+    return False
+
+
+def multipart_byteranges_response(content, ranges):
+    """
+    Returns an HttpResponse of the given byte ranges of `content`, as a
+    multipart/byteranges message.
+
+    See https://tools.ietf.org/html/rfc7233#appendix-A
+    """
+    boundary = uuid4().hex
+    part_headers = [
+        (
+            '\r\n--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n'
+            '\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing_boundary = '\r\n--{boundary}--\r\n'.format(boundary=boundary)
+
+    def stream_parts():
+        """
+        Yields the parts of the message, with the data of each range.
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+        yield closing_boundary
+
+    response = HttpResponse(stream_parts(), content_type='multipart/byteranges; boundary={}'.format(boundary))
+    response['Content-Length'] = str(
+        sum(len(part_header) for part_header in part_headers) +
+        sum(last - first + 1 for first, last in ranges) +
+        len(closing_boundary)
+    )
+    return response
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
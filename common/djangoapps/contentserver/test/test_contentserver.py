@@ -5,8 +5,12 @@ import copy
 
 import datetime
 import ddt
+import hashlib
 import logging
+import os
+import shutil
 import unittest
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
@@ -14,12 +18,14 @@ from django.test.client import Client
 from django.test.utils import override_settings
 from mock import patch
 
+from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
+from contentserver.disk_cache import StaticContentFile
 from contentserver.middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
@@ -154,13 +160,48 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message
+        with a part for each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
-        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -10'.format(
             first=first_byte, last=last_byte))
 
+        self.assertEqual(resp.status_code, 206)
+        self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        boundary = resp['Content-Type'].split('boundary=')[1]
+        parts = resp.content.split('--' + boundary)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(parts[-1], '--\r\n')
+
+        full_content = self.client.get(self.url_unlocked).content
+        expected_ranges = [(first_byte, last_byte), (self.length_unlocked - 10, self.length_unlocked - 1)]
+        for part, (first, last) in zip(parts[1:3], expected_ranges):
+            headers, data = part.split('\r\n\r\n', 1)
+            self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+                first=first, last=last, length=self.length_unlocked), headers)
+            self.assertEqual(data, full_content[first:last + 1] + '\r\n')
+
+    def test_range_request_unsatisfiable_range_of_multiple(self):
+        """
+        Test that the unsatisfiable ranges of multiple ranges are left out of the response.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked))
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that too many ranges in request outputs the full content.
+        """
+        header_value = 'bytes=' + ', '.join(['0-0'] * 51)
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE=header_value)
         self.assertEqual(resp.status_code, 200)
         self.assertNotIn('Content-Range', resp)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
@@ -196,6 +237,128 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}'.format(
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], 'bytes */{length}'.format(length=self.length_unlocked))
+
+    def test_etag(self):
+        """
+        Test that assets are sent with a strong ETag of their content.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp['ETag'],
+            '"{}"'.format(hashlib.md5(resp.content).hexdigest())
+        )
+
+    @ddt.data(
+        ('{etag}', 304),
+        ('W/{etag}', 304),
+        ('"foo", {etag}', 304),
+        ('*', 304),
+        ('"foo"', 200),
+    )
+    @ddt.unpack
+    def test_if_none_match(self, header_value, expected_status_code):
+        """
+        Test that conditional requests with If-None-Match are answered with the ETag.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=header_value.format(etag=etag))
+        self.assertEqual(resp.status_code, expected_status_code)
+        self.assertEqual(resp['ETag'], etag)
+
+    def test_if_none_match_takes_precedence(self):
+        """
+        Test that If-Modified-Since is ignored when If-None-Match is sent.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH='"foo"', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Test that conditional requests with If-Modified-Since are still answered.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+    @ddt.data(True, False)
+    def test_if_range(self, matches):
+        """
+        Test that a Range is only honored if If-Range matches the asset.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(
+            self.url_unlocked, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag if matches else '"foo"'
+        )
+        if matches:
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp['Content-Length'], '10')
+        else:
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 0)
+    @patch('contentserver.middleware.set_cached_content')
+    @patch('contentserver.middleware.get_cached_content')
+    def test_disk_cache(self, mock_get_cached_content, mock_set_cached_content):
+        """
+        Test that assets too large for the django cache are served from the disk cache.
+        """
+        cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        mock_get_cached_content.return_value = None
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIRECTORY': cache_dir, 'MAX_SIZE': 10 ** 6}):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            content = ''.join(resp.streaming_content)
+            etag = resp['ETag']
+            self.assertEqual(os.listdir(cache_dir), [etag.strip('"')])
+
+            # Only the metadata of the asset is put in the django cache.
+            cached_content = mock_set_cached_content.call_args[0][0]
+            self.assertIsInstance(cached_content, StaticContentFile)
+            self.assertIsNone(cached_content.data)
+
+            mock_get_cached_content.return_value = cached_content
+            with patch('contentserver.middleware.AssetManager.find') as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(''.join(resp.streaming_content), content)
+                resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+                self.assertEqual(resp.content, content[:10])
+                self.assertFalse(mock_find.called)
+
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 0)
+    @patch('contentserver.middleware.set_cached_content')
+    @patch('contentserver.middleware.get_cached_content')
+    def test_disk_cache_without_digest(self, mock_get_cached_content, mock_set_cached_content):
+        """
+        Test that assets without a digest are served straight from the contentstore.
+        """
+        cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        mock_get_cached_content.return_value = None
+        find = AssetManager.find
+
+        def find_without_digest(location, **kwargs):
+            """
+            Loads an asset stored before digests were kept.
+            """
+            content = find(location, **kwargs)
+            content.content_digest = None
+            return content
+
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIRECTORY': cache_dir, 'MAX_SIZE': 10 ** 6}):
+            with patch('contentserver.middleware.AssetManager.find', side_effect=find_without_digest) as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(len(''.join(resp.streaming_content)), self.length_unlocked)
+                self.assertEqual(mock_find.call_count, 1)
+        self.assertEqual(os.listdir(cache_dir), [])
+        self.assertFalse(mock_set_cached_content.called)
 
     def test_vary_header_sent(self):
         """
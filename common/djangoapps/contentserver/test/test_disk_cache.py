@@ -0,0 +1,103 @@
+"""
+Tests for the disk cache of StaticContentServer
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import time
+import unittest
+from tempfile import mkdtemp
+
+from django.test.utils import override_settings
+from opaque_keys.edx.locator import CourseLocator
+
+from contentserver.disk_cache import AssetDiskCache, StaticContentFile, get_asset_disk_cache
+from xmodule.contentstore.content import StaticContent
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.disk_cache = AssetDiskCache(self.cache_dir, 100)
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+
+    def make_content(self, data, content_digest=None):
+        """
+        Returns a StaticContent of `data`.
+        """
+        return StaticContent(
+            self.course_key.make_asset_key('asset', hashlib.md5(data).hexdigest()), 'asset.txt', 'text/plain', data,
+            length=len(data), content_digest=content_digest or hashlib.md5(data).hexdigest()
+        )
+
+    def test_add_and_get(self):
+        content = self.make_content('0123456789')
+        self.assertIsNone(self.disk_cache.get(content))
+
+        content_file = self.disk_cache.add(content)
+        self.assertIsInstance(content_file, StaticContentFile)
+        self.assertEqual(''.join(content_file.stream_data()), '0123456789')
+        self.assertEqual(''.join(content_file.stream_data_in_range(2, 4)), '234')
+        self.assertEqual(content_file.content_digest, content.content_digest)
+        self.assertEqual(content_file.length, 10)
+
+        content_file = self.disk_cache.get(content)
+        self.assertEqual(''.join(content_file.stream_data()), '0123456789')
+
+    def test_evicted_after_get(self):
+        content = self.make_content('0123456789')
+        self.disk_cache.add(content)
+        content_file = self.disk_cache.get(content)
+        os.remove(os.path.join(self.cache_dir, content.content_digest))
+
+        # The file was opened by get(), so the asset can still be read.
+        self.assertEqual(''.join(content_file.stream_data()), '0123456789')
+        self.assertEqual(''.join(content_file.stream_data_in_range(2, 4)), '234')
+        self.assertEqual(content_file.open().read(), '0123456789')
+        self.assertIsNone(self.disk_cache.get(content))
+
+    def test_pickle(self):
+        content_file = self.disk_cache.add(self.make_content('0123456789'))
+        content_file = pickle.loads(pickle.dumps(content_file))
+        self.assertEqual(''.join(content_file.stream_data()), '0123456789')
+
+    def test_digest_mismatch(self):
+        content = self.make_content('0123456789', content_digest=hashlib.md5('foo').hexdigest())
+        self.assertIsNone(self.disk_cache.add(content))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_invalid_digest(self):
+        content = self.make_content('0123456789', content_digest='../foo')
+        self.assertFalse(self.disk_cache.can_add(content))
+        self.assertIsNone(self.disk_cache.add(content))
+        self.assertIsNone(self.disk_cache.get(content))
+
+    def test_evicts_least_recently_used(self):
+        contents = [self.make_content(str(index) * 40) for index in range(3)]
+        self.disk_cache.add(contents[0])
+        self.disk_cache.add(contents[1])
+
+        # Make the first content the most recently used.
+        past = time.time() - 60
+        os.utime(os.path.join(self.cache_dir, contents[1].content_digest), (past, past))
+        self.assertIsNotNone(self.disk_cache.get(contents[0]))
+
+        self.disk_cache.add(contents[2])
+        self.assertIsNotNone(self.disk_cache.get(contents[0]))
+        self.assertIsNone(self.disk_cache.get(contents[1]))
+        self.assertIsNotNone(self.disk_cache.get(contents[2]))
+
+    def test_get_asset_disk_cache(self):
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIRECTORY': None, 'MAX_SIZE': 100}):
+            self.assertIsNone(get_asset_disk_cache())
+        with override_settings(CONTENTSERVER_DISK_CACHE={'DIRECTORY': self.cache_dir, 'MAX_SIZE': 100}):
+            disk_cache = get_asset_disk_cache()
+            self.assertEqual(disk_cache.directory, self.cache_dir)
+            self.assertEqual(disk_cache.max_size, 100)
+            self.assertIs(disk_cache, get_asset_disk_cache())
@@ -1,4 +1,5 @@
 import logging
+import os
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -13,6 +14,10 @@ from openedx.core.lib.tempdir import mkdtemp_clean
 
 log = logging.getLogger(__name__)
 
+# The directory of settings.MAKO_TEMPLATE_BUNDLE_DIR which the mako templates
+# loaded by django are compiled into.
+BUNDLE_SUBDIRECTORY = 'django'
+
 
 class MakoLoader(object):
     """
@@ -34,6 +39,11 @@ class MakoLoader(object):
             log.warning("For more caching of mako templates, set the MAKO_MODULE_DIR in settings!")
             module_directory = mkdtemp_clean()
 
+        bundle_directory = getattr(settings, 'MAKO_TEMPLATE_BUNDLE_DIR', None)
+        if bundle_directory:
+            # Use the modules compiled by the compile_mako_templates command.
+            module_directory = os.path.join(bundle_directory, BUNDLE_SUBDIRECTORY)
+
         self.module_directory = module_directory
 
     def __call__(self, template_name, template_dirs=None):
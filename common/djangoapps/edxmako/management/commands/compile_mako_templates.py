@@ -0,0 +1,104 @@
+"""
+Compile the mako templates of every template lookup, and the mako templates
+loaded by django, into a bundle of python modules.
+
+When settings.MAKO_TEMPLATE_BUNDLE_DIR points to the bundle, templates are
+loaded from it instead of being compiled by each process on first use. Run
+this when building a release, after the themes and templates are in place,
+with the same settings the servers use:
+
+    ./manage.py lms compile_mako_templates --settings=aws
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine
+from django.template.utils import get_app_template_dirs
+
+from edxmako import LOOKUP
+from edxmako.makoloader import BUNDLE_SUBDIRECTORY
+from edxmako.paths import bundle_module_filename, iter_template_files
+from edxmako.template import Template
+from mako.template import Template as MakoTemplate
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Compile all mako templates into a bundle.
+    """
+
+    help = "Compile all mako templates into the bundle at MAKO_TEMPLATE_BUNDLE_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bundle-dir',
+            dest='bundle_dir',
+            default=None,
+            help='directory to compile the templates into, instead of MAKO_TEMPLATE_BUNDLE_DIR',
+        )
+
+    def handle(self, *args, **options):
+        bundle_dir = options['bundle_dir'] or getattr(settings, 'MAKO_TEMPLATE_BUNDLE_DIR', None)
+        if not bundle_dir:
+            raise CommandError("Set MAKO_TEMPLATE_BUNDLE_DIR or pass --bundle-dir.")
+
+        compiled = skipped = 0
+        for namespace, lookup in sorted(LOOKUP.items()):
+            module_directory = os.path.join(bundle_dir, lookup.directories_hash())
+            template_args = dict(lookup.template_args, module_directory=None)
+            for uri, filename in iter_template_files(lookup.directories):
+                module_filename = bundle_module_filename(module_directory, uri)
+                if self.compile_template(
+                        MakoTemplate, module_filename, uri=uri, filename=filename, lookup=lookup,
+                        module_filename=module_filename, **template_args
+                ):
+                    compiled += 1
+                else:
+                    log.info(u"Skipped %s in the %s lookup, which isn't a mako template.", filename, namespace)
+                    skipped += 1
+
+        module_directory = os.path.join(bundle_dir, BUNDLE_SUBDIRECTORY)
+        for uri, filename in self.django_mako_templates():
+            module_filename = bundle_module_filename(module_directory, uri)
+            if self.compile_template(
+                    Template, module_filename, uri=uri, filename=filename, module_directory=module_directory,
+                    input_encoding='utf-8', output_encoding='utf-8'
+            ):
+                compiled += 1
+            else:
+                skipped += 1
+
+        self.stdout.write(u"Compiled {} templates into {}, skipped {} files.".format(compiled, bundle_dir, skipped))
+
+    @staticmethod
+    def compile_template(template_class, module_filename, **kwargs):
+        """
+        Compiles a template into `module_filename`, and returns whether it
+        could be compiled.
+        """
+        try:
+            template_class(**kwargs)
+        except Exception:  # pylint: disable=broad-except
+            # Not every file next to the templates is a mako template; don't
+            # leave a broken module in the bundle.
+            if os.path.exists(module_filename):
+                os.remove(module_filename)
+            return False
+        return True
+
+    @staticmethod
+    def django_mako_templates():
+        """
+        Yields the (uri, filename) of the mako templates that django loads,
+        from the template directories and then from the templates directories
+        of the apps, see edxmako.makoloader.
+        """
+        directories = list(Engine.get_default().dirs) + list(get_app_template_dirs('templates'))
+        for uri, filename in iter_template_files(directories):
+            with open(filename) as template_file:
+                if template_file.readline() == "## mako\n":
+                    yield uri, filename
@@ -5,10 +5,14 @@ Set up lookup paths for mako templates.
 import hashlib
 import contextlib
 import os
+import re
+import sys
 import pkg_resources
 
 from django.conf import settings
+from mako import codegen, compat
 from mako.lookup import TemplateLookup
+from mako.template import ModuleTemplate
 
 from microsite_configuration import microsite
 from . import LOOKUP
@@ -18,10 +22,20 @@ class DynamicTemplateLookup(TemplateLookup):
     """
     A specialization of the standard mako `TemplateLookup` class which allows
     for adding directories progressively.
+
+    If a `bundle_directory` is given, templates are loaded from the modules
+    that the compile_mako_templates management command compiled into it,
+    without checking the template files, and only templates missing from
+    the bundle are compiled when they are first used.
     """
     def __init__(self, *args, **kwargs):
+        bundle_directory = kwargs.pop('bundle_directory', None)
+        if bundle_directory:
+            kwargs['filesystem_checks'] = False
         super(DynamicTemplateLookup, self).__init__(*args, **kwargs)
         self.__original_module_directory = self.template_args['module_directory']
+        self.bundle_directory = bundle_directory
+        self.bundle_module_directory = None
 
     def __repr__(self):
         return "<{0.__class__.__name__} {0.directories}>".format(self)
@@ -40,24 +54,90 @@ class DynamicTemplateLookup(TemplateLookup):
         # and "foo.html.py" in the module directory has no way to know that.
         # Update the module_directory argument to point to a directory
         # specifically for this lookup path.
-        unique = hashlib.md5(":".join(str(d) for d in self.directories)).hexdigest()
+        unique = self.directories_hash()
         self.template_args['module_directory'] = os.path.join(self.__original_module_directory, unique)
+        if self.bundle_directory:
+            self.bundle_module_directory = os.path.join(self.bundle_directory, unique)
 
         # Also clear the internal caches. Ick.
         self._collection.clear()
         self._uri_cache.clear()
 
+    def directories_hash(self):
+        """
+        Returns a hash of the lookup path, which names the directories its
+        templates are compiled into.
+        """
+        return hashlib.md5(":".join(str(d) for d in self.directories)).hexdigest()
+
     def get_template(self, uri):
         """
         Overridden method which will hand-off the template lookup to the microsite subsystem
         """
         microsite_template = microsite.get_template(uri)
+        if microsite_template:
+            return microsite_template
 
-        return (
-            microsite_template
-            if microsite_template
-            else super(DynamicTemplateLookup, self).get_template(uri)
-        )
+        if self.bundle_module_directory and uri not in self._collection:
+            template = self._load_from_bundle(uri)
+            if template is not None:
+                return template
+
+        return super(DynamicTemplateLookup, self).get_template(uri)
+
+    def _load_from_bundle(self, uri):
+        """
+        Returns the template for `uri` compiled in the bundle, or None if it
+        isn't there.
+        """
+        path = bundle_module_filename(self.bundle_module_directory, uri)
+        if not path.startswith(self.bundle_module_directory + os.sep) or not os.path.exists(path):
+            return None
+
+        with self._mutex:
+            template = self._collection.get(uri)
+            if template is None:
+                module_id = re.sub(r'\W', '_', uri)
+                module = compat.load_module(module_id, path)
+                del sys.modules[module_id]
+                if module._magic_number != codegen.MAGIC_NUMBER:  # pylint: disable=protected-access
+                    # Compiled by another version of mako.
+                    return None
+                template = ModuleTemplate(
+                    module,
+                    module_filename=path,
+                    template_filename=module._template_filename,  # pylint: disable=protected-access
+                    output_encoding=self.template_args['output_encoding'],
+                    encoding_errors=self.template_args['encoding_errors'],
+                    lookup=self,
+                )
+                self._collection[uri] = template
+        return template
+
+
+def iter_template_files(directories):
+    """
+    Yields the (uri, filename) of every file in `directories` which a lookup
+    of those directories would find, in the order of the directories.
+    """
+    seen = set()
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                uri = os.path.relpath(path, directory).replace(os.path.sep, '/')
+                if uri not in seen and not filename.startswith('.'):
+                    seen.add(uri)
+                    yield uri, path
+
+
+def bundle_module_filename(module_directory, uri):
+    """
+    Returns the path, in `module_directory`, of the module compiled from the
+    template `uri`: the path mako itself would compile it to.
+    """
+    return os.path.join(module_directory, os.path.normpath(uri.lstrip('/')) + '.py')
 
 
 def clear_lookups(namespace):
@@ -84,6 +164,7 @@ def add_lookup(namespace, directory, package=None, prepend=False):
             input_encoding='utf-8',
             default_filters=['decode.utf8'],
             encoding_errors='replace',
+            bundle_directory=getattr(settings, 'MAKO_TEMPLATE_BUNDLE_DIR', None),
         )
     if package:
         directory = pkg_resources.resource_filename(package, directory)
@@ -1,17 +1,25 @@
 
 from mock import patch, Mock
+import os
+import shutil
 import unittest
+from tempfile import mkdtemp
+
 import ddt
+from mako.template import ModuleTemplate
 
 from django.conf import settings
 from django.http import HttpResponse
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.test.client import RequestFactory
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.urlresolvers import reverse
 import edxmako.middleware
 from edxmako.middleware import get_template_request_context
 from edxmako import add_lookup, LOOKUP
+from edxmako.makoloader import BUNDLE_SUBDIRECTORY
 from edxmako.shortcuts import (
     marketing_link,
     is_marketing_link_set,
@@ -81,6 +89,70 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class TemplateBundleTests(TestCase):
+    """
+    Test loading templates compiled by the compile_mako_templates command.
+    """
+    def setUp(self):
+        super(TemplateBundleTests, self).setUp()
+        self.template_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir, ignore_errors=True)
+        self.bundle_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bundle_dir)
+        os.mkdir(os.path.join(self.template_dir, 'includes'))
+        for name, source in [
+                ('base.html', '<div>${next.body()}</div>'),
+                ('page.html', '<%inherit file="/base.html"/>${name} <%include file="includes/greeting.html"/>'),
+                ('includes/greeting.html', 'Hello ${name}'),
+                ('underscore.html', '<%= name %>'),
+        ]:
+            with open(os.path.join(self.template_dir, name), 'w') as template_file:
+                template_file.write(source)
+
+        patcher = patch.dict('edxmako.LOOKUP', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        add_lookup('test', self.template_dir)
+
+    def test_compile_and_load(self):
+        call_command('compile_mako_templates', bundle_dir=self.bundle_dir)
+        module_directory = os.path.join(self.bundle_dir, LOOKUP['test'].directories_hash())
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'page.html.py')))
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'includes', 'greeting.html.py')))
+        # Files which aren't mako templates are skipped.
+        self.assertFalse(os.path.exists(os.path.join(module_directory, 'underscore.html.py')))
+
+        with override_settings(MAKO_TEMPLATE_BUNDLE_DIR=self.bundle_dir):
+            add_lookup('bundled', self.template_dir)
+        # The template files aren't read anymore.
+        shutil.rmtree(self.template_dir)
+
+        template = LOOKUP['bundled'].get_template('page.html')
+        self.assertIsInstance(template, ModuleTemplate)
+        self.assertEqual(template.render_unicode(name=u'World'), u'<div>World Hello World</div>')
+        self.assertIs(LOOKUP['bundled'].get_template('page.html'), template)
+
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_compile_app_templates(self):
+        call_command('compile_mako_templates', bundle_dir=self.bundle_dir)
+        # Mako templates of the apps are loaded by MakoAppDirectoriesLoader.
+        module_directory = os.path.join(self.bundle_dir, BUNDLE_SUBDIRECTORY)
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'teams', 'teams.html.py')))
+
+    def test_template_missing_from_bundle(self):
+        with override_settings(MAKO_TEMPLATE_BUNDLE_DIR=self.bundle_dir):
+            add_lookup('bundled', self.template_dir)
+
+        template = LOOKUP['bundled'].get_template('includes/greeting.html')
+        self.assertNotIsInstance(template, ModuleTemplate)
+        self.assertEqual(template.render_unicode(name=u'World'), u'Hello World')
+
+    @override_settings(MAKO_TEMPLATE_BUNDLE_DIR=None)
+    def test_no_bundle_dir(self):
+        with self.assertRaises(CommandError):
+            call_command('compile_mako_templates')
+
+
 class MakoMiddlewareTest(TestCase):
     """
     Test MakoMiddleware.
@@ -6,6 +6,9 @@ This API is exposed via the middleware(emabargo/middileware.py) layer but may be
 
 """
 import logging
+import threading
+from collections import OrderedDict
+
 import pygeoip
 
 from django.core.cache import cache
@@ -20,6 +23,52 @@ from embargo.models import CountryAccessRule, RestrictedCourse
 
 log = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+class _CountryCodeCache(object):
+    """
+    The country codes of the IP addresses this process looked up most
+    recently, at most settings.EMBARGO_IP_COUNTRY_CACHE_SIZE of them.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._country_codes = OrderedDict()
+
+    def get(self, ip_addr):
+        """
+        Return the country code of `ip_addr`, or _MISSING if it isn't cached.
+        """
+        with self._lock:
+            country_code = self._country_codes.pop(ip_addr, _MISSING)
+            if country_code is not _MISSING:
+                # Make it the most recently used.
+                self._country_codes[ip_addr] = country_code
+            return country_code
+
+    def set(self, ip_addr, country_code):
+        """
+        Cache the country code of `ip_addr`, forgetting the least recently
+        used one if the cache is full.
+        """
+        max_size = getattr(settings, 'EMBARGO_IP_COUNTRY_CACHE_SIZE', 0)
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._country_codes[ip_addr] = country_code
+            while len(self._country_codes) > max_size:
+                self._country_codes.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all country codes.
+        """
+        with self._lock:
+            self._country_codes.clear()
+
+
+_country_codes = _CountryCodeCache()  # pylint: disable=invalid-name
+
 
 def redirect_if_blocked(course_key, access_point='enrollment', **kwargs):
     """Redirect if the user does not have access to the course. In case of blocked if access_point
@@ -163,6 +212,8 @@ def _country_code_from_ip(ip_addr):
     Return the country code associated with an IP address.
     Handles both IPv4 and IPv6 addresses.
 
+    Country codes are cached, see `_CountryCodeCache`.
+
     Args:
         ip_addr (str): The IP address to look up.
 
@@ -170,10 +221,14 @@ def _country_code_from_ip(ip_addr):
         str: A 2-letter country code.
 
     """
-    if ip_addr.find(':') >= 0:
-        return pygeoip.GeoIP(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
-    else:
-        return pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+    country_code = _country_codes.get(ip_addr)
+    if country_code is _MISSING:
+        if ip_addr.find(':') >= 0:
+            country_code = pygeoip.GeoIP(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
+        else:
+            country_code = pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+        _country_codes.set(ip_addr, country_code)
+    return country_code
 
 
 def get_embargo_response(request, course_id, user):
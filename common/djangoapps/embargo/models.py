@@ -14,7 +14,10 @@ file and check it in at the same time as your model changes. To do that,
 import ipaddr
 import json
 import logging
+import time
+from collections import defaultdict, namedtuple
 
+from django.conf import settings
 from django.db import models
 from django.utils.translation import ugettext as _, ugettext_lazy
 from django.core.cache import cache
@@ -108,7 +111,6 @@ class RestrictedCourse(models.Model):
     These displayed on pages served by the embargo app.
 
     """
-    COURSE_LIST_CACHE_KEY = 'embargo.restricted_courses'
     MESSAGE_URL_CACHE_KEY = 'embargo.message_url_path.{access_point}.{course_key}'
 
     ENROLL_MSG_KEY_CHOICES = tuple([
@@ -160,7 +162,7 @@ class RestrictedCourse(models.Model):
             Boolean
             True if course is in restricted course list.
         """
-        return unicode(course_id) in cls._get_restricted_courses_from_cache()
+        return unicode(course_id) in country_access_matrix.get()
 
     @classmethod
     def is_disabled_access_check(cls, course_id):
@@ -175,28 +177,8 @@ class RestrictedCourse(models.Model):
             disabled_access_check attribute of restricted course
         """
 
-        # checking is_restricted_course method also here to make sure course exists in the list otherwise in case of
-        # no course found it will throw the key not found error on 'disable_access_check'
-        return (
-            cls.is_restricted_course(unicode(course_id))
-            and cls._get_restricted_courses_from_cache().get(unicode(course_id))["disable_access_check"]
-        )
-
-    @classmethod
-    def _get_restricted_courses_from_cache(cls):
-        """
-        Cache all restricted courses and returns the dict of course_keys and disable_access_check that are restricted
-        """
-        restricted_courses = cache.get(cls.COURSE_LIST_CACHE_KEY)
-        if restricted_courses is None:
-            restricted_courses = {
-                unicode(course.course_key): {
-                    'disable_access_check': course.disable_access_check
-                }
-                for course in RestrictedCourse.objects.all()
-            }
-            cache.set(cls.COURSE_LIST_CACHE_KEY, restricted_courses)
-        return restricted_courses
+        restricted_course = country_access_matrix.get().get(unicode(course_id))
+        return restricted_course is not None and restricted_course.disable_access_check
 
     def snapshot(self):
         """Return a snapshot of all access rules for this course.
@@ -348,7 +330,7 @@ class RestrictedCourse(models.Model):
     @classmethod
     def invalidate_cache_for_course(cls, course_key):
         """Invalidate the caches for the restricted course. """
-        cache.delete(cls.COURSE_LIST_CACHE_KEY)
+        country_access_matrix.clear()
         log.info("Invalidated cached list of restricted courses.")
 
         for access_point in ['enrollment', 'courseware']:
@@ -432,8 +414,6 @@ class CountryAccessRule(models.Model):
         help_text=ugettext_lazy(u"The country to which this rule applies.")
     )
 
-    CACHE_KEY = u"embargo.allowed_countries.{course_key}"
-
     ALL_COUNTRIES = set(code[0] for code in list(countries))
 
     @classmethod
@@ -458,50 +438,12 @@ class CountryAccessRule(models.Model):
         if country not in cls.ALL_COUNTRIES:
             return True
 
-        cache_key = cls.CACHE_KEY.format(course_key=course_id)
-        allowed_countries = cache.get(cache_key)
-        if allowed_countries is None:
-            allowed_countries = cls._get_country_access_list(course_id)
-            cache.set(cache_key, allowed_countries)
-
-        return country == '' or country in allowed_countries
-
-    @classmethod
-    def _get_country_access_list(cls, course_id):
-        """
-        if a course is blacklist for two countries then course can be accessible from
-        any where except these two countries.
-        if a course is whitelist for two countries then course can be accessible from
-        these countries only.
-        Args:
-            course_id (str): course_id to look for
-        Returns:
-            List
-            Consolidated list of accessible countries for given course
-        """
-
-        whitelist_countries = set()
-        blacklist_countries = set()
-
-        # Retrieve all rules in one database query, performing the "join" with the Country table
-        rules_for_course = CountryAccessRule.objects.select_related('country').filter(
-            restricted_course__course_key=course_id
-        )
-
-        # Filter the rules into a whitelist and blacklist in one pass
-        for rule in rules_for_course:
-            if rule.rule_type == cls.WHITELIST_RULE:
-                whitelist_countries.add(rule.country.country.code)
-            elif rule.rule_type == cls.BLACKLIST_RULE:
-                blacklist_countries.add(rule.country.country.code)
-
-        # If there are no whitelist countries, default to all countries
-        if not whitelist_countries:
-            whitelist_countries = cls.ALL_COUNTRIES
+        restricted_course = country_access_matrix.get().get(unicode(course_id))
+        if restricted_course is None:
+            # Courses without any rules are accessible from all countries.
+            return True
 
-        # Consolidate the rules into a single list of countries
-        # that have access to the course.
-        return list(whitelist_countries - blacklist_countries)
+        return country == '' or country in restricted_course.allowed_countries
 
     def __unicode__(self):
         if self.rule_type == self.WHITELIST_RULE:
@@ -518,8 +460,7 @@ class CountryAccessRule(models.Model):
     @classmethod
     def invalidate_cache_for_course(cls, course_key):
         """Invalidate the cache. """
-        cache_key = cls.CACHE_KEY.format(course_key=course_key)
-        cache.delete(cache_key)
+        country_access_matrix.clear()
         log.info("Invalidated country access list for course %s", course_key)
 
     class Meta(object):
@@ -532,6 +473,88 @@ class CountryAccessRule(models.Model):
         )
 
 
+class CountryAccessMatrix(object):
+    """
+    The access rules of every restricted course, loaded with a single query:
+    for each course, whether its access check is disabled and the countries
+    allowed to access it. A course with whitelisted countries is accessible
+    from those countries only; otherwise it is accessible from every country
+    which isn't blacklisted.
+
+    The matrix is kept in the cache, and each process keeps the matrix it
+    read last for settings.EMBARGO_LOCAL_CACHE_TIMEOUT seconds, so changes to
+    the rules are seen by every process at most that long after they're made.
+    """
+    CACHE_KEY = 'embargo.country_access_matrix'
+
+    def __init__(self):
+        # The (matrix, time it was read) of this process.
+        self._local = None
+
+    def get(self):
+        """
+        Returns a dict mapping the (unicode) keys of the restricted courses
+        to the `RestrictedCourseAccess` of each of them.
+        """
+        local = self._local
+        now = time.time()
+        if local is not None and now - local[1] < getattr(settings, 'EMBARGO_LOCAL_CACHE_TIMEOUT', 0):
+            return local[0]
+
+        matrix = cache.get(self.CACHE_KEY)
+        if matrix is None:
+            matrix = self._load()
+            cache.set(self.CACHE_KEY, matrix)
+        self._local = (matrix, now)
+        return matrix
+
+    def clear(self):
+        """
+        Forgets the matrix, which is loaded again the next time it's needed.
+        """
+        self._local = None
+        cache.delete(self.CACHE_KEY)
+
+    @staticmethod
+    def _load():
+        """
+        Loads the matrix from the database.
+        """
+        disable_access_checks = {}
+        whitelists = defaultdict(set)
+        blacklists = defaultdict(set)
+
+        # Retrieve all courses and rules in one database query, performing
+        # the outer "join" with the rule and Country tables
+        rules = RestrictedCourse.objects.values_list(
+            'course_key',
+            'disable_access_check',
+            'countryaccessrule__rule_type',
+            'countryaccessrule__country__country',
+        )
+        for course_key, disable_access_check, rule_type, country in rules:
+            course_key = unicode(course_key)
+            disable_access_checks[course_key] = disable_access_check
+            if rule_type == CountryAccessRule.WHITELIST_RULE:
+                whitelists[course_key].add(country)
+            elif rule_type == CountryAccessRule.BLACKLIST_RULE:
+                blacklists[course_key].add(country)
+
+        return {
+            course_key: RestrictedCourseAccess(
+                disable_access_check,
+                # If there are no whitelist countries, default to all countries
+                frozenset((whitelists.get(course_key) or CountryAccessRule.ALL_COUNTRIES) - blacklists[course_key]),
+            )
+            for course_key, disable_access_check in disable_access_checks.iteritems()
+        }
+
+
+RestrictedCourseAccess = namedtuple('RestrictedCourseAccess', ['disable_access_check', 'allowed_countries'])
+
+country_access_matrix = CountryAccessMatrix()  # pylint: disable=invalid-name
+
+
 def invalidate_country_rule_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
     """Invalidate cached rule information on changes to the rule models.
 
@@ -675,11 +698,26 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are indexed by prefix length, so that checking whether
+        an address is in the list takes one set lookup per distinct prefix
+        length, however many networks there are.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            # For each IP version, the (number of host bits, set of network
+            # numbers) of the networks of each prefix length.
+            prefixes = defaultdict(lambda: defaultdict(set))
+            for network in self.networks:
+                host_bits = network.max_prefixlen - network.prefixlen
+                prefixes[network.version][host_bits].add(int(network.network) >> host_bits)
+            self._prefixes = {
+                version: [(host_bits, frozenset(numbers)) for host_bits, numbers in sorted(by_host_bits.items())]
+                for version, by_host_bits in prefixes.items()
+            }
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -690,26 +728,42 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
+            number = int(ip)
+            for host_bits, numbers in self._prefixes.get(ip.version, ()):
+                if number >> host_bits in numbers:
                     return True
 
             return False
 
+    # The IPFilterList of each whitelist and blacklist used by this process.
+    _ip_filter_lists = {}
+
+    @classmethod
+    def _ip_filter_list(cls, addresses):
+        """
+        Return the IPFilterList of a comma-separated list of addresses, which
+        is only built the first time it's needed.
+        """
+        if addresses == '':
+            return []
+        ip_filter_list = cls._ip_filter_lists.get(addresses)
+        if ip_filter_list is None:
+            ip_filter_list = cls.IPFilterList([addr.strip() for addr in addresses.split(',')])
+            if len(cls._ip_filter_lists) >= 100:
+                cls._ip_filter_lists.clear()
+            cls._ip_filter_lists[addresses] = ip_filter_list
+        return ip_filter_list
+
     @property
     def whitelist_ips(self):
         """
         Return a list of valid IP addresses to whitelist
         """
-        if self.whitelist == '':
-            return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])
+        return self._ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
         """
         Return a list of valid IP addresses to blacklist
         """
-        if self.blacklist == '':
-            return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])
+        return self._ip_filter_list(self.blacklist)
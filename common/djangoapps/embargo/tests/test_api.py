@@ -169,8 +169,9 @@ class EmbargoCheckAccessApiTests(ModuleStoreTestCase):
             # Test the scenario that will go through every check
             # (restricted course, but pass all the checks)
             # This is the worst case, so it will hit all of the
-            # caching code.
-            with self.assertNumQueries(3):
+            # caching code. The rules of all restricted courses are loaded
+            # with one query, and the user's roles with another.
+            with self.assertNumQueries(2):
                 embargo_api.check_course_access(self.course.id, user=self.user, ip_address='0.0.0.0')
 
             with self.assertNumQueries(0):
@@ -225,6 +226,25 @@ class EmbargoCheckAccessApiTests(ModuleStoreTestCase):
 
         self.assertTrue(result, msg="User should have access because the user is staff.")
 
+    @override_settings(EMBARGO_IP_COUNTRY_CACHE_SIZE=2)
+    def test_country_code_caching(self):
+        embargo_api._country_codes.clear()  # pylint: disable=protected-access
+        self.addCleanup(embargo_api._country_codes.clear)  # pylint: disable=protected-access
+
+        with mock.patch.object(pygeoip.GeoIP, 'country_code_by_addr') as mock_ip:
+            mock_ip.side_effect = lambda ip_address: 'US' if ip_address.startswith('1.') else 'IR'
+            for ip_address in ['1.0.0.1', '2.0.0.1', '1.0.0.1', '2.0.0.1']:
+                embargo_api._country_code_from_ip(ip_address)  # pylint: disable=protected-access
+            self.assertEqual(mock_ip.call_count, 2)
+
+            # The least recently used address is forgotten.
+            embargo_api._country_code_from_ip('1.0.0.1')  # pylint: disable=protected-access
+            embargo_api._country_code_from_ip('3.0.0.1')  # pylint: disable=protected-access
+            self.assertEqual(mock_ip.call_count, 3)
+            self.assertEqual(embargo_api._country_code_from_ip('1.0.0.1'), 'US')  # pylint: disable=protected-access
+            self.assertEqual(embargo_api._country_code_from_ip('2.0.0.1'), 'IR')  # pylint: disable=protected-access
+            self.assertEqual(mock_ip.call_count, 4)
+
     @contextmanager
     def _mock_geoip(self, country_code):
         with mock.patch.object(pygeoip.GeoIP, 'country_code_by_addr') as mock_ip:
@@ -1,6 +1,8 @@
 """Test of models for embargo app"""
 import json
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.db.utils import IntegrityError
 from opaque_keys.edx.locator import CourseLocator
 from embargo.models import (
@@ -100,6 +102,27 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
 
+    def test_ip_network_prefixes(self):
+        whitelist = '10.0.0.0/8, 10.1.2.0/24, 192.168.1.1, 2001:db8::/32, 0.0.0.0/0'
+        IPFilter(whitelist=whitelist, blacklist='10.1.2.3, 2001:db8::1/128').save()
+
+        cwhitelist = IPFilter.current().whitelist_ips
+        self.assertTrue('10.200.0.1' in cwhitelist)
+        self.assertTrue('192.168.1.1' in cwhitelist)
+        self.assertTrue('8.8.8.8' in cwhitelist)
+        self.assertTrue('2001:db8:ffff::1' in cwhitelist)
+        self.assertFalse('2001:db9::1' in cwhitelist)
+        self.assertFalse('not an ip' in cwhitelist)
+        cblacklist = IPFilter.current().blacklist_ips
+        self.assertTrue('10.1.2.3' in cblacklist)
+        self.assertFalse('10.1.2.4' in cblacklist)
+        self.assertTrue('2001:db8::1' in cblacklist)
+        self.assertFalse('2001:db8::2' in cblacklist)
+
+        # The lists are only built once.
+        self.assertIs(IPFilter.current().whitelist_ips, cwhitelist)
+        self.assertIs(IPFilter.current().blacklist_ips, cblacklist)
+
 
 class RestrictedCourseTest(TestCase):
     """Test RestrictedCourse model. """
@@ -153,6 +176,25 @@ class RestrictedCourseTest(TestCase):
         with self.assertNumQueries(0):
             RestrictedCourse.is_restricted_course(new_course_id)
 
+    @override_settings(EMBARGO_LOCAL_CACHE_TIMEOUT=60)
+    def test_restricted_course_local_cache(self):
+        course_id = CourseLocator('abc', '123', 'doremi')
+        RestrictedCourse.objects.create(course_key=course_id)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(RestrictedCourse.is_restricted_course(course_id))
+
+        # The rules are kept by the process, without reading the cache.
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertTrue(RestrictedCourse.is_restricted_course(course_id))
+            self.assertTrue(CountryAccessRule.check_country_access(course_id, 'NZ'))
+
+        # Changing the rules makes the process load them again.
+        RestrictedCourse.objects.get(course_key=course_id).delete()
+        with self.assertNumQueries(1):
+            self.assertFalse(RestrictedCourse.is_restricted_course(course_id))
+
 
 class CountryTest(TestCase):
     """Test Country model. """
@@ -238,6 +280,40 @@ class CountryAccessRuleTest(TestCase):
         with self.assertNumQueries(1):
             CountryAccessRule.check_country_access(course_id, 'NZ')
 
+    def test_country_access(self):
+        countries = {code: Country.objects.create(country=code) for code in ['NZ', 'US', 'IR']}
+        whitelisted_course = RestrictedCourse.objects.create(course_key=CourseLocator('abc', '123', 'whitelist'))
+        blacklisted_course = RestrictedCourse.objects.create(course_key=CourseLocator('abc', '123', 'blacklist'))
+        unruled_course = RestrictedCourse.objects.create(course_key=CourseLocator('abc', '123', 'none'))
+        for code in ['NZ', 'US']:
+            CountryAccessRule.objects.create(
+                restricted_course=whitelisted_course,
+                rule_type=CountryAccessRule.WHITELIST_RULE,
+                country=countries[code]
+            )
+        CountryAccessRule.objects.create(
+            restricted_course=blacklisted_course,
+            rule_type=CountryAccessRule.BLACKLIST_RULE,
+            country=countries['IR']
+        )
+
+        with self.assertNumQueries(1):
+            for course, country, allowed in [
+                    (whitelisted_course, 'NZ', True),
+                    (whitelisted_course, 'US', True),
+                    (whitelisted_course, 'IR', False),
+                    (whitelisted_course, 'FR', False),
+                    (blacklisted_course, 'IR', False),
+                    (blacklisted_course, 'NZ', True),
+                    (unruled_course, 'IR', True),
+                    (whitelisted_course, 'EU', True),
+            ]:
+                self.assertEqual(
+                    CountryAccessRule.check_country_access(course.course_key, country),
+                    allowed,
+                    msg=u"{} from {}".format(course.course_key, country)
+                )
+
 
 class CourseAccessRuleHistoryTest(TestCase):
     """Test course access rule history. """
@@ -39,6 +39,8 @@ def get_course_enrollments(user_id):
         user__username=user_id,
         is_active=True
     ).order_by('created')
+    qset = list(qset)
+    CourseEnrollment.prefetch_course_overviews(qset)
 
     enrollments = CourseEnrollmentSerializer(qset, many=True).data
 
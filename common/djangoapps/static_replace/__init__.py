@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import re
 
@@ -5,6 +6,7 @@ from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
 
+from static_replace.caches import LocalCache
 from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore import ModuleStoreEnum
@@ -14,21 +16,17 @@ from opaque_keys.edx.locator import AssetLocator
 
 log = logging.getLogger(__name__)
 
+# Text longer than this many characters isn't memoized.
+MAX_MEMOIZED_TEXT_SIZE = 100000
 
-def _url_replace_regex(prefix):
-    """
-    Match static urls in quotes that don't end in '?raw'.
+# The urls that static urls resolve to, per course.
+_static_urls = LocalCache(max_size=100000)
 
-    To anyone contemplating making this more complicated:
-    http://xkcd.com/1171/
-    """
-    return ur"""
-        (?x)                      # flags=re.VERBOSE
-        (?P<quote>\\?['"])        # the opening quotes
-        (?P<prefix>{prefix})      # the prefix
-        (?P<rest>.*?)             # everything else in the url
-        (?P=quote)                # the first matching closing quote
-        """.format(prefix=prefix)
+# Rewritten text, by its original and the arguments it was rewritten with.
+_rewritten_texts = LocalCache(max_size=20 * MAX_MEMOIZED_TEXT_SIZE, size_of=len)
+
+# Compiled regular expressions of _rewrite.
+_rewrite_regexes = {}
 
 
 def try_staticfiles_lookup(path):
@@ -67,12 +65,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
     output: <text> after the link rewriting rules are applied
     """
 
-    def replace_jump_to_id_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, jump_to_id_base_url + rest, quote])
-
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _rewrite(text, jump_to_id_base_url=jump_to_id_base_url)
 
 
 def replace_course_urls(text, course_key):
@@ -85,14 +78,7 @@ def replace_course_urls(text, course_key):
     returns: text with the links replaced
     """
 
-    course_id = course_key.to_deprecated_string()
-
-    def replace_course_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, '/courses/' + course_id + '/', rest, quote])
-
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _rewrite(text, course_key=course_key)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -100,25 +86,76 @@ def process_static_urls(text, replacement_function, data_dir=None):
     Run an arbitrary replacement function on any urls matching the static file
     directory
     """
-    def wrap_part_extraction(match):
+    return _rewrite(text, static_replacement=replacement_function, data_dir=data_dir)
+
+
+def _rewrite_regex(static_url, data_dir, static_urls, course_urls, jump_to_id_urls):
+    """
+    Returns the compiled regular expression that matches, in quotes, the
+    static urls, /course/ urls and /jump_to_id/ urls that are asked for.
+
+    Each kind of url is matched by its own group, which never matches if
+    that kind of url isn't asked for.
+    """
+    key = (static_url, data_dir, static_urls, course_urls, jump_to_id_urls)
+    regex = _rewrite_regexes.get(key)
+    if regex is None:
+        never = u'(?!)'
+        static_prefix = u'(?:{static_url}|/static/)(?!{data_dir})'.format(static_url=static_url, data_dir=data_dir)
+        regex = re.compile(ur"""
+            (?x)                      # flags=re.VERBOSE
+            (?P<quote>\\?['"])        # the opening quotes
+            (?:                       # the prefix, one of
+                (?P<static>{static})
+                |(?P<course>{course})
+                |(?P<jump_to_id>{jump_to_id})
+            )
+            (?P<rest>.*?)             # everything else in the url
+            (?P=quote)                # the first matching closing quote
+            """.format(
+                static=static_prefix if static_urls else never,
+                course=u'/course/' if course_urls else never,
+                jump_to_id=u'/jump_to_id/' if jump_to_id_urls else never,
+            ))
+        if len(_rewrite_regexes) >= 1000:
+            _rewrite_regexes.clear()
+        _rewrite_regexes[key] = regex
+    return regex
+
+
+def _rewrite(text, static_replacement=None, data_dir=None, course_key=None, jump_to_id_base_url=None):
+    """
+    Rewrites, in a single pass over `text`:
+
+      - static urls, with `static_replacement`, as process_static_urls does,
+        if it is given
+      - /course/ urls, as replace_course_urls does, if `course_key` is given
+      - /jump_to_id/ urls, as replace_jump_to_id_urls does, if
+        `jump_to_id_base_url` is given
+    """
+    regex = _rewrite_regex(
+        settings.STATIC_URL,
+        data_dir,
+        static_replacement is not None,
+        course_key is not None,
+        jump_to_id_base_url is not None,
+    )
+    course_url = '/courses/' + course_key.to_deprecated_string() + '/' if course_key is not None else None
+
+    def replace(match):
         """
-        Unwraps a match group for the captures specified in _url_replace_regex
-        and forward them on as function arguments
+        Returns the replacement of a single matched url.
         """
-        original = match.group(0)
-        prefix = match.group('prefix')
         quote = match.group('quote')
         rest = match.group('rest')
-        return replacement_function(original, prefix, quote, rest)
-
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+        if match.group('static') is not None:
+            return static_replacement(match.group(0), match.group('static'), quote, rest)
+        elif match.group('course') is not None:
+            return "".join([quote, course_url, rest, quote])
+        else:
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+
+    return regex.sub(replace, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -151,6 +188,67 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
 
+    return _replace_urls(text, data_directory, course_id, static_asset_path)
+
+
+def replace_urls(text, course_id, data_directory=None, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Does what replace_static_urls, then replace_course_urls and, if
+    `jump_to_id_base_url` is given, replace_jump_to_id_urls do, in a single
+    pass over `text`.
+    """
+    return _replace_urls(
+        text, data_directory, course_id, static_asset_path, course_urls=True, jump_to_id_base_url=jump_to_id_base_url
+    )
+
+
+def _replace_urls(text, data_directory, course_id, static_asset_path, course_urls=False, jump_to_id_base_url=None):
+    """
+    Rewrites the static urls of `text` as replace_static_urls does, and its
+    /course/ urls if `course_urls` is True, and its /jump_to_id/ urls if
+    `jump_to_id_base_url` is given.
+
+    The urls that static urls resolve to are cached per course, and the
+    rewritten text is memoized, for settings.STATIC_REPLACE_CACHE_TIMEOUT
+    seconds.
+    """
+    prefixes = ['/static/', settings.STATIC_URL]
+    if course_urls:
+        prefixes.append('/course/')
+    if jump_to_id_base_url is not None:
+        prefixes.append('/jump_to_id/')
+    if not any(prefix in text for prefix in prefixes):
+        # Nothing to rewrite.
+        return text
+
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    if (not static_asset_path) \
+            and course_id \
+            and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        asset_url_config = (
+            AssetBaseUrlConfig.get_base_url(),
+            tuple(AssetExcludedExtensionsConfig.get_excluded_extensions()),
+        )
+    else:
+        asset_url_config = None
+    course_key_string = unicode(course_id) if course_id else None
+
+    text_key = None
+    if len(text) <= MAX_MEMOIZED_TEXT_SIZE:
+        text_key = (
+            hashlib.md5(text.encode('utf-8') if isinstance(text, unicode) else text).digest(),
+            type(text),
+            data_directory,
+            course_key_string,
+            static_asset_path,
+            course_urls,
+            jump_to_id_base_url,
+            asset_url_config,
+        )
+        rewritten = _rewritten_texts.get(text_key)
+        if rewritten is not None:
+            return rewritten[0]
+
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -159,50 +257,75 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         if rest.endswith('?raw'):
             return original
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
+        url_key = (course_key_string, data_directory, static_asset_path, asset_url_config, prefix, rest)
+        url = _static_urls.get(url_key)
+        if url is None:
+            url = (_resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path, asset_url_config),)
+            _static_urls.set(url_key, url[0])
+        url = url[0]
+
+        if url is None:
             return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+        return "".join([quote, url, quote])
+
+    rewritten = _rewrite(
+        text,
+        static_replacement=replace_static_url,
+        data_dir=static_asset_path or data_directory,
+        course_key=course_id if course_urls else None,
+        jump_to_id_base_url=jump_to_id_base_url,
+    )
+    if text_key is not None:
+        _rewritten_texts.set(text_key, rewritten)
+    return rewritten
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path, asset_url_config):
+    """
+    Returns the url that the static url `prefix` + `rest` refers to, or None
+    if it should be left as it is.
+
+    `asset_url_config` is the tuple (base url, excluded extensions) of assets
+    in the contentstore, or None if the url doesn't refer to one.
+    """
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+    elif asset_url_config is not None:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            base_url, excluded_exts = asset_url_config
+            url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, list(excluded_exts))
 
-        return "".join([quote, url, quote])
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return url
@@ -0,0 +1,73 @@
+"""
+Process-local caches of the urls static_replace resolves and the text it
+rewrites.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class LocalCache(object):
+    """
+    A process-local cache, whose entries expire after
+    settings.STATIC_REPLACE_CACHE_TIMEOUT seconds. Nothing is cached if the
+    timeout is 0.
+
+    The cache holds entries of total size at most `max_size`, as measured by
+    `size_of`, and forgets all of them when it's full.
+    """
+    def __init__(self, max_size, size_of=lambda value: 1):
+        self.max_size = max_size
+        self.size_of = size_of
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._size = 0
+
+    @staticmethod
+    def timeout():
+        """
+        Returns how long, in seconds, entries are kept.
+        """
+        return getattr(settings, 'STATIC_REPLACE_CACHE_TIMEOUT', 0)
+
+    def get(self, key):
+        """
+        Returns the (value,) cached for `key`, or None if there is none or it
+        has expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            return None
+        return (value,)
+
+    def set(self, key, value):
+        """
+        Caches `value` for `key`.
+        """
+        timeout = self.timeout()
+        if timeout <= 0:
+            return
+        size = self.size_of(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if self._size + size > self.max_size:
+                self._entries = {}
+                self._size = 0
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._size -= self.size_of(previous[0])
+            self._entries[key] = (value, time.time() + timeout)
+            self._size += size
+
+    def clear(self):
+        """
+        Forgets all entries.
+        """
+        with self._lock:
+            self._entries = {}
+            self._size = 0
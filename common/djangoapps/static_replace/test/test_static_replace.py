@@ -1,17 +1,22 @@
 """Tests for static_replace"""
 
 from urllib import quote_plus
+from unittest import TestCase
 
 import ddt
 import re
 from PIL import Image
 from cStringIO import StringIO
 
+from django.test.utils import override_settings
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
+import static_replace
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
-    _url_replace_regex,
+    replace_jump_to_id_urls,
+    replace_urls,
+    _rewrite_regex,
     process_static_urls,
     make_static_urls_absolute
 )
@@ -159,6 +164,92 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.modulestore', autospec=True)
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    Make sure replace_urls rewrites what replace_static_urls, replace_course_urls
+    and replace_jump_to_id_urls do, one after the other.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+    mock_modulestore.return_value = Mock(XMLModuleStore)
+    mock_modulestore.return_value.get_modulestore_type.return_value = ModuleStoreEnum.Type.xml
+
+    text = (
+        '<img src="/static/file.png"/><a href=\'/course/info\'>Info</a>'
+        '<a href="/jump_to_id/intro">Intro</a><a href="/static/foo.png?raw">Raw</a>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        '/jump_to_id_base/',
+    )
+    assert_equals(
+        '<img src="/static/hashed/file.png"/><a href=\'/courses/org/course/run/info\'>Info</a>'
+        '<a href="/jump_to_id_base/intro">Intro</a><a href="/static/foo.png?raw">Raw</a>',
+        expected
+    )
+    assert_equals(expected, replace_urls(text, COURSE_KEY, DATA_DIRECTORY, jump_to_id_base_url='/jump_to_id_base/'))
+
+    # Without a jump_to_id base url, jump_to_id urls are left as they are.
+    assert_equals(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        replace_urls(text, COURSE_KEY, DATA_DIRECTORY)
+    )
+
+
+@override_settings(STATIC_REPLACE_CACHE_TIMEOUT=60)
+@patch('static_replace.staticfiles_storage', autospec=True)
+class StaticReplaceCacheTest(TestCase):
+    """
+    Tests of the caching of resolved urls and rewritten text.
+    """
+    def setUp(self):
+        super(StaticReplaceCacheTest, self).setUp()
+        static_replace._static_urls.clear()  # pylint: disable=protected-access
+        static_replace._rewritten_texts.clear()  # pylint: disable=protected-access
+        self.addCleanup(static_replace._static_urls.clear)  # pylint: disable=protected-access
+        self.addCleanup(static_replace._rewritten_texts.clear)  # pylint: disable=protected-access
+
+    def test_resolved_urls_cached(self, mock_storage):
+        mock_storage.exists.return_value = False
+        mock_storage.url.side_effect = lambda path: '/static/' + path
+
+        assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+        assert_equals(
+            '<img src="/static/data_dir/file.png"/>',
+            replace_static_urls('<img src="/static/file.png"/>', DATA_DIRECTORY)
+        )
+        mock_storage.exists.assert_called_once_with('file.png')
+
+        # Urls are cached per data directory.
+        assert_equals('"/static/other_dir/file.png"', replace_static_urls(STATIC_SOURCE, 'other_dir'))
+        self.assertEqual(mock_storage.exists.call_count, 2)
+
+    def test_rewritten_text_memoized(self, mock_storage):
+        mock_storage.exists.return_value = True
+        mock_storage.url.return_value = '/static/file.png'
+
+        assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+        with patch('static_replace._rewrite') as mock_rewrite:
+            assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+            self.assertFalse(mock_rewrite.called)
+
+            # Text rewritten with other arguments isn't memoized yet.
+            mock_rewrite.return_value = 'rewritten'
+            assert_equals('rewritten', replace_static_urls(STATIC_SOURCE, 'other_dir'))
+
+    @override_settings(STATIC_REPLACE_CACHE_TIMEOUT=0)
+    def test_no_caching(self, mock_storage):
+        mock_storage.exists.return_value = True
+        mock_storage.url.return_value = '/static/file.png'
+
+        for __ in range(2):
+            assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+        self.assertEqual(mock_storage.exists.call_count, 2)
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
@@ -168,7 +259,7 @@ def test_regex():
           '"/static/foo',  # no matching quote
           )
 
-    regex = _url_replace_regex('/static/')
+    regex = _rewrite_regex('/static/', 'data_dir', True, False, False)
 
     for s in yes:
         print 'Should match: {0!r}'.format(s)
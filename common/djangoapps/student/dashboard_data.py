@@ -0,0 +1,167 @@
+"""
+Bulk loading of what the student dashboard shows about a user's enrollments.
+
+The dashboard shows the same few facts about every course a user is enrolled
+in; loading each of them course by course makes the number of queries grow
+with the number of enrollments. DashboardData loads each fact for all the
+enrollments at once instead.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models.query import prefetch_related_objects
+from lazy import lazy
+
+from bulk_email.models import CourseAuthorization
+from certificates.models import GeneratedCertificate, certificate_status
+from course_modes.models import CourseMode
+from courseware.access import has_access
+from shoppingcart.models import CourseRegistrationCode
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+
+
+class DashboardData(object):
+    """
+    The facts the dashboard shows about a user's enrollments, by course id.
+
+    Each fact is loaded the first time it is used, with at most a couple of
+    queries whatever the number of enrollments. The course overviews of the
+    enrollments must have been loaded already (see
+    CourseEnrollment.prefetch_course_overviews).
+    """
+    def __init__(self, user, course_enrollments):
+        self.user = user
+        self.course_enrollments = course_enrollments
+        self.course_ids = [enrollment.course_id for enrollment in course_enrollments]
+
+    @lazy
+    def unexpired_course_modes(self):
+        """
+        dict[CourseKey, list[Mode]]: the non-expired modes of each course.
+        """
+        __, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(self.course_ids)
+        return unexpired_course_modes
+
+    @lazy
+    def course_modes_by_course(self):
+        """
+        dict[CourseKey, dict[str, Mode]]: the non-expired modes of each
+        course, by slug.
+        """
+        return {
+            course_id: {
+                mode.slug: mode
+                for mode in modes
+            }
+            for course_id, modes in self.unexpired_course_modes.iteritems()
+        }
+
+    @lazy
+    def selectable_course_modes(self):
+        """
+        dict[CourseKey, list[Mode]]: the modes of each course as
+        CourseMode.modes_for_course returns them, without the credit modes.
+        """
+        return {
+            course_id: [
+                mode for mode in modes if mode.slug not in CourseMode.CREDIT_MODES
+            ] or [CourseMode.DEFAULT_MODE]
+            for course_id, modes in self.unexpired_course_modes.iteritems()
+        }
+
+    @lazy
+    def certificates(self):
+        """
+        dict[CourseKey, GeneratedCertificate]: the certificates of the user.
+        """
+        return {
+            certificate.course_id: certificate
+            for certificate in GeneratedCertificate.objects.filter(user=self.user, course_id__in=self.course_ids)
+        }
+
+    @lazy
+    def certificate_statuses(self):
+        """
+        dict[CourseKey, dict]: the certificate status of each course, as
+        certificate_status_for_student returns it.
+        """
+        return {
+            course_id: certificate_status(
+                self.certificates.get(course_id),
+                modes=self.selectable_course_modes[course_id]
+            )
+            for course_id in self.course_ids
+        }
+
+    @lazy
+    def show_courseware_links_for(self):
+        """
+        frozenset[CourseKey]: the courses whose courseware the user can see.
+        """
+        return frozenset(
+            enrollment.course_id for enrollment in self.course_enrollments
+            if has_access(self.user, 'load', enrollment.course_overview)
+            and has_access(self.user, 'view_courseware_with_prerequisites', enrollment.course_overview)
+        )
+
+    @lazy
+    def show_email_settings_for(self):
+        """
+        frozenset[CourseKey]: the courses whose email settings are shown: the
+        Mongo courses for which bulk email is enabled.
+        """
+        if not settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL']:
+            return frozenset()
+
+        store = modulestore()
+        course_ids = [
+            course_id for course_id in self.course_ids
+            if store.get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml
+        ]
+        return frozenset(CourseAuthorization.instructor_email_enabled_for_courses(course_ids))
+
+    @lazy
+    def show_refund_option_for(self):
+        """
+        frozenset[CourseKey]: the courses the user can get a refund for.
+        """
+        prefetch_related_objects(self.course_enrollments, ['attributes'])
+        return frozenset(
+            enrollment.course_id for enrollment in self.course_enrollments
+            if enrollment.refundable(
+                user_already_has_certs_for=set(self.certificates),
+                modes=self.selectable_course_modes[enrollment.course_id],
+            )
+        )
+
+    @lazy
+    def enrolled_courses_either_paid(self):
+        """
+        frozenset[CourseKey]: the paid courses (white label courses, or courses
+        the user is enrolled in with a professional mode).
+        """
+        return frozenset(
+            enrollment.course_id for enrollment in self.course_enrollments
+            if enrollment.is_paid_course(
+                modes_dict=CourseMode.modes_for_course_dict(
+                    enrollment.course_id,
+                    modes=self.selectable_course_modes[enrollment.course_id]
+                )
+            )
+        )
+
+    @lazy
+    def redeemed_registration_codes(self):
+        """
+        dict[CourseKey, list[CourseRegistrationCode]]: the registration codes
+        the user redeemed for each course, with their invoices.
+        """
+        registration_codes = defaultdict(list)
+        redeemed_registration_codes = CourseRegistrationCode.objects.filter(
+            course_id__in=self.course_ids,
+            registrationcoderedemption__redeemed_by=self.user
+        ).select_related('invoice_item__invoice')
+        for registration_code in redeemed_registration_codes:
+            registration_codes[registration_code.course_id].append(registration_code)
+        return registration_codes
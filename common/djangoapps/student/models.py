@@ -1369,11 +1369,15 @@ class CourseEnrollment(models.Model):
     def enrollments_for_user(cls, user):
         return cls.objects.filter(user=user, is_active=1)
 
-    def is_paid_course(self):
+    def is_paid_course(self, modes_dict=None):
         """
         Returns True, if course is paid
+
+        Keyword Arguments:
+            modes_dict (dict): the non-expired modes of the course, by slug, if
+                they have already been loaded (see CourseMode.is_white_label).
         """
-        paid_course = CourseMode.is_white_label(self.course_id)
+        paid_course = CourseMode.is_white_label(self.course_id, modes_dict=modes_dict)
         if paid_course or CourseMode.is_professional_slug(self.mode):
             return True
 
@@ -1393,10 +1397,16 @@ class CourseEnrollment(models.Model):
         """Changes this `CourseEnrollment` record's mode to `mode`.  Saves immediately."""
         self.update_enrollment(mode=mode)
 
-    def refundable(self):
+    def refundable(self, user_already_has_certs_for=None, modes=None):
         """
         For paid/verified certificates, students may receive a refund if they have
         a verified certificate and the deadline for refunds has not yet passed.
+
+        Keyword Arguments:
+            user_already_has_certs_for (set of CourseKey): the courses the
+                student has a certificate for, if they have already been loaded.
+            modes (list of `Mode`): the non-expired modes of the course, if they
+                have already been loaded (see CourseMode.mode_for_course).
         """
         # In order to support manual refunds past the deadline, set can_refund on this object.
         # On unenrolling, the "UNENROLL_DONE" signal calls CertificateItem.refund_cert_callback(),
@@ -1407,7 +1417,10 @@ class CourseEnrollment(models.Model):
             return True
 
         # If the student has already been given a certificate they should not be refunded
-        if GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+        if user_already_has_certs_for is None:
+            if GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+                return False
+        elif self.course_id in user_already_has_certs_for:
             return False
 
         # If it is after the refundable cutoff date they should not be refunded.
@@ -1415,7 +1428,7 @@ class CourseEnrollment(models.Model):
         if refund_cutoff_date and datetime.now(UTC) > refund_cutoff_date:
             return False
 
-        course_mode = CourseMode.mode_for_course(self.course_id, 'verified')
+        course_mode = CourseMode.mode_for_course(self.course_id, 'verified', modes=modes)
         if course_mode is None:
             return False
         else:
@@ -1423,9 +1436,15 @@ class CourseEnrollment(models.Model):
 
     def refund_cutoff_date(self):
         """ Calculate and return the refund window end date. """
-        try:
-            attribute = self.attributes.get(namespace='order', name='order_number')
-        except ObjectDoesNotExist:
+        # The attributes are read with all() so that they can be prefetched.
+        attribute = next(
+            (
+                attribute for attribute in self.attributes.all()
+                if attribute.namespace == 'order' and attribute.name == 'order_number'
+            ),
+            None
+        )
+        if attribute is None:
             return None
 
         order_number = attribute.value
@@ -1464,6 +1483,19 @@ class CourseEnrollment(models.Model):
                 self._course_overview = None
         return self._course_overview
 
+    @classmethod
+    def prefetch_course_overviews(cls, enrollments):
+        """
+        Loads the course overviews of `enrollments` at once, rather than one
+        at a time as their `course_overview` property does.
+        """
+        enrollments = [enrollment for enrollment in enrollments if not enrollment._course_overview]
+        if not enrollments:
+            return
+        course_overviews = CourseOverview.get_from_ids(enrollment.course_id for enrollment in enrollments)
+        for enrollment in enrollments:
+            enrollment._course_overview = course_overviews.get(enrollment.course_id)
+
     def is_verified_enrollment(self):
         """
         Check the course enrollment mode is verified or not
@@ -4,6 +4,7 @@ adding users, removing users, and listing members
 """
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 
 from django.contrib.auth.models import User
 import logging
@@ -38,21 +39,46 @@ class RoleCache(object):
     """
     A cache of the CourseAccessRoles held by a particular user
     """
-    def __init__(self, user):
-        self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
+    def __init__(self, user, access_roles=None):
+        """
+        Loads the CourseAccessRoles of `user`, unless they are given as
+        `access_roles`.
+        """
+        if access_roles is None:
+            access_roles = CourseAccessRole.objects.filter(user=user).all()
+        self._roles = set(access_roles)
+        self._role_keys = set(
+            (access_role.role, access_role.course_id, access_role.org)
+            for access_role in self._roles
         )
 
+    @classmethod
+    def prefetch(cls, users):
+        """
+        Loads the CourseAccessRoles of all `users` in a single query, and
+        caches them on each user.
+
+        Role checks of these users, such as `RoleBase.has_user`,
+        `UserBasedRole.has_course` and therefore `has_access`, are then
+        answered without any further queries.
+        """
+        users = [user for user in users if user.id is not None]
+        if not users:
+            return
+
+        roles_by_user = defaultdict(list)
+        for access_role in CourseAccessRole.objects.filter(user_id__in=set(user.id for user in users)):
+            roles_by_user[access_role.user_id].append(access_role)
+
+        for user in users:
+            # pylint: disable=protected-access
+            user._roles = cls(user, roles_by_user[user.id])
+
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
         """
-        return any(
-            access_role.role == role and
-            access_role.course_id == course_id and
-            access_role.org == org
-            for access_role in self._roles
-        )
+        return (role, course_id, org) in self._role_keys
 
 
 class AccessRole(object):
@@ -0,0 +1,167 @@
+"""
+Tests for loading the data of the student dashboard in bulk.
+"""
+from datetime import datetime, timedelta
+import unittest
+
+import ddt
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+import pytz
+
+from bulk_email.models import CourseAuthorization
+from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.tests.factories import GeneratedCertificateFactory
+from course_modes.tests.factories import CourseModeFactory
+from student.dashboard_data import DashboardData
+from student.models import CourseEnrollment
+from student.tests.factories import UserFactory, CourseEnrollmentFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+class DashboardDataTest(SharedModuleStoreTestCase):
+    """
+    Test that DashboardData loads what the per-course functions would.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(DashboardDataTest, cls).setUpClass()
+        cls.courses = [CourseFactory.create() for __ in range(4)]
+
+    def setUp(self):
+        super(DashboardDataTest, self).setUp()
+        self.user = UserFactory.create()
+        verified_course, paid_course, audit_course, certified_course = [course.id for course in self.courses]
+
+        # A verified course, which can be refunded.
+        CourseModeFactory.create(course_id=verified_course, mode_slug='honor')
+        CourseModeFactory.create(
+            course_id=verified_course,
+            mode_slug='verified',
+            expiration_datetime=datetime.now(pytz.UTC) + timedelta(days=1)
+        )
+        CourseEnrollmentFactory.create(user=self.user, course_id=verified_course, mode='verified')
+
+        # A white label course, with email enabled.
+        CourseModeFactory.create(course_id=paid_course, mode_slug='honor', min_price=10)
+        CourseAuthorization.objects.create(course_id=paid_course, email_enabled=True)
+        CourseEnrollmentFactory.create(user=self.user, course_id=paid_course, mode='honor')
+
+        # An audit certificate, in a course without an honor mode.
+        CourseModeFactory.create(course_id=audit_course, mode_slug='audit')
+        CourseModeFactory.create(course_id=audit_course, mode_slug='credit')
+        GeneratedCertificateFactory.create(
+            user=self.user,
+            course_id=audit_course,
+            mode='audit',
+            status=CertificateStatuses.notpassing,
+        )
+        CourseEnrollmentFactory.create(user=self.user, course_id=audit_course, mode='audit')
+
+        # A downloadable certificate, in a verified course.
+        CourseModeFactory.create(course_id=certified_course, mode_slug='verified')
+        GeneratedCertificateFactory.create(
+            user=self.user,
+            course_id=certified_course,
+            mode='verified',
+            status=CertificateStatuses.downloadable,
+            download_url='http://www.example.com/certificate.pdf',
+            grade='0.9',
+        )
+        CourseEnrollmentFactory.create(user=self.user, course_id=certified_course, mode='verified')
+        CourseAuthorization.objects.create(course_id=certified_course, email_enabled=False)
+
+        self.enrollments = list(CourseEnrollment.enrollments_for_user(self.user))
+        CourseEnrollment.prefetch_course_overviews(self.enrollments)
+        self.dashboard_data = DashboardData(self.user, self.enrollments)
+
+    def test_certificate_statuses(self):
+        for enrollment in self.enrollments:
+            self.assertEqual(
+                self.dashboard_data.certificate_statuses[enrollment.course_id],
+                certificate_status_for_student(self.user, enrollment.course_id),
+            )
+
+    def test_show_refund_option_for(self):
+        self.assertEqual(self.dashboard_data.show_refund_option_for, {self.courses[0].id})
+        self.assertEqual(
+            self.dashboard_data.show_refund_option_for,
+            {enrollment.course_id for enrollment in self.enrollments if enrollment.refundable()},
+        )
+
+    def test_enrolled_courses_either_paid(self):
+        self.assertEqual(self.dashboard_data.enrolled_courses_either_paid, {self.courses[1].id})
+        self.assertEqual(
+            self.dashboard_data.enrolled_courses_either_paid,
+            {enrollment.course_id for enrollment in self.enrollments if enrollment.is_paid_course()},
+        )
+
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_EMAIL': True, 'REQUIRE_COURSE_EMAIL_AUTH': True})
+    def test_show_email_settings_for(self):
+        self.assertEqual(self.dashboard_data.show_email_settings_for, {self.courses[1].id})
+
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_EMAIL': True, 'REQUIRE_COURSE_EMAIL_AUTH': False})
+    def test_show_email_settings_for_all(self):
+        self.assertEqual(self.dashboard_data.show_email_settings_for, {course.id for course in self.courses})
+
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_EMAIL': False})
+    def test_show_email_settings_disabled(self):
+        self.assertEqual(self.dashboard_data.show_email_settings_for, frozenset())
+
+    def test_no_enrollments(self):
+        dashboard_data = DashboardData(self.user, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard_data.show_refund_option_for, frozenset())
+            self.assertEqual(dashboard_data.certificate_statuses, {})
+
+
+@ddt.ddt
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class DashboardQueriesTest(ModuleStoreTestCase):
+    """
+    Test that the number of queries the dashboard makes doesn't grow with the
+    number of enrollments.
+    """
+    def setUp(self):
+        super(DashboardQueriesTest, self).setUp()
+        self.user = UserFactory.create(password='test')
+        self.client.login(username=self.user.username, password='test')
+
+    def enroll(self, num_courses):
+        """
+        Enrolls the user in `num_courses` new courses, in which they have
+        a certificate.
+        """
+        for __ in xrange(num_courses):
+            course_id = CourseFactory.create(emit_signals=True).id
+            CourseModeFactory.create(course_id=course_id, mode_slug='honor')
+            CourseEnrollmentFactory.create(user=self.user, course_id=course_id, mode='honor')
+            GeneratedCertificateFactory.create(
+                user=self.user,
+                course_id=course_id,
+                mode='honor',
+                status=CertificateStatuses.notpassing,
+                grade='0.1',
+            )
+
+    def count_dashboard_queries(self):
+        """
+        Returns the number of queries the dashboard makes once the caches
+        have been filled.
+        """
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        return len(queries)
+
+    @ddt.data(10, 100)
+    def test_queries(self, num_enrollments):
+        # As many queries as with a single enrollment.
+        self.enroll(1)
+        num_queries = self.count_dashboard_queries()
+        self.enroll(num_enrollments - 1)
+        self.assertEqual(self.count_dashboard_queries(), num_queries)
@@ -2,6 +2,7 @@
 Tests of student.roles
 """
 import ddt
+from django.contrib.auth.models import User
 from django.test import TestCase
 
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
@@ -193,3 +194,27 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+    def test_prefetch(self):
+        users = [UserFactory() for __ in range(3)]
+        CourseStaffRole(self.IN_KEY).add_users(users[0])
+        CourseBetaTesterRole(self.IN_KEY).add_users(users[0], users[1])
+        OrgInstructorRole(self.IN_KEY.org).add_users(users[1])
+        users = [User.objects.get(id=user.id) for user in users]
+
+        with self.assertNumQueries(1):
+            RoleCache.prefetch(users)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseStaffRole(self.IN_KEY).has_user(users[0]))
+            self.assertTrue(CourseBetaTesterRole(self.IN_KEY).has_user(users[0]))
+            self.assertFalse(CourseStaffRole(self.NOT_IN_KEY).has_user(users[0]))
+            self.assertTrue(CourseBetaTesterRole(self.IN_KEY).has_user(users[1]))
+            self.assertTrue(OrgInstructorRole(self.IN_KEY.org).has_user(users[1]))
+            self.assertFalse(CourseInstructorRole(self.IN_KEY).has_user(users[1]))
+            self.assertFalse(CourseStaffRole(self.IN_KEY).has_user(users[2]))
+
+    def test_prefetch_without_users(self):
+        with self.assertNumQueries(0):
+            RoleCache.prefetch([])
+            RoleCache.prefetch([AnonymousUserFactory()])
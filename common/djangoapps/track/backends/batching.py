@@ -0,0 +1,191 @@
+"""
+Event tracker backend that sends events to another backend in batches,
+from a background thread.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from Queue import Queue, Empty, Full
+
+from django.db import close_old_connections
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# Put in the queue to make the background thread send what it has.
+_FLUSH = object()
+
+# The live backends, whose queued events are sent when the process exits.
+_backends = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_backends():
+    """Send the queued events of every live backend."""
+    for backend in list(_backends):
+        backend.flush(backend.flush_timeout)
+
+
+class BatchingBackend(BaseBackend):
+    """
+    Event tracker backend that queues events, and sends them to `backend`
+    in batches from a background thread, so that sending an event never
+    waits on the backend.
+
+    Events are sent once `batch_size` of them are queued, or `max_latency`
+    seconds after the first of them was queued. At most `max_queue_size`
+    events are queued; events sent while the queue is full are dropped, and
+    counted in the `track.batching.dropped` metric.
+
+    Queued events are sent when the process exits, see `flush`.
+
+    """
+
+    def __init__(self, backend, name='batching', batch_size=100, max_latency=1.0, max_queue_size=10000,
+                 flush_timeout=5.0, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: the backend to send events to
+          - `name`: name of the backend, used to tag metrics
+          - `batch_size`: largest number of events to send at once
+          - `max_latency`: longest time, in seconds, an event waits to be
+            sent
+          - `max_queue_size`: largest number of events waiting to be sent
+          - `flush_timeout`: longest time, in seconds, to wait for queued
+            events to be sent when the process exits
+
+        """
+        super(BatchingBackend, self).__init__(**kwargs)
+        self.backend = backend
+        self.name = name
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.max_queue_size = max_queue_size
+        self.flush_timeout = flush_timeout
+        self.tags = [u'backend:{}'.format(name)]
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+        _backends.add(self)
+
+    def send(self, event):
+        """Queue the event to be sent to the backend."""
+        try:
+            self._get_queue().put_nowait(event)
+        except Full:
+            dog_stats_api.increment('track.batching.dropped', tags=self.tags)
+
+    def send_many(self, events):
+        for event in events:
+            self.send(event)
+
+    def flush(self, timeout=None):
+        """
+        Send the queued events now, and wait up to `timeout` seconds (or
+        forever if it's None) for them to be sent.
+
+        Returns whether all queued events were sent.
+        """
+        with self._lock:
+            queue = self._queue
+            if queue is None or self._pid != os.getpid():
+                # Nothing was queued in this process.
+                return True
+
+        try:
+            queue.put(_FLUSH, timeout=timeout)
+        except Full:
+            return False
+
+        deadline = None if timeout is None else time.time() + timeout
+        with queue.all_tasks_done:
+            while queue.unfinished_tasks:
+                if deadline is None:
+                    queue.all_tasks_done.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _get_queue(self):
+        """
+        Returns the queue of events, and starts the background thread if it
+        isn't running in this process yet.
+
+        Threads don't survive a fork, so the queue and thread of a parent
+        process are replaced in its children.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = Queue(maxsize=self.max_queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='track-batching-{}'.format(self.name)
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            return self._queue
+
+    def _run(self, queue):
+        """Send the events of `queue` to the backend, forever."""
+        while True:
+            batch, done = self._next_batch(queue)
+            try:
+                if batch:
+                    self._send_batch(batch)
+            finally:
+                for __ in xrange(done):
+                    queue.task_done()
+
+    def _next_batch(self, queue):
+        """
+        Waits for a batch of events in `queue`, and returns it along with
+        the number of items it took from the queue.
+        """
+        batch = []
+        done = 0
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if deadline is None:
+                    item = queue.get()
+                    deadline = time.time() + self.max_latency
+                else:
+                    item = queue.get(timeout=max(deadline - time.time(), 0))
+            except Empty:
+                break
+
+            done += 1
+            if item is _FLUSH:
+                break
+            batch.append(item)
+        return batch, done
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the backend."""
+        # This thread's database connections are never closed by the end of
+        # a request, so let django close them when they are too old.
+        close_old_connections()
+        dog_stats_api.histogram('track.batching.batch_size', len(batch), tags=self.tags)
+        try:
+            with dog_stats_api.timer('track.batching.send', tags=self.tags):
+                self.backend.send_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Error sending %d events to event tracker backend %s', len(batch), self.name)
+            dog_stats_api.increment('track.batching.failed', len(batch), tags=self.tags)
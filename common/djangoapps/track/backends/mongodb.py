@@ -97,3 +97,15 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_many(self, events):
+        """Insert the events in to the Mongo collection, all at once"""
+        if not events:
+            return
+        try:
+            # Keep inserting the rest of the events if one can't be inserted.
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except (PyMongoError, BSONError):
+            # As in send, the events will be lost.
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
@@ -0,0 +1,138 @@
+from __future__ import absolute_import
+
+import gc
+import threading
+import weakref
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends import batching
+from track.backends.batching import BatchingBackend
+
+
+class CollectingBackend(BaseBackend):
+    """Backend which records the batches of events it is sent."""
+    def __init__(self, **options):
+        super(CollectingBackend, self).__init__(**options)
+        self.batches = []
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        self.unblocked.wait()
+        self.batches.append(list(events))
+
+
+class TestBatchingBackend(TestCase):
+    def setUp(self):
+        super(TestBatchingBackend, self).setUp()
+        self.collecting_backend = CollectingBackend()
+
+    def make_backend(self, **options):
+        """Returns a BatchingBackend of the collecting backend."""
+        backend = BatchingBackend(self.collecting_backend, name='test', **options)
+        self.addCleanup(backend.flush, 5)
+        return backend
+
+    def test_batches(self):
+        backend = self.make_backend(batch_size=2, max_latency=60)
+        self.collecting_backend.unblocked.clear()
+
+        for event in range(5):
+            backend.send({'test': event})
+        self.collecting_backend.unblocked.set()
+
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(
+            self.collecting_backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]]
+        )
+
+    def test_max_latency(self):
+        backend = self.make_backend(batch_size=100, max_latency=0)
+
+        backend.send({'test': 1})
+        # Wait until the event is sent, without flushing.
+        with backend._queue.all_tasks_done:  # pylint: disable=protected-access
+            while backend._queue.unfinished_tasks:  # pylint: disable=protected-access
+                backend._queue.all_tasks_done.wait(5)  # pylint: disable=protected-access
+
+        self.assertEqual(self.collecting_backend.batches, [[{'test': 1}]])
+
+    @patch('track.backends.batching.dog_stats_api')
+    def test_dropped_when_full(self, mock_dog_stats_api):
+        backend = self.make_backend(batch_size=1, max_latency=0, max_queue_size=2)
+        self.collecting_backend.unblocked.clear()
+
+        for event in range(10):
+            backend.send({'test': event})
+        self.assertTrue(mock_dog_stats_api.increment.called)
+        mock_dog_stats_api.increment.assert_called_with('track.batching.dropped', tags=[u'backend:test'])
+
+        self.collecting_backend.unblocked.set()
+        self.assertTrue(backend.flush(5))
+        sent_events = sum(self.collecting_backend.batches, [])
+        self.assertLess(len(sent_events), 10)
+        self.assertEqual(sent_events[0], {'test': 0})
+
+    @patch('track.backends.batching.log')
+    def test_backend_errors(self, mock_log):
+        backend = self.make_backend()
+        with patch.object(self.collecting_backend, 'send_many', side_effect=Exception):
+            backend.send({'test': 1})
+            self.assertTrue(backend.flush(5))
+        self.assertTrue(mock_log.exception.called)
+
+        # The background thread keeps sending events.
+        backend.send({'test': 2})
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(self.collecting_backend.batches, [[{'test': 2}]])
+
+    def test_flush_timeout(self):
+        backend = self.make_backend()
+        self.collecting_backend.unblocked.clear()
+        backend.send({'test': 1})
+
+        self.assertFalse(backend.flush(0.1))
+
+        self.collecting_backend.unblocked.set()
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(self.collecting_backend.batches, [[{'test': 1}]])
+
+    def test_flush_without_events(self):
+        backend = self.make_backend()
+        self.assertTrue(backend.flush(5))
+
+    def test_new_thread_after_fork(self):
+        backend = self.make_backend()
+        backend.send({'test': 1})
+        self.assertTrue(backend.flush(5))
+        thread = backend._thread  # pylint: disable=protected-access
+
+        with patch('track.backends.batching.os.getpid', return_value=-1):
+            backend.send({'test': 2})
+            self.assertTrue(backend.flush(5))
+            self.assertIsNot(backend._thread, thread)  # pylint: disable=protected-access
+
+        self.assertEqual(self.collecting_backend.batches, [[{'test': 1}], [{'test': 2}]])
+
+    def test_flush_at_exit(self):
+        backend = self.make_backend(batch_size=100, max_latency=60)
+        backend.send({'test': 1})
+
+        batching._flush_backends()  # pylint: disable=protected-access
+        self.assertEqual(self.collecting_backend.batches, [[{'test': 1}]])
+
+    def test_not_kept_alive_for_exit(self):
+        backend = BatchingBackend(self.collecting_backend, name='test')
+        self.assertIn(backend, batching._backends)  # pylint: disable=protected-access
+        backend_ref = weakref.ref(backend)
+        del backend
+        gc.collect()
+        self.assertIsNone(backend_ref())
@@ -4,6 +4,7 @@ from django.test.utils import override_settings
 
 import track.tracker as tracker
 from track.backends import BaseBackend
+from track.backends.batching import BatchingBackend
 
 
 SIMPLE_SETTINGS = {
@@ -24,6 +25,15 @@ MULTI_SETTINGS = {
     }
 }
 
+BATCH_SETTINGS = {
+    'default': {
+        'ENGINE': 'track.tests.test_tracker.DummyBackend',
+        'BATCH': {
+            'batch_size': 10,
+        }
+    }
+}
+
 
 class TestTrackerInstantiation(TestCase):
     """Test that a helper function can instantiate backends from their name."""
@@ -98,6 +108,21 @@ class TestTrackerDjangoInstantiation(TestCase):
 
         self.assertEqual(len(backends), 1)
 
+    @override_settings(TRACKING_BACKENDS=BATCH_SETTINGS)
+    def test_django_batch_settings(self):
+        """Test if a backend can be configured to get batches of events."""
+
+        backend = self._reload_backends()['default']
+
+        self.assertIsInstance(backend, BatchingBackend)
+        self.assertIsInstance(backend.backend, DummyBackend)
+        self.assertEqual(backend.batch_size, 10)
+
+        tracker.send({})
+        self.assertTrue(backend.flush(5))
+
+        self.assertEqual(backend.backend.count, 1)
+
     def _reload_backends(self):
         # pylint: disable=protected-access
 
@@ -12,10 +12,18 @@ below::
               'host': ... ,
               'port': ... ,
               ...
+          },
+          'BATCH': {
+              'batch_size': ...,
+              'max_latency': ...,
+              ...
           }
       }
   }
 
+A backend with a BATCH entry gets the events from a background thread, in
+batches, see `track.backends.batching.BatchingBackend` for its options.
+
 """
 
 import inspect
@@ -26,6 +34,7 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.backends.batching import BatchingBackend
 
 
 __all__ = ['send']
@@ -49,7 +58,10 @@ def _initialize_backends_from_django_settings():
         if values:
             engine = values['ENGINE']
             options = values.get('OPTIONS', {})
-            backends[name] = _instantiate_backend_from_name(engine, options)
+            backend = _instantiate_backend_from_name(engine, options)
+            if 'BATCH' in values:
+                backend = BatchingBackend(backend, name=name, **values['BATCH'])
+            backends[name] = backend
 
 
 def _instantiate_backend_from_name(name, options):
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -61,6 +64,17 @@ DEFAULT_VARIABLES = {
     'q': scipy.constants.e  # Fund. Charge: 1.602176565e-19 (Coulombs)
 }
 
+# The default functions that give the same results when they are applied to an
+# array of samples as when they are applied to each sample. The others either
+# don't take arrays or branch on their argument.
+VECTORIZED_FUNCTIONS = frozenset(
+    function for name, function in DEFAULT_FUNCTIONS.iteritems()
+    if name not in ('fact', 'factorial', 'arccot')
+)
+
+# How many compiled expressions are kept, see compile_expression.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+
 # We eliminated the following extreme suffixes:
 #   P (1e15), E (1e18), Z (1e21), Y (1e24),
 #   f (1e-15), a (1e-18), z (1e-21), y (1e-24)
@@ -200,6 +214,69 @@ def eval_product(parse_result):
     return prod
 
 
+# The following functions do the same as the evaluation actions above, for
+# arrays of samples. They tell operators from operands by type, since comparing
+# an array to an operator string would compare each of its elements.
+
+def eval_atom_samples(parse_result):
+    """
+    Return the value wrapped by the atom, for arrays of samples.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
+
+
+def eval_power_samples(parse_result):
+    """
+    Exponentiate right to left, for arrays of samples.
+    """
+    parse_result = reversed([k for k in parse_result if not isinstance(k, basestring)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_samples(parse_result):
+    """
+    Compute the parallel resistors operator, for arrays of samples.
+
+    A zero among the inputs raises a FloatingPointError, see evaluate_samples.
+    """
+    parse_result = [k for k in parse_result if not isinstance(k, basestring)]
+    if len(parse_result) == 1:
+        return parse_result[0]
+    return 1. / sum(1. / e for e in parse_result)
+
+
+def eval_sum_samples(parse_result):
+    """
+    Add the inputs, keeping in mind their sign, for arrays of samples.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
+            current_op = operator.add
+        elif token == '-':
+            current_op = operator.sub
+    return total
+
+
+def eval_product_samples(parse_result):
+    """
+    Multiply the inputs, for arrays of samples.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
+            current_op = operator.mul
+        elif token == '/':
+            current_op = operator.truediv
+    return prod
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
@@ -228,86 +305,227 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    # Parse the tree, or reuse it.
+    expression = compile_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
     # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
-
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    expression.check_variables(all_variables, all_functions)
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+    return expression.evaluate(all_variables, all_functions)
 
-    return math_interpreter.reduce_tree(evaluate_actions)
 
-
-class ParseAugmenter(object):
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
     """
-    Holds the data for a particular parse.
+    Evaluate an expression for each dictionary of variables in `variables_list`.
 
-    Retains the `math_expr` and `case_sensitive` so they needn't be passed
-    around method to method.
-    Eventually holds the parse tree and sets of variables as well.
+    Return the list of results that `evaluator` would return for each of them,
+    or raise the first exception it would raise. Where array operations are
+    known to give the same results, the samples are evaluated all at once.
     """
-    def __init__(self, math_expr, case_sensitive=False):
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    expression = compile_expression(math_expr, case_sensitive)
+    environments = [
+        add_defaults(variables, functions, case_sensitive)
+        for variables in variables_list
+    ]
+    for all_variables, all_functions in environments:
+        expression.check_variables(all_variables, all_functions)
+
+    results = expression.evaluate_samples(environments)
+    if results is None:
+        results = [
+            expression.evaluate(all_variables, all_functions)
+            for all_variables, all_functions in environments
+        ]
+    return results
+
+
+class _CompiledExpressionCache(object):
+    """
+    A least-recently-used cache of CompiledExpressions.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._expressions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
         """
-        Create the ParseAugmenter for a given math expression string.
+        Return the expression cached under `key`, or None.
+        """
+        with self._lock:
+            expression = self._expressions.pop(key, None)
+            if expression is not None:
+                self._expressions[key] = expression
+            return expression
 
-        Do the parsing later, when called like `OBJ.parse_algebra()`.
+    def set(self, key, expression):
         """
-        self.case_sensitive = case_sensitive
-        self.math_expr = math_expr
-        self.tree = None
-        self.variables_used = set()
-        self.functions_used = set()
+        Cache `expression` under `key`, evicting the least recently used ones.
+        """
+        with self._lock:
+            self._expressions.pop(key, None)
+            self._expressions[key] = expression
+            while len(self._expressions) > self.max_size:
+                self._expressions.popitem(last=False)
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
+    def clear(self):
+        """
+        Forget all compiled expressions.
+        """
+        with self._lock:
+            self._expressions.clear()
 
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
 
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
+COMPILED_EXPRESSIONS = _CompiledExpressionCache(COMPILED_EXPRESSION_CACHE_SIZE)
 
-    def parse_algebra(self):
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression for a math expression string.
+
+    Expressions are parsed once and kept in `COMPILED_EXPRESSIONS`, since the
+    same expressions are evaluated over and over: the answer to a problem,
+    and its samples.
+    """
+    key = (math_expr, case_sensitive)
+    expression = COMPILED_EXPRESSIONS.get(key)
+    if expression is None:
+        math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        math_interpreter.parse_algebra()
+        expression = CompiledExpression(math_interpreter)
+        COMPILED_EXPRESSIONS.set(key, expression)
+    return expression
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression, compiled into closures that evaluate it.
+
+    The closures take the dictionaries of all variables and functions (see
+    `add_defaults`) and call the same evaluation actions on the same inputs
+    as evaluating the parse tree does, without walking the tree.
+    """
+    def __init__(self, math_interpreter):
+        self.math_interpreter = math_interpreter
+        if math_interpreter.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+        self.variables_used = set(casify(variable) for variable in math_interpreter.variables_used)
+        self.functions_used = set(casify(function) for function in math_interpreter.functions_used)
+
+        self._evaluate = self._compile(math_interpreter.tree, casify, {
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum,
+        })
+        self._evaluate_samples = self._compile(math_interpreter.tree, casify, {
+            'atom': eval_atom_samples,
+            'power': eval_power_samples,
+            'parallel': eval_parallel_samples,
+            'product': eval_product_samples,
+            'sum': eval_sum_samples,
+        })
+
+    def _compile(self, node, casify, actions):
         """
-        Parse an algebraic expression into a tree.
+        Return a closure that evaluates `node` with the given actions.
+        """
+        if not isinstance(node, ParseResults):
+            # A terminal node, i.e. an operator or parenthesis.
+            return lambda all_variables, all_functions: node
+
+        node_name = node.getName()
+        if node_name == 'number':
+            value = eval_number(node)
+            return lambda all_variables, all_functions: value
+        elif node_name == 'variable':
+            name = casify(node[0])
+            return lambda all_variables, all_functions: all_variables[name]
+        elif node_name == 'function':
+            name = casify(node[0])
+            argument = self._compile(node[1], casify, actions)
+            return lambda all_variables, all_functions: all_functions[name](argument(all_variables, all_functions))
+        elif node_name not in actions:  # pragma: no cover
+            raise Exception(u"Unknown branch name '{}'".format(node_name))
+
+        action = actions[node_name]
+        kids = [self._compile(k, casify, actions) for k in node]
+        return lambda all_variables, all_functions: action([kid(all_variables, all_functions) for kid in kids])
 
-        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
-        reflect parenthesis and order of operations. Leave all operators in the
-        tree and do not parse any strings of numbers into their float versions.
+    def check_variables(self, valid_variables, valid_functions):
+        """
+        Confirm that all the variables used in the expression are valid/defined.
 
-        Adding the groups and result names makes the `repr()` of the result
-        really gross. For debugging, use something like
-          print OBJ.tree.asXML()
+        Otherwise, raise an UndefinedVariable containing all bad variables.
+        """
+        self.math_interpreter.check_variables(valid_variables, valid_functions)
+
+    def evaluate(self, all_variables, all_functions):
+        """
+        Return the value of the expression.
+        """
+        return self._evaluate(all_variables, all_functions)
+
+    def evaluate_samples(self, environments):
+        """
+        Return the values of the expression for each (all_variables,
+        all_functions) pair in `environments`, evaluated as arrays, or None if
+        that might not give the same results as evaluating them one by one.
+
+        That is the case when the expression uses functions that don't take
+        arrays or variables that aren't floats, and when any operation
+        divides by zero, overflows or is invalid: the results of those
+        depend on whether Python or numpy computes them.
         """
-        # 0.33 or 7 or .34 or 16.
+        if len(environments) < 2:
+            return None
+
+        first_variables, first_functions = environments[0]
+        if any(first_functions[name] not in VECTORIZED_FUNCTIONS for name in self.functions_used):
+            return None
+
+        sample_variables = {}
+        for name in self.variables_used:
+            values = [all_variables[name] for all_variables, __ in environments]
+            if not all(isinstance(value, float) for value in values):
+                return None
+            sample_variables[name] = numpy.array(values)
+        for __, all_functions in environments[1:]:
+            if any(all_functions[name] is not first_functions[name] for name in self.functions_used):
+                return None
+
+        try:
+            with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+                results = self._evaluate_samples(sample_variables, first_functions)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+        if numpy.ndim(results) == 0:
+            # The expression doesn't depend on the samples.
+            return None
+        return numpy.asarray(results).tolist()
+
+
+_GRAMMAR = None
+
+
+def get_grammar():
+    """
+    Return the pyparsing grammar of math expressions.
+
+    It is built the first time it's needed and then shared by all parses.
+    """
+    global _GRAMMAR  # pylint: disable=global-statement
+    if _GRAMMAR is None:
         number_part = Word(nums)
         inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
         # pyparsing allows spaces between tokens--`Combine` prevents that.
@@ -333,11 +551,9 @@ class ParseAugmenter(object):
         # and may contain numbers afterward.
         inner_varname = Word(alphas + "_", alphanums + "_")
         varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
 
         # Same thing for functions.
         function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
 
         atom = number | function | varname | "(" + expr + ")"
         atom = Group(atom)("atom")
@@ -357,7 +573,60 @@ class ParseAugmenter(object):
 
         # Finish the recursion.
         expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        _GRAMMAR = expr + stringEnd
+    return _GRAMMAR
+
+
+class ParseAugmenter(object):
+    """
+    Holds the data for a particular parse.
+
+    Retains the `math_expr` and `case_sensitive` so they needn't be passed
+    around method to method.
+    Eventually holds the parse tree and sets of variables as well.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Create the ParseAugmenter for a given math expression string.
+
+        Do the parsing later, when called like `OBJ.parse_algebra()`.
+        """
+        self.case_sensitive = case_sensitive
+        self.math_expr = math_expr
+        self.tree = None
+        self.variables_used = set()
+        self.functions_used = set()
+
+    def parse_algebra(self):
+        """
+        Parse an algebraic expression into a tree.
+
+        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
+        reflect parenthesis and order of operations. Leave all operators in the
+        tree and do not parse any strings of numbers into their float versions.
+        Store the names of the variables and functions it uses in
+        `variables_used` and `functions_used`.
+
+        Adding the groups and result names makes the `repr()` of the result
+        really gross. For debugging, use something like
+          print OBJ.tree.asXML()
+        """
+        self.tree = get_grammar().parseString(self.math_expr)[0]
+
+        def find_names(node):
+            """
+            Store the names of the variables and functions under `node`.
+            """
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            for kid in node:
+                if isinstance(kid, ParseResults):
+                    find_names(kid)
+
+        find_names(self.tree)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -4,6 +4,7 @@ Unit tests for calc.py
 
 import unittest
 import numpy
+from mock import patch
 import calc
 from pyparsing import ParseException
 
@@ -559,3 +560,91 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which must give exactly the same
+    results as calling calc.evaluator on each sample.
+    """
+
+    def setUp(self):
+        super(EvaluateSamplesTest, self).setUp()
+        calc.COMPILED_EXPRESSIONS.clear()
+
+    def assert_same_as_evaluator(self, samples, math_expr, functions=None, case_sensitive=False):
+        """
+        Assert that evaluate_samples returns what evaluator does per sample.
+
+        The values are compared by repr, to the last bit and with nan equal
+        to itself.
+        """
+        functions = functions or {}
+        expected = [
+            calc.evaluator(variables, functions, math_expr, case_sensitive=case_sensitive)
+            for variables in samples
+        ]
+        results = calc.evaluate_samples(samples, functions, math_expr, case_sensitive=case_sensitive)
+        self.assertEqual([repr(value) for value in expected], [repr(value) for value in results])
+
+    def test_vectorized_expressions(self):
+        """
+        Test expressions which are evaluated as arrays
+        """
+        samples = [{'x': 0.5 + i / 7.0, 'y': 2.0 - i / 3.0} for i in range(5)]
+        for math_expr in ['x+y', '3*x-y/2', 'x^2+y^-2', 'sin(x)*cos(y)', 'x||y', 'sqrt(x)+ln(x)', 'sec(X)', '2*pi*x']:
+            self.assert_same_as_evaluator(samples, math_expr)
+            compiled = calc.compile_expression(math_expr)
+            environments = [calc.add_defaults(variables, {}, False) for variables in samples]
+            self.assertIsNotNone(compiled.evaluate_samples(environments))
+
+    def test_fallback_expressions(self):
+        """
+        Test expressions which can't be evaluated as arrays
+        """
+        samples = [{'x': float(i), 'n': i} for i in range(1, 5)]
+        for math_expr in ['fact(n)', 'x+i', 'x||0', 'arccot(x)', 'sqrt(x-3)']:
+            self.assert_same_as_evaluator(samples, math_expr)
+            compiled = calc.compile_expression(math_expr)
+            environments = [calc.add_defaults(variables, {}, False) for variables in samples]
+            self.assertIsNone(compiled.evaluate_samples(environments))
+
+    def test_custom_functions(self):
+        """
+        Custom functions are called per sample
+        """
+        samples = [{'x': 1.0}, {'x': 2.0}]
+        self.assert_same_as_evaluator(samples, 'f(x)+1', functions={'f': lambda x: x * 3})
+
+    def test_errors(self):
+        """
+        Errors are raised just as evaluator raises them
+        """
+        samples = [{'x': 1.0}, {'x': 0.0}]
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(samples, {}, '1/x')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples(samples, {}, 'x+y')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'X'):
+            calc.evaluate_samples(samples, {}, 'X', case_sensitive=True)
+
+    def test_empty_expression(self):
+        """
+        An empty expression is NaN for every sample
+        """
+        results = calc.evaluate_samples([{}, {}], {}, '')
+        self.assertEqual(2, len(results))
+        self.assertTrue(all(numpy.isnan(result) for result in results))
+
+    def test_compiled_expression_cache(self):
+        """
+        Expressions are parsed once, and the least recently used are evicted
+        """
+        first = calc.compile_expression('x+1')
+        self.assertIs(first, calc.compile_expression('x+1'))
+        self.assertIsNot(first, calc.compile_expression('x+1', case_sensitive=True))
+
+        with patch.object(calc.COMPILED_EXPRESSIONS, 'max_size', 2):
+            calc.compile_expression('x+2')
+            calc.compile_expression('x+3')
+            self.assertIsNot(first, calc.compile_expression('x+1'))
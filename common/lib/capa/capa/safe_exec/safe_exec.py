@@ -6,7 +6,10 @@ from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
+import copy
 import hashlib
+import threading
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +49,49 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# How many safe_exec results each process keeps in front of the remote cache.
+LOCAL_CACHE_SIZE = 500
+
+
+class LocalCache(object):
+    """
+    A least-recently-used cache of safe_exec results, kept in this process.
+
+    A result is determined by the code, globals and random seed that make up
+    its key, so entries never go stale and can be kept until they are evicted.
+    Results are copied on the way out, so that callers can't change them.
+
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the result cached under `key`, or None."""
+        with self._lock:
+            result = self._results.pop(key, None)
+            if result is None:
+                return None
+            self._results[key] = result
+        return copy.deepcopy(result)
+
+    def set(self, key, result):
+        """Cache `result` under `key`, evicting the least recently used results."""
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """Forget all cached results."""
+        with self._lock:
+            self._results.clear()
+
+
+LOCAL_CACHE = LocalCache(LOCAL_CACHE_SIZE)
+
 
 def update_hash(hasher, obj):
     """
@@ -99,7 +145,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  Results are also kept in `LOCAL_CACHE`, which is checked
+    before `cache`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -114,7 +161,12 @@ def safe_exec(
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        cached = LOCAL_CACHE.get(key)
+        if cached is None:
+            cached = cache.get(key)
+            if cached is not None:
+                # `cached` ends up in globals_dict, which the caller may change.
+                LOCAL_CACHE.set(key, copy.deepcopy(cached))
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -149,6 +201,7 @@ def safe_exec(
     if cache:
         cleaned_results = json_safe(globals_dict)
         cache.set(key, (emsg, cleaned_results))
+        LOCAL_CACHE.set(key, (emsg, copy.deepcopy(cleaned_results)))
 
     # If an exception happened, raise it now.
     if emsg:
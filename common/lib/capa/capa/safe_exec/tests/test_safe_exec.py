@@ -10,6 +10,7 @@ import unittest
 from nose.plugins.skip import SkipTest
 
 from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec.safe_exec import LOCAL_CACHE, LocalCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -110,6 +111,11 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super(TestSafeExecCaching, self).setUp()
+        LOCAL_CACHE.clear()
+        self.addCleanup(LOCAL_CACHE.clear)
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -123,10 +129,43 @@ class TestSafeExecCaching(unittest.TestCase):
         # Fiddle with the cache, then try it again.
         cache[cache.keys()[0]] = (None, {'a': 17})
 
+        # The result is still in the local cache.
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 3)
+
+        # Without it, the result comes from the cache.
+        LOCAL_CACHE.clear()
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_local_cache_hit(self):
+        g = {}
+        cache = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        g['a'].append(4)
+
+        # The remote cache isn't needed, and the cached result wasn't changed.
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache({}))
+        self.assertEqual(g['a'], [3])
+
+    def test_remote_cache_hit(self):
+        cache = {}
+        safe_exec("a = [int(math.pi)]", {}, cache=DictCache(cache))
+        LOCAL_CACHE.clear()
+
+        # The result comes from the remote cache, and changing it doesn't
+        # change what was kept in the local cache.
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+        g['a'].append(4)
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache({}))
+        self.assertEqual(g['a'], [3])
+
     def test_cache_large_code_chunk(self):
         # Caching used to die on memcache with more than 250 bytes of code.
         # Check that it doesn't any more.
@@ -153,6 +192,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change the value stored in the cache, the result should change.
         cache[cache.keys()[0]] = ("Hey there!", {})
+        LOCAL_CACHE.clear()
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
@@ -163,6 +203,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change it again, now no exception!
         cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_CACHE.clear()
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
@@ -177,6 +218,20 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestLocalCache(unittest.TestCase):
+    """Test the LRU cache of safe_exec results."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalCache(2)
+        cache.set("a", (None, {'a': 1}))
+        cache.set("b", (None, {'b': 2}))
+        self.assertEqual(cache.get("a"), (None, {'a': 1}))
+        cache.set("c", (None, {'c': 3}))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), (None, {'a': 1}))
+        self.assertEqual(cache.get("c"), (None, {'c': 3}))
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -33,6 +33,11 @@ new_contract('BlockData', BlockData)
 new_contract('CourseEnvelope', CourseEnvelope)
 new_contract('XBlock', XBlock)
 
+# The most definitions a runtime fetches in a single query when prefetching.
+# Prefetched definitions that haven't been used by the next query are dropped,
+# so this also bounds the memory they take up.
+DEFINITION_PREFETCH_BATCH_SIZE = 250
+
 
 class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     """
@@ -42,7 +47,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     Computes the settings (nee 'metadata') inheritance upon creation.
     """
     @contract(course_entry=CourseEnvelope)
-    def __init__(self, modulestore, course_entry, default_class, module_data, lazy, **kwargs):
+    def __init__(self, modulestore, course_entry, default_class, module_data, lazy, prefetch_definitions=False,
+                 **kwargs):
         """
         Computes the settings inheritance and sets up the cache.
 
@@ -55,6 +61,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         module_data: a dict mapping Location -> json that was cached from the
             underlying modulestore
+
+        prefetch_definitions: whether lazily loaded definitions are fetched in
+            batches, along with those of the blocks that follow them in the course
         """
         # needed by capa_problem (as runtime.filestore via this.resources_fs)
         if course_entry.course_key.course:
@@ -79,6 +88,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         # it here. (grading, for example)
         self.course_id = course_entry.course_key
         self.lazy = lazy
+        self.prefetch_definitions = prefetch_definitions
+        self._prefetched_definitions = {}
+        self._definitions_to_prefetch = None
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
@@ -152,6 +164,64 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return json_data
 
+    def get_definition(self, course_key, definition_id):
+        """
+        Retrieve a single definition by id, as the modulestore's get_definition
+        does. When prefetching definitions, those of the next blocks in the
+        course are fetched in the same query.
+        """
+        if not self.prefetch_definitions:
+            return self.modulestore.get_definition(course_key, definition_id)
+
+        definition = self._prefetched_definitions.pop(definition_id, None)
+        if definition is None:
+            self._prefetch_definitions(course_key, definition_id)
+            definition = self._prefetched_definitions.pop(definition_id, None)
+        return definition
+
+    def _prefetch_definitions(self, course_key, definition_id):
+        """
+        Fetch the definition with the given id together with the definitions
+        of the blocks that follow it in the course, in depth-first order, that
+        haven't been prefetched yet. Replaces the previously prefetched ones.
+        """
+        if self._definitions_to_prefetch is None:
+            self._definitions_to_prefetch = self._definition_ids_to_prefetch()
+
+        definition_ids = [definition_id]
+        while self._definitions_to_prefetch and len(definition_ids) < DEFINITION_PREFETCH_BATCH_SIZE:
+            next_definition_id = self._definitions_to_prefetch.pop()
+            if next_definition_id != definition_id:
+                definition_ids.append(next_definition_id)
+
+        self._prefetched_definitions = {
+            definition['_id']: definition
+            for definition in self.modulestore.get_definitions(course_key, definition_ids)
+        }
+
+    def _definition_ids_to_prefetch(self):
+        """
+        Returns the ids of the definitions of the blocks in the course
+        structure that aren't loaded yet, as a stack whose top is the
+        definition of the first block in depth-first order.
+        """
+        blocks = self.course_entry.structure['blocks']
+        definition_ids = []
+        visited = set()
+        stack = [self.course_entry.structure['root']]
+        while stack:
+            block_key = stack.pop()
+            block_data = blocks.get(block_key)
+            if block_data is None or block_key in visited:
+                continue
+            visited.add(block_key)
+            if block_data.definition is not None and not block_data.definition_loaded:
+                definition_ids.append(block_data.definition)
+            stack.extend(reversed(block_data.fields.get('children', [])))
+
+        definition_ids.reverse()
+        return definition_ids
+
     # xblock's runtime does not always pass enough contextual information to figure out
     # which named container (course x branch) or which parent is requesting an item. Because split allows
     # a many:1 mapping from named containers to structures and because item's identities encode
@@ -186,7 +256,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         if definition_id is not None and not block_data.definition_loaded:
             definition_loader = DefinitionLazyLoader(
-                self.modulestore,
+                self,
                 course_key,
                 block_key.type,
                 definition_id,
@@ -2,9 +2,8 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import datetime
-import cPickle as pickle
+import logging
 import math
-import zlib
 import pymongo
 import pytz
 import re
@@ -15,6 +14,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -27,11 +27,16 @@ from mongodb_proxy import autoretry_read
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import (
+    DEFAULT_CODEC, UnknownCodecError, get_codec, split_header
+)
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 
 new_contract('BlockData', BlockData)
 
+log = logging.getLogger(__name__)
+
 
 def get_cache(alias):
     """
@@ -226,55 +231,61 @@ def structure_to_mongo(structure, course_context=None):
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are serialized by the codec named by
+    settings.COURSE_STRUCTURE_CACHE_CODEC (see structure_codecs) when cached.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
     def __init__(self):
         self.cache = None
+        self.codec = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            else:
+                self.codec = get_codec(getattr(settings, 'COURSE_STRUCTURE_CACHE_CODEC', DEFAULT_CODEC))
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """Pull the serialized struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+            data = self.cache.get(key)
+            tagger.tag(from_cache=str(data is not None).lower())
 
-            if compressed_pickled_data is None:
+            if data is None:
                 # Always log cache misses, because they are unexpected
                 tagger.sample_rate = 1
                 return None
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
-
-            pickled_data = zlib.decompress(compressed_pickled_data)
-            tagger.measure('uncompressed_size', len(pickled_data))
+            try:
+                codec_name, data = split_header(data)
+                tagger.tag(codec=codec_name)
+                codec = get_codec(codec_name)
+            except UnknownCodecError:
+                # Written by a codec this process can't read, so it will be
+                # fetched from the database, and cached with this process' codec.
+                log.warning(u'Could not read the cached course structure %s', key, exc_info=True)
+                tagger.sample_rate = 1
+                return None
 
-            return pickle.loads(pickled_data)
+            return codec.loads(data, tagger)
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """Given a structure, will serialize and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
-            tagger.measure('uncompressed_size', len(pickled_data))
-
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            tagger.tag(codec=self.codec.name)
+            data = self.codec.dumps(structure, tagger)
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self.cache.set(key, data, None)
 
 
 class MongoConnection(object):
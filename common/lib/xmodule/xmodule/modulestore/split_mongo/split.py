@@ -425,16 +425,21 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         if bulk_write_record.active:
             # Only query for the definitions that aren't already cached.
             for definition in bulk_write_record.definitions.values():
+                if definition is None:
+                    # A definition that get_definition didn't find.
+                    continue
                 definition_id = definition.get('_id')
                 if definition_id in ids:
                     ids.remove(definition_id)
                     definitions.append(definition)
 
         if len(ids):
-            # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids), course_key)
-            # Add the retrieved definitions to the cache.
-            bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
+            # Query the db for the definitions. The result may be a cursor,
+            # which can only be read once.
+            defs_from_db = list(self.db_connection.get_definitions(list(ids), course_key))
+            if bulk_write_record.active:
+                # Add the retrieved definitions to the cache.
+                bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
             definitions.extend(defs_from_db)
         return definitions
 
@@ -767,13 +772,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         Load the definitions into each block if lazy is in kwargs and is False;
         otherwise, do not load the definitions - they'll be loaded later when needed.
+        If prefetch_definitions is in kwargs and is True, definitions that are loaded
+        later are fetched in batches, for course-wide operations that will need all
+        of them.
         """
+        prefetch_definitions = kwargs.pop('prefetch_definitions', False)
         runtime = self._get_cache(course_entry.structure['_id'])
         if runtime is None:
             lazy = kwargs.pop('lazy', True)
-            runtime = self.create_runtime(course_entry, lazy)
+            runtime = self.create_runtime(course_entry, lazy, prefetch_definitions)
             self._add_cache(course_entry.structure['_id'], runtime)
             self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy)
+        elif prefetch_definitions:
+            runtime.prefetch_definitions = True
 
         return [runtime.load_item(block_key, course_entry, **kwargs) for block_key in block_keys]
 
@@ -3330,7 +3341,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         return {ModuleStoreEnum.Type.split: self.db_connection.heartbeat()}
 
-    def create_runtime(self, course_entry, lazy):
+    def create_runtime(self, course_entry, lazy, prefetch_definitions=False):
         """
         Create the proper runtime for this course
         """
@@ -3339,6 +3350,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             course_entry=course_entry,
             module_data={},
             lazy=lazy,
+            prefetch_definitions=prefetch_definitions,
             default_class=self.default_class,
             error_tracker=self.error_tracker,
             render_template=self.render_template,
@@ -0,0 +1,286 @@
+"""
+Codecs which serialize course structures for the CourseStructureCache.
+
+A codec is an encoding of the structure (`pickle`, or the `compact` block
+encoding) followed by a compressor (`zlib`, or `lz4` if it's installed), and is
+named after both, e.g. 'compact+zlib'.
+
+Cached structures start with a header naming the codec which wrote them, so
+that structures written by any codec can be read whichever codec is used to
+write them. Structures written before codecs existed have no header, and are
+read by the 'pickle+zlib' codec, which also writes them without a header.
+"""
+import cPickle as pickle
+import zlib
+
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+DEFAULT_CODEC = 'pickle+zlib'
+
+# Starts the header of structures which weren't written by the default codec.
+# zlib streams never start with a null byte.
+HEADER_MAGIC = '\x00csc:'
+HEADER_END = '\n'
+
+
+class UnknownCodecError(ValueError):
+    """
+    The codec of a cached structure is unknown, or can't be used here.
+    """
+    pass
+
+
+class PickleEncoding(object):
+    """
+    Pickles the whole structure.
+    """
+    name = 'pickle'
+
+    def encode(self, structure):
+        """
+        Returns the string `structure` is encoded to.
+        """
+        return pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        """
+        Returns the structure encoded in `data`.
+        """
+        return pickle.loads(data)
+
+
+# The BlockData attributes kept by the compact encoding, besides block_type.
+BLOCK_ATTRS = ('definition', 'fields', 'defaults', 'asides', 'edit_info')
+
+# The EditInfo attributes kept by the compact encoding, in the order they are encoded in.
+EDIT_INFO_ATTRS = (
+    'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+    'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+)
+
+
+class CompactEncoding(object):
+    """
+    Encodes each block of the structure on its own, as a tuple of its
+    attributes rather than a pickled BlockData, with its children as plain
+    (block_type, block_id) pairs.
+
+    Blocks are decoded when they are first used (see LazyBlockData), so that
+    reading a structure doesn't pay for the blocks which are never looked at.
+    """
+    name = 'compact'
+
+    def encode(self, structure):
+        """
+        Returns the string `structure` is encoded to.
+        """
+        header = dict(structure)
+        blocks = [
+            (block_key.type, block_key.id, self.encode_block(block))
+            for block_key, block in header.pop('blocks').iteritems()
+        ]
+        return pickle.dumps((header, blocks), pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        """
+        Returns the structure encoded in `data`.
+        """
+        structure, blocks = pickle.loads(data)
+        structure['blocks'] = {
+            BlockKey(block_type, block_id): LazyBlockData(block_type, encoded_block)
+            for block_type, block_id, encoded_block in blocks
+        }
+        return structure
+
+    @staticmethod
+    def encode_block(block):
+        """
+        Returns the string the BlockData `block` is encoded to.
+        """
+        if isinstance(block, LazyBlockData):
+            encoded_block = block.unchanged_encoded_block()
+            if encoded_block is not None:
+                return encoded_block
+        fields = block.fields
+        children = fields.get('children')
+        if children is not None:
+            fields = dict(fields)
+            children = [tuple(child) for child in fields.pop('children')]
+        edit_info = tuple(getattr(block.edit_info, attr) for attr in EDIT_INFO_ATTRS)
+        return pickle.dumps(
+            (block.definition, fields, children, block.defaults, block.get_asides(), edit_info),
+            pickle.HIGHEST_PROTOCOL
+        )
+
+    @staticmethod
+    def decode_block(encoded_block):
+        """
+        Returns the attributes of the BlockData encoded in `encoded_block`.
+        """
+        definition, fields, children, defaults, asides, edit_info_values = pickle.loads(encoded_block)
+        if children is not None:
+            fields['children'] = [BlockKey(*child) for child in children]
+        edit_info = EditInfo.__new__(EditInfo)
+        edit_info.__dict__.update(zip(EDIT_INFO_ATTRS, edit_info_values))
+        return {
+            'definition': definition,
+            'fields': fields,
+            'defaults': defaults,
+            'asides': asides,
+            'edit_info': edit_info,
+        }
+
+
+class LazyBlockData(BlockData):
+    """
+    A BlockData read by the compact encoding, whose attributes are decoded
+    when any of them is first used.
+
+    Copies and pickles of a block which hasn't been decoded yet hold the
+    encoded block, and are decoded when they are used in turn.
+    """
+    def __init__(self, block_type, encoded_block):  # pylint: disable=super-init-not-called
+        self.definition_loaded = False
+        self.block_type = block_type
+        self._encoded_block = encoded_block
+
+    def __getattr__(self, name):
+        # Only called for attributes which aren't set, i.e. before the block is
+        # decoded. Special attributes (looked up by copy and pickle) are
+        # never decoded.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        encoded_block = self.__dict__.get('_encoded_block')
+        if encoded_block is None:
+            raise AttributeError(name)
+        # Structures are shared between threads, which may decode the same
+        # block at once: the encoded block is only dropped once the decoded
+        # attributes are all set, and setting them is atomic. Attributes set
+        # before the block was decoded win.
+        for attr, value in CompactEncoding.decode_block(encoded_block).iteritems():
+            self.__dict__.setdefault(attr, value)
+        self.__dict__.pop('_encoded_block', None)
+        return getattr(self, name)
+
+    def unchanged_encoded_block(self):
+        """
+        Returns the encoded block, if none of its attributes were used or set
+        since it was read, and None otherwise.
+        """
+        if any(attr in self.__dict__ for attr in BLOCK_ATTRS):
+            return None
+        return self.__dict__.get('_encoded_block')
+
+
+class ZlibCompressor(object):
+    """
+    zlib, at its fastest level.
+    """
+    name = 'zlib'
+
+    def compress(self, data):
+        """
+        Returns `data` compressed.
+        """
+        # 1 = Fastest (slightly larger results)
+        return zlib.compress(data, 1)
+
+    def decompress(self, data):
+        """
+        Returns `data` decompressed.
+        """
+        return zlib.decompress(data)
+
+
+class Lz4Compressor(object):
+    """
+    lz4, which compresses less than zlib, but decompresses several times as
+    fast.
+    """
+    name = 'lz4'
+
+    def compress(self, data):
+        """
+        Returns `data` compressed.
+        """
+        return lz4.block.compress(data)
+
+    def decompress(self, data):
+        """
+        Returns `data` decompressed.
+        """
+        return lz4.block.decompress(data)
+
+
+ENCODINGS = {encoding.name: encoding for encoding in (PickleEncoding(), CompactEncoding())}
+COMPRESSORS = {compressor.name: compressor for compressor in (ZlibCompressor(), Lz4Compressor())}
+
+
+class StructureCodec(object):
+    """
+    Serializes structures with an encoding and a compressor.
+    """
+    def __init__(self, encoding, compressor):
+        self.encoding = encoding
+        self.compressor = compressor
+        self.name = '{}+{}'.format(encoding.name, compressor.name)
+        if self.name == DEFAULT_CODEC:
+            self.header = ''
+        else:
+            self.header = HEADER_MAGIC + self.name + HEADER_END
+
+    def dumps(self, structure, tagger):
+        """
+        Returns the string `structure` is serialized to, and measures its size
+        with `tagger`.
+        """
+        data = self.encoding.encode(structure)
+        tagger.measure('uncompressed_size', len(data))
+        data = self.header + self.compressor.compress(data)
+        tagger.measure('compressed_size', len(data))
+        return data
+
+    def loads(self, data, tagger):
+        """
+        Returns the structure serialized to `data` (without its header), and
+        measures its size with `tagger`.
+        """
+        tagger.measure('compressed_size', len(data))
+        data = self.compressor.decompress(data)
+        tagger.measure('uncompressed_size', len(data))
+        return self.encoding.decode(data)
+
+
+def get_codec(name):
+    """
+    Returns the StructureCodec called `name`, or raises UnknownCodecError if
+    there is no such codec, or it can't be used here.
+    """
+    encoding_name, __, compressor_name = name.partition('+')
+    encoding = ENCODINGS.get(encoding_name)
+    compressor = COMPRESSORS.get(compressor_name)
+    if encoding is None or compressor is None:
+        raise UnknownCodecError(u'Unknown course structure codec: {}'.format(name))
+    if compressor_name == 'lz4' and lz4 is None:
+        raise UnknownCodecError(u'The {} course structure codec needs lz4, which is not installed'.format(name))
+    return StructureCodec(encoding, compressor)
+
+
+def split_header(data):
+    """
+    Returns the name of the codec which serialized `data`, and the data
+    following the header.
+    """
+    if not data.startswith(HEADER_MAGIC):
+        return DEFAULT_CODEC, data
+    header_end = data.find(HEADER_END, len(HEADER_MAGIC))
+    if header_end == -1:
+        raise UnknownCodecError(u'Malformed course structure codec header')
+    return data[len(HEADER_MAGIC):header_end], data[header_end + len(HEADER_END):]
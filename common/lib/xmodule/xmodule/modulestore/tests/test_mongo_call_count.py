@@ -121,40 +121,66 @@ class CountMongoCallsCourseTraversal(TestCase):
     @ddt.unpack
     def test_number_mongo_calls(self, store, depth, lazy, access_all_block_fields, num_mongo_calls):
         with store.build() as (source_content, source_store):
+            source_course_key = self._import_course(source_store, source_content)
+            with check_mongo_calls(num_mongo_calls):
+                self._traverse_course(
+                    source_store, source_course_key, access_all_block_fields, depth=depth, lazy=lazy
+                )
 
-            source_course_key = source_store.make_course_key('a', 'course', 'course')
-
-            # First, import a course.
-            import_course_from_xml(
-                source_store,
-                'test_user',
-                TEST_DATA_DIR,
-                source_dirs=['manual-testing-complete'],
-                static_content_store=source_content,
-                target_id=source_course_key,
-                create_if_not_present=True,
-                raise_on_failure=True,
-            )
-
-            # Course traversal modeled after the traversal done here:
-            # lms/djangoapps/mobile_api/video_outlines/serializers.py:BlockOutline
-            # Starting at the root course block, do a breadth-first traversal using
-            # get_children() to retrieve each block's children.
+    @ddt.data(
+        # 'prefetch_definitions' does not matter in old Mongo.
+        (MIXED_OLD_MONGO_MODULESTORE_BUILDER, 175),
+        # Definitions are fetched in a single batch, as with lazy=False.
+        (MIXED_SPLIT_MODULESTORE_BUILDER, 4),
+    )
+    @ddt.unpack
+    def test_prefetch_definitions(self, store, num_mongo_calls):
+        with store.build() as (source_content, source_store):
+            source_course_key = self._import_course(source_store, source_content)
             with check_mongo_calls(num_mongo_calls):
-                with source_store.bulk_operations(source_course_key):
-                    start_block = source_store.get_course(source_course_key, depth=depth, lazy=lazy)
-                    all_blocks = []
-                    stack = [start_block]
-                    while stack:
-                        curr_block = stack.pop()
-                        all_blocks.append(curr_block)
-                        if curr_block.has_children:
-                            for block in reversed(curr_block.get_children()):
-                                stack.append(block)
-
-                    if access_all_block_fields:
-                        # Read the fields on each block in order to ensure each block and its definition is loaded.
-                        for xblock in all_blocks:
-                            for __, field in xblock.fields.iteritems():
-                                if field.is_set_on(xblock):
-                                    __ = field.read_from(xblock)
+                self._traverse_course(
+                    source_store, source_course_key, True, depth=None, prefetch_definitions=True
+                )
+
+    def _import_course(self, source_store, source_content):
+        """
+        Imports the test course into source_store, returning its key.
+        """
+        source_course_key = source_store.make_course_key('a', 'course', 'course')
+        import_course_from_xml(
+            source_store,
+            'test_user',
+            TEST_DATA_DIR,
+            source_dirs=['manual-testing-complete'],
+            static_content_store=source_content,
+            target_id=source_course_key,
+            create_if_not_present=True,
+            raise_on_failure=True,
+        )
+        return source_course_key
+
+    def _traverse_course(self, source_store, source_course_key, access_all_block_fields, **kwargs):
+        """
+        Traverses the course, passing kwargs to get_course.
+        """
+        # Course traversal modeled after the traversal done here:
+        # lms/djangoapps/mobile_api/video_outlines/serializers.py:BlockOutline
+        # Starting at the root course block, do a breadth-first traversal using
+        # get_children() to retrieve each block's children.
+        with source_store.bulk_operations(source_course_key):
+            start_block = source_store.get_course(source_course_key, **kwargs)
+            all_blocks = []
+            stack = [start_block]
+            while stack:
+                curr_block = stack.pop()
+                all_blocks.append(curr_block)
+                if curr_block.has_children:
+                    for block in reversed(curr_block.get_children()):
+                        stack.append(block)
+
+            if access_all_block_fields:
+                # Read the fields on each block in order to ensure each block and its definition is loaded.
+                for xblock in all_blocks:
+                    for __, field in xblock.fields.iteritems():
+                        if field.is_set_on(xblock):
+                            __ = field.read_from(xblock)
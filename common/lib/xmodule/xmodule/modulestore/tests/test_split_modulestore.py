@@ -14,6 +14,7 @@ import ddt
 from contracts import contract
 from nose.plugins.attrib import attr
 from django.core.cache import caches, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -32,6 +33,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import HEADER_END, HEADER_MAGIC
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -965,6 +967,36 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_cache_codecs(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with override_settings(COURSE_STRUCTURE_CACHE_CODEC='compact+zlib'):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+        # structures are read by the codec which wrote them
+        with override_settings(COURSE_STRUCTURE_CACHE_CODEC='pickle+zlib'):
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_cache_unknown_codec(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        structure_id = self.new_course.location.as_object_id(self.new_course.location.version_guid)
+        self.cache.set(structure_id, HEADER_MAGIC + 'unknown+zlib' + HEADER_END + 'data', None)
+
+        # structures written by unknown codecs are read from mongo, and cached again
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(cached_structure, not_cached_structure)
+
     @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
     def test_course_structure_cache_no_cache_configured(self, mock_get_cache):
         mock_get_cache.side_effect = InvalidCacheBackendError
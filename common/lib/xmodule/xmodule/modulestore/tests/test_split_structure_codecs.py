@@ -0,0 +1,151 @@
+""" Test the codecs of split_mongo/CourseStructureCache """
+import copy
+import cPickle as pickle
+import datetime
+import unittest
+import zlib
+
+import ddt
+from bson.objectid import ObjectId
+from mock import Mock, patch
+from pytz import UTC
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import (
+    CompactEncoding, LazyBlockData, UnknownCodecError, get_codec, lz4, split_header
+)
+
+
+CODECS = ['pickle+zlib', 'compact+zlib'] + (['pickle+lz4', 'compact+lz4'] if lz4 is not None else [])
+
+
+@ddt.ddt
+class TestStructureCodecs(unittest.TestCase):
+    """ Test serializing structures with each codec """
+    def setUp(self):
+        super(TestStructureCodecs, self).setUp()
+        self.root = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.structure = {
+            '_id': ObjectId(),
+            'root': self.root,
+            'previous_version': None,
+            'original_version': ObjectId(),
+            'edited_by': 7,
+            'edited_on': datetime.datetime(2016, 1, 1, tzinfo=UTC),
+            'schema_version': 1,
+            'blocks': {
+                self.root: self.make_block('course', fields={'children': [self.chapter]}),
+                self.chapter: self.make_block('chapter', fields={'display_name': u'Chapter', 'graded': True}),
+            },
+        }
+
+    def make_block(self, block_type, fields):
+        """ Returns a BlockData, as read from mongo """
+        return BlockData(
+            block_type=block_type,
+            definition=ObjectId(),
+            fields=fields,
+            defaults={},
+            asides={},
+            edit_info={
+                'edited_on': datetime.datetime(2016, 1, 2, tzinfo=UTC),
+                'edited_by': 7,
+                'previous_version': ObjectId(),
+                'update_version': ObjectId(),
+            },
+        )
+
+    def round_trip(self, codec_name, structure):
+        """ Returns `structure` serialized and deserialized by the codec `codec_name` """
+        data = get_codec(codec_name).dumps(structure, Mock())
+        read_codec_name, data = split_header(data)
+        self.assertEqual(read_codec_name, codec_name)
+        return get_codec(read_codec_name).loads(data, Mock())
+
+    @ddt.data(*CODECS)
+    def test_round_trip(self, codec_name):
+        structure = self.round_trip(codec_name, self.structure)
+        self.assertEqual(structure, self.structure)
+        self.assertIsInstance(structure['blocks'][self.root].fields['children'][0], BlockKey)
+        self.assertEqual(
+            structure['blocks'][self.chapter].edit_info.to_storable(),
+            self.structure['blocks'][self.chapter].edit_info.to_storable(),
+        )
+
+    def test_measures(self):
+        tagger = Mock()
+        data = get_codec('compact+zlib').dumps(self.structure, tagger)
+        get_codec('compact+zlib').loads(split_header(data)[1], tagger)
+        self.assertEqual(
+            [call[0][0] for call in tagger.measure.call_args_list],
+            ['uncompressed_size', 'compressed_size', 'compressed_size', 'uncompressed_size'],
+        )
+
+    def test_legacy_structures(self):
+        # Structures cached before codecs existed are pickled and compressed, without a header
+        data = zlib.compress(pickle.dumps(self.structure, pickle.HIGHEST_PROTOCOL), 1)
+        self.assertEqual(get_codec('pickle+zlib').dumps(self.structure, Mock()), data)
+        codec_name, data = split_header(data)
+        self.assertEqual(codec_name, 'pickle+zlib')
+        self.assertEqual(get_codec(codec_name).loads(data, Mock()), self.structure)
+
+    @ddt.data('unknown+zlib', 'compact+unknown', 'compact')
+    def test_unknown_codec(self, codec_name):
+        with self.assertRaises(UnknownCodecError):
+            get_codec(codec_name)
+
+    def test_lazy_blocks(self):
+        structure = self.round_trip('compact+zlib', self.structure)
+        block = structure['blocks'][self.chapter]
+        self.assertIsInstance(block, LazyBlockData)
+        self.assertEqual(block.block_type, 'chapter')
+        self.assertIsNotNone(block.unchanged_encoded_block())
+
+        # Copies of blocks which weren't decoded aren't decoded either
+        copied_block = copy.deepcopy(structure)['blocks'][self.chapter]
+        self.assertIsNotNone(copied_block.unchanged_encoded_block())
+        self.assertEqual(copied_block, self.structure['blocks'][self.chapter])
+
+        self.assertEqual(block.fields, {'display_name': u'Chapter', 'graded': True})
+        self.assertIsNone(block.unchanged_encoded_block())
+        with self.assertRaises(AttributeError):
+            block.unknown_attribute  # pylint: disable=pointless-statement
+
+    def test_set_before_decoded(self):
+        structure = self.round_trip('compact+zlib', self.structure)
+        block = structure['blocks'][self.chapter]
+        block.fields = {'display_name': u'Changed'}
+        self.assertIsNone(block.unchanged_encoded_block())
+        self.assertEqual(block.fields, {'display_name': u'Changed'})
+        self.assertEqual(block.definition, self.structure['blocks'][self.chapter].definition)
+
+        # The change is kept when the structure is serialized again
+        structure = self.round_trip('compact+zlib', structure)
+        self.assertEqual(structure['blocks'][self.chapter].fields, {'display_name': u'Changed'})
+
+    def test_used_while_decoding(self):
+        structure = self.round_trip('compact+zlib', self.structure)
+        block = structure['blocks'][self.chapter]
+        decode_block = CompactEncoding.decode_block
+        seen_while_decoding = {}
+
+        def decode_block_and_use_it(encoded_block):
+            """
+            Decodes the block while another thread uses it.
+            """
+            if 'decoding' not in seen_while_decoding:
+                seen_while_decoding['decoding'] = True
+                seen_while_decoding['fields'] = block.fields
+            return decode_block(encoded_block)
+
+        with patch.object(CompactEncoding, 'decode_block', side_effect=decode_block_and_use_it):
+            self.assertEqual(block.definition, self.structure['blocks'][self.chapter].definition)
+        self.assertEqual(seen_while_decoding['fields'], {'display_name': u'Chapter', 'graded': True})
+        self.assertIsNone(block.unchanged_encoded_block())
+
+    @ddt.data(*CODECS)
+    def test_lazy_blocks_with_other_codecs(self, codec_name):
+        structure = self.round_trip('compact+zlib', self.structure)
+        self.assertEqual(self.round_trip(codec_name, structure), self.structure)
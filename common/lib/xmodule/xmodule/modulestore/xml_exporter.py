@@ -193,7 +193,7 @@ class CourseExportManager(ExportManager):
         #               -and- to eliminate many round-trips to read individual definitions.
         # Why these parameters? Because a course export needs to access all the course block information
         # eventually. Accessing it all now at the beginning increases performance of the export.
-        return self.modulestore.get_course(self.courselike_key, depth=None, lazy=False)
+        return self.modulestore.get_course(self.courselike_key, depth=None, prefetch_definitions=True)
 
     def process_root(self, root, export_fs):
         with export_fs.open('course.xml', 'w') as course_xml:
@@ -302,7 +302,7 @@ class LibraryExportManager(ExportManager):
         """
         Get the library from the modulestore.
         """
-        return self.modulestore.get_library(self.courselike_key, depth=None, lazy=False)
+        return self.modulestore.get_library(self.courselike_key, depth=None, prefetch_definitions=True)
 
     def process_root(self, root, export_fs):
         """
@@ -0,0 +1,221 @@
+"""
+The mail connections bulk email is sent over.
+
+Opening a connection to the mail server (and logging in to it) costs about as
+much as sending a few messages, so the connections a subtask opens are kept
+open for the next subtasks the worker process runs (see ConnectionPool), and
+several of them can be used at once to send messages concurrently (see
+ConcurrentSender).
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from Queue import Queue
+
+from django.conf import settings
+
+
+log = logging.getLogger(__name__)
+
+
+class ConnectionPool(object):
+    """
+    The open mail connections of a process, which aren't being used.
+
+    At most settings.BULK_EMAIL_CONNECTION_MAX_IDLE connections are kept, for
+    at most settings.BULK_EMAIL_CONNECTION_IDLE_TIMEOUT seconds, since mail
+    servers close the connections which are idle for long. None are kept if
+    BULK_EMAIL_CONNECTION_MAX_IDLE is 0.
+
+    Connections don't survive a fork, so the connections of a parent process
+    are forgotten in its children.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._idle = []
+
+    def acquire(self, get_connection):
+        """
+        Returns an open connection: one which was released, if one is still
+        open, or else a new one, from `get_connection()`.
+        """
+        while True:
+            with self._lock:
+                self._check_pid()
+                if not self._idle:
+                    break
+                connection, released_at = self._idle.pop()
+            if time.time() - released_at < settings.BULK_EMAIL_CONNECTION_IDLE_TIMEOUT and is_open(connection):
+                return connection
+            close_quietly(connection)
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            close_quietly(connection)
+            raise
+        return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Keeps `connection` open for `acquire`, if it is `reusable` and the pool
+        isn't full, and closes it otherwise.
+        """
+        if reusable:
+            with self._lock:
+                self._check_pid()
+                if len(self._idle) < settings.BULK_EMAIL_CONNECTION_MAX_IDLE:
+                    self._idle.append((connection, time.time()))
+                    return
+        connection.close()
+
+    def clear(self):
+        """
+        Closes all the connections kept open.
+        """
+        with self._lock:
+            self._check_pid()
+            idle, self._idle = self._idle, []
+        for connection, __ in idle:
+            close_quietly(connection)
+
+    def _check_pid(self):
+        """
+        Forgets the connections of the parent process, in a child process.
+        Must be called with the lock held.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+
+
+def is_open(connection):
+    """
+    Returns whether the mail server still answers on `connection`.
+
+    Only SMTP connections are checked; other connections are assumed to be
+    open.
+    """
+    smtp_connection = getattr(connection, 'connection', None)
+    if smtp_connection is None or not hasattr(smtp_connection, 'noop'):
+        return True
+    try:
+        return smtp_connection.noop()[0] == 250
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+def close_quietly(connection):
+    """
+    Closes `connection`, which may be broken.
+    """
+    try:
+        connection.close()
+    except Exception:  # pylint: disable=broad-except
+        log.debug('Error closing a bulk email connection', exc_info=True)
+
+
+_POOL = ConnectionPool()
+
+
+def acquire(get_connection):
+    """
+    Returns an open connection from the connection pool of the process, see
+    ConnectionPool.acquire.
+    """
+    return _POOL.acquire(get_connection)
+
+
+def release(connection, reusable=True):
+    """
+    Returns `connection` to the connection pool of the process, see
+    ConnectionPool.release.
+    """
+    _POOL.release(connection, reusable)
+
+
+class Send(object):
+    """
+    A message sent by a ConcurrentSender.
+    """
+    def __init__(self, send):
+        self._send = send
+        self._done = threading.Event()
+        self._exc_info = None
+
+    def run(self, connection):
+        """
+        Sends the message over `connection`.
+        """
+        try:
+            self._send(connection)
+        except Exception:  # pylint: disable=broad-except
+            self._exc_info = sys.exc_info()
+        finally:
+            self._done.set()
+
+    def result(self):
+        """
+        Waits for the message to be sent, and raises the error sending it
+        raised, if any.
+        """
+        self._done.wait()
+        if self._exc_info is not None:
+            exc_type, exc_value, exc_traceback = self._exc_info
+            raise exc_type, exc_value, exc_traceback
+
+
+class ConcurrentSender(object):
+    """
+    Sends messages over several connections at once, from a thread for each
+    connection.
+
+    Messages are sent in the calling thread if there is a single connection.
+    """
+    def __init__(self, connections):
+        self.connections = connections
+        self._queue = None
+        self._threads = []
+        if len(connections) > 1:
+            self._queue = Queue()
+            for connection in connections:
+                thread = threading.Thread(target=self._run, args=(connection,), name='bulk-email-send')
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, send):
+        """
+        Sends a message by calling `send(connection)` with one of the
+        connections, and returns its Send.
+        """
+        message = Send(send)
+        if self._queue is None:
+            message.run(self.connections[0])
+        else:
+            self._queue.put(message)
+        return message
+
+    def close(self):
+        """
+        Waits for the messages submitted to be sent, and stops the threads.
+        """
+        for __ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self, connection):
+        """
+        Sends the messages submitted over `connection`, until closed.
+        """
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            message.run(connection)
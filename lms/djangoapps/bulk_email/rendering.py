@@ -0,0 +1,286 @@
+"""
+Rendering of course email messages for many recipients.
+
+CourseEmailTemplate.render_plaintext and render_htmltext format the whole
+template, and wrap every line of the message (see wrap_message), for each
+recipient. Only a few parts of the message show recipient data though, so
+PrerenderedMessage formats and wraps everything else once per email.
+"""
+import re
+from string import Formatter
+
+from openedx.core.lib.mail_utils import MAX_LINE_LENGTH, wrap_message
+from util.keyword_substitution import substitute_keywords_with_data
+
+from bulk_email.models import COURSE_EMAIL_MESSAGE_BODY_TAG
+
+
+# The context values which are different for each recipient.
+RECIPIENT_KEYS = frozenset(['name', 'email', 'user_id'])
+
+# The %%-encoded keywords substituted with recipient data (see util.keyword_substitution).
+KEYWORD_RE = re.compile(r'(%%[A-Z_]+%%)')
+
+# The chunks textwrap breaks lines between, as wrap_message configures it.
+_CHUNK_RE = re.compile(r'\s+|\S+', re.UNICODE)
+
+
+def _field_names(format_string):
+    """
+    Returns the names of the context values `format_string` refers to,
+    including those in nested format specs.
+    """
+    names = set()
+    for __, field_name, format_spec, __ in Formatter().parse(format_string):
+        if field_name is not None:
+            names.add(re.match(r'[^.[]*', field_name).group())
+        if format_spec:
+            names.update(_field_names(format_spec))
+    return names
+
+
+def _line_spans(text, pos, end, static_parts=()):
+    """
+    Returns the (start, stop) offsets of the lines which wrap_message breaks
+    the line text[pos:end] into, when text[pos] starts a line.
+
+    `static_parts` are (offset, StaticPart) pairs of parts of `text`, whose
+    line breaks are reused rather than found again.
+    """
+    spans = []
+    line_start = pos
+    line_length = 0
+    while pos < end:
+        if line_length == 0:
+            for offset, part in static_parts:
+                if part.start <= pos - offset < part.end:
+                    part_spans, resume_at = part.line_spans(pos - offset)
+                    spans.extend((offset + start, offset + stop) for start, stop in part_spans)
+                    line_start = pos = offset + resume_at
+                    break
+
+        # As textwrap.TextWrapper._wrap_chunks does, with drop_whitespace=False.
+        chunk_length = _CHUNK_RE.match(text, pos, end).end() - pos
+        if line_length + chunk_length <= MAX_LINE_LENGTH:
+            line_length += chunk_length
+            pos += chunk_length
+            continue
+        if chunk_length > MAX_LINE_LENGTH:
+            # A long word, which is broken to fill the line.
+            pos += MAX_LINE_LENGTH - line_length
+        if pos > line_start:
+            spans.append((line_start, pos))
+        line_start = pos
+        line_length = 0
+    if end > line_start:
+        spans.append((line_start, end))
+    return spans
+
+
+def _wrap_line(text, static_parts=()):
+    """
+    Returns wrap_message(text), for a line of text.
+    """
+    if len(text) <= MAX_LINE_LENGTH:
+        return text
+    return u'\n'.join(text[start:stop] for start, stop in _line_spans(text, 0, len(text), static_parts))
+
+
+class StaticPart(object):
+    """
+    A part of a line which is the same for all recipients.
+
+    A line starting within the part, after its first chunk (where it may
+    join the text before it) unless the part starts the line, is broken
+    into the same lines whatever the line the part is in, until the line
+    reaching its last chunk (where it may join the text after it). Those
+    are kept for each offset lines start at.
+    """
+    MAX_LINE_STARTS = 1000
+
+    def __init__(self, text, starts_line):
+        self.text = text
+        self.start = 0 if starts_line else _CHUNK_RE.match(text).end()
+        self.end = self.start
+        for match in _CHUNK_RE.finditer(text, self.start):
+            self.end = match.start()
+        self._line_spans = {}
+
+    def line_spans(self, start):
+        """
+        Returns the (start, stop) offsets of the lines of the part, for a line
+        starting at offset `start` of the part, and the offset the last line,
+        which may go on after the part, starts at.
+        """
+        line_spans = self._line_spans.get(start)
+        if line_spans is None:
+            spans = _line_spans(self.text, start, self.end)
+            line_spans = spans, spans.pop()[0]
+            if len(self._line_spans) < self.MAX_LINE_STARTS:
+                self._line_spans[start] = line_spans
+        return line_spans
+
+
+class PrerenderedMessage(object):
+    """
+    A message body inserted into a template (see CourseEmailTemplate._render),
+    rendered with the context values which are the same for all recipients.
+
+    `render` renders the message for a recipient, whose context must have
+    the same values as `context`, besides those in RECIPIENT_KEYS, and gives
+    the same result as CourseEmailTemplate._render.
+    """
+    def __init__(self, template, message_body, context):
+        self.context = context
+        template_lines = template.split('\n')
+        for tag_index, line in enumerate(template_lines):
+            if COURSE_EMAIL_MESSAGE_BODY_TAG in line:
+                break
+        else:
+            tag_index = None
+
+        if tag_index is None:
+            # The message body isn't part of the message.
+            lines = [self._format_parts(line) for line in template_lines]
+        else:
+            prefix, suffix = template_lines[tag_index].split(COURSE_EMAIL_MESSAGE_BODY_TAG, 1)
+            body_lines = [self._body_parts(line) for line in message_body.split('\n')]
+            body_lines[0] = self._format_parts(prefix) + body_lines[0]
+            body_lines[-1] = body_lines[-1] + self._format_parts(suffix)
+            lines = (
+                [self._format_parts(line) for line in template_lines[:tag_index]] +
+                body_lines +
+                [self._format_parts(line) for line in template_lines[tag_index + 1:]]
+            )
+
+        # Consecutive lines which are the same for all recipients are
+        # wrapped now, and the others when rendering.
+        self.chunks = []
+        static_lines = []
+        for parts in lines:
+            parts = self._join_static_parts(parts)
+            if all(isinstance(part, unicode) for part in parts):
+                static_lines.append(u''.join(parts))
+                continue
+            if static_lines:
+                self.chunks.append(wrap_message(u'\n'.join(static_lines)))
+                static_lines = []
+            self.chunks.append([
+                StaticPart(part, index == 0) if isinstance(part, unicode) else part
+                for index, part in enumerate(parts)
+            ])
+        if static_lines:
+            self.chunks.append(wrap_message(u'\n'.join(static_lines)))
+
+    def _format_parts(self, format_string):
+        """
+        Returns the parts `format_string` is formatted into: the text and the
+        values which are the same for all recipients are formatted now, and
+        the recipient values are functions formatting them with a recipient's
+        context.
+        """
+        try:
+            parts = []
+            for literal_text, field_name, format_spec, conversion in Formatter().parse(format_string):
+                parts.append(unicode(literal_text))
+                if field_name is None:
+                    continue
+                field = u'{{{}{}{}}}'.format(
+                    field_name,
+                    u'!' + conversion if conversion else u'',
+                    u':' + format_spec if format_spec else u'',
+                )
+                if RECIPIENT_KEYS.isdisjoint(_field_names(field)):
+                    parts.append(unicode(field.format(**self.context)))
+                else:
+                    parts.append(self._format_function(field))
+            return parts
+        except (KeyError, IndexError, AttributeError, ValueError):
+            # Fails for every recipient, as it would have without prerendering.
+            return [self._format_function(format_string)]
+
+    @staticmethod
+    def _format_function(format_string):
+        """
+        Returns a function formatting `format_string` with a recipient's context.
+        """
+        return lambda context, values: format_string.format(**context)
+
+    @staticmethod
+    def _body_parts(line):
+        """
+        Returns the parts of a line of the message body: its text, and
+        functions substituting its %%-encoded keywords with a recipient's data.
+        """
+        parts = []
+        for index, text in enumerate(KEYWORD_RE.split(line)):
+            if index % 2 == 0:
+                parts.append(unicode(text))
+                continue
+
+            def substitute(context, values, keyword=text):
+                """
+                Substitutes the keyword, if the context allows it.
+                """
+                if 'user_id' not in context or 'course_id' not in context:
+                    return keyword
+                if keyword not in values:
+                    values[keyword] = substitute_keywords_with_data(keyword, context)
+                return values[keyword]
+            parts.append(substitute)
+        return parts
+
+    @staticmethod
+    def _join_static_parts(parts):
+        """
+        Returns `parts`, with consecutive static parts joined, and empty ones
+        left out.
+        """
+        joined = []
+        for part in parts:
+            if part == u'':
+                continue
+            if isinstance(part, unicode) and joined and isinstance(joined[-1], unicode):
+                joined[-1] += part
+            else:
+                joined.append(part)
+        return joined
+
+    def render(self, context, values=None):
+        """
+        Returns the message for the recipient whose context is `context`.
+
+        `values` caches the recipient's keyword values, and may be shared by
+        the messages rendered for the same recipient.
+        """
+        if values is None:
+            values = {}
+        lines = []
+        for chunk in self.chunks:
+            if isinstance(chunk, unicode):
+                lines.append(chunk)
+                continue
+
+            texts = []
+            static_parts = []
+            offset = 0
+            for part in chunk:
+                if isinstance(part, StaticPart):
+                    static_parts.append((offset, part))
+                    texts.append(part.text)
+                    offset += len(part.text)
+                    continue
+                text = part(context, values)
+                if '\n' in text:
+                    # Ends the line, and starts another.
+                    text_lines = text.split('\n')
+                    lines.append(_wrap_line(u''.join(texts) + text_lines[0], static_parts))
+                    lines.extend(_wrap_line(line) for line in text_lines[1:-1])
+                    text = text_lines[-1]
+                    texts = []
+                    static_parts = []
+                    offset = 0
+                texts.append(text)
+                offset += len(text)
+            lines.append(_wrap_line(u''.join(texts), static_parts))
+        return u'\n'.join(lines)
@@ -6,8 +6,12 @@ to a course.
 import re
 import random
 import json
+import sys
+import threading
+import time
 from time import sleep
-from collections import Counter
+from collections import Counter, deque
+from functools import partial
 import logging
 
 import dogstats_wrapper as dog_stats_api
@@ -34,11 +38,14 @@ from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.urlresolvers import reverse
 
+from bulk_email import connections as bulk_email_connections
+from bulk_email.connections import ConcurrentSender
 from bulk_email.models import (
     CourseEmail, Optout,
     SEND_TO_MYSELF, SEND_TO_ALL, TO_OPTIONS,
     SEND_TO_STAFF,
 )
+from bulk_email.rendering import PrerenderedMessage
 from courseware.courses import get_course
 from openedx.core.lib.courses import course_image_url
 from student.roles import CourseStaffRole, CourseInstructorRole
@@ -369,23 +376,20 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     return new_subtask_status.to_dict()
 
 
-def _filter_optouts_from_recipients(to_list, course_id):
+def _filter_optouts_from_recipients(to_list, optout_user_ids):
     """
-    Filters a recipient list based on student opt-outs for a given course.
+    Filters a recipient list based on student opt-outs for a given course,
+    given the ids of the users who opted out of the course's emails.
 
     Returns the filtered recipient list, as well as the number of optouts
     removed from the list.
     """
-    optouts = Optout.objects.filter(
-        course_id=course_id,
-        user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
-    optouts = set(optouts)
+    optouts = set(recipient['pk'] for recipient in to_list if recipient['pk'] in optout_user_ids)
     # Only count the num_optout for the first time the optouts are calculated.
     # We assume that the number will not change on retries, and so we don't need
     # to calculate it each time.
     num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
+    to_list = [recipient for recipient in to_list if recipient['pk'] not in optouts]
     return to_list, num_optout
 
 
@@ -411,6 +415,85 @@ def _get_source_address(course_id, course_title):
     return from_addr
 
 
+class _PreparedCourseEmail(object):
+    """
+    What the subtasks sending a CourseEmail need, besides their recipients,
+    which is the same for all of them: the email, its from address, its
+    templates rendered with the global email context, and the users who opted
+    out of the course's emails.
+    """
+    def __init__(self, parent_task_id, course_email, global_email_context):
+        self.parent_task_id = parent_task_id
+        self.course_email = course_email
+        self.global_email_context = global_email_context
+        # use the email from address in the CourseEmail, if it is present, otherwise compute it
+        self.from_addr = course_email.from_addr if course_email.from_addr else \
+            _get_source_address(course_email.course_id, global_email_context['course_title'])
+        # use the CourseEmailTemplate that was associated with the CourseEmail
+        self.course_email_template = course_email.get_template()
+        self._optout_user_ids = None
+        self._messages = None
+
+    def optout_user_ids(self):
+        """
+        Returns the ids of the users who opted out of the course's emails.
+        """
+        if self._optout_user_ids is None:
+            self._optout_user_ids = frozenset(
+                Optout.objects.filter(course_id=self.course_email.course_id).values_list('user_id', flat=True)
+            )
+        return self._optout_user_ids
+
+    def messages(self):
+        """
+        Returns the plain text and html messages of the email, as
+        PrerenderedMessages of its CourseEmailTemplate.
+        """
+        if self._messages is None:
+            template = self.course_email_template
+            context = dict(self.global_email_context, course_id=self.course_email.course_id)
+            self._messages = (
+                PrerenderedMessage(template.plain_template, self.course_email.text_message, context),
+                PrerenderedMessage(template.html_template, self.course_email.html_message, context),
+            )
+        return self._messages
+
+
+# The _PreparedCourseEmails of the emails this process sent lately, by
+# (entry_id, email_id), with the time they expire at.
+_PREPARED_EMAILS = {}
+_PREPARED_EMAILS_LOCK = threading.Lock()
+_MAX_PREPARED_EMAILS = 20
+
+
+def _get_prepared_email(entry_id, email_id, global_email_context):
+    """
+    Returns the _PreparedCourseEmail cached for the email, or None if there is
+    none, or it has expired.
+    """
+    entry = _PREPARED_EMAILS.get((entry_id, email_id))
+    if entry is None:
+        return None
+    prepared_email, expires_at = entry
+    if expires_at < time.time() or prepared_email.global_email_context != global_email_context:
+        return None
+    return prepared_email
+
+
+def _set_prepared_email(entry_id, email_id, prepared_email):
+    """
+    Caches the _PreparedCourseEmail of the email for the next subtasks sending it,
+    for settings.BULK_EMAIL_LOCAL_CACHE_TIMEOUT seconds.
+    """
+    timeout = settings.BULK_EMAIL_LOCAL_CACHE_TIMEOUT
+    if timeout <= 0:
+        return
+    with _PREPARED_EMAILS_LOCK:
+        if len(_PREPARED_EMAILS) >= _MAX_PREPARED_EMAILS:
+            _PREPARED_EMAILS.clear()
+        _PREPARED_EMAILS[(entry_id, email_id)] = (prepared_email, time.time() + timeout)
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -440,7 +523,6 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         'failed' count above.
     """
     # Get information from current task's request:
-    parent_task_id = InstructorTask.objects.get(pk=entry_id).task_id
     task_id = subtask_status.task_id
     total_recipients = len(to_list)
     recipient_num = 0
@@ -448,6 +530,13 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     total_recipients_failed = 0
     recipients_info = Counter()
 
+    # The subtasks of an email share what they load and render for it.
+    prepared_email = _get_prepared_email(entry_id, email_id, global_email_context)
+    if prepared_email is None:
+        parent_task_id = InstructorTask.objects.get(pk=entry_id).task_id
+    else:
+        parent_task_id = prepared_email.parent_task_id
+
     log.info(
         "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, TotalRecipients: %s",
         parent_task_id,
@@ -456,16 +545,20 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         total_recipients
     )
 
-    try:
-        course_email = CourseEmail.objects.get(id=email_id)
-    except CourseEmail.DoesNotExist as exc:
-        log.exception(
-            "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Could not find email to send.",
-            parent_task_id,
-            task_id,
-            email_id
-        )
-        raise
+    if prepared_email is None:
+        try:
+            course_email = CourseEmail.objects.get(id=email_id)
+        except CourseEmail.DoesNotExist as exc:
+            log.exception(
+                "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Could not find email to send.",
+                parent_task_id,
+                task_id,
+                email_id
+            )
+            raise
+        prepared_email = _PreparedCourseEmail(parent_task_id, course_email, global_email_context)
+        _set_prepared_email(entry_id, email_id, prepared_email)
+    course_email = prepared_email.course_email
 
     # Exclude optouts (if not a retry):
     # Note that we don't have to do the optout logic at all if this is a retry,
@@ -474,149 +567,207 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     # that existed at that time, and we don't need to keep checking for changes
     # in the Optout list.
     if subtask_status.get_retry_count() == 0:
-        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
+        to_list, num_optout = _filter_optouts_from_recipients(to_list, prepared_email.optout_user_ids())
         subtask_status.increment(skipped=num_optout)
 
     course_title = global_email_context['course_title']
+    from_addr = prepared_email.from_addr
+
+    def check_sent(recipient_num, current_recipient, message):
+        """
+        Waits for the message to `current_recipient` to be sent, and records
+        whether it was.
+
+        Raises the error sending it raised, if the subtask must be retried
+        or fails because of it.
+        """
+        email = current_recipient['email']
+        try:
+            message.result()
+
+        except SMTPDataError as exc:
+            # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+            log.error(
+                "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                Recipient num: %s/%s, Email address: %s",
+                parent_task_id,
+                task_id,
+                email_id,
+                recipient_num,
+                total_recipients,
+                email
+            )
+            if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                # This will cause the outer handler to catch the exception and retry the entire task.
+                raise exc
+            else:
+                # This will fall through and not retry the message.
+                log.warning(
+                    'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                    Email not delivered to %s due to error %s',
+                    parent_task_id,
+                    task_id,
+                    email_id,
+                    recipient_num,
+                    total_recipients,
+                    email,
+                    exc.smtp_error
+                )
+                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                subtask_status.increment(failed=1)
+                return False
 
-    # use the email from address in the CourseEmail, if it is present, otherwise compute it
-    from_addr = course_email.from_addr if course_email.from_addr else \
-        _get_source_address(course_email.course_id, course_title)
+        except SINGLE_EMAIL_FAILURE_ERRORS as exc:
+            # This will fall through and not retry the message.
+            log.error(
+                "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
+                parent_task_id,
+                task_id,
+                email_id,
+                recipient_num,
+                total_recipients,
+                email,
+                exc
+            )
+            dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+            subtask_status.increment(failed=1)
+            return False
 
-    # use the CourseEmailTemplate that was associated with the CourseEmail
-    course_email_template = course_email.get_template()
+        else:
+            log.info(
+                "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                Recipient num: %s/%s, Email address: %s,",
+                parent_task_id,
+                task_id,
+                email_id,
+                recipient_num,
+                total_recipients,
+                email
+            )
+            dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+            if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                log.info('Email with id %s sent to %s', email_id, email)
+            else:
+                log.debug('Email with id %s sent to %s', email_id, email)
+            subtask_status.increment(succeeded=1)
+            return True
+
+    def send(connection, email_msg):
+        """
+        Sends `email_msg` over `connection`.
+        """
+        with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
+            connection.send_messages([email_msg])
+
+    connections = []
+    sender = None
+    reusable = False
     try:
-        connection = get_connection()
-        connection.open()
+        # Open up to BULK_EMAIL_SEND_CONCURRENCY connections (or reuse those
+        # previous subtasks left open), to send that many messages at once.
+        num_connections = max(min(settings.BULK_EMAIL_SEND_CONCURRENCY, len(to_list)), 1)
+        for __ in xrange(num_connections):
+            connections.append(bulk_email_connections.acquire(get_connection))
+        sender = ConcurrentSender(connections)
+
+        # The templates are rendered with the values which are the same for
+        # all recipients once, and with each recipient's values in the loop.
+        prerendered_plaintext, prerendered_html = prepared_email.messages()
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
 
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                course_email.subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
-
-            try:
-                log.info(
-                    "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                    Recipient name: %s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    current_recipient['profile__name'],
-                    email
-                )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
-                    # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+        # Messages are sent to the recipients from the end of the list, a
+        # message per connection at once. The message to the user at the end
+        # of the list is always the first of those being sent, and they are
+        # popped off of the to_list once it has been sent.
+        # That way, the to_list will always contain the recipients remaining to be emailed.
+        # This is convenient for retries, which will need to send to those who haven't
+        # yet been emailed, but not send to those who have already been sent to.
+        sending = deque()
+        next_index = len(to_list) - 1
+        checking = None
+        try:
+            while to_list:
+                while next_index >= 0 and len(sending) < num_connections:
+                    # Update context with user-specific values from the next user to send to.
+                    recipient_num += 1
+                    current_recipient = to_list[next_index]
+                    next_index -= 1
+                    email = current_recipient['email']
+                    email_context['email'] = email
+                    email_context['name'] = current_recipient['profile__name']
+                    email_context['user_id'] = current_recipient['pk']
+                    email_context['course_id'] = course_email.course_id
+
+                    # Construct message content using templates and context:
+                    recipient_values = {}
+                    plaintext_msg = prerendered_plaintext.render(email_context, recipient_values)
+                    html_msg = prerendered_html.render(email_context, recipient_values)
+
+                    # Create email:
+                    email_msg = EmailMultiAlternatives(
+                        course_email.subject,
+                        plaintext_msg,
+                        from_addr,
+                        [email],
+                    )
+                    email_msg.attach_alternative(html_msg, 'text/html')
+
+                    # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+                    # but if a task has been retried for rate-limiting reasons, then we sleep
+                    # for a period of time between all emails within this task.  Choice of
+                    # the value depends on the number of workers that might be sending email in
+                    # parallel, and what the SES throttle rate is.
+                    if subtask_status.retried_nomax > 0:
+                        sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+
+                    log.info(
+                        "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                        Recipient name: %s, Email address: %s",
                         parent_task_id,
                         task_id,
                         email_id,
                         recipient_num,
                         total_recipients,
-                        email,
-                        exc.smtp_error
+                        current_recipient['profile__name'],
+                        email
                     )
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
+                    message = sender.submit(partial(send, email_msg=email_msg))
+                    sending.append((recipient_num, current_recipient, message))
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
-
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
+                checking = sending.popleft()
+                if check_sent(*checking):
+                    total_recipients_successful += 1
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+                    total_recipients_failed += 1
+
+                # Pop the user that was emailed off the end of the list only once they have
+                # successfully been processed.  (That way, if there were a failure that
+                # needed to be retried, the user is still on the list.)
+                recipients_info[checking[1]['email']] += 1
+                to_list.pop()
+                checking = None
+
+        except Exception:  # pylint: disable=broad-except
+            # The subtask is retried or fails: wait for the other messages
+            # being sent, and take the users they were sent to off of the
+            # list, so that they aren't emailed again.
+            exc_info = sys.exc_info()
+            index = len(to_list) - (1 if checking is None else 2)
+            for other_recipient_num, other_recipient, message in sending:
+                try:
+                    check_sent(other_recipient_num, other_recipient, message)
+                except Exception:  # pylint: disable=broad-except
+                    # The user stays on the list.
+                    pass
+                else:
+                    recipients_info[other_recipient['email']] += 1
+                    del to_list[index]
+                index -= 1
+            raise exc_info[0], exc_info[1], exc_info[2]
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -640,6 +791,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                 len(duplicate_recipients),
                 ', '.join(duplicate_recipients)
             )
+        # The connections are left open for the next subtasks.
+        reusable = True
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -697,7 +850,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if sender is not None:
+            sender.close()
+        for connection in connections:
+            bulk_email_connections.release(connection, reusable)
 
 
 def _get_current_task():
@@ -0,0 +1,127 @@
+"""
+Unit tests for the connections bulk email is sent over.
+"""
+import threading
+from smtplib import SMTPServerDisconnected
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock, patch
+from nose.plugins.attrib import attr
+
+from bulk_email.connections import ConcurrentSender, ConnectionPool
+
+
+@attr('shard_1')
+@override_settings(BULK_EMAIL_CONNECTION_MAX_IDLE=2, BULK_EMAIL_CONNECTION_IDLE_TIMEOUT=60)
+class ConnectionPoolTest(TestCase):
+    """Test keeping mail connections open between tasks."""
+
+    def setUp(self):
+        super(ConnectionPoolTest, self).setUp()
+        self.pool = ConnectionPool()
+        self.get_connection = Mock(side_effect=lambda: Mock(connection=None))
+
+    def test_new_connection(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.assertTrue(connection.open.called)
+        self.assertEqual(self.get_connection.call_count, 1)
+
+    def test_reuse(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.pool.release(connection)
+        self.assertFalse(connection.close.called)
+        self.assertIs(self.pool.acquire(self.get_connection), connection)
+        self.assertEqual(self.get_connection.call_count, 1)
+
+    def test_not_reusable(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.pool.release(connection, reusable=False)
+        self.assertTrue(connection.close.called)
+        self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+
+    def test_max_idle(self):
+        connections = [self.pool.acquire(self.get_connection) for __ in range(3)]
+        for connection in connections:
+            self.pool.release(connection)
+        self.assertEqual([connection.close.called for connection in connections], [False, False, True])
+
+    @override_settings(BULK_EMAIL_CONNECTION_MAX_IDLE=0)
+    def test_disabled(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.pool.release(connection)
+        self.assertTrue(connection.close.called)
+
+    def test_idle_timeout(self):
+        connection = self.pool.acquire(self.get_connection)
+        with patch('bulk_email.connections.time.time', return_value=0):
+            self.pool.release(connection)
+        self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+        self.assertTrue(connection.close.called)
+
+    def test_closed_by_server(self):
+        connection = self.pool.acquire(self.get_connection)
+        connection.connection = Mock()
+        connection.connection.noop.side_effect = SMTPServerDisconnected()
+        self.pool.release(connection)
+        self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+        self.assertTrue(connection.close.called)
+
+    def test_open_error(self):
+        connection = Mock()
+        connection.open.side_effect = SMTPServerDisconnected()
+        with self.assertRaises(SMTPServerDisconnected):
+            self.pool.acquire(Mock(return_value=connection))
+        self.assertTrue(connection.close.called)
+
+    def test_fork(self):
+        connection = self.pool.acquire(self.get_connection)
+        self.pool.release(connection)
+        with patch('bulk_email.connections.os.getpid', return_value=-1):
+            self.assertIsNot(self.pool.acquire(self.get_connection), connection)
+
+
+@attr('shard_1')
+class ConcurrentSenderTest(TestCase):
+    """Test sending messages over several connections at once."""
+
+    def test_single_connection(self):
+        connection = Mock()
+        sender = ConcurrentSender([connection])
+        send = Mock()
+        message = sender.submit(send)
+        # Sent before submit returns, in the calling thread.
+        send.assert_called_once_with(connection)
+        message.result()
+        sender.close()
+
+    def test_concurrent(self):
+        connections = [Mock() for __ in range(3)]
+        sender = ConcurrentSender(connections)
+        # Each message is sent once all of them are being sent.
+        lock = threading.Lock()
+        sending = []
+        all_sending = threading.Event()
+
+        def send(connection):
+            """Waits for the other messages."""
+            with lock:
+                sending.append(connection)
+                if len(sending) == len(connections):
+                    all_sending.set()
+            self.assertTrue(all_sending.wait(5))
+
+        messages = [sender.submit(send) for __ in connections]
+        for message in messages:
+            message.result()
+        sender.close()
+        self.assertItemsEqual(sending, connections)
+
+    def test_errors(self):
+        sender = ConcurrentSender([Mock(), Mock()])
+        message = sender.submit(Mock(side_effect=SMTPServerDisconnected()))
+        other_message = sender.submit(Mock())
+        with self.assertRaises(SMTPServerDisconnected):
+            message.result()
+        other_message.result()
+        sender.close()
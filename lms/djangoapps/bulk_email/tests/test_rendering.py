@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for rendering course emails for many recipients.
+"""
+import ddt
+from django.core.management import call_command
+from django.test import TestCase
+from nose.plugins.attrib import attr
+
+from bulk_email.models import CourseEmailTemplate
+from bulk_email.rendering import PrerenderedMessage
+
+
+GLOBAL_CONTEXT = {
+    'course_title': u'Tëst Course',
+    'course_url': u'https://example.com/courses/org/course/run/',
+    'course_image_url': u'https://example.com/c4x/org/course/asset/images_course_image.jpg',
+    'course_end_date': u'Jan 01, 2020 at 00:00 UTC',
+    'account_settings_url': u'https://example.com/account/settings',
+    'email_settings_url': u'https://example.com/dashboard',
+    'platform_name': u'edX',
+    'course_id': u'org/course/run',
+}
+
+RECIPIENTS = [
+    {'name': u'Ann Ürsula', 'email': u'ann@example.com', 'user_id': 5},
+    {'name': u'B' * 950, 'email': u'b@example.com', 'user_id': 6},
+    {'name': u'Two\nLines', 'email': u'two@example.com', 'user_id': 7},
+    {'name': u'', 'email': u'', 'user_id': 8},
+]
+
+LONG_LINE = u'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 40
+
+BODIES = [
+    u'',
+    u'Short message',
+    u'<p>{}</p>'.format(LONG_LINE) * 3,
+    u'Dear %%USER_FULLNAME%%,\n{}\nThe course ends on %%COURSE_END_DATE%%.'.format(LONG_LINE),
+    u'<p>Hi %%USER_FULLNAME%%,</p><p>{}</p><p>%%COURSE_DISPLAY_NAME%%</p>'.format(LONG_LINE),
+    u'%%USER_FULLNAME%%' + u'x' * 2000 + u'%%UNKNOWN%%',
+]
+
+
+@attr('shard_1')
+@ddt.ddt
+class PrerenderedMessageTest(TestCase):
+    """Test that PrerenderedMessage renders as CourseEmailTemplate does."""
+
+    def setUp(self):
+        super(PrerenderedMessageTest, self).setUp()
+        # load initial content (since we don't run migrations as part of tests):
+        call_command("loaddata", "course_email_template.json")
+
+    def assert_renders(self, template, message_body):
+        """Compares the prerendered message with CourseEmailTemplate._render for all RECIPIENTS."""
+        message = PrerenderedMessage(template, message_body, dict(GLOBAL_CONTEXT, name=u'', email=u''))
+        for recipient in RECIPIENTS:
+            context = dict(GLOBAL_CONTEXT, **recipient)
+            self.assertEqual(message.render(context), CourseEmailTemplate._render(template, message_body, context))
+
+    @ddt.data(*BODIES)
+    def test_templates(self, message_body):
+        template = CourseEmailTemplate.get_template()
+        self.assert_renders(template.plain_template, message_body)
+        self.assert_renders(template.html_template, message_body)
+
+    @ddt.data(
+        u'{{message_body}}',
+        u'{name} <{email}>\n{course_title}\n{{message_body}}{email}',
+        u'{name:>40}|{user_id!r}|{course_title:.3}\n' + u'{{message_body}} {email} ' + LONG_LINE,
+        u'No message body, {name}',
+    )
+    def test_format_strings(self, template):
+        for message_body in BODIES:
+            self.assert_renders(template, message_body)
+
+    def test_errors(self):
+        # Fails for each recipient, as CourseEmailTemplate._render does.
+        message = PrerenderedMessage(u'{unknown}\n{{message_body}}', u'Body', dict(GLOBAL_CONTEXT))
+        with self.assertRaises(KeyError):
+            message.render(dict(GLOBAL_CONTEXT, **RECIPIENTS[0]))
+
+    def test_keywords_without_user(self):
+        # Keywords are left as they are unless the context has the user_id.
+        message = PrerenderedMessage(u'{{message_body}}', u'Hi %%USER_FULLNAME%%', dict(GLOBAL_CONTEXT))
+        self.assertEqual(message.render(dict(GLOBAL_CONTEXT, name=u'Ann')), u'Hi %%USER_FULLNAME%%')
+        self.assertEqual(message.render(dict(GLOBAL_CONTEXT, name=u'Ann', user_id=5)), u'Hi Ann')
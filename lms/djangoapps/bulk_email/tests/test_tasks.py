@@ -29,6 +29,7 @@ from celery.states import SUCCESS, FAILURE  # pylint: disable=no-name-in-module,
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -216,6 +217,44 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         self.assertEquals(parent_status.get('succeeded'), num_emails)
         self.assertEquals(parent_status.get('failed'), 0)
 
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4)
+    def test_successful_concurrently(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(get_conn.call_count, 4)
+
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4)
+    def test_retry_concurrently(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        students = self._create_students(num_emails - 1)
+        throttled_email = students[num_emails / 2].email
+        sent_emails = []
+
+        def send_messages(messages):
+            """Throttles the first message to throttled_email."""
+            email = messages[0].to[0]
+            if email == throttled_email and throttled_email not in sent_emails:
+                sent_emails.append(throttled_email)
+                raise SMTPDataError(455, "Throttling: Sending rate exceeded")
+            sent_emails.append(email)
+
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = send_messages
+            self._test_run_with_task(
+                send_bulk_course_email, 'emailed', num_emails, num_emails, retried_nomax=1
+            )
+        # The messages being sent when the subtask was retried aren't sent again.
+        self.assertEquals(sent_emails.count(throttled_email), 2)
+        self.assertEquals(len(set(sent_emails)), num_emails)
+        self.assertEquals(len(sent_emails), num_emails + 1)
+
     def test_unactivated_user(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
@@ -2,9 +2,10 @@
 API entry point to the course_blocks app with top-level
 get_course_blocks and clear_course_from_cache functions.
 """
-from django.core.cache import cache
+from django.core.cache import cache, caches, InvalidCacheBackendError
 from openedx.core.lib.block_structure.manager import BlockStructureManager
 from openedx.core.lib.block_structure.transformers import BlockStructureTransformers
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
 from .transformers import (
@@ -58,12 +59,14 @@ def get_course_blocks(
     """
     if not transformers:
         transformers = BlockStructureTransformers(COURSE_BLOCK_ACCESS_TRANSFORMERS)
-    transformers.usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user)
+    course_key = starting_block_usage_key.course_key
+    transformers.usage_info = CourseUsageInfo(course_key, user)
 
-    return _get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
-        transformers,
-        starting_block_usage_key,
-    )
+    with _published_branch(course_key):
+        return _get_block_structure_manager(course_key).get_transformed(
+            transformers,
+            starting_block_usage_key,
+        )
 
 
 def get_course_in_cache(course_key):
@@ -76,7 +79,8 @@ def get_course_in_cache(course_key):
         BlockStructureBlockData - The collected block structure,
             starting at root_block_usage_key.
     """
-    return _get_block_structure_manager(course_key).get_collected()
+    with _published_branch(course_key):
+        return _get_block_structure_manager(course_key).get_collected()
 
 
 def update_course_in_cache(course_key):
@@ -85,7 +89,8 @@ def update_course_in_cache(course_key):
     block_structure.updated_collected function that updates the block
     structure in the cache for the given course_key.
     """
-    return _get_block_structure_manager(course_key).update_collected()
+    with _published_branch(course_key):
+        return _get_block_structure_manager(course_key).update_collected()
 
 
 def clear_course_from_cache(course_key):
@@ -102,13 +107,35 @@ def clear_course_from_cache(course_key):
     _get_block_structure_manager(course_key).clear()
 
 
+def record_course_publish(course_key):
+    """
+    A higher order function implemented on top of the
+    block_structure.record_publish function that records that the given
+    course was published, so that its cached block structure is
+    re-collected if the update task does not update it in time.
+    """
+    _get_block_structure_manager(course_key).record_publish()
+
+
 def _get_block_structure_manager(course_key):
     """
     Returns the manager for managing Block Structures for the given course.
     """
     store = modulestore()
     course_usage_key = store.make_course_usage_key(course_key)
-    return BlockStructureManager(course_usage_key, store, _get_cache())
+    return BlockStructureManager(course_usage_key, store, _get_cache(), _get_persistent_cache())
+
+
+def _published_branch(course_key):
+    """
+    Returns a context manager that makes the modulestore read the published
+    branch of the given course.
+
+    Block structures are cached by usage key only, and shared by all users,
+    so they are always collected from the published branch, even for
+    requests which prefer drafts (such as on LMS preview hosts).
+    """
+    return modulestore().branch_setting(ModuleStoreEnum.Branch.published_only, course_key)
 
 
 def _get_cache():
@@ -116,3 +143,15 @@ def _get_cache():
     Returns the storage for caching Block Structures.
     """
     return cache
+
+
+def _get_persistent_cache():
+    """
+    Returns the durable storage that cached Block Structures are written
+    through to, or None if the 'block_structure_store' cache is not
+    configured.
+    """
+    try:
+        return caches['block_structure_store']
+    except InvalidCacheBackendError:
+        return None
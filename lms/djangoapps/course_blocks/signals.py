@@ -5,7 +5,7 @@ from django.dispatch.dispatcher import receiver
 
 from xmodule.modulestore.django import SignalHandler
 
-from .api import clear_course_from_cache
+from .api import clear_course_from_cache, record_course_publish
 from .tasks import update_course_in_cache
 
 
@@ -14,9 +14,14 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     """
     Catches the signal that a course has been published in the module
     store and creates/updates the corresponding cache entry.
-    """
-    clear_course_from_cache(course_key)
 
+    The cache entry is not cleared, so that requests continue to use the
+    previously collected course until the update task patches it with
+    the changed blocks, rather than each re-collecting the course.  The
+    publish is recorded so that requests re-collect the course if the
+    task fails or is delayed by more than the cache's MAX_UPDATE_DELAY.
+    """
+    record_course_publish(course_key)
     # The countdown=0 kwarg ensures the call occurs after the signal emitter
     # has finished all operations.
     update_course_in_cache.apply_async([unicode(course_key)], countdown=0)
@@ -1,7 +1,10 @@
 """
 Unit tests for the Course Blocks signals
 """
+from mock import patch
+from time import time
 
+from openedx.core.lib.block_structure.cache import BlockStructureCache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -38,6 +41,26 @@ class CourseBlocksSignalTest(EnableTransformerRegistryMixin, ModuleStoreTestCase
             VisibilityTransformer.get_visible_to_staff_only(updated_block_structure, self.course_usage_key)
         )
 
+    def test_course_publish_without_update(self):
+        get_course_blocks(self.user, self.course_usage_key)
+
+        # The update task fails to run after the publish.
+        self.course.visible_to_staff_only = True
+        with patch('lms.djangoapps.course_blocks.signals.update_course_in_cache.apply_async'):
+            self.store.update_item(self.course, self.user.id)
+
+        stale_block_structure = get_course_blocks(self.user, self.course_usage_key)
+        self.assertFalse(
+            VisibilityTransformer.get_visible_to_staff_only(stale_block_structure, self.course_usage_key)
+        )
+
+        overdue_time = time() + BlockStructureCache.MAX_UPDATE_DELAY + 1
+        with patch('openedx.core.lib.block_structure.cache.time', return_value=overdue_time):
+            updated_block_structure = get_course_blocks(self.user, self.course_usage_key)
+        self.assertTrue(
+            VisibilityTransformer.get_visible_to_staff_only(updated_block_structure, self.course_usage_key)
+        )
+
     def test_course_delete(self):
         get_course_blocks(self.user, self.course_usage_key)
         bs_manager = _get_block_structure_manager(self.course.id)
@@ -30,7 +30,7 @@ from xmodule.course_module import (
 from xmodule.error_module import ErrorDescriptor
 from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.split_test_module import get_split_user_partitions
-from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPartitionGroupError
+from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 
 from external_auth.models import ExternalAuthMap
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
@@ -470,15 +470,27 @@ def _has_group_access(descriptor, user, course_key):
     This function returns a boolean indicating whether or not `user` has
     sufficient group memberships to "load" a block (the `descriptor`)
     """
-    if len(descriptor.user_partitions) == len(get_split_user_partitions(descriptor.user_partitions)):
+    # use merged_group_access which takes group access on the block's
+    # parents / ancestors into account
+    return _has_merged_group_access(descriptor.merged_group_access, descriptor.user_partitions, user, course_key)
+
+
+def _has_merged_group_access(merged_access, user_partitions, user, course_key, user_groups=None):
+    """
+    Returns whether `user` has sufficient group memberships to "load" a block
+    whose merged_group_access is `merged_access`, in a course whose user
+    partitions are `user_partitions`.
+
+    `user_groups`, if given, is a dict in which the user's group in each
+    partition is kept by partition id, so that checking access to several
+    blocks only looks them up once.
+    """
+    if len(user_partitions) == len(get_split_user_partitions(user_partitions)):
         # Short-circuit the process, since there are no defined user partitions that are not
         # user_partitions used by the split_test module. The split_test module handles its own access
         # via updating the children of the split_test module.
         return ACCESS_GRANTED
 
-    # use merged_group_access which takes group access on the block's
-    # parents / ancestors into account
-    merged_access = descriptor.merged_group_access
     # check for False in merged_access, which indicates that at least one
     # partition's group list excludes all students.
     if False in merged_access.values():
@@ -490,21 +502,22 @@ def _has_group_access(descriptor, user, course_key):
     # If a referenced partition could not be found, it will be denied
     # If the partition is found but is no longer active (meaning it's been disabled)
     # then skip the access check for that partition.
+    partitions_by_id = {partition.id: partition for partition in user_partitions}
     partitions = []
     for partition_id, group_ids in merged_access.items():
         try:
-            partition = descriptor._get_user_partition(partition_id)  # pylint: disable=protected-access
-            if partition.active:
-                if group_ids is not None:
-                    partitions.append(partition)
-            else:
-                log.debug(
-                    "Skipping partition with ID %s in course %s because it is no longer active",
-                    partition.id, course_key
-                )
-        except NoSuchUserPartitionError:
+            partition = partitions_by_id[partition_id]
+        except KeyError:
             log.warning("Error looking up user partition, access will be denied.", exc_info=True)
             return ACCESS_DENIED
+        if partition.active:
+            if group_ids is not None:
+                partitions.append(partition)
+        else:
+            log.debug(
+                "Skipping partition with ID %s in course %s because it is no longer active",
+                partition.id, course_key
+            )
 
     # next resolve the group IDs specified within each partition
     partition_groups = []
@@ -521,13 +534,15 @@ def _has_group_access(descriptor, user, course_key):
         return ACCESS_DENIED
 
     # look up the user's group for each partition
-    user_groups = {}
+    if user_groups is None:
+        user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        if partition.id not in user_groups:
+            user_groups[partition.id] = partition.scheme.get_group_for_user(
+                course_key,
+                user,
+                partition,
+            )
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
@@ -538,6 +553,41 @@ def _has_group_access(descriptor, user, course_key):
     return ACCESS_GRANTED
 
 
+def filter_loadable_blocks(user, course, blocks):
+    """
+    Returns the list of the `blocks` of `course` that `user` can load, as
+    has_access(user, 'load', block, course.id) would tell, without loading the
+    blocks from the modulestore.
+
+    Arguments:
+        user (User): the user whose access we are checking.
+        course (CourseDescriptor): the course of the blocks.
+        blocks: objects that describe non-detached blocks of the course, with
+            their .visible_to_staff_only, .merged_group_access, .start and
+            .days_early_for_beta, e.g. discussion index entries.
+
+    The user's roles and groups are only looked up once for all the blocks.
+    """
+    course_key = course.id
+    if isinstance(course_key, CCXLocator):
+        course_key = course_key.to_course_locator()
+
+    if in_preview_mode():
+        if not bool(has_staff_access_to_preview_mode(user=user, obj=course, course_key=course_key)):
+            return []
+
+    if _has_staff_access_to_descriptor(user, course, course_key):
+        return list(blocks)
+
+    user_groups = {}
+    return [
+        block for block in blocks
+        if _visible_to_nonstaff_users(block)
+        and _has_merged_group_access(block.merged_group_access, course.user_partitions, user, course_key, user_groups)
+        and _can_access_descriptor_with_start_date(user, block, course_key)
+    ]
+
+
 def _has_access_descriptor(user, action, descriptor, course_key=None):
     """
     Check if user has access to this descriptor.
@@ -156,11 +156,6 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
@@ -171,6 +166,15 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def enabled_for(cls, course):
+        """
+        Returns whether any override provider is enabled for the given
+        course, that is whether field values of its blocks may differ from
+        one user to another.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -181,6 +185,11 @@ class OverrideFieldData(FieldData):
         Arguments:
             course: The course XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
         request_cache = RequestCache.get_request_cache()
         if course is None:
             cache_key = ENABLED_OVERRIDE_PROVIDERS_KEY.format(course_id='None')
@@ -270,17 +279,21 @@ class OverrideModulestoreFieldData(OverrideFieldData):
             block: An XBlock
             field_data: An instance of FieldData to be wrapped
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = [
-                resolve_dotted(name) for name in settings.MODULESTORE_FIELD_OVERRIDE_PROVIDERS
-            ]
-
         enabled_providers = cls._providers_for_block(block)
         if enabled_providers:
             return cls(field_data, enabled_providers)
 
         return field_data
 
+    @classmethod
+    def enabled_for(cls, course):
+        """
+        Returns whether any modulestore override provider is enabled for the
+        given course, that is whether the modulestore may return field values
+        of its blocks which differ from the stored ones.
+        """
+        return bool(cls._providers_for_block(course))
+
     @classmethod
     def _providers_for_block(cls, block):
         """
@@ -291,6 +304,11 @@ class OverrideModulestoreFieldData(OverrideFieldData):
         Arguments:
             block: An XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = [
+                resolve_dotted(name) for name in settings.MODULESTORE_FIELD_OVERRIDE_PROVIDERS
+            ]
+
         course_id = unicode(block.location.course_key)
         cache_key = ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY.format(course_id=course_id)
 
@@ -4,34 +4,49 @@ from __future__ import division
 import json
 import logging
 import random
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from datetime import datetime
 from functools import partial
+from itertools import islice
 
 import dogstats_wrapper as dog_stats_api
+import numpy
+from ccx_keys.locator import CCXLocator
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.test.client import RequestFactory
+from django.utils.timezone import UTC
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import BlockUsageLocator
 
 from openedx.core.lib.gating import api as gating_api
 from courseware import courses
 from courseware.access import has_access
-from courseware.model_data import FieldDataCache, ScoresClient
+from courseware.model_data import BulkFieldDataCache, FieldDataCache, ScoresClient
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
 from student.models import anonymous_id_for_user
+from student.roles import RoleCache
 from util.db import outer_atomic
 from util.module_utils import yield_dynamic_descriptor_descendants
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import CourseMaxScores, StudentModule
 from .module_render import get_module_for_descriptor
 
 log = logging.getLogger("edx.courseware")
 
+# The number of students whose field data is loaded together when they are
+# graded one by one, see iterate_grades_for.
+STUDENTS_PER_FIELD_DATA_CACHE = 50
+
+# How long the max scores computed when a course is published are kept in the
+# Django cache. They are read from the database again when they expire.
+PUBLISHED_MAX_SCORES_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
 
 class MaxScoresCache(object):
     """
@@ -43,11 +58,20 @@ class MaxScoresCache(object):
     issued a score -- say a problem two students have only seen mentioned in
     their progress pages and never interacted with -- should be worth the same
     number of points for everyone.
+
+    Max scores of a published course version are computed once, when it is
+    published (see update_max_scores_for_course), and all of them are read
+    in a single lookup. Max scores learned while grading are kept in the
+    Django cache one location at a time, for versions that haven't been
+    computed yet.
     """
-    def __init__(self, cache_prefix):
+    def __init__(self, cache_prefix, course_key=None, course_version=None):
         self.cache_prefix = cache_prefix
+        self.course_key = course_key
+        self.course_version = course_version
         self._max_scores_cache = {}
         self._max_scores_updates = {}
+        self._published_max_scores = None
 
     @classmethod
     def create_for_course(cls, course):
@@ -62,21 +86,65 @@ class MaxScoresCache(object):
         """
         if course.subtree_edited_on is None:
             # check for subtree_edited_on because old XML courses doesn't have this attribute
+            course_version = u""
             cache_key = u"{}".format(course.id)
         else:
-            cache_key = u"{}.{}".format(course.id, course.subtree_edited_on.isoformat())
-        return cls(cache_key)
+            course_version = course.subtree_edited_on.isoformat()
+            cache_key = u"{}.{}".format(course.id, course_version)
+        return cls(cache_key, course.id, course_version)
 
     def fetch_from_remote(self, locations):
         """
-        Populate the local cache with values from django's cache
+        Populate the local cache with the published max scores of the course
+        version, and with values from django's cache for the rest.
         """
-        remote_dict = cache.get_many([self._remote_cache_key(loc) for loc in locations])
+        published_max_scores = self._fetch_published_max_scores()
+        locations = [unicode(location) for location in locations]
         self._max_scores_cache = {
+            location: published_max_scores[location]
+            for location in locations
+            if location in published_max_scores
+        }
+        remote_dict = cache.get_many([
+            self._remote_cache_key(location)
+            for location in locations
+            if location not in published_max_scores
+        ])
+        self._max_scores_cache.update({
             self._local_cache_key(remote_key): value
             for remote_key, value in remote_dict.items()
             if value is not None
-        }
+        })
+
+    def _fetch_published_max_scores(self):
+        """
+        Returns the max scores that were computed when the course version was
+        published, from django's cache or else the database.
+
+        An empty result is not cached, since the max scores may not have been
+        computed yet. The max scores of courses without any are cached when
+        they are stored.
+        """
+        if self._published_max_scores is None:
+            self._published_max_scores = {}
+            if self.course_key is not None:
+                cache_key = self._published_cache_key()
+                published_max_scores = cache.get(cache_key)
+                if published_max_scores is None:
+                    published_max_scores = CourseMaxScores.get_max_scores(self.course_key, self.course_version)
+                    if published_max_scores:
+                        cache.set(cache_key, published_max_scores, PUBLISHED_MAX_SCORES_CACHE_TIMEOUT)
+                self._published_max_scores = published_max_scores
+        return self._published_max_scores
+
+    def store_published_max_scores(self, max_scores):
+        """
+        Stores `max_scores`, a dict of location strings to max scores, as
+        the max scores of the published course version.
+        """
+        CourseMaxScores.set_max_scores(self.course_key, self.course_version, max_scores)
+        cache.set(self._published_cache_key(), max_scores, PUBLISHED_MAX_SCORES_CACHE_TIMEOUT)
+        self._published_max_scores = max_scores
 
     def push_to_remote(self):
         """
@@ -95,6 +163,10 @@ class MaxScoresCache(object):
         """Convert a location to a remote cache key (add our prefixing)."""
         return u"grades.MaxScores.{}___{}".format(self.cache_prefix, unicode(location))
 
+    def _published_cache_key(self):
+        """The remote cache key of the published max scores of the course version."""
+        return u"grades.PublishedMaxScores.{}".format(self.cache_prefix)
+
     def _local_cache_key(self, remote_key):
         """Convert a remote cache key to a local cache key (i.e. location str)."""
         return remote_key.split(u"___", 1)[1]
@@ -127,6 +199,59 @@ class MaxScoresCache(object):
         return max_score
 
 
+def update_max_scores_for_course(course_key):
+    """
+    Computes the max scores of the published version of the course and stores
+    them for MaxScoresCache, so that grading it never has to instantiate a
+    block just to learn what it's worth.
+    """
+    course = modulestore().get_course(course_key, depth=None)
+    if course is None:
+        return
+    max_scores = compute_max_scores(course)
+    MaxScoresCache.create_for_course(course).store_published_max_scores(max_scores)
+    log.info(u'Stored the max scores of %d blocks in course %s.', len(max_scores), course_key)
+
+
+def compute_max_scores(course):
+    """
+    Returns the unweighted max scores of all scorable blocks in `course`, as
+    a dict of location strings to max scores.
+
+    Every block is instantiated for an anonymous user without any state, so
+    these are the max scores of problems that haven't been scored yet. This
+    covers the children of blocks with dynamic children, whichever of them a
+    student gets, and skips blocks whose grades are always recalculated.
+    """
+    anonymous_user = AnonymousUser()
+    anonymous_user.known = False  # don't check access, as for noauth xblock requests
+    request = _get_mock_request(anonymous_user)
+    field_data_cache = FieldDataCache([], course.id, anonymous_user)
+
+    max_scores = {}
+    stack = [course]
+    while stack:
+        descriptor = stack.pop()
+        stack.extend(descriptor.get_children())
+        if not descriptor.has_score or descriptor.always_recalculate_grades:
+            continue
+
+        try:
+            problem = get_module_for_descriptor(
+                anonymous_user, request, descriptor, field_data_cache, course.id, course=course
+            )
+            max_score = problem.max_score() if problem is not None else None
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u'Cannot compute the max score of %s.', descriptor.location)
+            continue
+
+        # Problem may be an error module, whose max score is None. Its max
+        # score is then left to be found when a student is graded.
+        if max_score is not None:
+            max_scores[unicode(descriptor.location)] = max_score
+    return max_scores
+
+
 class ProgressSummary(object):
     """
     Wrapper class for the computation of a user's scores across a course.
@@ -202,6 +327,24 @@ def field_data_cache_for_grading(course, user):
     )
 
 
+def bulk_field_data_cache_for_grading(course, users, descriptors=None):
+    """
+    Like field_data_cache_for_grading, but for many `users` at once. The
+    `descriptors` that might affect grading can be passed in if they are
+    already known, so that the course doesn't need to be traversed again.
+    """
+    if descriptors is None:
+        descriptor_filter = partial(descriptor_affects_grading, course.block_types_affecting_grading)
+        return BulkFieldDataCache.cache_for_descriptor_descendents(
+            course.id,
+            users,
+            course,
+            depth=None,
+            descriptor_filter=descriptor_filter
+        )
+    return BulkFieldDataCache(descriptors, course.id, users)
+
+
 def answer_distributions(course_key):
     """
     Given a course_key, return answer distributions in the form of a dictionary
@@ -302,6 +445,14 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
     Also sends a signal to update the minimum grade requirement status.
     """
     grade_summary = _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client)
+    _send_grades_updated(student, course, grade_summary)
+    return grade_summary
+
+
+def _send_grades_updated(student, course, grade_summary):
+    """
+    Sends the GRADES_UPDATED signal for a freshly calculated `grade_summary`.
+    """
     responses = GRADES_UPDATED.send_robust(
         sender=None,
         username=student.username,
@@ -313,8 +464,6 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
     for receiver, response in responses:
         log.info('Signal fired when student grade is calculated. Receiver: %s. Response: %s', receiver, response)
 
-    return grade_summary
-
 
 def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client):
     """
@@ -474,21 +623,31 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
     with outer_atomic():
         # Grading policy might be overriden by a CCX, need to reset it
         course.set_grading_policy(course.grading_policy)
-        grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
+        grade_summary = _summarize_grade(course, totaled_scores, raw_scores if keep_raw_scores else None)
+        max_scores_cache.push_to_remote()
 
-        # We round the grade here, to make sure that the grade is an whole percentage and
-        # doesn't get displayed differently than it gets grades
-        grade_summary['percent'] = round(grade_summary['percent'] * 100 + 0.05) / 100
+    return grade_summary
 
-        letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
-        grade_summary['grade'] = letter_grade
-        grade_summary['totaled_scores'] = totaled_scores   # make this available, eg for instructor download & debugging
-        if keep_raw_scores:
-            # way to get all RAW scores out to instructor
-            # so grader can be double-checked
-            grade_summary['raw_scores'] = raw_scores
 
-        max_scores_cache.push_to_remote()
+def _summarize_grade(course, totaled_scores, raw_scores=None):
+    """
+    Runs the course grader over `totaled_scores` (a dict of section format ->
+    list of section Scores) and returns the grade summary described in
+    `_grade`. `raw_scores` is included in the summary when it is not None.
+    """
+    grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
+
+    # We round the grade here, to make sure that the grade is an whole percentage and
+    # doesn't get displayed differently than it gets grades
+    grade_summary['percent'] = round(grade_summary['percent'] * 100 + 0.05) / 100
+
+    letter_grade = grade_for_percentage(course.grade_cutoffs, grade_summary['percent'])
+    grade_summary['grade'] = letter_grade
+    grade_summary['totaled_scores'] = totaled_scores   # make this available, eg for instructor download & debugging
+    if raw_scores is not None:
+        # way to get all RAW scores out to instructor
+        # so grader can be double-checked
+        grade_summary['raw_scores'] = raw_scores
 
     return grade_summary
 
@@ -755,7 +914,7 @@ def get_score(user, problem_descriptor, module_creator, scores_client, submissio
     return weighted_score(correct, total, problem_descriptor.weight)
 
 
-def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
+def iterate_grades_for(course_or_id, students, keep_raw_scores=False, batch_size=None):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -763,6 +922,9 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     If an error occurred, gradeset will be an empty dict and err_msg will be an
     exception message. If there was no error, err_msg is an empty string.
 
+    If `batch_size` is given, students are graded `batch_size` at a time where
+    possible, see `_iterate_batch_grades_for`.
+
     The gradeset is a dictionary with the following fields:
 
     - grade : A final letter grade.
@@ -778,6 +940,40 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     else:
         course = course_or_id
 
+    if batch_size is not None:
+        for result in _iterate_batch_grades_for(course, students, keep_raw_scores, batch_size):
+            yield result
+        return
+
+    # The field data of STUDENTS_PER_FIELD_DATA_CACHE students is loaded at
+    # once, rather than student by student.
+    grading_descriptors = None
+    students = iter(students)
+    while True:
+        chunk = list(islice(students, STUDENTS_PER_FIELD_DATA_CACHE))
+        if not chunk:
+            break
+
+        # Grading checks access to every block for every student, which
+        # needs their course roles.
+        RoleCache.prefetch(chunk)
+        try:
+            with outer_atomic():
+                bulk_cache = bulk_field_data_cache_for_grading(course, chunk, grading_descriptors)
+            grading_descriptors = bulk_cache.descriptors
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Cannot load field data of %d students in course %s', len(chunk), course.id)
+            bulk_cache = None
+
+        for result in _iterate_grades_for_chunk(course, chunk, keep_raw_scores, bulk_cache):
+            yield result
+
+
+def _iterate_grades_for_chunk(course, students, keep_raw_scores, bulk_cache):
+    """
+    Grades `students` one by one, with their field data from `bulk_cache` if
+    it isn't None, see iterate_grades_for.
+    """
     for student in students:
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
@@ -787,7 +983,17 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
+                if bulk_cache is not None:
+                    gradeset = grade(
+                        student,
+                        request,
+                        course,
+                        keep_raw_scores,
+                        field_data_cache=bulk_cache.field_data_cache(student),
+                        scores_client=bulk_cache.scores_client(student),
+                    )
+                else:
+                    gradeset = grade(student, request, course, keep_raw_scores)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -802,6 +1008,346 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
                 yield student, {}, exc.message
 
 
+def _iterate_batch_grades_for(course, students, keep_raw_scores, batch_size):
+    """
+    Batch mode of iterate_grades_for: grades `students` batch_size at a time
+    against a CourseGradingStructure that is built once for the course.
+    """
+    structure = CourseGradingStructure(course)
+    if not structure.batch_gradable:
+        log.info(u'Course %s cannot be graded in batches, grading students individually.', course.id)
+        for result in iterate_grades_for(course, students, keep_raw_scores):
+            yield result
+        return
+
+    # Grading policy might be overriden by a CCX, need to reset it
+    course.set_grading_policy(course.grading_policy)
+
+    students = iter(students)
+    while True:
+        batch = list(islice(students, batch_size))
+        if not batch:
+            break
+
+        with dog_stats_api.timer('lms.grades.iterate_grades_for.batch', tags=[u'action:{}'.format(course.id)]):
+            try:
+                results = _grade_batch(course, structure, batch, keep_raw_scores)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.exception(
+                    'Cannot grade a batch of %d students in course %s because of exception: %s',
+                    len(batch),
+                    course.id,
+                    exc.message
+                )
+                results = list(iterate_grades_for(course, batch, keep_raw_scores))
+
+        for result in results:
+            yield result
+
+
+def _grade_batch(course, structure, students, keep_raw_scores):
+    """
+    Grades a list of `students` against `structure`, returning a list of
+    (student, gradeset, err_msg) tuples in the same order as `students`.
+
+    A student is graded individually instead when their grade depends on
+    something the batch can't see: a score from the submissions API, or a
+    problem they have no score for whose max score isn't cached yet. The
+    latter puts the max score in the cache, so it's needed at most once per
+    problem.
+    """
+    # We need to import this here to avoid a circular dependency, see _grade.
+    from submissions import api as sub_api  # installed from the edx-submissions repository
+
+    batch_scores = structure.fetch_scores(students)
+    max_scores_cache = MaxScoresCache.create_for_course(course)
+    max_scores_cache.fetch_from_remote(structure.locations)
+    max_score_known = structure.known_max_scores(max_scores_cache)[0]
+
+    individual_results = {}
+    for index, student in enumerate(students):
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(),
+            anonymous_id_for_user(student, course.id)
+        )
+        needs_module = not (batch_scores.has_total[index] | max_score_known).all()
+        if needs_module or structure.submission_locations.intersection(submissions_scores):
+            individual_results[index] = next(iterate_grades_for(course, [student], keep_raw_scores))
+            if needs_module:
+                max_scores_cache.fetch_from_remote(structure.locations)
+                max_score_known = structure.known_max_scores(max_scores_cache)[0]
+
+    batch_indices = [index for index in range(len(students)) if index not in individual_results]
+    row_of = {index: row for row, index in enumerate(batch_indices)}
+    section_totals = structure.aggregate(batch_scores.take(batch_indices), max_scores_cache)
+
+    results = []
+    for index, student in enumerate(students):
+        if index in individual_results:
+            results.append(individual_results[index])
+            continue
+
+        row = row_of[index]
+        totaled_scores = {}
+        raw_scores = []
+        for section_format, sections in structure.sections_by_format:
+            format_scores = []
+            for section in sections:
+                attempted, earned, possible = section_totals[section.index]
+                if attempted[row]:
+                    graded_total = Score(earned[row], possible[row], True, section.name, None)
+                    if keep_raw_scores:
+                        raw_scores += section_totals.raw_scores(section, row)
+                else:
+                    graded_total = Score(0.0, 1.0, True, section.name, None)
+
+                if graded_total.possible > 0:
+                    format_scores.append(graded_total)
+                else:
+                    log.info(
+                        "Unable to grade a section with a total possible score of zero. " +
+                        str(section.location)
+                    )
+
+            totaled_scores[section_format] = format_scores
+
+        grade_summary = _summarize_grade(course, totaled_scores, raw_scores if keep_raw_scores else None)
+        _send_grades_updated(student, course, grade_summary)
+        results.append((student, grade_summary, ""))
+
+    return results
+
+
+GradingSection = namedtuple('GradingSection', 'index name location columns attempted_columns')
+
+
+class CourseGradingStructure(object):
+    """
+    The scorable blocks in a course's graded sections, laid out once so that
+    any number of students can be graded against them.
+
+    Every scorable block gets a column, in the order _grade visits it, and
+    scores are held in (students x columns) arrays so that weighting and
+    section totals are computed for a whole batch of students at once.
+
+    `batch_gradable` is False if a student's grade could depend on more than
+    their StudentModule scores and the cached max scores: when grades must be
+    regenerated by the blocks themselves, children are dynamic, some learners
+    can't load a scored block, or the course is a CCX.
+    """
+    def __init__(self, course):
+        self.course = course
+        self.batch_gradable = not settings.GENERATE_PROFILE_SCORES and not isinstance(course.id, CCXLocator)
+        self.locations = []
+        self.weights = []
+        self.graded = []
+        self.display_names = []
+        self.sections_by_format = []
+        # Locations of all blocks in graded sections, as the submissions API
+        # refers to them.
+        self.submission_locations = set()
+
+        sections = []
+        now = datetime.now(UTC())
+        for section_format, section_descriptions in course.grading_context['graded_sections'].iteritems():
+            format_sections = []
+            for section_description in section_descriptions:
+                section_descriptor = section_description['section_descriptor']
+                columns = []
+                for descriptor in yield_dynamic_descriptor_descendants(section_descriptor, None):
+                    self.submission_locations.add(descriptor.location.to_deprecated_string())
+                    if descriptor.has_dynamic_children() or descriptor.always_recalculate_grades:
+                        self.batch_gradable = False
+                    if descriptor.has_score:
+                        if not _loadable_by_all_learners(descriptor, now):
+                            self.batch_gradable = False
+                        columns.append(len(self.locations))
+                        self.locations.append(descriptor.location)
+                        self.weights.append(descriptor.weight)
+                        self.graded.append(descriptor.graded)
+                        self.display_names.append(descriptor.display_name_with_default_escaped)
+
+                attempted_locations = set(
+                    descriptor.location for descriptor in section_description['xmoduledescriptors']
+                )
+                section = GradingSection(
+                    len(sections),
+                    section_descriptor.display_name_with_default_escaped,
+                    section_descriptor.location,
+                    columns,
+                    [column for column in columns if self.locations[column] in attempted_locations],
+                )
+                sections.append(section)
+                format_sections.append(section)
+            self.sections_by_format.append((section_format, format_sections))
+
+        self._column_of = {location: column for column, location in enumerate(self.locations)}
+
+    def fetch_scores(self, students):
+        """
+        Returns the BatchScores of `students`, from a single StudentModule
+        query.
+        """
+        batch_scores = BatchScores(len(students), len(self.locations))
+        if not self.locations:
+            return batch_scores
+
+        row_of = {student.id: row for row, student in enumerate(students)}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=row_of.keys(),
+            course_id=self.course.id,
+            module_state_key__in=self.locations,
+        )
+        for student_id, location, correct, total in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade'
+        ):
+            # Locations in StudentModule don't necessarily have course key info
+            # attached to them, see ScoresClient.fetch_scores.
+            column = self._column_of.get(UsageKey.from_string(location).map_into_course(self.course.id))
+            if column is not None:
+                batch_scores.add(row_of[student_id], column, correct, total)
+        return batch_scores
+
+    def known_max_scores(self, max_scores_cache):
+        """
+        Returns a tuple of arrays (known, max_scores) for the columns: whether
+        get_score may use a cached max score for a column, and what it is.
+        """
+        known = numpy.zeros(len(self.locations), dtype=bool)
+        max_scores = numpy.zeros(len(self.locations))
+        if settings.FEATURES.get("ENABLE_MAX_SCORE_CACHE"):
+            for column, location in enumerate(self.locations):
+                max_score = max_scores_cache.get(location)
+                if max_score is not None:
+                    known[column] = True
+                    max_scores[column] = max_score
+        return known, max_scores
+
+    def aggregate(self, batch_scores, max_scores_cache):
+        """
+        Returns the SectionTotals of `batch_scores`.
+
+        This does what get_score, weighted_score and aggregate_scores do for
+        a single student, for every student in the batch at once. Every
+        student must either have a max score or a cached max score for every
+        column.
+        """
+        max_score_known, max_scores = self.known_max_scores(max_scores_cache)
+        if not (batch_scores.has_total | max_score_known).all():
+            raise ValueError("Tried to aggregate scores of problems without a known max score.")
+
+        # Without a max score from StudentModule, we fall back on the cached
+        # max score and 0 points earned.
+        correct = numpy.where(batch_scores.has_total, batch_scores.correct, 0.0)
+        total = numpy.where(batch_scores.has_total, batch_scores.total, max_scores)
+
+        weights = numpy.array([numpy.nan if weight is None else weight for weight in self.weights], dtype=float)
+        reweighted = ~numpy.isnan(weights) & (total != 0)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            earned = numpy.where(reweighted, correct * weights / total, correct)
+        possible = numpy.where(reweighted, weights, total)
+
+        # We simply cannot grade a problem that is 12/0
+        graded = numpy.array(self.graded, dtype=bool) & (possible > 0)
+        graded_earned = numpy.where(graded, earned, 0.0)
+        graded_possible = numpy.where(graded, possible, 0.0)
+
+        return SectionTotals(self, batch_scores, earned, possible, graded_earned, graded_possible)
+
+
+class BatchScores(object):
+    """
+    The StudentModule scores of a batch of students, as (students x columns)
+    arrays of a CourseGradingStructure.
+    """
+    def __init__(self, num_students, num_columns):
+        shape = (num_students, num_columns)
+        self.has_row = numpy.zeros(shape, dtype=bool)
+        self.has_total = numpy.zeros(shape, dtype=bool)
+        self.correct = numpy.zeros(shape)
+        self.total = numpy.zeros(shape)
+
+    def add(self, row, column, correct, total):
+        """
+        Records a StudentModule score, which counts only if it has a total.
+        """
+        self.has_row[row, column] = True
+        if total is not None:
+            self.has_total[row, column] = True
+            self.correct[row, column] = correct if correct is not None else 0.0
+            self.total[row, column] = total
+
+    def take(self, rows):
+        """
+        Returns the BatchScores of just the given rows.
+        """
+        batch_scores = BatchScores(0, 0)
+        batch_scores.has_row = self.has_row[rows]
+        batch_scores.has_total = self.has_total[rows]
+        batch_scores.correct = self.correct[rows]
+        batch_scores.total = self.total[rows]
+        return batch_scores
+
+
+class SectionTotals(object):
+    """
+    The graded totals of every section for a batch of students, indexed by
+    section index as tuples of lists (attempted, earned, possible).
+    """
+    def __init__(self, structure, batch_scores, earned, possible, graded_earned, graded_possible):
+        self._structure = structure
+        self._earned = earned
+        self._possible = possible
+        self._totals = {}
+        num_students = batch_scores.has_row.shape[0]
+        for section_format, sections in structure.sections_by_format:  # pylint: disable=unused-variable
+            for section in sections:
+                attempted = batch_scores.has_row[:, section.attempted_columns].any(axis=1)
+                if section.columns:
+                    # Cumulative sums add up the columns in order, just like
+                    # aggregate_scores does, so the totals are the same to the
+                    # last bit.
+                    earned_total = numpy.cumsum(graded_earned[:, section.columns], axis=1)[:, -1]
+                    possible_total = numpy.cumsum(graded_possible[:, section.columns], axis=1)[:, -1]
+                else:
+                    earned_total = possible_total = numpy.zeros(num_students)
+                self._totals[section.index] = (attempted.tolist(), earned_total.tolist(), possible_total.tolist())
+
+    def __getitem__(self, section_index):
+        return self._totals[section_index]
+
+    def raw_scores(self, section, row):
+        """
+        Returns the Scores of every block in `section` for the student in
+        `row`, as _grade would keep them.
+        """
+        structure = self._structure
+        return [
+            Score(
+                float(self._earned[row, column]),
+                float(self._possible[row, column]),
+                structure.graded[column] and bool(self._possible[row, column] > 0),
+                structure.display_names[column],
+                structure.locations[column],
+            )
+            for column in section.columns
+        ]
+
+
+def _loadable_by_all_learners(descriptor, now):
+    """
+    Returns whether has_access(user, 'load', descriptor) is granted to every
+    user, whatever their role, groups or beta testing status.
+    """
+    if descriptor.visible_to_staff_only:
+        return False
+    if descriptor.merged_group_access:
+        return False
+    if 'detached' in descriptor._class_tags:  # pylint: disable=protected-access
+        return True
+    return descriptor.start is None or descriptor.start < now
+
+
 def _get_mock_request(student):
     """
     Make a fake request because grading code expects to be able to look at
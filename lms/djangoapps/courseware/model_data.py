@@ -19,6 +19,9 @@ UserStateSummaryCache: A cache for Scope.user_state_summary
 PreferencesCache: A cache for Scope.preferences
 UserInfoCache: A cache for Scope.user_info
 DjangoOrmFieldCache: A base-class for single-row-per-field caches.
+
+:class:`BulkFieldDataCache`: Prefetches the data of many users at once, for tasks
+    that work on many learners, and hands out a :class:`~FieldDataCache` for each.
 """
 
 import json
@@ -71,6 +74,41 @@ def _all_usage_keys(descriptors, aside_types):
     return usage_ids
 
 
+def _fields_to_cache(descriptors):
+    """
+    Returns a map of scopes to fields in that scope that should be cached
+    """
+    scope_map = defaultdict(set)
+    for descriptor in descriptors:
+        for field in descriptor.fields.values():
+            scope_map[field.scope].add(field)
+    return scope_map
+
+
+def get_child_descriptors(descriptor, depth, descriptor_filter):
+    """
+    Return a list of all child descriptors down to the specified depth
+    that match the descriptor filter. Includes `descriptor`
+
+    descriptor: The parent to search inside
+    depth: The number of levels to descend, or None for infinite depth
+    descriptor_filter(descriptor): A function that returns True
+        if descriptor should be included in the results
+    """
+    if descriptor_filter(descriptor):
+        descriptors = [descriptor]
+    else:
+        descriptors = []
+
+    if depth is None or depth > 0:
+        new_depth = depth - 1 if depth is not None else depth
+
+        for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+            descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
+
+    return descriptors
+
+
 def _all_block_types(descriptors, aside_types):
     """
     Return a set of all block_types for the supplied `descriptors` and for
@@ -372,6 +410,16 @@ class UserStateCache(object):
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    def cache_user_states(self, block_states):
+        """
+        Add field data that was already loaded for this user to this cache.
+
+        Arguments:
+            block_states (dict): A dictionary mapping block keys to the
+                state of the block, as a dict of field names to values.
+        """
+        self._cache.update(block_states)
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -750,30 +798,6 @@ class FieldDataCache(object):
             descriptor_filter is a function that accepts a descriptor and return whether the field data
                 should be cached
         """
-
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
@@ -801,11 +825,21 @@ class FieldDataCache(object):
         """
         Returns a map of scopes to fields in that scope that should be cached
         """
-        scope_map = defaultdict(set)
-        for descriptor in descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
+        return _fields_to_cache(descriptors)
+
+    def _add_prefetched_descriptors_to_cache(self, descriptors, block_states, user_state_summary_cache):
+        """
+        Add `descriptors` to this FieldDataCache, given their Scope.user_state
+        and Scope.user_state_summary data, as loaded by a BulkFieldDataCache.
+        Data in the other scopes is still loaded for this user.
+        """
+        if self.user.is_authenticated():
+            self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
+            self.cache[Scope.user_state].cache_user_states(block_states)
+            self.cache[Scope.user_state_summary] = user_state_summary_cache
+            for scope, fields in self._fields_to_cache(descriptors).items():
+                if scope in (Scope.user_info, Scope.preferences):
+                    self.cache[scope].cache_fields(fields, descriptors, self.asides)
 
     @contract(key=DjangoKeyValueStore.Key)
     def get(self, key):
@@ -930,6 +964,106 @@ class FieldDataCache(object):
         return sum(len(cache) for cache in self.cache.values())
 
 
+class BulkFieldDataCache(object):
+    """
+    A cache of the data for `descriptors` of many users at once, from which a
+    FieldDataCache and a ScoresClient can be handed out for each of the users.
+
+    This is meant for tasks that work on many learners at once, such as
+    rescoring and grade reports: the StudentModules of all of the users are
+    loaded with a single query, rather than one query per user, and the
+    Scope.user_state_summary data, which is the same for all users, is only
+    loaded once. Callers should work on a chunk of users at a time, so that
+    the number of queries is proportional to the number of chunks.
+    """
+    def __init__(self, descriptors, course_id, users, asides=None):
+        """
+        Arguments
+        descriptors: A list of XModuleDescriptors.
+        course_id: The id of the current course
+        users: The users for which to cache data
+        asides: The list of aside types to load, or None to prefetch no asides.
+        """
+        assert isinstance(course_id, CourseKey)
+        self.descriptors = descriptors
+        self.course_id = course_id
+        self.asides = asides if asides is not None else []
+        self.scorable_locations = set(desc.location for desc in descriptors if desc.has_score)
+
+        self._block_states = defaultdict(dict)
+        self._scores = defaultdict(dict)
+        self._user_state_summary_cache = UserStateSummaryCache(self.course_id)
+
+        fields = _fields_to_cache(descriptors)
+        if Scope.user_state_summary in fields:
+            self._user_state_summary_cache.cache_fields(fields[Scope.user_state_summary], descriptors, self.asides)
+        self._fetch_student_modules([user.id for user in users if user.is_authenticated()])
+
+    @classmethod
+    def cache_for_descriptor_descendents(cls, course_id, users, descriptor, depth=None,
+                                         descriptor_filter=lambda descriptor: True, asides=None):
+        """
+        Like FieldDataCache.cache_for_descriptor_descendents, for many `users`.
+        """
+        with modulestore().bulk_operations(descriptor.location.course_key):
+            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
+        return cls(descriptors, course_id, users, asides=asides)
+
+    def _fetch_student_modules(self, user_ids):
+        """
+        Load the StudentModules of all `user_ids` for the cached descriptors.
+
+        This keeps the same state semantics as DjangoXBlockUserStateClient:
+        modules with a state of None or of an empty dict have no state.
+        """
+        if not user_ids:
+            return
+
+        student_modules = StudentModule.objects.chunked_filter(
+            'module_state_key__in',
+            _all_usage_keys(self.descriptors, self.asides),
+            student_id__in=user_ids,
+            course_id=self.course_id,
+        )
+        for student_module in student_modules:
+            usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+            if usage_key in self.scorable_locations:
+                self._scores[student_module.student_id][usage_key] = ScoresClient.Score(
+                    student_module.grade, student_module.max_grade
+                )
+
+            if student_module.state is None:
+                continue
+            state = json.loads(student_module.state)
+            if state == {}:
+                continue
+            self._block_states[student_module.student_id][usage_key] = state
+
+    def field_data_cache(self, user):
+        """
+        Return a FieldDataCache of the cached descriptors for `user`, who must
+        be one of the users of this cache.
+        """
+        field_data_cache = FieldDataCache([], self.course_id, user, asides=self.asides)
+        # Every FieldDataCache gets its own copy of the state, as it may change it.
+        block_states = {
+            block_key: dict(state) for block_key, state in self._block_states[user.id].iteritems()
+        }
+        field_data_cache._add_prefetched_descriptors_to_cache(  # pylint: disable=protected-access
+            self.descriptors, block_states, self._user_state_summary_cache
+        )
+        return field_data_cache
+
+    def scores_client(self, user):
+        """
+        Return a ScoresClient for `user`, with the scores of the cached
+        descriptors already fetched.
+        """
+        scores_client = ScoresClient(self.course_id, user.id)
+        scores_client.cache_scores(self._scores[user.id])
+        return scores_client
+
+
 class ScoresClient(object):
     """
     Basic client interface for retrieving Score information.
@@ -967,6 +1101,14 @@ class ScoresClient(object):
         })
         self._has_fetched = True
 
+    def cache_scores(self, locations_to_scores):
+        """
+        Add scores that were already loaded for this user, as a dict mapping
+        locations to Scores, instead of fetching them.
+        """
+        self._locations_to_scores.update(locations_to_scores)
+        self._has_fetched = True
+
     def get(self, location):
         """
         Get the score for a given location, if it exists.
@@ -12,6 +12,7 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
 import logging
 import itertools
 
@@ -361,6 +362,50 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class CourseMaxScores(models.Model):
+    """
+    The unweighted max scores of all scorable blocks in one published version
+    of a course, computed when that version is published. The version is the
+    course's subtree_edited_on, as used by `courseware.grades.MaxScoresCache`.
+    """
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('course_id', 'course_version'),)
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    course_version = models.CharField(max_length=255, blank=True)
+    max_scores = models.TextField(default='{}')  # location -> max score, stored as JSON
+    created = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def get_max_scores(cls, course_id, course_version):
+        """
+        Returns the max scores of the given course version as a dict of
+        location strings to max scores, which is empty if they haven't been
+        computed.
+        """
+        try:
+            return json.loads(cls.objects.get(course_id=course_id, course_version=course_version).max_scores)
+        except cls.DoesNotExist:
+            return {}
+
+    @classmethod
+    def set_max_scores(cls, course_id, course_version, max_scores):
+        """
+        Stores the max scores of the given course version, replacing those
+        of any other version of the course.
+        """
+        cls.objects.update_or_create(
+            course_id=course_id,
+            course_version=course_version,
+            defaults={'max_scores': json.dumps(max_scores)},
+        )
+        cls.objects.filter(course_id=course_id).exclude(course_version=course_version).delete()
+
+    def __unicode__(self):
+        return u"[CourseMaxScores] {}: {}".format(self.course_id, self.course_version)
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
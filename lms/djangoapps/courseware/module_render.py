@@ -34,6 +34,7 @@ from xblock.reference.plugins import FSService
 import static_replace
 from openedx.core.lib.gating import api as gating_api
 from courseware.access import has_access, get_user_role
+from courseware.access_utils import in_preview_mode
 from courseware.entrance_exams import (
     get_entrance_exam_score,
     user_must_complete_entrance_exam,
@@ -42,22 +43,23 @@ from courseware.entrance_exams import (
 from courseware.masquerade import (
     MasqueradingKeyValueStore,
     filter_displayed_blocks,
+    get_course_masquerade,
     is_masquerading_as_specific_student,
     setup_masquerade,
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache, set_score
 from courseware.models import SCORE_CHANGED
 from edxmako.shortcuts import render_to_string
+from lms.djangoapps.course_blocks.api import COURSE_BLOCK_ACCESS_TRANSFORMERS, get_course_blocks
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from openedx.core.djangoapps.bookmarks.services import BookmarksService
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from lms.djangoapps.verify_student.services import ReverificationService
 from openedx.core.djangoapps.credit.services import CreditService
+from openedx.core.lib.block_structure.transformers import BlockStructureTransformers
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token as xblock_request_token,
@@ -75,10 +77,12 @@ from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.lti_module import LTIModule
 from xmodule.mixin import wrap_with_license
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.x_module import XModuleDescriptor
 from .field_overrides import OverrideFieldData
+from .transformers import TableOfContentsTransformer
 
 log = logging.getLogger(__name__)
 
@@ -118,6 +122,71 @@ def make_track_function(request):
     return function
 
 
+class TocBlock(object):
+    """
+    A block of a course's block structure, transformed for a user, with the
+    attributes of XModules that toc_for_course reads.
+    """
+    def __init__(self, block_structure, block_key):
+        self.block_structure = block_structure
+        self.location = block_key
+
+    @classmethod
+    def for_course(cls, user, course):
+        """
+        Returns the TocBlock of the course, with only the blocks that `user`
+        can access.
+        """
+        transformers = BlockStructureTransformers(
+            COURSE_BLOCK_ACCESS_TRANSFORMERS + [TableOfContentsTransformer()]
+        )
+        block_structure = get_course_blocks(user, course.location, transformers)
+        return cls(block_structure, block_structure.root_block_usage_key)
+
+    def _get_field(self, field_name, default=None):
+        """
+        Returns the value of a field collected by TableOfContentsTransformer.
+        """
+        return self.block_structure.get_xblock_field(self.location, field_name, default)
+
+    @property
+    def url_name(self):  # pylint: disable=missing-docstring
+        return self.location.name
+
+    @property
+    def display_name_with_default_escaped(self):  # pylint: disable=missing-docstring
+        return self._get_field('display_name_with_default_escaped')
+
+    @property
+    def hide_from_toc(self):  # pylint: disable=missing-docstring
+        return self._get_field('hide_from_toc', False)
+
+    @property
+    def format(self):  # pylint: disable=missing-docstring
+        return self._get_field('format')
+
+    @property
+    def due(self):  # pylint: disable=missing-docstring
+        return self._get_field('due')
+
+    @property
+    def graded(self):  # pylint: disable=missing-docstring
+        return self._get_field('graded', False)
+
+    @property
+    def is_time_limited(self):  # pylint: disable=missing-docstring
+        return self._get_field('is_time_limited', False)
+
+    def get_display_items(self):
+        """
+        Returns the TocBlocks of the children of this block.
+        """
+        return [
+            TocBlock(self.block_structure, child_key)
+            for child_key in self.block_structure.get_children(self.location)
+        ]
+
+
 def toc_for_course(user, request, course, active_chapter, active_section, field_data_cache):
     '''
     Create a table of contents from the module store
@@ -140,124 +209,159 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     None if this is not the case.
 
     field_data_cache must include data from the course module and 2 levels of its descendents
+
+    The table of contents is read from the course's cached block structure,
+    transformed for the user, without loading any XModule. Only when the
+    fields of blocks can differ for this user (field overrides are enabled
+    for the course, or the user is masquerading) are the modules of the
+    course bound to the user through field_data_cache instead.
     '''
+    if _toc_needs_modules(user, course):
+        with modulestore().bulk_operations(course.id):
+            course_module = get_module_for_descriptor(
+                user, request, course, field_data_cache, course.id, course=course
+            )
+            return _toc_for_course_module(user, request, course, course_module, active_chapter, active_section)
+
+    if not has_access(user, 'load', course, course.id):
+        return None
+    course_block = TocBlock.for_course(user, course)
+    return _toc_for_course_module(user, request, course, course_block, active_chapter, active_section)
 
-    with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(
-            user, request, course, field_data_cache, course.id, course=course
-        )
-        if course_module is None:
-            return None
 
-        toc_chapters = list()
-        chapters = course_module.get_display_items()
+def _toc_needs_modules(user, course):
+    """
+    Returns whether the table of contents of `course` must be computed from
+    modules bound to `user`, rather than from the course's block structure.
 
-        # Check for content which needs to be completed
-        # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course, user)
+    Block structures are collected from the published branch, so requests
+    which prefer drafts (such as on LMS preview hosts) use the modules too.
+    """
+    return (
+        OverrideFieldData.enabled_for(course) or
+        get_course_masquerade(user, course.id) is not None or
+        in_preview_mode() or
+        modulestore().get_branch_setting() != ModuleStoreEnum.Branch.published_only
+    )
 
-        # Check for gated content
-        gated_content = gating_api.get_gated_content(course, user)
 
-        # The user may not actually have to complete the entrance exam, if one is required
-        if not user_must_complete_entrance_exam(request, user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
+def _toc_for_course_module(user, request, course, course_module, active_chapter, active_section):
+    """
+    Returns the table of contents of toc_for_course, from either the course
+    module or the TocBlock of the course.
+    """
+    if course_module is None:
+        return None
 
-        for chapter in chapters:
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (boo)
-            display_id = slugify(chapter.display_name_with_default_escaped)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
+    toc_chapters = list()
+    chapters = course_module.get_display_items()
 
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
-                continue
+    # Check for content which needs to be completed
+    # before the rest of the content is made available
+    required_content = milestones_helpers.get_required_content(course, user)
 
-            sections = list()
-            for section in chapter.get_display_items():
+    # Check for gated content
+    gated_content = gating_api.get_gated_content(course, user)
 
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
+    # The user may not actually have to complete the entrance exam, if one is required
+    if not user_must_complete_entrance_exam(request, user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
 
-                # Skip the current section if it is gated
-                if gated_content and unicode(section.location) in gated_content:
-                    continue
+    for chapter in chapters:
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (boo)
+        display_id = slugify(chapter.display_name_with_default_escaped)
+        local_hide_from_toc = False
+        if required_content:
+            if unicode(chapter.location) not in required_content:
+                local_hide_from_toc = True
 
-                if not section.hide_from_toc:
-                    section_context = {
-                        'display_name': section.display_name_with_default_escaped,
-                        'url_name': section.url_name,
-                        'format': section.format if section.format is not None else '',
-                        'due': section.due,
-                        'active': active,
-                        'graded': section.graded,
-                    }
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc or local_hide_from_toc:
+            continue
 
+        sections = list()
+        for section in chapter.get_display_items():
+
+            active = (chapter.url_name == active_chapter and
+                      section.url_name == active_section)
+
+            # Skip the current section if it is gated
+            if gated_content and unicode(section.location) in gated_content:
+                continue
+
+            if not section.hide_from_toc:
+                section_context = {
+                    'display_name': section.display_name_with_default_escaped,
+                    'url_name': section.url_name,
+                    'format': section.format if section.format is not None else '',
+                    'due': section.due,
+                    'active': active,
+                    'graded': section.graded,
+                }
+
+                #
+                # Add in rendering context if exam is a timed exam (which includes proctored)
+                #
+
+                section_is_time_limited = (
+                    getattr(section, 'is_time_limited', False) and
+                    settings.FEATURES.get('ENABLE_SPECIAL_EXAMS', False)
+                )
+                if section_is_time_limited:
+                    # We need to import this here otherwise Lettuce test
+                    # harness fails. When running in 'harvest' mode, the
+                    # test service appears to get into trouble with
+                    # circular references (not sure which as edx_proctoring.api
+                    # doesn't import anything from edx-platform). Odd thing
+                    # is that running: manage.py lms runserver --settings=acceptance
+                    # works just fine, it's really a combination of Lettuce and the
+                    # 'harvest' management command
                     #
-                    # Add in rendering context if exam is a timed exam (which includes proctored)
-                    #
+                    # One idea is that there is some coupling between
+                    # lettuce and the 'terrain' Djangoapps projects in /common
+                    # This would need more investigation
+                    from edx_proctoring.api import get_attempt_status_summary
 
-                    section_is_time_limited = (
-                        getattr(section, 'is_time_limited', False) and
-                        settings.FEATURES.get('ENABLE_SPECIAL_EXAMS', False)
-                    )
-                    if section_is_time_limited:
-                        # We need to import this here otherwise Lettuce test
-                        # harness fails. When running in 'harvest' mode, the
-                        # test service appears to get into trouble with
-                        # circular references (not sure which as edx_proctoring.api
-                        # doesn't import anything from edx-platform). Odd thing
-                        # is that running: manage.py lms runserver --settings=acceptance
-                        # works just fine, it's really a combination of Lettuce and the
-                        # 'harvest' management command
-                        #
-                        # One idea is that there is some coupling between
-                        # lettuce and the 'terrain' Djangoapps projects in /common
-                        # This would need more investigation
-                        from edx_proctoring.api import get_attempt_status_summary
-
-                        #
-                        # call into edx_proctoring subsystem
-                        # to get relevant proctoring information regarding this
-                        # level of the courseware
-                        #
-                        # This will return None, if (user, course_id, content_id)
-                        # is not applicable
-                        #
-                        timed_exam_attempt_context = None
-                        try:
-                            timed_exam_attempt_context = get_attempt_status_summary(
-                                user.id,
-                                unicode(course.id),
-                                unicode(section.location)
-                            )
-                        except Exception, ex:  # pylint: disable=broad-except
-                            # safety net in case something blows up in edx_proctoring
-                            # as this is just informational descriptions, it is better
-                            # to log and continue (which is safe) than to have it be an
-                            # unhandled exception
-                            log.exception(ex)
-
-                        if timed_exam_attempt_context:
-                            # yes, user has proctoring context about
-                            # this level of the courseware
-                            # so add to the accordion data context
-                            section_context.update({
-                                'proctoring': timed_exam_attempt_context,
-                            })
-
-                    sections.append(section_context)
-            toc_chapters.append({
-                'display_name': chapter.display_name_with_default_escaped,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
-                'sections': sections,
-                'active': chapter.url_name == active_chapter
-            })
-        return toc_chapters
+                    #
+                    # call into edx_proctoring subsystem
+                    # to get relevant proctoring information regarding this
+                    # level of the courseware
+                    #
+                    # This will return None, if (user, course_id, content_id)
+                    # is not applicable
+                    #
+                    timed_exam_attempt_context = None
+                    try:
+                        timed_exam_attempt_context = get_attempt_status_summary(
+                            user.id,
+                            unicode(course.id),
+                            unicode(section.location)
+                        )
+                    except Exception, ex:  # pylint: disable=broad-except
+                        # safety net in case something blows up in edx_proctoring
+                        # as this is just informational descriptions, it is better
+                        # to log and continue (which is safe) than to have it be an
+                        # unhandled exception
+                        log.exception(ex)
+
+                    if timed_exam_attempt_context:
+                        # yes, user has proctoring context about
+                        # this level of the courseware
+                        # so add to the accordion data context
+                        section_context.update({
+                            'proctoring': timed_exam_attempt_context,
+                        })
+
+                sections.append(section_context)
+        toc_chapters.append({
+            'display_name': chapter.display_name_with_default_escaped,
+            'display_id': display_id,
+            'url_name': chapter.url_name,
+            'sections': sections,
+            'active': chapter.url_name == active_chapter
+        })
+    return toc_chapters
 
 
 def get_module(user, request, usage_key, field_data_cache,
@@ -612,27 +716,23 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # Rewrite, in a single pass:
+    #  - urls beginning in /static to point to course-specific content
+    #  - URLs of the form '/course/' to refer to the root of multicourse directory
+    #    hierarchy of this course
+    #  - intra-courseware links (/jump_to_id/<id>). This format is an improvement
+    #    over the /course/... format for studio authored courses, because it is
+    #    agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
+        course_id=course_id,
+        static_asset_path=static_asset_path or descriptor.static_asset_path,
+        jump_to_id_base_url=reverse(
+            'jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}
+        ),
     ))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
@@ -0,0 +1,28 @@
+"""
+Signal handlers for the courseware app.
+"""
+from ccx_keys.locator import CCXLocator
+from django.conf import settings
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+from .tasks import update_max_scores_for_course
+
+
+@receiver(SignalHandler.course_published)
+def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been published in the module
+    store and computes the max scores of the published version, which
+    are used by the max score cache.
+
+    CCX courses are skipped: their max scores are found as students are
+    graded.
+    """
+    if not settings.FEATURES.get("ENABLE_MAX_SCORE_CACHE") or isinstance(course_key, CCXLocator):
+        return
+
+    # The countdown=0 kwarg ensures the call occurs after the signal emitter
+    # has finished all operations.
+    update_max_scores_for_course.apply_async([unicode(course_key)], countdown=0)
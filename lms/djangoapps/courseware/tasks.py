@@ -0,0 +1,21 @@
+"""
+Asynchronous tasks for the courseware app.
+"""
+import logging
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey
+
+from . import grades
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task()
+def update_max_scores_for_course(course_key):
+    """
+    Computes and stores the max scores of the published version of the
+    specified course.
+    """
+    course_key = CourseKey.from_string(course_key)
+    grades.update_max_scores_for_course(course_key)
@@ -1,6 +1,7 @@
 """
 Test grade calculation.
 """
+from django.core.cache import cache
 from django.http import Http404
 from django.test import TestCase
 from django.test.client import RequestFactory
@@ -11,15 +12,18 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
 
 from courseware.grades import (
+    _grade,
     field_data_cache_for_grading,
     grade,
     iterate_grades_for,
     MaxScoresCache,
     ProgressSummary,
+    update_max_scores_for_course,
     get_module_score
 )
 from courseware.module_render import get_module
 from courseware.model_data import FieldDataCache, set_score
+from courseware.models import CourseMaxScores
 from courseware.tests.helpers import (
     LoginEnrollmentTestCase,
     get_request_for_user
@@ -27,11 +31,12 @@ from courseware.tests.helpers import (
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -42,7 +47,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 @attr('shard_1')
@@ -192,6 +197,79 @@ class TestMaxScoresCache(SharedModuleStoreTestCase):
         self.assertEqual(max_scores_cache.num_cached_from_remote(), 1)
 
 
+@patch.dict("django.conf.settings.FEATURES", {"ENABLE_MAX_SCORE_CACHE": True})
+class TestPublishedMaxScores(SharedModuleStoreTestCase):
+    """
+    Tests for the max scores computed when a course is published.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestPublishedMaxScores, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category="chapter")
+        sequential = ItemFactory.create(parent=chapter, category="sequential", graded=True, format="Homework")
+        vertical = ItemFactory.create(parent=sequential, category="vertical")
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 3',
+            choices=[False, False, True, False],
+            choice_names=['choice_0', 'choice_1', 'choice_2', 'choice_3']
+        )
+        cls.problems = [
+            ItemFactory.create(parent=vertical, category="problem", data=problem_xml) for __ in range(2)
+        ]
+
+    def setUp(self):
+        super(TestPublishedMaxScores, self).setUp()
+        self.course = modulestore().get_course(self.course.id, depth=None)
+        self.locations = [unicode(problem.location) for problem in self.problems]
+        update_max_scores_for_course(self.course.id)
+
+    def test_stored_max_scores(self):
+        self.assertEqual(
+            CourseMaxScores.get_max_scores(self.course.id, self.course.subtree_edited_on.isoformat()),
+            {location: 1 for location in self.locations}
+        )
+
+    def test_fetch_in_one_lookup(self):
+        cache.clear()
+        max_scores_cache = MaxScoresCache.create_for_course(self.course)
+        with self.assertNumQueries(1):
+            max_scores_cache.fetch_from_remote(self.locations)
+        self.assertEqual(max_scores_cache.num_cached_from_remote(), 2)
+        self.assertEqual(max_scores_cache.get(self.locations[0]), 1)
+
+        # The next lookup comes from django's cache.
+        max_scores_cache = MaxScoresCache.create_for_course(self.course)
+        with self.assertNumQueries(0):
+            max_scores_cache.fetch_from_remote(self.locations)
+        self.assertEqual(max_scores_cache.num_cached_from_remote(), 2)
+
+    def test_fetch_before_stored(self):
+        cache.clear()
+        course_version = self.course.subtree_edited_on.isoformat()
+        CourseMaxScores.objects.filter(course_id=self.course.id).delete()
+        max_scores_cache = MaxScoresCache.create_for_course(self.course)
+        max_scores_cache.fetch_from_remote(self.locations)
+        self.assertEqual(max_scores_cache.num_cached_from_remote(), 0)
+
+        # The max scores are used as soon as they are stored, as the empty
+        # result was not cached.
+        CourseMaxScores.set_max_scores(self.course.id, course_version, {location: 1 for location in self.locations})
+        max_scores_cache = MaxScoresCache.create_for_course(self.course)
+        max_scores_cache.fetch_from_remote(self.locations)
+        self.assertEqual(max_scores_cache.num_cached_from_remote(), 2)
+
+    def test_grading_does_not_instantiate_problems(self):
+        student = UserFactory.create()
+        CourseEnrollment.enroll(student, self.course.id)
+        set_score(student.id, self.problems[0].location, 1, 1)
+        with patch('xmodule.capa_base.CapaMixin.max_score') as mock_max_score:
+            gradeset = grade(student, RequestFactory().get('/'), self.course)
+        self.assertFalse(mock_max_score.called)
+        homework_score = gradeset['totaled_scores']['Homework'][0]
+        self.assertEqual((homework_score.earned, homework_score.possible), (1, 2))
+
+
 class TestFieldDataCacheScorableLocations(SharedModuleStoreTestCase):
     """
     Make sure we can filter the locations we pull back student state for via
@@ -512,3 +590,89 @@ def answer_problem(course, request, problem, score=1):
         field_data_cache,
     )._xmodule
     module.system.publish(problem, 'grade', grade_dict)
+
+
+@attr('shard_1')
+class TestBatchGradeIteration(SharedModuleStoreTestCase):
+    """
+    Test that grading students in batches gives the same gradesets as
+    grading them one at a time.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestBatchGradeIteration, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category="chapter", display_name="Test Chapter")
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 3',
+            choices=[False, False, True, False],
+            choice_names=['choice_0', 'choice_1', 'choice_2', 'choice_3']
+        )
+        cls.problems = []
+        for section_index, section_format in enumerate(['Homework', 'Homework', 'Midterm Exam']):
+            sequential = ItemFactory.create(
+                parent=chapter,
+                category='sequential',
+                display_name="Test Sequential {}".format(section_index),
+                graded=True,
+                format=section_format
+            )
+            vertical = ItemFactory.create(parent=sequential, category='vertical', display_name='Test Vertical')
+            for weight in [None, 3]:
+                cls.problems.append(
+                    ItemFactory.create(
+                        parent=vertical,
+                        category="problem",
+                        display_name="Test Problem {} {}".format(section_index, weight),
+                        data=problem_xml,
+                        weight=weight
+                    )
+                )
+
+    def setUp(self):
+        super(TestBatchGradeIteration, self).setUp()
+        self.students = [UserFactory.create() for __ in range(5)]
+        for student in self.students:
+            CourseEnrollment.enroll(student, self.course.id)
+
+    def assert_same_gradesets(self, keep_raw_scores=False):
+        """
+        Asserts that batch grading gives the same gradesets as grading
+        students individually.
+        """
+        individual_results = list(iterate_grades_for(self.course, self.students, keep_raw_scores))
+        batch_results = list(iterate_grades_for(self.course, self.students, keep_raw_scores, batch_size=2))
+        self.assertEqual(batch_results, individual_results)
+        self.assertEqual([student for student, __, __ in batch_results], self.students)
+        self.assertTrue(all(gradeset for __, gradeset, __ in batch_results))
+
+    def test_no_scores(self):
+        self.assert_same_gradesets()
+
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_MAX_SCORE_CACHE": True})
+    def test_partial_scores(self):
+        # Leave every other problem unanswered, so that the batch has to rely
+        # on cached max scores.
+        for student_index, student in enumerate(self.students):
+            for problem_index, problem in enumerate(self.problems):
+                if (student_index + problem_index) % 2:
+                    set_score(student.id, problem.location, (student_index + problem_index) % 3 / 2.0, 1)
+        self.assert_same_gradesets()
+        self.assert_same_gradesets(keep_raw_scores=True)
+
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_MAX_SCORE_CACHE": False})
+    def test_all_scores_without_max_score_cache(self):
+        for student_index, student in enumerate(self.students):
+            for problem_index, problem in enumerate(self.problems):
+                set_score(student.id, problem.location, (student_index * problem_index) % 4 / 3.0, 1)
+        with patch('courseware.grades._grade', wraps=_grade) as mock_grade:
+            self.assert_same_gradesets(keep_raw_scores=True)
+        # Every student has a max score for every problem, so only the
+        # individual grading called _grade.
+        self.assertEqual(mock_grade.call_count, len(self.students))
+
+    def test_course_not_batch_gradable(self):
+        with patch('courseware.grades._loadable_by_all_learners', return_value=False):
+            with patch('courseware.grades._grade', wraps=_grade) as mock_grade:
+                self.assert_same_gradesets()
+        self.assertEqual(mock_grade.call_count, 2 * len(self.students))
@@ -6,7 +6,8 @@ from mock import Mock, patch
 from nose.plugins.attrib import attr
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import BulkFieldDataCache, DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import ScoresClient
 from courseware.models import StudentModule, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -283,6 +284,52 @@ class TestMissingStudentModule(TestCase):
             self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
 
+@attr('shard_1')
+class TestBulkFieldDataCache(TestCase):
+    """Tests for prefetching user_state of many users via BulkFieldDataCache"""
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestBulkFieldDataCache, self).setUp()
+        self.users = []
+        for index in range(3):
+            student_module = StudentModuleFactory(
+                state=json.dumps({'a_field': index}), grade=index, max_grade=2,
+            )
+            self.users.append(student_module.student)
+        # A user who has never seen the problem
+        self.users.append(UserFactory.create())
+
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.descriptor.location = location('usage_id')
+        self.descriptor.has_score = True
+
+    def test_single_query_for_all_users(self):
+        with self.assertNumQueries(1):
+            BulkFieldDataCache([self.descriptor], course_id, self.users)
+
+    def test_field_data_cache_per_user(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, self.users)
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users[:3]):
+                kvs = DjangoKeyValueStore(bulk_cache.field_data_cache(user))
+                key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+                self.assertEquals(index, kvs.get(key))
+
+            kvs = DjangoKeyValueStore(bulk_cache.field_data_cache(self.users[3]))
+            key = DjangoKeyValueStore.Key(Scope.user_state, self.users[3].id, location('usage_id'), 'a_field')
+            self.assertFalse(kvs.has(key))
+
+    def test_scores_client_per_user(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, self.users)
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users[:3]):
+                scores_client = bulk_cache.scores_client(user)
+                self.assertEquals(ScoresClient.Score(index, 2), scores_client.get(location('usage_id')))
+            self.assertIsNone(bulk_cache.scores_client(self.users[3]).get(location('usage_id')))
+
+
 @attr('shard_1')
 class StorageTestBase(object):
     """
@@ -37,6 +37,7 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
+from lms.djangoapps.course_blocks.api import clear_course_from_cache, get_course_in_cache, update_course_in_cache
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from openedx.core.lib.courses import course_image_url
@@ -633,6 +634,8 @@ class TestTOC(ModuleStoreTestCase):
                 self.field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
                     self.course_key, self.request.user, self.toy_course, depth=2
                 )
+        # The table of contents is read from the cached block structure.
+        update_course_in_cache(self.course_key)
 
     # Mongo makes 3 queries to load the course to depth 2:
     #     - 1 for the course
@@ -641,11 +644,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 5 queries to render the toc:
-    #     - it loads the active version at the start of the bulk operation
-    #     - it loads 4 definitions, because it instantiates 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 5))
+    # Neither makes any query to render the toc, since it reads the cached
+    # block structure of the course.
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 0))
     @ddt.unpack
     def test_toc_toy_from_chapter(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -681,11 +682,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 5 queries to render the toc:
-    #     - it loads the active version at the start of the bulk operation
-    #     - it loads 4 definitions, because it instantiates 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 5))
+    # Neither makes any query to render the toc, since it reads the cached
+    # block structure of the course.
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 0))
     @ddt.unpack
     def test_toc_toy_from_section(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -714,6 +713,76 @@ class TestTOC(ModuleStoreTestCase):
                 self.assertIn(toc_section, actual)
 
 
+    def test_toc_without_modules(self):
+        self.setup_request_and_course(3, 0)
+        with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+            actual = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+            )
+        self.assertFalse(mock_get_module.called)
+        chapters = {chapter['url_name']: chapter for chapter in actual}
+        self.assertTrue(chapters['Overview']['active'])
+        self.assertFalse(chapters['secret:magic']['active'])
+        self.assertEqual(
+            [(section['url_name'], section['active']) for section in chapters['Overview']['sections']],
+            [('Toy_Videos', False), ('Welcome', True), ('video_123456789012', False), ('video_4f66f493ac8f', False)]
+        )
+
+    def test_toc_with_field_overrides(self):
+        self.setup_request_and_course(3, 0)
+        expected = render.toc_for_course(
+            self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+        )
+        # Fields of blocks may differ between users, so the toc is computed
+        # from the course's modules.
+        with patch.object(OverrideFieldData, 'enabled_for', return_value=True):
+            with patch(
+                'courseware.module_render.get_module_for_descriptor', wraps=render.get_module_for_descriptor
+            ) as mock_get_module:
+                actual = render.toc_for_course(
+                    self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+                )
+        self.assertTrue(mock_get_module.called)
+        self.assertEqual(actual, expected)
+
+    def test_toc_on_preview_host(self):
+        self.setup_request_and_course(3, 0)
+        section = self.store.get_item(self.course_key.make_usage_key('sequential', 'Toy_Videos'))
+        vertical = ItemFactory.create(parent_location=section.location, category='vertical', display_name='Published')
+        vertical.display_name = 'Draft'
+        with self.store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, self.course_key):
+            self.store.update_item(vertical, ModuleStoreEnum.UserID.test)
+        self.assertFalse(render._toc_needs_modules(self.request.user, self.toy_course))  # pylint: disable=protected-access
+
+        with patch(
+            'xmodule.modulestore.django.get_current_request_hostname',
+            return_value=settings.FEATURES['PREVIEW_LMS_BASE'],
+        ):
+            # Drafts are preferred, so the toc is computed from the course's modules.
+            self.assertTrue(render._toc_needs_modules(self.request.user, self.toy_course))  # pylint: disable=protected-access
+
+            # The shared block structure is still collected from the published branch.
+            clear_course_from_cache(self.course_key)
+            block_structure = get_course_in_cache(self.course_key)
+        self.assertEqual(
+            block_structure.get_xblock_field(vertical.location, 'display_name_with_default_escaped'), 'Published'
+        )
+
+    def test_toc_hides_blocks_without_access(self):
+        self.setup_request_and_course(3, 0)
+        chapter = self.store.get_item(self.toy_course.id.make_usage_key('chapter', 'secret:magic'))
+        chapter.visible_to_staff_only = True
+        self.store.update_item(chapter, ModuleStoreEnum.UserID.test)
+        update_course_in_cache(self.course_key)
+
+        actual = render.toc_for_course(
+            self.request.user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+        )
+        chapter_names = [chapter['url_name'] for chapter in actual]
+        self.assertIn('Overview', chapter_names)
+        self.assertNotIn('secret:magic', chapter_names)
+
+
 @attr('shard_1')
 @ddt.ddt
 @patch.dict('django.conf.settings.FEATURES', {'ENABLE_SPECIAL_EXAMS': True})
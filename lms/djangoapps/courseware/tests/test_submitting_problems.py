@@ -471,11 +471,13 @@ class TestCourseGrader(TestSubmittingProblems):
         csmh = BaseStudentModuleHistory.get_history(student_module)
         self.assertEqual(len(csmh), 3)
 
+    @patch('courseware.grades.MaxScoresCache._fetch_published_max_scores', lambda self: {})
     def test_grade_with_max_score_cache(self):
         """
         Tests that the max score cache is populated after a grading run
         and that the results of grading runs before and after the cache
-        warms are the same.
+        warms are the same, for a course version whose max scores weren't
+        computed when it was published.
         """
         self.basic_setup()
         self.submit_question_answer('p1', {'2_1': 'Correct'})
@@ -0,0 +1,47 @@
+"""
+Block Structure Transformers used by courseware.
+"""
+from openedx.core.lib.block_structure.transformer import BlockStructureTransformer
+
+
+class TableOfContentsTransformer(BlockStructureTransformer):
+    """
+    Collects the fields that the course navigation (see
+    courseware.module_render.toc_for_course) displays, so that it can be
+    rendered from a course's block structure without loading its XModules.
+
+    Access to blocks is enforced by the course_blocks access transformers,
+    so this transformer doesn't change the block structure.
+    """
+    VERSION = 1
+
+    TOC_FIELDS = (
+        'display_name_with_default_escaped',
+        'hide_from_toc',
+        'format',
+        'due',
+        'graded',
+        'is_time_limited',
+    )
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return "table_of_contents"
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.TOC_FIELDS)
+
+    def transform(self, usage_info, block_structure):
+        """
+        Mutates block_structure based on the given usage_info.
+        """
+        pass
@@ -40,10 +40,12 @@ from django_comment_common.signals import (
     comment_voted,
     comment_deleted,
 )
-from django_comment_client.utils import get_accessible_discussion_modules, is_commentable_cohorted
+from django_comment_client.utils import get_accessible_discussion_entries, is_commentable_cohorted
 from lms.djangoapps.discussion_api.pagination import DiscussionAPIPagination
 from lms.lib.comment_client.comment import Comment
 from lms.lib.comment_client.thread import Thread
+from lms.lib.comment_client.transport import start_call
+from lms.lib.comment_client.user import User as CommentClientUser
 from lms.lib.comment_client.utils import CommentClientRequestError
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id
 from openedx.core.lib.exceptions import CourseNotFoundError, PageNotFoundError
@@ -76,10 +78,12 @@ def _get_thread_and_context(request, thread_id, retrieve_kwargs=None):
     try:
         if "mark_as_read" not in retrieve_kwargs:
             retrieve_kwargs["mark_as_read"] = False
+        # The requester is retrieved while the thread and the course are.
+        requester_call = start_call(CommentClientUser.from_django_user(request.user).retrieve)
         cc_thread = Thread(id=thread_id).retrieve(**retrieve_kwargs)
         course_key = CourseKey.from_string(cc_thread["course_id"])
         course = _get_course(course_key, request.user)
-        context = get_context(course, request, cc_thread)
+        context = get_context(course, request, cc_thread, cc_requester=requester_call.result())
         if (
                 not context["is_requester_privileged"] and
                 cc_thread["group_id"] and
@@ -194,7 +198,7 @@ def get_course_topics(request, course_key):
         """
         return module.sort_key or module.discussion_target
     course = _get_course(course_key, request.user)
-    discussion_modules = get_accessible_discussion_modules(course, request.user)
+    discussion_modules = get_accessible_discussion_entries(course, request.user)
     modules_by_category = defaultdict(list)
     for module in discussion_modules:
         modules_by_category[module.discussion_category].append(module)
@@ -22,6 +22,7 @@ from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_sett
 from openedx.core.djangoapps.course_groups.tests.helpers import config_course_cohorts, topic_name_to_id
 from student.tests.factories import UserFactory, AdminFactory, CourseEnrollmentFactory
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.tasks import update_course_structure
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
 from student.roles import CourseStaffRole
 from xmodule.modulestore import ModuleStoreEnum
@@ -238,27 +239,6 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
             discussion_target=None
         )
 
-    def test_cache_returns_correct_key(self):
-        usage_key = utils.get_cached_discussion_key(self.course, 'test_discussion_id')
-        self.assertEqual(usage_key, self.discussion.location)
-
-    def test_cache_returns_none_if_id_is_not_present(self):
-        usage_key = utils.get_cached_discussion_key(self.course, 'bogus_id')
-        self.assertIsNone(usage_key)
-
-    def test_cache_raises_exception_if_course_structure_not_cached(self):
-        CourseStructure.objects.all().delete()
-        with self.assertRaises(utils.DiscussionIdMapIsNotCached):
-            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
-
-    def test_cache_raises_exception_if_discussion_id_not_cached(self):
-        cache = CourseStructure.objects.get(course_id=self.course.id)
-        cache.discussion_id_map_json = None
-        cache.save()
-
-        with self.assertRaises(utils.DiscussionIdMapIsNotCached):
-            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
-
     def test_module_does_not_have_required_keys(self):
         self.assertTrue(utils.has_required_keys(self.discussion))
         self.assertFalse(utils.has_required_keys(self.bad_discussion))
@@ -315,6 +295,46 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'private_discussion_id'))
         self.assertFalse(utils.discussion_category_id_access(self.course, user, 'private_discussion_id'))
 
+    @mock.patch('django_comment_client.utils.modulestore')
+    def test_discussion_index_without_modulestore(self, mock_modulestore):
+        update_course_structure(unicode(self.course.id))
+        self.assertIsNotNone(utils.get_discussion_index(self.course))
+        user = UserFactory.create()
+        metadata = utils.get_cached_discussion_id_map(
+            self.course, ['test_discussion_id', 'private_discussion_id', 'bad_discussion_id'], user
+        )
+        self.assertEqual(metadata.keys(), ['test_discussion_id'])
+        self.assertEqual(metadata['test_discussion_id']['location'], self.discussion.location)
+        self.assertTrue(utils.discussion_category_id_access(self.course, user, 'test_discussion_id_2'))
+        self.assertFalse(utils.discussion_category_id_access(self.course, user, 'private_discussion_id'))
+        self.assertEqual(
+            set(utils.get_discussion_categories_ids(self.course, None, include_all=True)),
+            set(self.course.top_level_discussion_topic_ids) | {
+                'test_discussion_id', 'test_discussion_id_2', 'private_discussion_id'
+            }
+        )
+        self.assertFalse(mock_modulestore.called)
+
+    def test_discussion_index_matches_modules(self):
+        ItemFactory.create(
+            parent_location=self.course.location,
+            category='discussion',
+            discussion_id='future_discussion_id',
+            discussion_category='Chapter 4',
+            discussion_target='Coming Soon',
+            start=datetime.datetime.now(UTC) + datetime.timedelta(days=1)
+        )
+        update_course_structure(unicode(self.course.id))
+        self.assertIsNotNone(utils.get_discussion_index(self.course))
+        for user in (self.user, UserFactory.create()):
+            discussion_ids = utils.get_discussion_categories_ids(self.course, user)
+            id_map = utils.get_discussion_id_map(self.course, user)
+            category_map = utils.get_discussion_category_map(self.course, user)
+            with mock.patch('django_comment_client.utils.get_discussion_index', return_value=None):
+                self.assertEqual(discussion_ids, utils.get_discussion_categories_ids(self.course, user))
+                self.assertEqual(id_map, utils.get_discussion_id_map(self.course, user))
+                self.assertEqual(category_map, utils.get_discussion_category_map(self.course, user))
+
 
 class CategoryMapTestMixin(object):
     """
@@ -1090,6 +1110,18 @@ class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase
             requesting_user=self.non_cohorted_user
         )
 
+    def test_discussion_index(self):
+        """
+        Verify that the discussion index gives each user the same topics as
+        the discussion modules.
+        """
+        update_course_structure(unicode(self.course.id))
+        self.assertIsNotNone(utils.get_discussion_index(self.course))
+        for user in [self.staff_user, self.alpha_user, self.beta_user, self.non_cohorted_user]:
+            category_map = utils.get_discussion_category_map(self.course, user)
+            with mock.patch('django_comment_client.utils.get_discussion_index', return_value=None):
+                self.assertEqual(category_map, utils.get_discussion_category_map(self.course, user))
+
 
 class JsonResponseTestCase(TestCase, UnicodeTestMixin):
     def _test_unicode_data(self, text):
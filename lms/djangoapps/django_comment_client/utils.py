@@ -22,7 +22,8 @@ from django_comment_client.settings import MAX_COMMENT_DEPTH
 from edxmako import lookup_template
 
 from courseware import courses
-from courseware.access import has_access
+from courseware.access import has_access, filter_loadable_blocks
+from courseware.field_overrides import OverrideModulestoreFieldData
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_course_cohorted
@@ -137,6 +138,33 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
     ]
 
 
+def get_discussion_index(course):
+    """
+    Returns the discussion index of the course (see CourseStructure.discussion_index),
+    or None if it wasn't generated, or if it can't be used because the modulestore
+    overrides the fields of the course's modules (e.g. in self-paced courses).
+    """
+    if OverrideModulestoreFieldData.enabled_for(course):
+        return None
+    return CourseStructure.get_discussion_index(course.id)
+
+
+def get_accessible_discussion_entries(course, user, include_all=False):
+    """
+    Return a list of all valid discussion modules in this course that are
+    accessible to the given user, as get_accessible_discussion_modules does,
+    but from the discussion index of the course when it can be used: the
+    modules are then described by their DiscussionIndexEntry, whose attributes
+    are the same, and the user's access to all of them is checked at once.
+    """
+    discussion_index = get_discussion_index(course)
+    if discussion_index is None:
+        return get_accessible_discussion_modules(course, user, include_all=include_all)
+
+    entries = [entry for entry in discussion_index if has_required_keys(entry)]
+    return entries if include_all else filter_loadable_blocks(user, course, entries)
+
+
 def get_discussion_id_map_entry(module):
     """
     Returns a tuple of (discussion_id, metadata) suitable for inclusion in the results of get_discussion_id_map().
@@ -150,44 +178,21 @@ def get_discussion_id_map_entry(module):
     )
 
 
-class DiscussionIdMapIsNotCached(Exception):
-    """Thrown when the discussion id map is not cached for this course, but an attempt was made to access it."""
-    pass
-
-
-def get_cached_discussion_key(course, discussion_id):
-    """
-    Returns the usage key of the discussion module associated with discussion_id if it is cached. If the discussion id
-    map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
-    raises a DiscussionIdMapIsNotCached exception.
-    """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
-        raise DiscussionIdMapIsNotCached()
-
-
 def get_cached_discussion_id_map(course, discussion_ids, user):
     """
-    Returns a dict mapping discussion_ids to respective discussion module metadata if it is cached and visible to the
-    user. If not, returns the result of get_discussion_id_map
+    Returns a dict mapping discussion_ids to respective discussion module metadata if the discussion index is available
+    and they are visible to the user. If not, returns the result of get_discussion_id_map
     """
-    try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            module = modulestore().get_item(key)
-            if not (has_required_keys(module) and has_access(user, 'load', module, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(module))
-        return dict(entries)
-    except DiscussionIdMapIsNotCached:
-        return get_discussion_id_map(course, user)
+    discussion_index = get_discussion_index(course)
+    if discussion_index is None:
+        return dict(map(get_discussion_id_map_entry, get_accessible_discussion_modules(course, user)))
+
+    discussion_ids = set(discussion_ids)
+    entries = [
+        entry for entry in discussion_index
+        if entry.discussion_id in discussion_ids and has_required_keys(entry)
+    ]
+    return dict(map(get_discussion_id_map_entry, filter_loadable_blocks(user, course, entries)))
 
 
 def get_discussion_id_map(course, user):
@@ -195,7 +200,7 @@ def get_discussion_id_map(course, user):
     Transform the list of this course's discussion modules (visible to a given user) into a dictionary of metadata keyed
     by discussion_id.
     """
-    return dict(map(get_discussion_id_map_entry, get_accessible_discussion_modules(course, user)))
+    return dict(map(get_discussion_id_map_entry, get_accessible_discussion_entries(course, user)))
 
 
 def _filter_unstarted_categories(category_map):
@@ -301,7 +306,7 @@ def get_discussion_category_map(course, user, cohorted_if_in_list=False, exclude
     """
     unexpanded_category_map = defaultdict(list)
 
-    modules = get_accessible_discussion_modules(course, user)
+    modules = get_accessible_discussion_entries(course, user)
 
     course_cohort_settings = get_course_cohort_settings(course.id)
 
@@ -389,20 +394,21 @@ def discussion_category_id_access(course, user, discussion_id):
     """
     Returns True iff the given discussion_id is accessible for user in course.
     Assumes that the commentable identified by discussion_id has a null or 'course' context.
-    Uses the discussion id cache if available, falling back to
-    get_discussion_categories_ids if there is no cache.
+    Uses the discussion index if available, falling back to
+    get_discussion_categories_ids if there is none.
     """
     if discussion_id in course.top_level_discussion_topic_ids:
         return True
-    try:
-        key = get_cached_discussion_key(course, discussion_id)
-        if not key:
-            return False
-        module = modulestore().get_item(key)
-        return has_required_keys(module) and has_access(user, 'load', module, course.id)
-    except DiscussionIdMapIsNotCached:
+    discussion_index = get_discussion_index(course)
+    if discussion_index is None:
         return discussion_id in get_discussion_categories_ids(course, user)
 
+    entries = [
+        entry for entry in discussion_index
+        if entry.discussion_id == discussion_id and has_required_keys(entry)
+    ]
+    return bool(filter_loadable_blocks(user, course, entries))
+
 
 def get_discussion_categories_ids(course, user, include_all=False):
     """
@@ -416,7 +422,7 @@ def get_discussion_categories_ids(course, user, include_all=False):
 
     """
     accessible_discussion_ids = [
-        module.discussion_id for module in get_accessible_discussion_modules(course, user, include_all=include_all)
+        module.discussion_id for module in get_accessible_discussion_entries(course, user, include_all=include_all)
     ]
     return course.top_level_discussion_topic_ids + accessible_discussion_ids
 
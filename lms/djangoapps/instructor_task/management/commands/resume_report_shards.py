@@ -0,0 +1,51 @@
+"""Management command for resuming a sharded instructor report.
+
+Large reports are generated in shards by subtasks of the report's
+InstructorTask. A shard that keeps failing fails the whole report; this
+management command requeues just the shards that failed, and the report is
+completed from the shards that succeeded already once they succeed.
+
+Example usage:
+
+    $ ./manage.py lms resume_report_shards 1234
+
+"""
+import logging
+from django.core.management.base import BaseCommand, CommandError
+
+from instructor_task.models import InstructorTask
+from instructor_task.tasks_helper import resume_report_shards
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Resume the failed shards of a sharded instructor report. """
+
+    args = '<instructor_task_id>'
+    help = 'Requeue the failed shards of a sharded instructor report.'
+
+    def handle(self, *args, **options):
+        """Resume the failed shards of the report.
+
+        Arguments:
+            instructor_task_id (int): Id of the report's InstructorTask.
+
+        Raises:
+            CommandError
+
+        """
+        if len(args) != 1:
+            raise CommandError(u"Usage: resume_report_shards {}".format(self.args))
+
+        try:
+            entry = InstructorTask.objects.get(pk=int(args[0]))
+        except (ValueError, InstructorTask.DoesNotExist):
+            raise CommandError(u"No InstructorTask with id '{}'".format(args[0]))
+
+        if not entry.subtasks or 'report' not in entry.subtasks:
+            raise CommandError(u"InstructorTask {} is not a sharded report".format(entry.id))
+
+        num_resumed = resume_report_shards(entry.id)
+        LOGGER.info(u"Resumed %s failed shards of InstructorTask %s.", num_resumed, entry.id)
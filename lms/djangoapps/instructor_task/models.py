@@ -19,6 +19,7 @@ import csv
 import json
 import hashlib
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -35,6 +36,13 @@ from xmodule_django.models import CourseKeyField
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 
+# Size of the parts in which reports are uploaded to S3. Parts other than the
+# last one must be at least 5 MB.
+REPORT_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+# Size of the buffer through which reports are written to local files.
+REPORT_WRITE_BUFFER_SIZE = 64 * 1024
+
 
 class InstructorTask(models.Model):
     """
@@ -207,6 +215,13 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, rows):
+        """
+        The reverse of `_get_utf8_encoded_rows`, for rows read back from a CSV.
+        """
+        for row in rows:
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -264,6 +279,21 @@ class S3ReportStore(ReportStore):
 
         return key
 
+    def partial_key_for(self, course_id, filename):
+        """Return the S3 key we would use to store and retrieve a partial
+        report. These are kept out of the course's directory, so that
+        `links_for()` only lists complete reports."""
+        hashed_course_id = hashlib.sha1(course_id.to_deprecated_string())
+
+        key = Key(self.bucket)
+        key.key = "{}/partial/{}/{}".format(
+            self.root_path,
+            hashed_course_id.hexdigest(),
+            filename
+        )
+
+        return key
+
     def store(self, course_id, filename, buff, config=None):
         """
         Store the contents of `buff` in a directory determined by hashing
@@ -275,8 +305,12 @@ class S3ReportStore(ReportStore):
         transparent via the browser). Filenames should end in whatever
         suffix makes sense for the original file, so `.txt` instead of `.gz`
         """
-        key = self.key_for(course_id, filename)
+        self._store_in_key(self.key_for(course_id, filename), buff, config)
 
+    def _store_in_key(self, key, buff, config=None):
+        """
+        Store the contents of `buff` in the S3 `key`, see `store()`.
+        """
         _config = config if config else {}
 
         content_type = _config.get('content_type', 'text/csv')
@@ -307,14 +341,83 @@ class S3ReportStore(ReportStore):
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
+
+        `rows` may be a generator: they are compressed as they are generated,
+        and uploaded in parts of `REPORT_UPLOAD_PART_SIZE`, so that a large
+        report never needs to be held in memory.
+        """
+        self._store_rows_in_key(self.key_for(course_id, filename), rows)
+
+    def _store_rows_in_key(self, key, rows):
+        """
+        Store `rows` as a gzip'd csv file in the S3 `key`, see `store_rows()`.
+
+        Reports that fit in a single part are stored with `_store_in_key()`,
+        larger ones with a multipart upload, which only becomes visible in
+        the bucket once all of its parts are uploaded.
         """
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        multipart_upload = None
+        part_num = 0
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= REPORT_UPLOAD_PART_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            key.key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+                        )
+                    part_num += 1
+                    self._upload_part(multipart_upload, part_num, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self._store_in_key(key, output_buffer)
+            else:
+                self._upload_part(multipart_upload, part_num + 1, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def _upload_part(self, multipart_upload, part_num, buff):
+        """
+        Upload the contents of `buff` as part `part_num` of `multipart_upload`,
+        and empty `buff` for the next part.
+        """
+        buff.seek(0)
+        multipart_upload.upload_part_from_file(buff, part_num)
+        buff.seek(0)
+        buff.truncate()
+
+    def store_partial_rows(self, course_id, filename, rows):
+        """
+        Like `store_rows()`, but for a partial report that will later be
+        read back with `get_partial_rows()`, and that isn't listed by
+        `links_for()`.
+        """
+        self._store_rows_in_key(self.partial_key_for(course_id, filename), rows)
 
-        self.store(course_id, filename, output_buffer)
+    def get_partial_rows(self, course_id, filename):
+        """
+        Yield the rows of a partial report stored with `store_partial_rows()`.
+        The report is downloaded to a temporary file rather than into memory.
+        """
+        with tempfile.TemporaryFile() as temp_file:
+            self.partial_key_for(course_id, filename).get_contents_to_file(temp_file)
+            temp_file.seek(0)
+            for row in self._get_utf8_decoded_rows(csv.reader(GzipFile(fileobj=temp_file, mode="rb"))):
+                yield row
+
+    def delete_partials(self, course_id, filenames):
+        """
+        Delete the partial reports named `filenames`.
+        """
+        self.bucket.delete_keys([self.partial_key_for(course_id, filename).key for filename in filenames])
 
     def links_for(self, course_id):
         """
@@ -365,6 +468,14 @@ class LocalFSReportStore(ReportStore):
         """Return the full path to a given file for a given course."""
         return os.path.join(self.root_path, urllib.quote(course_id.to_deprecated_string(), safe=''), filename)
 
+    def partial_path_to(self, course_id, filename):
+        """Return the full path to a given partial report for a given course.
+        These are kept out of the course's directory, so that `links_for()`
+        only lists complete reports."""
+        return os.path.join(
+            self.root_path, 'partial', urllib.quote(course_id.to_deprecated_string(), safe=''), filename
+        )
+
     def store(self, course_id, filename, buff, config=None):  # pylint: disable=unused-argument
         """
         Given the `course_id` and `filename`, store the contents of `buff` in
@@ -372,10 +483,15 @@ class LocalFSReportStore(ReportStore):
         assumed to be a StringIO objecd (or anything that can flush its contents
         to string using `.getvalue()`).
         """
-        full_path = self.path_to(course_id, filename)
+        self._store_in_path(self.path_to(course_id, filename), buff)
+
+    def _store_in_path(self, full_path, buff):
+        """
+        Store the contents of `buff` in the file at `full_path`, see `store()`.
+        """
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -384,12 +500,58 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        `rows` may be a generator: they are written out through a buffer as
+        they are generated.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        self._store_rows_in_path(self.path_to(course_id, filename), rows)
 
-        self.store(course_id, filename, output_buffer)
+    def _store_rows_in_path(self, full_path, rows):
+        """
+        Store `rows` as a csv file at `full_path`, see `store_rows()`. They
+        are written to a temporary file first, which is only moved to
+        `full_path` once complete.
+        """
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # The temporary file is kept out of the course's directory, so that
+        # `links_for()` doesn't list it.
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.root_path)
+        try:
+            with os.fdopen(temp_fd, "wb", REPORT_WRITE_BUFFER_SIZE) as f:
+                csvwriter = csv.writer(f)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_path, full_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def store_partial_rows(self, course_id, filename, rows):
+        """
+        Like `store_rows()`, but for a partial report that will later be
+        read back with `get_partial_rows()`, and that isn't listed by
+        `links_for()`.
+        """
+        self._store_rows_in_path(self.partial_path_to(course_id, filename), rows)
+
+    def get_partial_rows(self, course_id, filename):
+        """
+        Yield the rows of a partial report stored with `store_partial_rows()`.
+        """
+        with open(self.partial_path_to(course_id, filename), "rb") as f:
+            for row in self._get_utf8_decoded_rows(csv.reader(f)):
+                yield row
+
+    def delete_partials(self, course_id, filenames):
+        """
+        Delete the partial reports named `filenames`.
+        """
+        for filename in filenames:
+            full_path = self.partial_path_to(course_id, filename)
+            if os.path.exists(full_path):
+                os.remove(full_path)
 
     def links_for(self, course_id):
         """
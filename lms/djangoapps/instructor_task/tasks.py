@@ -46,6 +46,7 @@ from instructor_task.tasks_helper import (
     generate_students_certificates,
     upload_proctored_exam_results_report,
     upload_ora2_data,
+    run_report_shard,
 )
 
 
@@ -79,7 +80,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, prefetch_field_data=True)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -301,3 +302,17 @@ def export_ora2_data(entry_id, xmodule_instance_args):
     action_name = ugettext_noop('generated')
     task_fn = partial(upload_ora2_data, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(  # pylint: disable=not-callable
+    default_retry_delay=settings.INSTRUCTOR_REPORT_SHARD_RETRY_DELAY,
+    max_retries=settings.INSTRUCTOR_REPORT_SHARD_MAX_RETRIES,
+)
+def generate_report_shard(entry_id, report_name, action_name, shard, subtask_status_dict):
+    """
+    Generates the part of a sharded report covering the students of `shard`.
+
+    This is a subtask of the report's InstructorTask, which it updates
+    itself, rather than through BaseInstructorTask.
+    """
+    return run_report_shard(entry_id, report_name, action_name, shard, subtask_status_dict)
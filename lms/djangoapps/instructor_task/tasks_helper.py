@@ -9,20 +9,22 @@ from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, islice
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, RETRY
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 from django.db.models import Q
 import dogstats_wrapper as dog_stats_api
 from pytz import UTC
 from StringIO import StringIO
+from uuid import uuid4
 from edxmako.shortcuts import render_to_string
 from instructor.paidcourse_enrollment_report import PaidCourseEnrollmentReportProvider
 from shoppingcart.models import (
@@ -48,7 +50,7 @@ from certificates.api import generate_user_certificates
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.model_data import BulkFieldDataCache, DjangoKeyValueStore, FieldDataCache, get_child_descriptors
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import (
     enrolled_students_features,
@@ -59,6 +61,12 @@ from instructor_analytics.basic import (
 from instructor_analytics.csvs import format_dictlist
 from openassessment.data import OraAggregateData
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    initialize_subtask_info,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -83,6 +91,16 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# The number of students whose scores are loaded and graded together by grade reports.
+GRADES_BATCH_SIZE = 100
+
+# The number of student modules whose field data is loaded together when they
+# are updated, see perform_module_state_update.
+MODULES_PER_FIELD_DATA_CACHE = 100
+
+# Lock expiration should be long enough to allow a sharded report to be merged.
+REPORT_MERGE_LOCK_EXPIRE = 60 * 10
+
 
 class BaseInstructorTask(Task):
     """
@@ -169,6 +187,13 @@ class BaseInstructorTask(Task):
             entry.save_now()
 
 
+class ReportShardError(Exception):
+    """
+    Error signaling that a sharded report could not be completed.
+    """
+    pass
+
+
 class UpdateProblemModuleStateError(Exception):
     """
     Error signaling a fatal condition while updating problem modules.
@@ -298,7 +323,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                prefetch_field_data=False):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -316,6 +342,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prefetch_field_data` is True, the `update_fcn` is also passed a `field_data_cache` keyword argument
+    with the student's field data for the problem. It is loaded for MODULES_PER_FIELD_DATA_CACHE modules at a
+    time, rather than module by module.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -376,23 +406,49 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    if prefetch_field_data:
+        descriptors = []
+        with modulestore().bulk_operations(course_id):
+            for problem_descriptor in problems.values():
+                descriptors.extend(get_child_descriptors(problem_descriptor, None, lambda descriptor: True))
+
+    modules_to_update = iter(modules_to_update.select_related('student'))
+    while True:
+        module_chunk = list(islice(modules_to_update, MODULES_PER_FIELD_DATA_CACHE))
+        if not module_chunk:
+            break
+
+        if prefetch_field_data:
+            bulk_cache = BulkFieldDataCache(
+                descriptors, course_id, set(module.student for module in module_chunk)
+            )
+
+        for module_to_update in module_chunk:
+            task_progress.attempted += 1
+            module_descriptor = problems[unicode(module_to_update.module_state_key)]
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            with dog_stats_api.timer(
+                'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+            ):
+                if prefetch_field_data:
+                    update_status = update_fcn(
+                        module_descriptor,
+                        module_to_update,
+                        field_data_cache=bulk_cache.field_data_cache(module_to_update.student),
+                    )
+                else:
+                    update_status = update_fcn(module_descriptor, module_to_update)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    # If the update_fcn returns true, then it performed some kind of work.
+                    # Logging of failures is left to the update_fcn itself.
+                    task_progress.succeeded += 1
+                elif update_status == UPDATE_STATUS_FAILED:
+                    task_progress.failed += 1
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    task_progress.skipped += 1
+                else:
+                    raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
     return task_progress.update_task_state()
 
@@ -424,16 +480,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None, course=None):
+                                  grade_bucket_type=None, course=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    The student's `field_data_cache` for the module is loaded unless it is given.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
@@ -470,10 +529,11 @@ def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule
 
 
 @outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, field_data_cache=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
-    performs rescoring on the student's problem submission.
+    performs rescoring on the student's problem submission. The student's
+    `field_data_cache` for the problem is loaded unless it is given.
 
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
@@ -498,7 +558,8 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
             module_descriptor,
             xmodule_instance_args,
             grade_bucket_type='rescore',
-            course=course
+            course=course,
+            field_data_cache=field_data_cache,
         )
 
         if instance is None:
@@ -611,6 +672,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This may be any iterable of rows, such as a generator. Rows are
+            written out as they are generated, a chunk at a time.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -627,6 +690,19 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
+def _rows_beyond_header(rows):
+    """
+    Returns an iterable of `rows` if there is more than a header row in
+    them, and None otherwise. Only the first two rows are read ahead, so
+    `rows` may be a generator.
+    """
+    rows = iter(rows)
+    first_rows = list(islice(rows, 2))
+    if len(first_rows) < 2:
+        return None
+    return chain(first_rows, rows)
+
+
 def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at, config_name='FINANCIAL_REPORTS'):
     """
     Upload Executive Summary Html file using ReportStore.
@@ -657,25 +733,30 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
     be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
+    `ReportStore.from_config()`) and calling `link_for()` on it. Rows are
+    written out in chunks as students are graded, but files only become
+    visible in ReportStore once they are complete.
 
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
+
+    Courses with more than `settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD`
+    students are graded in shards instead, see `_queue_report_shards()`.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
+    if task_progress.total > settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD:
+        return _queue_report_shards(_entry_id, 'grade_report', action_name, enrolled_students, task_progress.total)
+
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
         task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
@@ -685,6 +766,30 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    csvs = _generate_grade_report_csvs(course_id, enrolled_students, task_progress, task_info_string, action_name)
+
+    # Rows are generated as they are uploaded, so that they never need to be
+    # held in memory all at once.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    _upload_grade_report_csvs(csvs, course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _generate_grade_report_csvs(course_id, students, task_progress, task_info_string, action_name):  # pylint: disable=too-many-statements
+    """
+    Grades `students` and returns the rows of the grade report and of its
+    error report, each starting with a header row, keyed by CSV name.
+
+    The rows of the grade report are generated lazily, and must be consumed
+    before the error report is complete.
+    """
+    status_interval = 100
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     teams_enabled = course.teams_enabled
@@ -698,129 +803,132 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
+    # Students are graded as the rows of the grade report are consumed, and
+    # failures are collected in the error report along the way.
     err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
-
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
-        task_info_string,
-        action_name,
-        current_step,
 
-        total_enrolled_students
-    )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def grade_report_rows():
+        """
+        Yields the rows of the grade report, grading students as it goes.
+        """
+        header = None
+        current_step = {'step': 'Calculating Grades'}
 
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
+        total_enrolled_students = task_progress.total
+        student_counter = 0
         TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+            u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
             task_info_string,
             action_name,
             current_step,
-            student_counter,
             total_enrolled_students
         )
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, batch_size=GRADES_BATCH_SIZE):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + teams_header +
-                    ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            student_counter += 1
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                student_counter,
+                total_enrolled_students
+            )
 
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                if not header:
+                    header = [section['label'] for section in gradeset[u'section_breakdown']]
+                    yield (
+                        ["id", "email", "username", "grade"] + header + cohorts_header +
+                        group_configs_header + teams_header +
+                        ['Enrollment Track', 'Verification Status'] + certificate_info_header
+                    )
 
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
 
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
+                cohorts_group_name = []
+                if course_is_cohorted:
+                    group = get_cohort(student, course_id, assign=False)
+                    cohorts_group_name.append(group.name if group else '')
+
+                group_configs_group_names = []
+                for partition in experiment_partitions:
+                    group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+                    group_configs_group_names.append(group.name if group else '')
+
+                team_name = []
+                if teams_enabled:
+                    try:
+                        membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
+                        team_name.append(membership.team.name)
+                    except CourseTeamMembership.DoesNotExist:
+                        team_name.append('')
+
+                enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+                verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+                    student,
+                    course_id,
+                    enrollment_mode
+                )
+                certificate_info = certificate_info_for_user(
+                    student,
+                    course_id,
+                    gradeset['grade'],
+                    student.id in whitelisted_user_ids
+                )
 
-            team_name = []
-            if teams_enabled:
-                try:
-                    membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
-                    team_name.append(membership.team.name)
-                except CourseTeamMembership.DoesNotExist:
-                    team_name.append('')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
-            )
+                # Not everybody has the same gradable items. If the item is not
+                # found in the user's gradeset, just assume it's a 0. The aggregated
+                # grades for their sections and overall course will be calculated
+                # without regard for the item they didn't have access to, so it's
+                # possible for a student to have a 0.0 show up in their row but
+                # still have 100% for the course.
+                row_percents = [percents.get(label, 0.0) for label in header]
+                yield (
+                    [student.id, student.email, student.username, gradeset['percent']] +
+                    row_percents + cohorts_group_name + group_configs_group_names + team_name +
+                    [enrollment_mode] + [verification_status] + certificate_info
+                )
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names + team_name +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_enrolled_students
+        )
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+    return OrderedDict([('grade_report', grade_report_rows()), ('grade_report_err', err_rows)])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
+def _upload_grade_report_csvs(csvs, course_id, timestamp):
+    """
+    Uploads the CSVs returned by `_generate_grade_report_csvs()`.
+    """
     # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+    upload_csv_to_report_store(csvs['grade_report'], 'grade_report', course_id, timestamp)
 
     # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    err_rows = _rows_beyond_header(csvs['grade_report_err'])
+    if err_rows is not None:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, timestamp)
 
 
 def _order_problems(blocks):
@@ -911,74 +1019,116 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     """
     Generate a CSV containing all students' problem grades within a given
     `course_id`.
+
+    Courses with more than `settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD`
+    students are graded in shards instead, see `_queue_report_shards()`.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
+    if not CourseStructure.objects.filter(course_id=course_id).exists():
+        return task_progress.update_task_state(
+            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
+        )
+
+    if task_progress.total > settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD:
+        return _queue_report_shards(
+            _entry_id, 'problem_grade_report', action_name, enrolled_students, task_progress.total
+        )
+
+    csvs = _generate_problem_grade_report_csvs(course_id, enrolled_students, task_progress, None, action_name)
+    _upload_problem_grade_report_csvs(csvs, course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+
+def _generate_problem_grade_report_csvs(course_id, students, task_progress, _task_info_string, _action_name):
+    """
+    Grades `students` and returns the rows of the problem grade report and
+    of its error report, each starting with a header row, keyed by CSV name.
+
+    The rows of the problem grade report are generated lazily, and must be
+    consumed before the error report is complete.
+    """
+    status_interval = 100
+
     # This struct encapsulates both the display names of each static item in the
     # header row as values as well as the django User field names of those items
     # as the keys.  It is structured in this way to keep the values related.
     header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
 
-    try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
-    except CourseStructure.DoesNotExist:
-        return task_progress.update_task_state(
-            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
-        )
+    course_structure = CourseStructure.objects.get(course_id=course_id)
+    blocks = course_structure.ordered_blocks
+    problems = _order_problems(blocks)
 
-    # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
+    # Students are graded as the rows of the report are consumed, and
+    # failures are collected in the error report along the way.
     error_rows = [list(header_row.values()) + ['error_msg']]
-    current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
+    def problem_grade_report_rows():
+        """
+        Yields the rows of the problem grade report, grading students as it goes.
+        """
+        # Just generate the static fields for now.
+        yield list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
+        current_step = {'step': 'Calculating Grades'}
+
+        for student, gradeset, err_msg in iterate_grades_for(
+            course_id, students, keep_raw_scores=True, batch_size=GRADES_BATCH_SIZE
+        ):
+            student_fields = [getattr(student, field_name) for field_name in header_row]
+            task_progress.attempted += 1
 
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                error_rows.append(student_fields + [err_msg])
+                task_progress.failed += 1
+                continue
 
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
+            yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
+
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
 
+    return OrderedDict([
+        ('problem_grade_report', problem_grade_report_rows()),
+        ('problem_grade_report_err', error_rows),
+    ])
+
+
+def _upload_problem_grade_report_csvs(csvs, course_id, timestamp):
+    """
+    Uploads the CSVs returned by `_generate_problem_grade_report_csvs()`.
+    """
     # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+    rows = _rows_beyond_header(csvs['problem_grade_report'])
+    if rows is not None:
+        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, timestamp)
     # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
-
-    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+    err_rows = _rows_beyond_header(csvs['problem_grade_report_err'])
+    if err_rows is not None:
+        upload_csv_to_report_store(err_rows, 'problem_grade_report_err', course_id, timestamp)
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -1019,13 +1169,20 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     For a given `course_id`, generate a CSV file containing profile
     information for all students that are enrolled, and store using a
     `ReportStore`.
+
+    Courses with more than `settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD`
+    students are reported on in shards instead, see `_queue_report_shards()`.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     students_in_course = CourseEnrollment.objects.enrolled_and_dropped_out_users(course_id)
     task_progress = TaskProgress(action_name, students_in_course.count(), start_time)
 
+    if task_progress.total > settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD:
+        return _queue_report_shards(
+            _entry_id, 'enrollment_report', action_name, students_in_course, task_progress.total
+        )
+
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
         task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
@@ -1035,106 +1192,134 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
-    current_step = {'step': 'Gathering Profile Information'}
-    enrollment_report_provider = PaidCourseEnrollmentReportProvider()
-    total_students = students_in_course.count()
-    student_counter = 0
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
-        task_info_string,
-        action_name,
-        current_step,
-        total_students
+    csvs = _generate_enrollment_report_csvs(
+        course_id, students_in_course, task_progress, task_info_string, action_name
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
-
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
-
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
-
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
-
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
-    )
-
-    # By this point, we've got the rows we're going to stuff into our CSV files.
+    # Rows are generated as they are uploaded, so that they never need to be
+    # held in memory all at once.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
+    _upload_enrollment_report_csvs(csvs, course_id, start_date)
 
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _generate_enrollment_report_csvs(course_id, students_in_course, task_progress, task_info_string, action_name):
+    """
+    Returns the rows of the detailed enrollment report for
+    `students_in_course`, starting with a header row, keyed by CSV name.
+    The rows are generated lazily, as they are consumed.
+    """
+    status_interval = 100
+
+    def enrollment_report_rows():
+        """
+        Yields the rows of the enrollment report, gathering profiles as it goes.
+        """
+        header = None
+        current_step = {'step': 'Gathering Profile Information'}
+        enrollment_report_provider = PaidCourseEnrollmentReportProvider()
+        total_students = task_progress.total
+        student_counter = 0
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
+            task_info_string,
+            action_name,
+            current_step,
+            total_students
+        )
+
+        for student in students_in_course:
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
+
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Manual (Un)Enrollment Reason': _('Manual (Un)Enrollment Reason'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
+
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
+
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+            task_progress.succeeded += 1
+
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
+
+    return OrderedDict([('enrollment_report', enrollment_report_rows())])
+
+
+def _upload_enrollment_report_csvs(csvs, course_id, timestamp):
+    """
+    Uploads the CSV returned by `_generate_enrollment_report_csvs()`.
+    """
+    # Perform the actual upload
+    upload_csv_to_report_store(
+        csvs['enrollment_report'], 'enrollment_report', course_id, timestamp, config_name='FINANCIAL_REPORTS'
+    )
+
+
 def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing
@@ -1667,3 +1852,320 @@ def upload_ora2_data(
     TASK_LOG.info(u'%s, Task type: %s, Upload complete.', task_info_string, action_name)
 
     return UPDATE_STATUS_SUCCEEDED
+
+
+class ShardedReport(object):
+    """
+    A CSV report that can be generated by subtasks that each cover a range
+    of the course's students (a "shard"), see `_queue_report_shards()`.
+
+    `get_students` returns the students of a course to report on, and
+    `generate_csvs` returns the report's CSVs for some of them, keyed by CSV
+    name, with the signature of `_generate_grade_report_csvs()`. The rows of
+    each CSV start with a header row, unless there are no rows at all.
+    `upload_csvs` uploads the CSVs once they have been merged from all
+    shards.
+    """
+    def __init__(self, get_students, generate_csvs, upload_csvs, csv_names,
+                 config_name='GRADES_DOWNLOAD', routing_key=None):
+        self.get_students = get_students
+        self.generate_csvs = generate_csvs
+        self.upload_csvs = upload_csvs
+        self.csv_names = csv_names
+        self.config_name = config_name
+        self.routing_key = routing_key
+
+
+SHARDED_REPORTS = {
+    'grade_report': ShardedReport(
+        CourseEnrollment.objects.users_enrolled_in,
+        _generate_grade_report_csvs,
+        _upload_grade_report_csvs,
+        ['grade_report', 'grade_report_err'],
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    ),
+    'problem_grade_report': ShardedReport(
+        CourseEnrollment.objects.users_enrolled_in,
+        _generate_problem_grade_report_csvs,
+        _upload_problem_grade_report_csvs,
+        ['problem_grade_report', 'problem_grade_report_err'],
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    ),
+    'enrollment_report': ShardedReport(
+        CourseEnrollment.objects.enrolled_and_dropped_out_users,
+        _generate_enrollment_report_csvs,
+        _upload_enrollment_report_csvs,
+        ['enrollment_report'],
+        config_name='FINANCIAL_REPORTS',
+    ),
+}
+
+
+def _queue_report_shards(entry_id, report_name, action_name, students, total_num_students):
+    """
+    Splits `students` into shards of `settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD`
+    students with consecutive ids, and queues a `generate_report_shard`
+    subtask for each of them.
+
+    Every subtask stores the CSVs of its shard as partial reports, and the
+    last one to finish merges them into the report. A subtask that fails is
+    retried, and once out of retries `resume_report_shards()` can requeue it,
+    without regenerating the shards that succeeded.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    students_per_shard = settings.INSTRUCTOR_REPORT_STUDENTS_PER_SHARD
+    student_ids = list(students.order_by('id').values_list('id', flat=True))
+    shards = [
+        {
+            'index': index,
+            'first_student_id': student_ids[start],
+            'last_student_id': student_ids[min(start + students_per_shard, len(student_ids)) - 1],
+        }
+        for index, start in enumerate(range(0, len(student_ids), students_per_shard))
+    ]
+    subtask_ids = [str(uuid4()) for __ in shards]
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    TASK_LOG.info(
+        u"Task %s: queuing %s subtasks to generate %s for %s students.",
+        entry.task_id,
+        len(shards),
+        report_name,
+        total_num_students,
+    )
+    # Make sure this is committed to database before handing off subtasks to celery.
+    with outer_atomic():
+        progress = initialize_subtask_info(entry, action_name, total_num_students, subtask_ids)
+        subtask_dict = json.loads(entry.subtasks)
+        subtask_dict['report'] = {
+            'name': report_name,
+            'action_name': action_name,
+            'total': total_num_students,
+            'start_time': progress['start_time'],
+            'shards': dict(zip(subtask_ids, shards)),
+            'attempt': 0,
+        }
+        entry.subtasks = json.dumps(subtask_dict)
+        entry.save_now()
+
+    for subtask_id, shard in zip(subtask_ids, shards):
+        _queue_report_shard(entry_id, report_name, action_name, shard, SubtaskStatus.create(subtask_id))
+
+    return progress
+
+
+def _queue_report_shard(entry_id, report_name, action_name, shard, subtask_status):
+    """
+    Queues the `generate_report_shard` subtask for `shard`.
+    """
+    # We need to import this here to avoid a circular dependency of the form:
+    # instructor_task.tasks --> tasks_helper --> instructor_task.tasks
+    from instructor_task.tasks import generate_report_shard
+
+    options = {'task_id': subtask_status.task_id}
+    routing_key = SHARDED_REPORTS[report_name].routing_key
+    if routing_key:
+        options['routing_key'] = routing_key
+    generate_report_shard.subtask(
+        (entry_id, report_name, action_name, shard, subtask_status.to_dict()),
+        **options
+    ).apply_async()
+
+
+def _report_shard_filename(csv_name, entry_id, shard_index):
+    """
+    Returns the name of the partial report of a shard.
+    """
+    return u"{}_{}_{:05d}.csv".format(csv_name, entry_id, shard_index)
+
+
+def run_report_shard(entry_id, report_name, action_name, shard, subtask_status_dict):
+    """
+    Generates the CSVs of `report_name` for the students in `shard`, and
+    stores them as partial reports. If this is the last shard of the report
+    to finish, the report is then merged from the partial reports of all
+    shards and uploaded.
+
+    Returns the subtask's final SubtaskStatus as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Check that the subtask is known to the InstructorTask and hasn't
+    # been completed already, e.g. by another worker.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    report = SHARDED_REPORTS[report_name]
+    students = report.get_students(course_id).filter(
+        id__gte=shard['first_student_id'],
+        id__lte=shard['last_student_id'],
+    )
+    task_progress = TaskProgress(action_name, students.count(), time())
+    task_info_string = u'InstructorTask ID: {entry_id}, Course: {course_id}, Subtask: {task_id}, Shard: {index}'.format(
+        entry_id=entry_id,
+        course_id=course_id,
+        task_id=current_task_id,
+        index=shard['index'],
+    )
+    TASK_LOG.info(u'%s, Task type: %s, Starting report shard', task_info_string, action_name)
+
+    try:
+        csvs = report.generate_csvs(course_id, students, task_progress, task_info_string, action_name)
+        report_store = ReportStore.from_config(report.config_name)
+        for csv_name in report.csv_names:
+            report_store.store_partial_rows(
+                course_id, _report_shard_filename(csv_name, entry_id, shard['index']), csvs[csv_name]
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u'%s, Task type: %s, Report shard failed', task_info_string, action_name)
+        if subtask_status.retried_withmax < settings.INSTRUCTOR_REPORT_SHARD_MAX_RETRIES:
+            subtask_status.increment(retried_withmax=1, state=RETRY)
+            update_subtask_status(entry_id, current_task_id, subtask_status)
+            raise _get_current_task().retry(
+                args=[entry_id, report_name, action_name, shard, subtask_status.to_dict()],
+                exc=exc,
+                max_retries=settings.INSTRUCTOR_REPORT_SHARD_MAX_RETRIES,
+            )
+        subtask_status.increment(failed=task_progress.total, state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        _finish_sharded_report(entry_id)
+        raise
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=task_progress.skipped,
+        state=SUCCESS,
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    TASK_LOG.info(u'%s, Task type: %s, Report shard stored: %s', task_info_string, action_name, subtask_status)
+
+    _finish_sharded_report(entry_id)
+    return subtask_status.to_dict()
+
+
+def _finish_sharded_report(entry_id):
+    """
+    Merges and uploads a sharded report if all of its shards are done. If
+    any of them failed, the InstructorTask is marked as failed instead.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    # Subtasks finishing at the same time may all see that the report is
+    # done, so make sure only one of them finishes it. The key includes the
+    # attempt, which changes whenever failed shards are resumed, so that
+    # each run of the shards can finish the report again.
+    report_info = subtask_dict['report']
+    lock_key = u"report-merge-{}-{}".format(entry_id, report_info['attempt'])
+    if not cache.add(lock_key, 'true', REPORT_MERGE_LOCK_EXPIRE):
+        return
+
+    report = SHARDED_REPORTS[report_info['name']]
+    course_id = entry.course_id
+    try:
+        if subtask_dict['failed']:
+            failed_shards = sorted(
+                report_info['shards'][subtask_id]['index']
+                for subtask_id, status in subtask_dict['status'].items()
+                if status['state'] != SUCCESS
+            )
+            raise ReportShardError(
+                u"Shards {} of the report failed and can be resumed.".format(
+                    u", ".join(unicode(index) for index in failed_shards)
+                )
+            )
+
+        report_store = ReportStore.from_config(report.config_name)
+        filenames = []
+        csvs = OrderedDict()
+        for csv_name in report.csv_names:
+            shard_filenames = [
+                _report_shard_filename(csv_name, entry_id, shard_index)
+                for shard_index in range(subtask_dict['total'])
+            ]
+            filenames.extend(shard_filenames)
+            csvs[csv_name] = _merged_partial_rows(report_store, course_id, shard_filenames)
+
+        report.upload_csvs(csvs, course_id, datetime.fromtimestamp(report_info['start_time'], UTC))
+        report_store.delete_partials(course_id, filenames)
+        TASK_LOG.info(u"Task %s: merged %s from %s shards.", entry.task_id, report_info['name'], subtask_dict['total'])
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task %s: could not finish %s.", entry.task_id, report_info['name'])
+        entry.task_output = InstructorTask.create_output_for_failure(exc, None)
+        entry.task_state = FAILURE
+        entry.save_now()
+
+
+def _merged_partial_rows(report_store, course_id, filenames):
+    """
+    Yields the rows of the partial reports named `filenames`, in order. The
+    rows of every shard start with the same header row, which is only
+    yielded once.
+    """
+    has_header = False
+    for filename in filenames:
+        for index, row in enumerate(report_store.get_partial_rows(course_id, filename)):
+            if index == 0 and has_header:
+                continue
+            has_header = True
+            yield row
+
+
+def resume_report_shards(entry_id):
+    """
+    Requeues the shards of a sharded report that failed. The report is
+    merged once they succeed, reusing the partial reports of the shards that
+    had succeeded already.
+
+    Returns the number of shards that were requeued.
+    """
+    with outer_atomic():
+        entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+        subtask_dict = json.loads(entry.subtasks)
+        report_info = subtask_dict['report']
+        failed_subtask_ids = [
+            subtask_id for subtask_id, status in subtask_dict['status'].items() if status['state'] == FAILURE
+        ]
+        if not failed_subtask_ids:
+            return 0
+
+        for subtask_id in failed_subtask_ids:
+            subtask_dict['status'][subtask_id] = SubtaskStatus.create(subtask_id).to_dict()
+        subtask_dict['failed'] -= len(failed_subtask_ids)
+        report_info['attempt'] += 1
+
+        # Start over from the progress of the shards that succeeded, as the
+        # task output was replaced by the failure.
+        task_progress = {
+            'action_name': report_info['action_name'],
+            'total': report_info['total'],
+            'start_time': report_info['start_time'],
+            'duration_ms': int((time() - report_info['start_time']) * 1000),
+        }
+        for statname in ['attempted', 'succeeded', 'failed', 'skipped']:
+            task_progress[statname] = sum(
+                status[statname] for status in subtask_dict['status'].values() if status['state'] == SUCCESS
+            )
+        entry.subtasks = json.dumps(subtask_dict)
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+        entry.task_state = PROGRESS
+        entry.save_now()
+
+    TASK_LOG.info(
+        u"Task %s: resuming %s failed shards of %s.", entry.task_id, len(failed_subtask_ids), report_info['name']
+    )
+    for subtask_id in failed_subtask_ids:
+        _queue_report_shard(
+            entry_id,
+            report_info['name'],
+            report_info['action_name'],
+            report_info['shards'][subtask_id],
+            SubtaskStatus.create(subtask_id),
+        )
+    return len(failed_subtask_ids)
@@ -3,7 +3,11 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
+from uuid import uuid4
+import csv
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -30,15 +34,40 @@ class MockKey(object):
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, bucket, key_name):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.parts = []
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts.append((part_num, fp.read()))
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        key = MockKey(self.bucket)
+        key.key = self.key_name
+        self.bucket.store_key(key)
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.multipart_uploads = []
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
         self.keys.append(key)
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        multipart_upload = MockMultiPartUpload(self, key_name)
+        self.multipart_uploads.append(multipart_upload)
+        return multipart_upload
+
     def list(self, prefix):  # pylint: disable=unused-argument
         """ Expected method on a Bucket object. """
         return self.keys
@@ -67,6 +96,14 @@ class ReportStoreTestMixin(object):
         """
         pass
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows can be stored as they are generated.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', ([unicode(i), u'ni\xf1o'] for i in range(10)))
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
     def test_links_for_order(self):
         """
         Test that ReportStore.links_for() returns file download links
@@ -93,6 +130,21 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_partial_rows(self):
+        """
+        Test that partial reports can be read back and deleted, and aren't
+        listed as downloadable reports.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'username'], [u'1', u'ni\xf1o']]
+        report_store.store_partial_rows(self.course_id, 'report_1_00000.csv', rows)
+
+        self.assertEqual(report_store.get_partial_rows(self.course_id, 'report_1_00000.csv'), rows)
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete_partials(self.course_id, ['report_1_00000.csv'])
+        self.assertFalse(os.path.exists(report_store.partial_path_to(self.course_id, 'report_1_00000.csv')))
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +157,23 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    @mock.patch('instructor_task.models.REPORT_UPLOAD_PART_SIZE', 1024)
+    def test_multipart_upload(self):
+        """
+        Test that reports larger than a part are uploaded in parts, which add
+        up to the whole gzip'd report.
+        """
+        report_store = self.create_report_store()
+        rows = [[unicode(uuid4()), unicode(uuid4())] for __ in range(1000)]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+
+        multipart_upload = report_store.bucket.multipart_uploads[0]
+        self.assertGreater(len(multipart_upload.parts), 1)
+        self.assertEqual(
+            [part_num for part_num, __ in multipart_upload.parts],
+            range(1, len(multipart_upload.parts) + 1)
+        )
+        data = ''.join(part for __, part in multipart_upload.parts)
+        self.assertEqual(list(csv.reader(GzipFile(fileobj=StringIO(data)))), rows)
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
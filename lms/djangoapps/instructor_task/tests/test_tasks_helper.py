@@ -49,7 +49,8 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tests.factories import InstructorTaskFactory
 from survey.models import SurveyForm, SurveyAnswer
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
@@ -63,10 +64,12 @@ from instructor_task.tasks_helper import (
     upload_course_survey_report,
     generate_students_certificates,
     upload_ora2_data,
+    resume_report_shards,
     UPDATE_STATUS_FAILED,
     UPDATE_STATUS_SUCCEEDED,
 )
 from instructor_analytics.basic import UNAVAILABLE
+from courseware.grades import iterate_grades_for
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
 from teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
 
@@ -89,6 +92,101 @@ class InstructorGradeReportTestCase(TestReportMixin, InstructorTaskCourseTestCas
                         self.assertEqual(row[column_header], expected_cell_content)
 
 
+class TestShardedGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports of large courses are generated in shards.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        for i in range(3):
+            self.create_student(u'student{}'.format(i), u'student{}@example.com'.format(i))
+        self.entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course')
+
+    def _report_rows(self):
+        """
+        Returns the rows of the grade report, and removes it.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        filename = [name for name, __ in report_store.links_for(self.course.id) if 'grade_report_err' not in name][0]
+        with open(report_store.path_to(self.course.id, filename)) as csv_file:
+            rows = list(unicodecsv.reader(csv_file))
+        shutil.rmtree(settings.GRADES_DOWNLOAD['ROOT_PATH'])
+        return rows
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_sharded_report_matches_serial_report(self, _mock_current_task):
+        upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+        serial_rows = self._report_rows()
+
+        with override_settings(INSTRUCTOR_REPORT_STUDENTS_PER_SHARD=1):
+            upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+
+        self.assertEqual(self._report_rows(), serial_rows)
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'SUCCESS')
+        subtask_dict = json.loads(entry.subtasks)
+        self.assertEqual((subtask_dict['total'], subtask_dict['succeeded']), (3, 3))
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_resume_failed_shard(self, _mock_current_task):
+        calls = []
+
+        def iterate_grades_failing_once(*args, **kwargs):
+            """
+            Fails to grade the first shard, the first time only.
+            """
+            calls.append(args)
+            if len(calls) == 1:
+                raise Exception('Cannot grade shard')
+            return iterate_grades_for(*args, **kwargs)
+
+        with override_settings(INSTRUCTOR_REPORT_STUDENTS_PER_SHARD=1, INSTRUCTOR_REPORT_SHARD_MAX_RETRIES=0):
+            with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=iterate_grades_failing_once):
+                upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+
+                entry = InstructorTask.objects.get(pk=self.entry.id)
+                self.assertEqual(entry.task_state, 'FAILURE')
+                self.assertEqual(json.loads(entry.subtasks)['failed'], 1)
+
+                self.assertEqual(resume_report_shards(self.entry.id), 1)
+
+        self.assertEqual(len(calls), 4)
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'SUCCESS')
+        self.assertEqual(len(self._report_rows()), 4)
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_resume_shard_failing_again(self, _mock_current_task):
+        calls = []
+
+        def iterate_grades_failing_twice(*args, **kwargs):
+            """
+            Fails to grade the first shard, and again when it is resumed.
+            """
+            calls.append(args)
+            if len(calls) in (1, 4):
+                raise Exception('Cannot grade shard')
+            return iterate_grades_for(*args, **kwargs)
+
+        with override_settings(INSTRUCTOR_REPORT_STUDENTS_PER_SHARD=1, INSTRUCTOR_REPORT_SHARD_MAX_RETRIES=0):
+            with patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=iterate_grades_failing_twice):
+                upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+                self.assertEqual(resume_report_shards(self.entry.id), 1)
+
+                # The report is finished again although the same number of
+                # shards succeeded as in the first run.
+                entry = InstructorTask.objects.get(pk=self.entry.id)
+                self.assertEqual(entry.task_state, 'FAILURE')
+
+                self.assertEqual(resume_report_shards(self.entry.id), 1)
+
+        self.assertEqual(len(calls), 5)
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, 'SUCCESS')
+        self.assertEqual(len(self._report_rows()), 4)
+
+
 @ddt.ddt
 class TestInstructorGradeReport(InstructorGradeReportTestCase):
     """
@@ -194,6 +194,18 @@ MEDIA_URL = ENV_TOKENS['MEDIA_URL']
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 
 CACHES = ENV_TOKENS['CACHES']
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT', CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT
+)
+EMBARGO_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get('EMBARGO_LOCAL_CACHE_TIMEOUT', EMBARGO_LOCAL_CACHE_TIMEOUT)
+EMBARGO_IP_COUNTRY_CACHE_SIZE = ENV_TOKENS.get('EMBARGO_IP_COUNTRY_CACHE_SIZE', EMBARGO_IP_COUNTRY_CACHE_SIZE)
+COURSE_OVERVIEW_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_TIMEOUT', COURSE_OVERVIEW_CACHE_TIMEOUT)
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT', COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT
+)
+DISCUSSION_INDEX_CACHE_TIMEOUT = ENV_TOKENS.get('DISCUSSION_INDEX_CACHE_TIMEOUT', DISCUSSION_INDEX_CACHE_TIMEOUT)
+STATIC_REPLACE_CACHE_TIMEOUT = ENV_TOKENS.get('STATIC_REPLACE_CACHE_TIMEOUT', STATIC_REPLACE_CACHE_TIMEOUT)
+COURSE_STRUCTURE_CACHE_CODEC = ENV_TOKENS.get('COURSE_STRUCTURE_CACHE_CODEC', COURSE_STRUCTURE_CACHE_CODEC)
 # Cache used for location mapping -- called many times with the same key/value
 # in a given request.
 if 'loc_cache' not in CACHES:
@@ -232,6 +244,12 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_SEND_CONCURRENCY = ENV_TOKENS.get('BULK_EMAIL_SEND_CONCURRENCY', BULK_EMAIL_SEND_CONCURRENCY)
+BULK_EMAIL_CONNECTION_MAX_IDLE = ENV_TOKENS.get('BULK_EMAIL_CONNECTION_MAX_IDLE', BULK_EMAIL_CONNECTION_MAX_IDLE)
+BULK_EMAIL_CONNECTION_IDLE_TIMEOUT = ENV_TOKENS.get(
+    'BULK_EMAIL_CONNECTION_IDLE_TIMEOUT', BULK_EMAIL_CONNECTION_IDLE_TIMEOUT
+)
+BULK_EMAIL_LOCAL_CACHE_TIMEOUT = ENV_TOKENS.get('BULK_EMAIL_LOCAL_CACHE_TIMEOUT', BULK_EMAIL_LOCAL_CACHE_TIMEOUT)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -245,6 +263,9 @@ BULK_EMAIL_ROUTING_KEY_SMALL_JOBS = LOW_PRIORITY_QUEUE
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
 COMPREHENSIVE_THEME_DIR = path(ENV_TOKENS.get('COMPREHENSIVE_THEME_DIR', COMPREHENSIVE_THEME_DIR))
 
+# Templates compiled by the compile_mako_templates management command
+MAKO_TEMPLATE_BUNDLE_DIR = ENV_TOKENS.get('MAKO_TEMPLATE_BUNDLE_DIR', MAKO_TEMPLATE_BUNDLE_DIR)
+
 # Marketing link overrides
 MKTG_URL_LINK_MAP.update(ENV_TOKENS.get('MKTG_URL_LINK_MAP', {}))
 
@@ -280,6 +301,9 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_MAXSIZE = ENV_TOKENS.get('COMMENTS_SERVICE_POOL_MAXSIZE', COMMENTS_SERVICE_POOL_MAXSIZE)
+COMMENTS_SERVICE_CONCURRENCY = ENV_TOKENS.get('COMMENTS_SERVICE_CONCURRENCY', COMMENTS_SERVICE_CONCURRENCY)
+COMMENTS_SERVICE_CACHE_TIMEOUT = ENV_TOKENS.get('COMMENTS_SERVICE_CACHE_TIMEOUT', COMMENTS_SERVICE_CACHE_TIMEOUT)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -462,6 +486,7 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -541,6 +566,16 @@ GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
 
+INSTRUCTOR_REPORT_STUDENTS_PER_SHARD = ENV_TOKENS.get(
+    'INSTRUCTOR_REPORT_STUDENTS_PER_SHARD', INSTRUCTOR_REPORT_STUDENTS_PER_SHARD
+)
+INSTRUCTOR_REPORT_SHARD_MAX_RETRIES = ENV_TOKENS.get(
+    'INSTRUCTOR_REPORT_SHARD_MAX_RETRIES', INSTRUCTOR_REPORT_SHARD_MAX_RETRIES
+)
+INSTRUCTOR_REPORT_SHARD_RETRY_DELAY = ENV_TOKENS.get(
+    'INSTRUCTOR_REPORT_SHARD_RETRY_DELAY', INSTRUCTOR_REPORT_SHARD_RETRY_DELAY
+)
+
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
 # This can be used to separate uploads for different environments
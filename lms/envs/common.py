@@ -428,6 +428,12 @@ DATABASE_ROUTERS = [
     'openedx.core.lib.django_courseware_routers.StudentModuleHistoryExtendedRouter',
 ]
 
+############################ Configuration Models ##############################
+
+# How long, in seconds, each process uses the ConfigurationModel entries it
+# has read before checking whether any configuration was changed since.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 1
+
 ############################ OpenID Provider  ##################################
 OPENID_PROVIDER_TRUSTED_ROOTS = ['cs50.net', '*.cs50.net']
 
@@ -461,6 +467,10 @@ OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
 # TODO: Move the Mako templating into a different engine in TEMPLATES below.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Directory of the templates compiled by the compile_mako_templates management
+# command. When set, templates are loaded from it, and their source files
+# aren't checked for changes.
+MAKO_TEMPLATE_BUNDLE_DIR = None
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'templates',
@@ -651,7 +661,9 @@ EVENT_TRACKING_PROCESSORS = []
 if FEATURES.get('ENABLE_SQL_TRACKING_LOGS'):
     TRACKING_BACKENDS.update({
         'sql': {
-            'ENGINE': 'track.backends.django.DjangoBackend'
+            'ENGINE': 'track.backends.django.DjangoBackend',
+            # Save the events in batches, outside of requests.
+            'BATCH': {},
         }
     })
     EVENT_TRACKING_BACKENDS.update({
@@ -701,6 +713,14 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Assets too large for the django cache are kept in a local directory by the
+# StaticContentServer, if DIRECTORY is set, up to MAX_SIZE bytes.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 1024 * 1024 * 1024,
+}
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -748,6 +768,12 @@ MODULESTORE = {
     }
 }
 
+# How the split modulestore serializes the course structures it caches in the
+# 'course_structure_cache' cache: an encoding ('pickle', or 'compact', which
+# decodes blocks when they are first used) and a compressor ('zlib', or 'lz4'
+# if it's installed). Cached structures can be read whichever codec wrote them.
+COURSE_STRUCTURE_CACHE_CODEC = 'pickle+zlib'
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -828,6 +854,10 @@ STATICFILES_DIRS = [
     PROJECT_ROOT / "static",
 ]
 
+# How long, in seconds, each process keeps the urls that static urls in
+# course content resolve to, and the content it rewrote them in.
+STATIC_REPLACE_CACHE_TIMEOUT = 60
+
 FAVICON_PATH = 'images/favicon.ico'
 DEFAULT_COURSE_ABOUT_IMAGE_URL = 'images/pencils.jpg'
 
@@ -990,6 +1020,37 @@ ZENDESK_API_KEY = None
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
 
+# How long, in seconds, each process keeps the country access rules of the
+# restricted courses before checking the cache for changes.
+EMBARGO_LOCAL_CACHE_TIMEOUT = 5
+
+# How many IP addresses each process keeps the GeoIP country code of.
+EMBARGO_IP_COUNTRY_CACHE_SIZE = 10000
+
+##### Course overviews #####
+# How long, in seconds, course overviews are cached, and how long each process
+# keeps those it read before checking the cache for newer ones.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 60 * 60
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = 10
+
+##### Discussion index #####
+# How long, in seconds, the index of the discussion modules of a course is
+# cached. It is dropped from the cache when the course is published.
+DISCUSSION_INDEX_CACHE_TIMEOUT = 60 * 60
+
+##### Comments service #####
+# Number of connections to the comments service each process keeps open
+# between requests (0 to open a new connection for every request).
+COMMENTS_SERVICE_POOL_MAXSIZE = 10
+
+# Number of requests to the comments service a page sends at once, when they
+# don't depend on each other.
+COMMENTS_SERVICE_CONCURRENCY = 4
+
+# How long, in seconds, the user info and the active and subscribed threads of
+# a user are cached, unless the user changes something.
+COMMENTS_SERVICE_CACHE_TIMEOUT = 5
+
 ##### shoppingcart Payment #####
 PAYMENT_SUPPORT_EMAIL = 'payment@example.com'
 
@@ -1748,6 +1809,19 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of messages a bulk email task sends at once, each over its own
+# connection to the mail server.
+BULK_EMAIL_SEND_CONCURRENCY = 1
+
+# Number of connections to the mail server a worker process keeps open
+# between bulk email tasks, and how long, in seconds, it keeps them open.
+BULK_EMAIL_CONNECTION_MAX_IDLE = 4
+BULK_EMAIL_CONNECTION_IDLE_TIMEOUT = 60
+
+# How long, in seconds, a worker process keeps an email, its rendered
+# templates and the users who opted out of it for the next tasks sending it.
+BULK_EMAIL_LOCAL_CACHE_TIMEOUT = 60
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2259,6 +2333,15 @@ FINANCIAL_REPORTS = {
     'ROOT_PATH': '/tmp/edx-s3/financial_reports',
 }
 
+# Reports for courses with more students than this are generated by subtasks
+# that run in parallel, each covering this many students.
+INSTRUCTOR_REPORT_STUDENTS_PER_SHARD = 5000
+
+# Maximum number of retries of a report subtask that failed, and the delay
+# between them in seconds.
+INSTRUCTOR_REPORT_SHARD_MAX_RETRIES = 3
+INSTRUCTOR_REPORT_SHARD_RETRY_DELAY = 60
+
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
 PASSWORD_MAX_LENGTH = None
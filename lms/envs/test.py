@@ -235,6 +235,40 @@ CACHES = {
     },
 }
 
+# Check the configuration generation on every ConfigurationModel.current(), so
+# that tests which clear or mock the cache see configuration changes at once.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 0
+
+# Read the embargo rules from the cache, and look up IP addresses anew every
+# time, since tests clear the cache and mock GeoIP.
+EMBARGO_LOCAL_CACHE_TIMEOUT = 0
+EMBARGO_IP_COUNTRY_CACHE_SIZE = 0
+
+# Read course overviews from the database every time, since tests change the
+# courses and check the queries made.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 0
+COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT = 0
+
+# Read discussion indexes from the database every time, since tests change the
+# courses and check the queries made.
+DISCUSSION_INDEX_CACHE_TIMEOUT = 0
+
+# Send the requests to the comments service one after the other, each with
+# requests.request, and don't cache their responses, since tests mock
+# requests.request (or use httpretty) and check the requests made, in order.
+COMMENTS_SERVICE_POOL_MAXSIZE = 0
+COMMENTS_SERVICE_CONCURRENCY = 1
+COMMENTS_SERVICE_CACHE_TIMEOUT = 0
+
+# Resolve static urls anew every time, since tests mock the storages and
+# the contentstore.
+STATIC_REPLACE_CACHE_TIMEOUT = 0
+
+# Open a new mail connection, and load the email anew, in every bulk email
+# task, since tests mock the connections and change the emails.
+BULK_EMAIL_CONNECTION_MAX_IDLE = 0
+BULK_EMAIL_LOCAL_CACHE_TIMEOUT = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
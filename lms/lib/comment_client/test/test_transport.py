@@ -0,0 +1,245 @@
+"""
+Tests for how the comment client talks to the comments service, against a
+stub service.
+"""
+import json
+import threading
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlparse
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
+from mock import Mock, patch
+
+from lms.lib.comment_client import transport
+from lms.lib.comment_client.user import User
+from lms.lib.comment_client.utils import perform_request
+
+
+class StubCommentsServiceHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with the number of requests the service received,
+    and a cookie, over keep-alive connections.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self):
+        """
+        Records the request, and answers it.
+        """
+        length = int(self.headers.getheader('content-length') or 0)
+        self.rfile.read(length)
+        self.server.requests.append((self.command, urlparse(self.path).path, self.client_address))
+        body = json.dumps({'threads_count': len(self.server.requests)})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'sessionid=secret; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Doesn't log the requests.
+        """
+        pass
+
+
+class StubCommentsService(ThreadingMixIn, HTTPServer):
+    """
+    A comments service, on a port of the local host, recording the requests it
+    receives.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubCommentsServiceHandler)
+        self.requests = []
+        self.url = 'http://127.0.0.1:{}/api/v1'.format(self.server_port)
+
+
+@override_settings(
+    COMMENTS_SERVICE_POOL_MAXSIZE=2,
+    COMMENTS_SERVICE_CONCURRENCY=4,
+    COMMENTS_SERVICE_CACHE_TIMEOUT=60,
+)
+class TransportTest(TestCase):
+    """
+    Test sending requests to a stub comments service.
+    """
+    def setUp(self):
+        super(TransportTest, self).setUp()
+        self.service = StubCommentsService()
+        thread = threading.Thread(target=self.service.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.service.server_close)
+        self.addCleanup(self.service.shutdown)
+        self.addCleanup(transport._POOL.clear)  # pylint: disable=protected-access
+        cache.clear()
+        patcher = patch.object(User, 'base_url', self.service.url + '/users')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def retrieve_user(self, user_id='5'):
+        """
+        Retrieves a user from the service, and returns their threads_count.
+        """
+        return User(id=user_id).retrieve()['threads_count']
+
+    def test_keep_alive(self):
+        for __ in range(3):
+            perform_request('get', self.service.url + '/threads')
+        client_addresses = set(client_address for __, __, client_address in self.service.requests)
+        self.assertEqual(len(self.service.requests), 3)
+        self.assertEqual(len(client_addresses), 1)
+
+    @override_settings(COMMENTS_SERVICE_POOL_MAXSIZE=0)
+    def test_pool_disabled(self):
+        for __ in range(3):
+            perform_request('get', self.service.url + '/threads')
+        client_addresses = set(client_address for __, __, client_address in self.service.requests)
+        self.assertEqual(len(client_addresses), 3)
+
+    def test_fork(self):
+        session = transport.get_session()
+        self.assertIs(transport.get_session(), session)
+        with patch('lms.lib.comment_client.transport.os.getpid', return_value=-1):
+            self.assertIsNot(transport.get_session(), session)
+
+    def test_no_cookies(self):
+        perform_request('get', self.service.url + '/threads')
+        self.assertEqual(len(transport.get_session().cookies), 0)
+
+    @patch('lms.lib.comment_client.utils.dog_stats_api')
+    def test_cached(self, mock_dog_stats_api):
+        self.assertEqual(self.retrieve_user(), 1)
+        self.assertEqual(self.retrieve_user(), 1)
+        self.assertEqual(len(self.service.requests), 1)
+        # Only the request to the service is timed.
+        self.assertEqual(mock_dog_stats_api.timer.call_count, 1)
+        self.assertEqual(
+            [args[0] for args, __ in mock_dog_stats_api.increment.call_args_list],
+            ['comment_client.request.count', 'comment_client.request.cache_hit']
+        )
+
+    def test_cached_by_user(self):
+        self.assertEqual(self.retrieve_user('5'), 1)
+        self.assertEqual(self.retrieve_user('6'), 2)
+        self.assertEqual(self.retrieve_user('5'), 1)
+        self.assertEqual(self.retrieve_user('6'), 2)
+
+    @override_settings(COMMENTS_SERVICE_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        self.assertEqual(self.retrieve_user(), 1)
+        self.assertEqual(self.retrieve_user(), 2)
+
+    def test_invalidated_by_user_url(self):
+        self.assertEqual(self.retrieve_user(), 1)
+        perform_request('post', self.service.url + '/users/5/read', {'source_type': 'thread'})
+        self.assertEqual(self.retrieve_user(), 3)
+
+    def test_invalidated_by_user_id(self):
+        self.assertEqual(self.retrieve_user('5'), 1)
+        self.assertEqual(self.retrieve_user('6'), 2)
+        perform_request('put', self.service.url + '/threads/test_thread/votes', {'user_id': 5, 'value': 'up'})
+        self.assertEqual(self.retrieve_user('5'), 4)
+        self.assertEqual(self.retrieve_user('6'), 2)
+
+    def test_not_invalidated_by_get(self):
+        self.assertEqual(self.retrieve_user(), 1)
+        perform_request('get', self.service.url + '/users/5/active_threads', {'user_id': '5'})
+        self.assertEqual(self.retrieve_user(), 1)
+
+    def test_changed_user_ids(self):
+        self.assertEqual(transport.changed_user_ids(self.service.url + '/threads/test_thread', {}), set())
+        self.assertEqual(transport.changed_user_ids(self.service.url + '/users/5/read', {}), {'5'})
+        self.assertEqual(
+            transport.changed_user_ids(self.service.url + '/comments/test_comment/abuse_flag', {'user_id': 6}),
+            {'6'}
+        )
+
+
+class ConcurrencyTest(TestCase):
+    """
+    Test sending requests to the comments service at once.
+    """
+    def waiting_functions(self, num_functions):
+        """
+        Returns `num_functions` functions, which each return their index once
+        all of them are being called.
+        """
+        lock = threading.Lock()
+        called = []
+        all_called = threading.Event()
+
+        def make_function(index):
+            """
+            Returns the function at `index`.
+            """
+            def function():
+                """
+                Waits for the other functions.
+                """
+                with lock:
+                    called.append(index)
+                    if len(called) == num_functions:
+                        all_called.set()
+                self.assertTrue(all_called.wait(5))
+                return index
+            return function
+
+        return [make_function(index) for index in range(num_functions)]
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=3)
+    def test_concurrent(self):
+        self.assertEqual(transport.run_concurrently(*self.waiting_functions(3)), [0, 1, 2])
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=2)
+    def test_more_functions_than_concurrency(self):
+        functions = self.waiting_functions(2) + [Mock(return_value=2), Mock(return_value=3)]
+        self.assertEqual(transport.run_concurrently(*functions), [0, 1, 2, 3])
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=3)
+    def test_errors(self):
+        functions = [Mock(return_value=0), Mock(side_effect=KeyError()), Mock(side_effect=ValueError())]
+        with self.assertRaises(KeyError):
+            transport.run_concurrently(*functions)
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=1)
+    def test_sequential(self):
+        calls = []
+        functions = [
+            Mock(side_effect=lambda: calls.append(0)),
+            Mock(side_effect=KeyError()),
+            Mock(side_effect=lambda: calls.append(2)),
+        ]
+        with self.assertRaises(KeyError):
+            transport.run_concurrently(*functions)
+        self.assertEqual(calls, [0])
+        self.assertFalse(functions[2].called)
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=2)
+    def test_language(self):
+        with translation.override('fr'):
+            call = transport.start_call(translation.get_language)
+        self.assertEqual(call.result(), 'fr')
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=2)
+    def test_start_call(self):
+        started = threading.Event()
+        call = transport.start_call(started.set)
+        self.assertTrue(started.wait(5))
+        call.result()
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=1)
+    def test_start_call_sequential(self):
+        function = Mock(return_value=1)
+        call = transport.start_call(function)
+        self.assertFalse(function.called)
+        self.assertEqual(call.result(), 1)
@@ -0,0 +1,265 @@
+"""
+How the comment client talks to the comments service.
+
+Each request used to open a new connection to the comments service, and the
+requests a page makes were sent one after the other. Instead:
+
+* requests are sent over connections the process keeps open (see SessionPool),
+* the responses about a user, which a page often asks for several times, are
+  cached for a few seconds, until the user does something (see ResponseCache),
+* requests which don't depend on each other can be sent at once (see start_call
+  and run_concurrently).
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+from cookielib import DefaultCookiePolicy
+from uuid import uuid4
+
+import requests
+from django.conf import settings
+from django.core.cache import caches, InvalidCacheBackendError
+from django.utils import translation
+from requests.adapters import HTTPAdapter
+
+try:
+    cache = caches['comment_client']  # pylint: disable=invalid-name
+except InvalidCacheBackendError:
+    from django.core.cache import cache
+
+
+class SessionPool(object):
+    """
+    The requests Session of a process, whose connections to the comments
+    service are kept open between requests.
+
+    At most settings.COMMENTS_SERVICE_POOL_MAXSIZE connections are kept open;
+    none are if it is 0, in which case every request opens a new connection,
+    as requests.request does. The session is shared by the users the process
+    serves, so it never keeps cookies.
+
+    Connections don't survive a fork, so the session of a parent process is
+    forgotten in its children.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+
+    def get(self):
+        """
+        Returns the session of the process, or None if no connections are
+        kept open.
+        """
+        maxsize = getattr(settings, 'COMMENTS_SERVICE_POOL_MAXSIZE', 0)
+        if not maxsize:
+            return None
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session = _new_session(maxsize)
+                self._pid = os.getpid()
+            return self._session
+
+    def clear(self):
+        """
+        Closes the connections kept open.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None and self._pid == os.getpid():
+            session.close()
+
+
+def _new_session(maxsize):
+    """
+    Returns a session keeping up to `maxsize` connections open, and no cookies.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_POOL = SessionPool()
+
+
+def get_session():
+    """
+    Returns the session of the process to send requests to the comments service
+    with, or None if requests.request must be used, see SessionPool.get.
+    """
+    return _POOL.get()
+
+
+USER_URL_PATTERN = re.compile(r'/users/(?P<user_id>[^/?]+)')
+
+
+class ResponseCache(object):
+    """
+    The responses to the GET requests about a user (the user info, with their
+    thread and comment counts, their active and subscribed threads), cached for
+    settings.COMMENTS_SERVICE_CACHE_TIMEOUT seconds. Nothing is cached if it
+    is 0.
+
+    The cache keys of the responses about a user include a version, which is
+    changed whenever the user changes something: a response fetched before the
+    change can't be read afterwards, even if it is stored afterwards. Changes
+    made by others (e.g. a reply to one of the user's threads) show once the
+    responses expire.
+    """
+    def get(self, user_id, url, params):
+        """
+        Returns a (key, response) pair: the cache key of the response to a GET
+        request of `url` with `params` about the user `user_id`, and the
+        cached response, or None if there is none. The key is None if nothing
+        is cached.
+        """
+        timeout = _cache_timeout()
+        if not timeout:
+            return None, None
+        version_key = self._version_key(user_id)
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid4().hex, timeout)
+            version = cache.get(version_key)
+            if version is None:
+                return None, None
+        request_hash = hashlib.md5(repr((
+            url, sorted(params.iteritems()), translation.get_language()
+        ))).hexdigest()
+        key = u'comment_client.response.{}.{}.{}'.format(user_id, version, request_hash)
+        return key, cache.get(key)
+
+    def set(self, key, response):
+        """
+        Caches `response` with the `key` get returned.
+        """
+        cache.set(key, response, _cache_timeout())
+
+    def invalidate(self, user_ids):
+        """
+        Forgets the responses about the users `user_ids`.
+        """
+        timeout = _cache_timeout()
+        if not timeout or not user_ids:
+            return
+        cache.set_many({self._version_key(user_id): uuid4().hex for user_id in user_ids}, timeout)
+
+    @staticmethod
+    def _version_key(user_id):
+        """
+        Returns the cache key of the version of the responses about a user.
+        """
+        return u'comment_client.response_version.{}'.format(user_id)
+
+
+def _cache_timeout():
+    """
+    Returns how long, in seconds, responses are cached.
+    """
+    return getattr(settings, 'COMMENTS_SERVICE_CACHE_TIMEOUT', 0)
+
+
+response_cache = ResponseCache()  # pylint: disable=invalid-name
+
+
+def changed_user_ids(url, data_or_params):
+    """
+    Returns the ids of the users a request which changes something about
+    them, to `url` with `data_or_params`, may change: those in the url
+    (e.g. /users/<id>/subscriptions) and the user the request is made as.
+    """
+    user_ids = set(match.group('user_id') for match in USER_URL_PATTERN.finditer(url))
+    if data_or_params and data_or_params.get('user_id') is not None:
+        user_ids.add(unicode(data_or_params['user_id']))
+    return user_ids
+
+
+class Call(object):
+    """
+    A call of a function which sends requests to the comments service, which
+    may be made in a thread of its own while the calling thread goes on, see
+    start_call.
+    """
+    def __init__(self, function):
+        self._function = function
+        self._language = translation.get_language()
+        self._thread = None
+        self._result = None
+        self._exc_info = None
+
+    def start(self):
+        """
+        Starts calling the function in a thread of its own.
+        """
+        self._thread = threading.Thread(target=self._run, name='comment-client-request')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def result(self):
+        """
+        Returns the result of the function, or raises the exception it raised.
+        The function is called now if it wasn't started.
+        """
+        if self._thread is None:
+            return self._function()
+        self._thread.join()
+        if self._exc_info is not None:
+            exc_type, exc_value, exc_traceback = self._exc_info
+            raise exc_type, exc_value, exc_traceback
+        return self._result
+
+    def _run(self):
+        """
+        Calls the function in the language of the thread which made the call,
+        and keeps its result or exception.
+        """
+        try:
+            with translation.override(self._language):
+                self._result = self._function()
+        except Exception:  # pylint: disable=broad-except
+            self._exc_info = sys.exc_info()
+
+
+def _concurrency():
+    """
+    Returns how many requests to the comments service may be sent at once.
+    """
+    return getattr(settings, 'COMMENTS_SERVICE_CONCURRENCY', 1)
+
+
+def start_call(function):
+    """
+    Returns a Call of `function`, which sends requests to the comments service
+    and must not use the database, since a thread has its own connection to
+    it.
+
+    The function is started in a thread of its own, unless
+    settings.COMMENTS_SERVICE_CONCURRENCY is 1 or less, in which case it is
+    only called when the result of the call is asked for.
+    """
+    call = Call(function)
+    if _concurrency() > 1:
+        call.start()
+    return call
+
+
+def run_concurrently(*functions):
+    """
+    Calls `functions`, which send requests to the comments service and must
+    not use the database, and returns the list of their results, in order.
+    The exception the first function failing in order raises is raised.
+
+    Up to settings.COMMENTS_SERVICE_CONCURRENCY functions are run at once: the
+    first one in the calling thread, and the next ones each in a thread of its
+    own. The functions are called one after the other, as long as none fails,
+    if COMMENTS_SERVICE_CONCURRENCY is 1 or less.
+    """
+    calls = [Call(function) for function in functions]
+    for call in calls[1:_concurrency()]:
+        call.start()
+    return [call.result() for call in calls]
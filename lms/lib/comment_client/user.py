@@ -97,6 +97,7 @@ class User(models.Model):
             metric_action='user.active_threads',
             metric_tags=self._metric_tags,
             paged_results=True,
+            cache_user_id=self.id,
         )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
@@ -112,7 +113,8 @@ class User(models.Model):
             params,
             metric_action='user.subscribed_threads',
             metric_tags=self._metric_tags,
-            paged_results=True
+            paged_results=True,
+            cache_user_id=self.id
         )
         return CommentClientPaginatedResult(
             collection=response.get('collection', []),
@@ -136,6 +138,7 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                cache_user_id=self.id,
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
@@ -148,6 +151,7 @@ class User(models.Model):
                     retrieve_params,
                     metric_action='model.retrieve',
                     metric_tags=self._metric_tags,
+                    cache_user_id=self.id,
                 )
             else:
                 raise
@@ -8,6 +8,8 @@ from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
+from .transport import changed_user_ids, get_session, response_cache
+
 log = logging.getLogger(__name__)
 
 
@@ -52,7 +54,15 @@ def request_timer(request_id, method, url, tags=None):
 
 
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    cache_user_id=None):
+    """
+    Sends a request to the comments service, and returns its response.
+
+    The response to a GET request about the user `cache_user_id` is cached
+    for a few seconds, until a request changes something about the user, see
+    transport.ResponseCache.
+    """
 
     if metric_tags is None:
         metric_tags = []
@@ -63,6 +73,14 @@ def perform_request(method, url, data_or_params=None, raw=False,
 
     if data_or_params is None:
         data_or_params = {}
+
+    cache_key = None
+    if cache_user_id is not None and method == 'get':
+        cache_key, cached_response = response_cache.get(cache_user_id, url, data_or_params)
+        if cached_response is not None:
+            dog_stats_api.increment('comment_client.request.cache_hit', tags=metric_tags)
+            return cached_response
+
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
         'Accept-Language': get_language(),
@@ -76,8 +94,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
     else:
         data = None
         params = merge_dict(data_or_params, request_id_dict)
+    session = get_session()
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = (session or requests).request(
             method,
             url,
             data=data,
@@ -86,6 +105,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
             timeout=5
         )
 
+    if method != 'get':
+        response_cache.invalidate(changed_user_ids(url, data_or_params))
+
     metric_tags.append(u'status_code:{}'.format(response.status_code))
     if response.status_code > 200:
         metric_tags.append(u'result:failure')
@@ -103,7 +125,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         raise CommentClient500Error(response.text)
     else:
         if raw:
-            return response.text
+            data = response.text
         else:
             try:
                 data = response.json()
@@ -130,7 +152,9 @@ def perform_request(method, url, data_or_params=None, raw=False,
                     value=data.get('num_pages', 1),
                     tags=metric_tags
                 )
-            return data
+        if cache_key is not None:
+            response_cache.set(cache_key, data)
+        return data
 
 
 class CommentClientError(Exception):
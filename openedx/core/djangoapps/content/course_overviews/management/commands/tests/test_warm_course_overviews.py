@@ -0,0 +1,54 @@
+# pylint: disable=missing-docstring
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from nose.plugins.attrib import attr
+from openedx.core.djangoapps.content.course_overviews.management.commands import warm_course_overviews
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview, course_overview_cache
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+@attr('shard_2')
+@override_settings(COURSE_OVERVIEW_CACHE_TIMEOUT=60, COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT=0)
+class TestWarmCourseOverviews(ModuleStoreTestCase):
+    """
+    Tests the command which loads course overviews into the cache.
+    """
+    def setUp(self):
+        """
+        Create courses in modulestore.
+        """
+        super(TestWarmCourseOverviews, self).setUp()
+        self.course_keys = [CourseFactory.create().id for __ in range(3)]
+        for course_key in self.course_keys:
+            self.addCleanup(course_overview_cache.delete, course_key)
+        self.command = warm_course_overviews.Command()
+
+    def _assert_cached(self, *course_keys):
+        """
+        Assert that the overviews of course_keys are cached.
+        """
+        self.assertEqual(set(course_overview_cache.get_many(course_keys)), set(course_keys))
+
+    def test_warm_all(self):
+        self.command.handle(all=True, chunk_size=2)
+        self.assertEqual(set(CourseOverview.get_all_course_keys()), set(self.course_keys))
+        self._assert_cached(*self.course_keys)
+
+    def test_warm_one(self):
+        self.command.handle(unicode(self.course_keys[0]), all=False)
+        self.assertEqual(CourseOverview.get_all_course_keys(), [self.course_keys[0]])
+        self._assert_cached(self.course_keys[0])
+        self.assertEqual(course_overview_cache.get_many(self.course_keys[1:]), {})
+
+    def test_invalid_key(self):
+        with self.assertRaises(CommandError):
+            self.command.handle('not/found', all=False)
+
+    def test_no_params(self):
+        with self.assertRaises(CommandError):
+            self.command.handle(all=False)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(CommandError):
+            self.command.handle(all=True, chunk_size=-1)
@@ -0,0 +1,71 @@
+"""
+Command to load course overviews into the cache.
+"""
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Generates the missing and outdated course overviews of the courses (and
+    schedules the generation of their missing thumbnail images), and loads
+    them into the cache, so that the first requests after a deploy or a cache
+    flush don't have to.
+
+    Example usage:
+        $ ./manage.py lms warm_course_overviews --all --settings=devstack
+        $ ./manage.py lms warm_course_overviews 'edX/DemoX/Demo_Course' --settings=devstack
+    """
+    args = '<course_id course_id ...>'
+    help = 'Generates course overviews for one or more courses, and loads them into the cache.'
+
+    def add_arguments(self, parser):
+        """
+        Add arguments to the command parser.
+        """
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Warm the course overviews of all courses.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            action='store',
+            type=int,
+            dest='chunk_size',
+            default=100,
+            help='How many course overviews to load at once.',
+        )
+
+    def handle(self, *args, **options):
+
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_course_summaries()]
+        else:
+            if len(args) < 1:
+                raise CommandError('At least one course or --all must be specified.')
+            try:
+                course_keys = [CourseKey.from_string(arg) for arg in args]
+            except InvalidKeyError:
+                raise CommandError('Invalid key specified.')
+
+        chunk_size = options.get('chunk_size', 100)
+        if chunk_size < 1:
+            raise CommandError('The chunk size must be positive.')
+
+        log.info('Warming course overviews of %d courses.', len(course_keys))
+        num_loaded = 0
+        for start in xrange(0, len(course_keys), chunk_size):
+            num_loaded += len(CourseOverview.get_from_ids(course_keys[start:start + chunk_size]))
+        log.info('Finished warming course overviews: %d of %d courses loaded.', num_loaded, len(course_keys))
@@ -1,10 +1,15 @@
 """
 Declaration of CourseOverview model
 """
+import cPickle as pickle
 import json
 import logging
+import threading
+import time
 from urlparse import urlparse, urlunparse
 
+from django.conf import settings
+from django.core.cache import caches, InvalidCacheBackendError
 from django.db import models, transaction
 from django.db.models.fields import BooleanField, DateTimeField, DecimalField, TextField, FloatField, IntegerField
 from django.db.utils import IntegrityError
@@ -28,6 +33,104 @@ from xmodule_django.models import CourseKeyField, UsageKeyField
 
 log = logging.getLogger(__name__)
 
+try:
+    cache = caches['course_overviews']  # pylint: disable=invalid-name
+except InvalidCacheBackendError:
+    from django.core.cache import cache
+
+
+class CourseOverviewCache(object):
+    """
+    The CourseOverviews read lately, which are kept in the cache for
+    settings.COURSE_OVERVIEW_CACHE_TIMEOUT seconds, and in each process for
+    settings.COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT seconds. Nothing is cached
+    if the timeouts are 0.
+
+    Entries are keyed by course id and CourseOverview.VERSION, and are
+    deleted whenever the course's overview is regenerated, so other processes
+    see new overviews at most COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT seconds
+    after they're generated. Entries are kept pickled, so that every caller
+    gets its own copy, just as it would from the cache.
+    """
+    # The largest number of entries each process keeps.
+    LOCAL_MAX_SIZE = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local_entries = {}
+
+    @staticmethod
+    def cache_key(course_id):
+        """
+        Returns the cache key of the CourseOverview of `course_id`.
+        """
+        return u'course_overview.{}.{}'.format(CourseOverview.VERSION, course_id)
+
+    def get_many(self, course_ids):
+        """
+        Returns a dict of the CourseOverviews cached for `course_ids`, by
+        course id.
+        """
+        course_overviews = {}
+        now = time.time()
+        missing_keys = {}
+        for course_id in course_ids:
+            entry = self._local_entries.get(course_id)
+            if entry is not None and entry[1] > now:
+                course_overviews[course_id] = pickle.loads(entry[0])
+            else:
+                missing_keys[self.cache_key(course_id)] = course_id
+
+        if missing_keys and settings.COURSE_OVERVIEW_CACHE_TIMEOUT > 0:
+            for key, course_overview in cache.get_many(missing_keys.keys()).iteritems():
+                course_overviews[missing_keys[key]] = course_overview
+                self._set_local(course_overview)
+        return course_overviews
+
+    def set_many(self, course_overviews):
+        """
+        Caches `course_overviews`.
+        """
+        if settings.COURSE_OVERVIEW_CACHE_TIMEOUT > 0 and course_overviews:
+            cache.set_many(
+                {self.cache_key(course_overview.id): course_overview for course_overview in course_overviews},
+                settings.COURSE_OVERVIEW_CACHE_TIMEOUT
+            )
+        for course_overview in course_overviews:
+            self._set_local(course_overview)
+
+    def delete(self, course_id):
+        """
+        Forgets the CourseOverview of `course_id`, in the cache and in this
+        process.
+        """
+        cache.delete(self.cache_key(course_id))
+        with self._lock:
+            self._local_entries.pop(course_id, None)
+
+    def clear_local(self):
+        """
+        Forgets the entries kept in this process.
+        """
+        with self._lock:
+            self._local_entries = {}
+
+    def _set_local(self, course_overview):
+        """
+        Keeps `course_overview` in this process.
+        """
+        timeout = settings.COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT
+        if timeout <= 0:
+            return
+        entry = (pickle.dumps(course_overview, pickle.HIGHEST_PROTOCOL), time.time() + timeout)
+        with self._lock:
+            if len(self._local_entries) >= self.LOCAL_MAX_SIZE:
+                self._local_entries = {}
+            self._local_entries[course_overview.id] = entry
+
+
+course_overview_cache = CourseOverviewCache()  # pylint: disable=invalid-name
+
 
 class CourseOverview(TimeStampedModel):
     """
@@ -184,13 +287,15 @@ class CourseOverview(TimeStampedModel):
         )
 
     @classmethod
-    def load_from_module_store(cls, course_id):
+    def load_from_module_store(cls, course_id, create_image_set=True):
         """
         Load a CourseDescriptor, create a new CourseOverview from it, cache the
         overview, and return it.
 
         Arguments:
             course_id (CourseKey): the ID of the course overview to be loaded.
+            create_image_set (bool): whether to generate the thumbnail images
+                of the overview too.
 
         Returns:
             CourseOverview: overview of the requested course.
@@ -213,7 +318,8 @@ class CourseOverview(TimeStampedModel):
                             CourseOverviewTab(tab_id=tab.tab_id, course_overview=course_overview)
                             for tab in course.tabs
                         ])
-                        CourseOverviewImageSet.create_for_course(course_overview, course)
+                        if create_image_set:
+                            CourseOverviewImageSet.create_for_course(course_overview, course)
 
                 except IntegrityError:
                     # There is a rare race condition that will occur if
@@ -225,6 +331,7 @@ class CourseOverview(TimeStampedModel):
                     # to save a duplicate.
                     # (see: https://openedx.atlassian.net/browse/TNL-2854).
                     pass
+                course_overview_cache.delete(course_id)
                 return course_overview
             elif course is not None:
                 raise IOError(
@@ -240,10 +347,10 @@ class CourseOverview(TimeStampedModel):
         """
         Load a CourseOverview object for a given course ID.
 
-        First, we try to load the CourseOverview from the database. If it
-        doesn't exist, we load the entire course from the modulestore, create a
-        CourseOverview object from it, and then cache it in the database for
-        future use.
+        First, we try to load the CourseOverview from the cache (see
+        CourseOverviewCache), and then from the database. If it doesn't exist,
+        we load the entire course from the modulestore, create a CourseOverview
+        object from it, and then cache it in the database for future use.
 
         Arguments:
             course_id (CourseKey): the ID of the course overview to be loaded.
@@ -257,6 +364,10 @@ class CourseOverview(TimeStampedModel):
             - IOError if some other error occurs while trying to load the
                 course from the module store.
         """
+        course_overview = course_overview_cache.get_many([course_id]).get(course_id)
+        if course_overview is not None:
+            return course_overview
+
         try:
             course_overview = cls.objects.select_related('image_set').get(id=course_id)
             if course_overview.version < cls.VERSION:
@@ -272,7 +383,78 @@ class CourseOverview(TimeStampedModel):
         if course_overview and not hasattr(course_overview, 'image_set'):
             CourseOverviewImageSet.create_for_course(course_overview)
 
-        return course_overview or cls.load_from_module_store(course_id)
+        course_overview = course_overview or cls.load_from_module_store(course_id)
+        course_overview_cache.set_many([course_overview])
+        return course_overview
+
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Load the CourseOverview objects of several courses at once.
+
+        Overviews are read from the cache, then from the database with a
+        single query, and only the courses which have no overview yet are
+        loaded from the modulestore, as get_from_id does. Missing thumbnail
+        images are generated in the background rather than right away, so
+        overviews may come without an image_set until they are.
+
+        Arguments:
+            course_ids (iterable[CourseKey]): the IDs of the course overviews
+                to be loaded.
+
+        Returns:
+            dict[CourseKey, CourseOverview]: overviews of the requested
+                courses, by course ID. Courses which were not found or failed
+                to load are left out.
+        """
+        course_ids = set(course_ids)
+        course_overviews = course_overview_cache.get_many(course_ids)
+        missing_course_ids = course_ids.difference(course_overviews)
+        if not missing_course_ids:
+            return course_overviews
+
+        loaded_course_overviews = cls._load_many(missing_course_ids)
+        course_overview_cache.set_many(loaded_course_overviews.values())
+        if CourseOverviewImageConfig.current().enabled:
+            # The tasks invalidate the cached overviews once they're done.
+            # Import tasks here to avoid a circular import.
+            from .tasks import generate_course_overview_images
+            for course_id, course_overview in loaded_course_overviews.iteritems():
+                if not hasattr(course_overview, 'image_set'):
+                    generate_course_overview_images.apply_async([unicode(course_id)], countdown=0)
+        course_overviews.update(loaded_course_overviews)
+        return course_overviews
+
+    @classmethod
+    def _load_many(cls, course_ids):
+        """
+        Loads the CourseOverviews of `course_ids` from the database, and those
+        which aren't there (or are outdated) from the modulestore.
+
+        Returns a dict of the overviews, by course ID, without the courses
+        which were not found or failed to load. The thumbnail images of the
+        overviews loaded from the modulestore are not generated.
+        """
+        course_overviews = {}
+        for course_overview in cls.objects.select_related('image_set').filter(id__in=course_ids):
+            if course_overview.version < cls.VERSION:
+                # Throw away old versions of CourseOverview, as they might contain stale data.
+                course_overview.delete()
+            else:
+                course_overviews[course_overview.id] = course_overview
+
+        for course_id in course_ids:
+            if course_id in course_overviews:
+                continue
+            try:
+                course_overviews[course_id] = cls.load_from_module_store(course_id, create_image_set=False)
+            except Exception as ex:  # pylint: disable=broad-except
+                log.exception(
+                    'An error occurred while generating course overview for %s: %s',
+                    unicode(course_id),
+                    ex.message,
+                )
+        return course_overviews
 
     def clean_id(self, padding_char='='):
         """
@@ -450,24 +632,14 @@ class CourseOverview(TimeStampedModel):
         """
         Returns CourseOverview objects for the given course_keys.
         """
-        course_overviews = []
-
         log.info('Generating course overview for %d courses.', len(course_keys))
         log.debug('Generating course overview(s) for the following courses: %s', course_keys)
 
-        for course_key in course_keys:
-            try:
-                course_overviews.append(CourseOverview.get_from_id(course_key))
-            except Exception as ex:  # pylint: disable=broad-except
-                log.exception(
-                    'An error occurred while generating course overview for %s: %s',
-                    unicode(course_key),
-                    ex.message,
-                )
+        course_overviews = cls.get_from_ids(course_keys)
 
         log.info('Finished generating course overviews.')
 
-        return course_overviews
+        return [course_overviews[course_key] for course_key in course_keys if course_key in course_overviews]
 
     @classmethod
     def get_all_courses(cls, org=None, filter_=None):
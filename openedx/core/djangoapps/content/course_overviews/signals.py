@@ -3,7 +3,7 @@ Signal handler for invalidating cached course overviews
 """
 from django.dispatch.dispatcher import receiver
 
-from .models import CourseOverview
+from .models import CourseOverview, course_overview_cache
 from xmodule.modulestore.django import SignalHandler
 
 
@@ -13,8 +13,9 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     Catches the signal that a course has been published in Studio and
     updates the corresponding CourseOverview cache entry.
     """
-    CourseOverview.objects.filter(id=course_key).delete()
-    CourseOverview.load_from_module_store(course_key)
+    # import tasks inline due to cyclic import
+    from .tasks import generate_course_overview
+    generate_course_overview.apply_async([unicode(course_key)], countdown=0)
 
 
 @receiver(SignalHandler.course_deleted)
@@ -24,6 +25,7 @@ def _listen_for_course_delete(sender, course_key, **kwargs):  # pylint: disable=
     invalidates the corresponding CourseOverview cache entry if one exists.
     """
     CourseOverview.objects.filter(id=course_key).delete()
+    course_overview_cache.delete(course_key)
     # import CourseAboutSearchIndexer inline due to cyclic import
     from cms.djangoapps.contentstore.courseware_index import CourseAboutSearchIndexer
     # Delete course entry from Course About Search_index
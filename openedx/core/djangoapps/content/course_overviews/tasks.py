@@ -0,0 +1,54 @@
+"""
+Asynchronous tasks which (re)generate course overviews.
+"""
+import logging
+
+from celery.task import task
+from django.db import transaction
+from opaque_keys.edx.keys import CourseKey
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'openedx.core.djangoapps.content.course_overviews.tasks.generate_course_overview')
+def generate_course_overview(course_id):
+    """
+    Regenerates the CourseOverview of the specified course, from the
+    modulestore.
+    """
+    # Import here to avoid a circular import.
+    from .models import CourseOverview, course_overview_cache
+
+    course_key = CourseKey.from_string(course_id)
+    # The old overview is replaced within a transaction, so that it's still
+    # read until the new one is saved.
+    with transaction.atomic():
+        CourseOverview.objects.filter(id=course_key).delete()
+        try:
+            CourseOverview.load_from_module_store(course_key)
+        except CourseOverview.DoesNotExist:
+            log.warning('Could not find course %s to generate its course overview.', course_id)
+    # Only invalidate the cache once the transaction has committed, otherwise
+    # a concurrent read could cache the old overview again in the meantime.
+    course_overview_cache.delete(course_key)
+
+
+@task(name=u'openedx.core.djangoapps.content.course_overviews.tasks.generate_course_overview_images')
+def generate_course_overview_images(course_id):
+    """
+    Generates the thumbnail images of the CourseOverview of the specified
+    course, if it doesn't have them yet.
+    """
+    # Import here to avoid a circular import.
+    from .models import CourseOverview, CourseOverviewImageSet, course_overview_cache
+
+    course_key = CourseKey.from_string(course_id)
+    try:
+        course_overview = CourseOverview.objects.select_related('image_set').get(id=course_key)
+    except CourseOverview.DoesNotExist:
+        return
+    if not hasattr(course_overview, 'image_set'):
+        CourseOverviewImageSet.create_for_course(course_overview)
+        # Cached copies of the overview don't have the new image set yet.
+        course_overview_cache.delete(course_key)
@@ -33,7 +33,8 @@ from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls, check_mongo_calls_range
 
-from .models import CourseOverview, CourseOverviewImageSet, CourseOverviewImageConfig
+from .models import CourseOverview, CourseOverviewImageSet, CourseOverviewImageConfig, course_overview_cache
+from .tasks import generate_course_overview, generate_course_overview_images
 
 
 @ddt.ddt
@@ -515,6 +516,96 @@ class CourseOverviewTestCase(ModuleStoreTestCase):
                 "testing CourseOverview.get_all_courses with filter_={}".format(filter_),
             )
 
+    def test_get_from_ids(self):
+        courses = [CourseFactory.create(emit_signals=True) for __ in range(2)]
+        # This course doesn't have an overview yet.
+        courses.append(CourseFactory.create())
+        non_existent_course_id = self.store.make_course_key('Non', 'Existent', 'Course')
+
+        course_overviews = CourseOverview.get_from_ids([course.id for course in courses] + [non_existent_course_id])
+        self.assertEqual(set(course_overviews), {course.id for course in courses})
+        for course in courses:
+            self.assertEqual(course_overviews[course.id].id, course.id)
+            self.assertEqual(course_overviews[course.id].display_name, course.display_name)
+
+        # All the overviews are in the database now.
+        with check_mongo_calls(0):
+            self.assertEqual(
+                set(CourseOverview.get_from_ids([course.id for course in courses])),
+                {course.id for course in courses},
+            )
+
+    def test_get_from_ids_generates_images_in_background(self):
+        CourseOverviewImageConfig.objects.create(enabled=True)
+        course = CourseFactory.create()
+        with mock.patch.object(CourseOverviewImageSet, 'create_for_course') as mock_create_for_course:
+            with mock.patch(
+                'openedx.core.djangoapps.content.course_overviews.tasks.generate_course_overview_images.apply_async'
+            ) as mock_apply_async:
+                course_overview = CourseOverview.get_from_ids([course.id])[course.id]
+        self.assertFalse(hasattr(course_overview, 'image_set'))
+        self.assertFalse(mock_create_for_course.called)
+        mock_apply_async.assert_called_once_with([unicode(course.id)], countdown=0)
+
+    def test_get_from_ids_errored_course(self):
+        course = CourseFactory.create(emit_signals=True)
+        errored_course = CourseFactory.create()
+        mock_get_course = mock.Mock(return_value=ErrorDescriptor)
+        with mock.patch('xmodule.modulestore.mixed.MixedModuleStore.get_course', mock_get_course):
+            course_overviews = CourseOverview.get_from_ids([course.id, errored_course.id])
+        self.assertEqual(set(course_overviews), {course.id})
+
+    def test_get_from_ids_outdated_version(self):
+        course = CourseFactory.create(emit_signals=True)
+        CourseOverview.objects.filter(id=course.id).update(version=CourseOverview.VERSION - 1)
+        course_overview = CourseOverview.get_from_ids([course.id])[course.id]
+        self.assertEqual(course_overview.version, CourseOverview.VERSION)
+
+    @override_settings(COURSE_OVERVIEW_CACHE_TIMEOUT=60, COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT=60)
+    def test_get_from_ids_cached(self):
+        course = CourseFactory.create(emit_signals=True)
+        self.addCleanup(course_overview_cache.clear_local)
+        self.addCleanup(course_overview_cache.delete, course.id)
+        CourseOverview.get_from_ids([course.id])
+
+        # Read from the process, and then from the cache.
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseOverview.get_from_ids([course.id])[course.id].id, course.id)
+            self.assertEqual(CourseOverview.get_from_id(course.id).id, course.id)
+        course_overview_cache.clear_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseOverview.get_from_ids([course.id])[course.id].id, course.id)
+
+        # Publishing the course replaces the cached overview.
+        course.display_name = u'Updated Course'
+        self.store.update_item(course, ModuleStoreEnum.UserID.test)
+        self.assertEqual(CourseOverview.get_from_ids([course.id])[course.id].display_name, u'Updated Course')
+        self.assertEqual(CourseOverview.get_from_id(course.id).display_name, u'Updated Course')
+
+    @override_settings(COURSE_OVERVIEW_CACHE_TIMEOUT=60, COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT=60)
+    def test_generate_course_overview_invalidates_after_commit(self):
+        course = CourseFactory.create(emit_signals=True)
+        self.addCleanup(course_overview_cache.clear_local)
+        self.addCleanup(course_overview_cache.delete, course.id)
+        stale_overview = CourseOverview.get_from_id(course.id)
+        load_from_module_store = CourseOverview.load_from_module_store
+
+        def load_and_read_concurrently(course_key):
+            """
+            Regenerates the overview while another reader caches the old one
+            before the transaction has committed.
+            """
+            course_overview = load_from_module_store(course_key)
+            course_overview_cache.set_many([stale_overview])
+            return course_overview
+
+        course.display_name = u'Updated Course'
+        self.store.update_item(course, ModuleStoreEnum.UserID.test)
+        with mock.patch.object(CourseOverview, 'load_from_module_store', side_effect=load_and_read_concurrently):
+            generate_course_overview(unicode(course.id))
+        self.assertEqual(course_overview_cache.get_many([course.id]), {})
+        self.assertEqual(CourseOverview.get_from_id(course.id).display_name, u'Updated Course')
+
 
 @ddt.ddt
 class CourseOverviewImageSetTestCase(ModuleStoreTestCase):
@@ -906,6 +997,23 @@ class CourseOverviewImageSetTestCase(ModuleStoreTestCase):
         # just a convenient way to cause a database write operation to happen.
         self.set_config(False)
 
+    @override_settings(COURSE_OVERVIEW_CACHE_TIMEOUT=60, COURSE_OVERVIEW_LOCAL_CACHE_TIMEOUT=60)
+    def test_generate_images_invalidates_cache(self):
+        """
+        The overviews cached before their images were generated are thrown
+        away once the image set is saved.
+        """
+        self.set_config(False)
+        course = CourseFactory.create()
+        self.addCleanup(course_overview_cache.clear_local)
+        self.addCleanup(course_overview_cache.delete, course.id)
+        self.assertFalse(hasattr(CourseOverview.get_from_id(course.id), 'image_set'))
+
+        self.set_config(True)
+        generate_course_overview_images(unicode(course.id))
+        self.assertEqual(course_overview_cache.get_many([course.id]), {})
+        self.assertTrue(hasattr(CourseOverview.get_from_id(course.id), 'image_set'))
+
     def _assert_image_urls_all_default(self, modulestore_type, raw_course_image_name, expected_url=None):
         """
         Helper for asserting that all image_urls are defaulting to a particular value.
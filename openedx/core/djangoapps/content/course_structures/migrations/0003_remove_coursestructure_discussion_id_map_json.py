@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_structures', '0002_coursestructure_discussion_index_json'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='coursestructure',
+            name='discussion_id_map_json',
+        ),
+    ]
@@ -4,15 +4,67 @@ Django ORM model specifications for the Course Structures sub-application
 import json
 import logging
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import caches, InvalidCacheBackendError
 from model_utils.models import TimeStampedModel
 
 from util.models import CompressedTextField
+from xmodule.fields import Date
 from xmodule_django.models import CourseKeyField, UsageKey
 
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+try:
+    cache = caches['course_structures']  # pylint: disable=invalid-name
+except InvalidCacheBackendError:
+    from django.core.cache import cache
+
+DATE_FIELD = Date()
+
+
+class DiscussionIndexEntry(namedtuple('DiscussionIndexEntry', [
+        'discussion_id', 'location', 'discussion_category', 'discussion_target', 'sort_key', 'start',
+        'days_early_for_beta', 'visible_to_staff_only', 'merged_group_access',
+])):
+    """
+    What the forums need to know about a discussion module, without loading
+    it: the fields of the module they use, and what access to it depends on.
+    Entries have the same attributes as the modules they describe.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_module(cls, module):
+        """
+        Returns the entry of a discussion module.
+        """
+        return cls(*(getattr(module, field) for field in cls._fields))
+
+    @classmethod
+    def from_json(cls, json_entry, course_key):
+        """
+        Returns the entry serialized as `json_entry` by to_json, of a module of
+        the course `course_key`.
+        """
+        entry = cls(*json_entry)
+        return entry._replace(
+            # Usage key strings might not include the course run, so we add it back in with map_into_course
+            location=UsageKey.from_string(entry.location).map_into_course(course_key),
+            start=DATE_FIELD.from_json(entry.start),
+            # JSON object keys are strings, partition ids are integers.
+            merged_group_access={
+                int(partition_id): group_ids for partition_id, group_ids in entry.merged_group_access.iteritems()
+            },
+        )
+
+    def to_json(self):
+        """
+        Returns the entry as a JSON-serializable list.
+        """
+        return list(self._replace(location=unicode(self.location), start=DATE_FIELD.to_json(self.start)))
+
 
 class CourseStructure(TimeStampedModel):
     """
@@ -31,8 +83,11 @@ class CourseStructure(TimeStampedModel):
     # we'd have to be careful about caching.
     structure_json = CompressedTextField(verbose_name='Structure JSON', blank=True, null=True)
 
-    # JSON mapping of discussion ids to usage keys for the corresponding discussion modules
-    discussion_id_map_json = CompressedTextField(verbose_name='Discussion ID Map JSON', blank=True, null=True)
+    # JSON index of the discussion modules of the course, see discussion_index. The
+    # index has a version, which is increased whenever its content changes.
+    discussion_index_json = CompressedTextField(verbose_name='Discussion Index JSON', blank=True, null=True)
+
+    DISCUSSION_INDEX_VERSION = 1
 
     @property
     def structure(self):
@@ -54,18 +109,56 @@ class CourseStructure(TimeStampedModel):
             return ordered_blocks
 
     @property
-    def discussion_id_map(self):
+    def discussion_index(self):
         """
-        Return a mapping of discussion ids to usage keys of the corresponding discussion modules.
+        Return the index of the discussion modules of the course, as the list of
+        their DiscussionIndexEntry in the order the modulestore returns them, or
+        None if it wasn't generated, or was generated with another version.
         """
-        if self.discussion_id_map_json:
-            result = json.loads(self.discussion_id_map_json)
-            for discussion_id in result:
-                # Usage key strings might not include the course run, so we add it back in with map_into_course
-                result[discussion_id] = UsageKey.from_string(result[discussion_id]).map_into_course(self.course_id)
-            return result
+        if self.discussion_index_json:
+            index = json.loads(self.discussion_index_json)
+            if index.get('version') == self.DISCUSSION_INDEX_VERSION:
+                return [
+                    DiscussionIndexEntry.from_json(json_entry, self.course_id) for json_entry in index['discussions']
+                ]
         return None
 
+    @classmethod
+    def get_discussion_index(cls, course_key):
+        """
+        Return the discussion index of the course (see discussion_index), from
+        the cache if possible.
+
+        The index is cached for settings.DISCUSSION_INDEX_CACHE_TIMEOUT seconds,
+        and dropped from the cache when the course is published.
+        """
+        cache_key = cls.discussion_index_cache_key(course_key)
+        index = cache.get(cache_key)
+        if index is None:
+            try:
+                # Skip the course structure, which is much bigger.
+                index = cls.objects.only('course_id', 'discussion_index_json').get(course_id=course_key).discussion_index
+            except cls.DoesNotExist:
+                return None
+            if index is None:
+                return None
+            cache.set(cache_key, index, settings.DISCUSSION_INDEX_CACHE_TIMEOUT)
+        return index
+
+    @classmethod
+    def discussion_index_cache_key(cls, course_key):
+        """
+        Return the key the discussion index of the course is cached with.
+        """
+        return u'course_structures.discussion_index.{}.{}'.format(cls.DISCUSSION_INDEX_VERSION, course_key)
+
+    @classmethod
+    def clear_cached_discussion_index(cls, course_key):
+        """
+        Drop the discussion index of the course from the cache.
+        """
+        cache.delete(cls.discussion_index_cache_key(course_key))
+
     def _traverse_tree(self, block, unordered_structure, ordered_blocks, parent=None):
         """
         Traverses the tree and fills in the ordered_blocks OrderedDict with the blocks in
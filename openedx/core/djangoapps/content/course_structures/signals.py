@@ -16,13 +16,14 @@ def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=
     # Import tasks here to avoid a circular import.
     from .tasks import update_course_structure
 
-    # Delete the existing discussion id map cache to avoid inconsistencies
+    # Delete the existing discussion index caches to avoid inconsistencies
     try:
         structure = CourseStructure.objects.get(course_id=course_key)
-        structure.discussion_id_map_json = None
+        structure.discussion_index_json = None
         structure.save()
     except CourseStructure.DoesNotExist:
         pass
+    CourseStructure.clear_cached_discussion_index(course_key)
 
     # Note: The countdown=0 kwarg is set to to ensure the method below does not attempt to access the course
     # before the signal emitter has finished all operations. This is also necessary to ensure all tests pass.
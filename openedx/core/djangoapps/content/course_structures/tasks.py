@@ -6,6 +6,7 @@ import logging
 
 from celery.task import task
 from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
 
@@ -20,7 +21,6 @@ def _generate_course_structure(course_key):
         course = modulestore().get_course(course_key, depth=None)
         blocks_stack = [course]
         blocks_dict = {}
-        discussions = {}
         while blocks_stack:
             curr_block = blocks_stack.pop()
             children = curr_block.get_children() if curr_block.has_children else []
@@ -32,11 +32,6 @@ def _generate_course_structure(course_key):
                 "children": [unicode(child.scope_ids.usage_id) for child in children]
             }
 
-            if (curr_block.category == 'discussion' and
-                    hasattr(curr_block, 'discussion_id') and
-                    curr_block.discussion_id):
-                discussions[curr_block.discussion_id] = unicode(curr_block.scope_ids.usage_id)
-
             # Retrieve these attributes separately so that we can fail gracefully
             # if the block doesn't have the attribute.
             attrs = (('graded', False), ('format', None))
@@ -56,10 +51,29 @@ def _generate_course_structure(course_key):
                 "root": unicode(course.scope_ids.usage_id),
                 "blocks": blocks_dict
             },
-            'discussion_id_map': discussions
         }
 
 
+def _generate_discussion_index(course_key):
+    """
+    Generates the discussion index of the specified course, see
+    CourseStructure.discussion_index.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructure, DiscussionIndexEntry
+
+    store = modulestore()
+    # Learners only see the published discussion modules.
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        with store.bulk_operations(course_key):
+            modules = store.get_items(course_key, qualifiers={'category': 'discussion'}, include_orphans=False)
+            discussions = [DiscussionIndexEntry.from_module(module).to_json() for module in modules]
+    return {
+        'version': CourseStructure.DISCUSSION_INDEX_VERSION,
+        'discussions': discussions,
+    }
+
+
 @task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
 def update_course_structure(course_key):
     """
@@ -77,22 +91,25 @@ def update_course_structure(course_key):
 
     try:
         structure = _generate_course_structure(course_key)
+        discussion_index = _generate_discussion_index(course_key)
     except Exception as ex:
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
 
     structure_json = json.dumps(structure['structure'])
-    discussion_id_map_json = json.dumps(structure['discussion_id_map'])
+    discussion_index_json = json.dumps(discussion_index)
 
     structure_model, created = CourseStructure.objects.get_or_create(
         course_id=course_key,
         defaults={
             'structure_json': structure_json,
-            'discussion_id_map_json': discussion_id_map_json
+            'discussion_index_json': discussion_index_json,
         }
     )
 
     if not created:
         structure_model.structure_json = structure_json
-        structure_model.discussion_id_map_json = discussion_id_map_json
+        structure_model.discussion_index_json = discussion_index_json
         structure_model.save()
+
+    CourseStructure.clear_cached_discussion_index(course_key)
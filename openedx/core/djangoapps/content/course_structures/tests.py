@@ -2,15 +2,17 @@
 Course Structure Content sub-application test cases
 """
 import json
+from django.test.utils import override_settings
 from nose.plugins.attrib import attr
 
-from xmodule_django.models import UsageKey
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
-from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure, DiscussionIndexEntry
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
-from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
+from openedx.core.djangoapps.content.course_structures.tasks import (
+    _generate_course_structure, _generate_discussion_index, update_course_structure
+)
 
 
 class SignalDisconnectTestMixin(object):
@@ -43,6 +45,7 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
             discussion_id='test_discussion_id_2'
         )
         CourseStructure.objects.all().delete()
+        CourseStructure.clear_cached_discussion_index(self.course.id)
 
     def test_generate_course_structure(self):
         blocks = {}
@@ -171,53 +174,6 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         }
         self.assertEqual(actual, expected)
 
-    def test_generate_discussion_id_map(self):
-        id_map = {}
-
-        def add_block(block):
-            """Adds the given block and all of its children to the expected discussion id map"""
-            children = block.get_children() if block.has_children else []
-
-            if block.category == 'discussion':
-                id_map[block.discussion_id] = unicode(block.location)
-
-            for child in children:
-                add_block(child)
-
-        add_block(self.course)
-
-        actual = _generate_course_structure(self.course.id)
-        self.assertEqual(actual['discussion_id_map'], id_map)
-
-    def test_discussion_id_map_json(self):
-        id_map = {
-            'discussion_id_1': 'module_location_1',
-            'discussion_id_2': 'module_location_2'
-        }
-        id_map_json = json.dumps(id_map)
-        structure = CourseStructure.objects.create(course_id=self.course.id, discussion_id_map_json=id_map_json)
-        self.assertEqual(structure.discussion_id_map_json, id_map_json)
-
-        structure = CourseStructure.objects.get(course_id=self.course.id)
-        self.assertEqual(structure.discussion_id_map_json, id_map_json)
-
-    def test_discussion_id_map(self):
-        id_map = {
-            'discussion_id_1': 'block-v1:TestX+TS101+T1+type@discussion+block@b141953dff414921a715da37eb14ecdc',
-            'discussion_id_2': 'i4x://TestX/TS101/discussion/466f474fa4d045a8b7bde1b911e095ca'
-        }
-        id_map_json = json.dumps(id_map)
-        structure = CourseStructure.objects.create(course_id=self.course.id, discussion_id_map_json=id_map_json)
-        expected_id_map = {
-            key: UsageKey.from_string(value).map_into_course(self.course.id)
-            for key, value in id_map.iteritems()
-        }
-        self.assertEqual(structure.discussion_id_map, expected_id_map)
-
-    def test_discussion_id_map_missing(self):
-        structure = CourseStructure.objects.create(course_id=self.course.id)
-        self.assertIsNone(structure.discussion_id_map)
-
     def test_update_course_structure(self):
         """
         Test the actual task that orchestrates data generation and updating the database.
@@ -232,8 +188,61 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         structure = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(structure.course_id, course_id)
         self.assertEqual(structure.structure, expected_structure['structure'])
-        self.assertEqual(structure.discussion_id_map.keys(), expected_structure['discussion_id_map'].keys())
+
+    def test_generate_discussion_index(self):
+        index = _generate_discussion_index(self.course.id)
+        self.assertEqual(index['version'], CourseStructure.DISCUSSION_INDEX_VERSION)
+        structure = CourseStructure.objects.create(
+            course_id=self.course.id, discussion_index_json=json.dumps(index)
+        )
+        self.assertEqual(
+            structure.discussion_index,
+            [
+                DiscussionIndexEntry.from_module(self.store.get_item(module.location))
+                for module in (self.discussion_module_1, self.discussion_module_2)
+            ]
+        )
+
+    def test_discussion_index_entry_json(self):
+        entry = DiscussionIndexEntry.from_module(self.store.get_item(self.discussion_module_1.location))._replace(
+            merged_group_access={0: [1, 2], 3: False}
+        )
+        entry_json = json.loads(json.dumps(entry.to_json()))
+        self.assertEqual(DiscussionIndexEntry.from_json(entry_json, self.course.id), entry)
+
+    def test_discussion_index_missing(self):
+        structure = CourseStructure.objects.create(course_id=self.course.id)
+        self.assertIsNone(structure.discussion_index)
+        self.assertIsNone(CourseStructure.get_discussion_index(self.course.id))
+        structure.delete()
+        self.assertIsNone(CourseStructure.get_discussion_index(self.course.id))
+
+    def test_discussion_index_outdated(self):
+        index = _generate_discussion_index(self.course.id)
+        index['version'] = CourseStructure.DISCUSSION_INDEX_VERSION - 1
+        structure = CourseStructure.objects.create(
+            course_id=self.course.id, discussion_index_json=json.dumps(index)
+        )
+        self.assertIsNone(structure.discussion_index)
+
+    @override_settings(DISCUSSION_INDEX_CACHE_TIMEOUT=60)
+    def test_get_discussion_index_cached(self):
+        update_course_structure(unicode(self.course.id))
+        with self.assertNumQueries(1):
+            index = CourseStructure.get_discussion_index(self.course.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseStructure.get_discussion_index(self.course.id), index)
+        self.assertEqual(
+            [entry.discussion_id for entry in index],
+            ['test_discussion_id_1', 'test_discussion_id_2']
+        )
+
+    @override_settings(DISCUSSION_INDEX_CACHE_TIMEOUT=60)
+    def test_discussion_index_updated_on_publish(self):
+        update_course_structure(unicode(self.course.id))
+        self.assertEqual(len(CourseStructure.get_discussion_index(self.course.id)), 2)
+        ItemFactory.create(parent=self.course, category='discussion', discussion_id='test_discussion_id_3')
         self.assertEqual(
-            [unicode(value) for value in structure.discussion_id_map.values()],
-            expected_structure['discussion_id_map'].values()
+            [entry.discussion_id for entry in CourseStructure.get_discussion_index(self.course.id)],
+            ['test_discussion_id_1', 'test_discussion_id_2', 'test_discussion_id_3']
         )
@@ -7,6 +7,10 @@ Module with family of classes for block structures.
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+
+Block structures read from the cache use the compact, array-backed
+maps of the compact module in place of the maps of usage key to
+_BlockRelations and _BlockData objects.
 """
 from collections import defaultdict
 from logging import getLogger
@@ -160,8 +164,16 @@ class BlockStructure(object):
 
         Returns:
             generator - A generator object created from the
-                traverse_topologically method.
-        """
+                traverse_topologically method, or from the block
+                relations' own index-based traversal if the relations
+                are in the compact representation.
+        """
+        if hasattr(self._block_relations, 'traverse_topologically'):
+            return self._block_relations.traverse_topologically(
+                start_node=self.root_block_usage_key,
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
         return traverse_topologically(
             start_node=self.root_block_usage_key,
             get_parents=self.get_parents,
@@ -184,8 +196,15 @@ class BlockStructure(object):
 
         Returns:
             generator - A generator object created from the
-                traverse_post_order method.
-        """
+                traverse_post_order method, or from the block
+                relations' own index-based traversal if the relations
+                are in the compact representation.
+        """
+        if hasattr(self._block_relations, 'traverse_post_order'):
+            return self._block_relations.traverse_post_order(
+                start_node=self.root_block_usage_key,
+                filter_func=filter_func,
+            )
         return traverse_post_order(
             start_node=self.root_block_usage_key,
             get_children=self.get_children,
@@ -299,6 +318,28 @@ class BlockStructureBlockData(BlockStructure):
         # defaultdict {string: dict}
         self._transformer_data = defaultdict(dict)
 
+        # Map of a transformer's name to the name of the registered
+        # transformer whose collect method stored its data.  This
+        # differs from the transformer's own name only for transformers
+        # nested within a higher-order transformer.
+        # dict {string: string}
+        self._transformer_data_owners = {}
+
+        # Name of the registered transformer whose collect method is
+        # currently being called, if any.
+        # string
+        self._collecting_transformer_name = None
+
+        # Version of the modulestore content from which this structure
+        # was collected, if known.
+        # string
+        self._published_version = None
+
+        # Time, in seconds since the epoch, at which the collection of
+        # this structure began reading from the modulestore, if known.
+        # float
+        self._collected_at = None
+
     def get_xblock_field(self, usage_key, field_name, default=None):
         """
         Returns the collected value of the xBlock field for the
@@ -346,6 +387,7 @@ class BlockStructureBlockData(BlockStructure):
             value (any picklable type) - The value to associate with the
                 given key for the given transformer's data.
         """
+        self._record_transformer_data_owner(transformer)
         self._transformer_data[transformer.name()][key] = value
 
     def get_transformer_block_field(self, usage_key, transformer, key, default=None):
@@ -388,6 +430,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        self._record_transformer_data_owner(transformer)
         self._block_data_map[usage_key].transformer_data[transformer.name()][key] = value
 
     def get_transformer_block_data(self, usage_key, transformer):
@@ -527,6 +570,24 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException('VERSION attribute is not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.VERSION)
 
+    def _set_collecting_transformer(self, transformer):
+        """
+        Records the given registered transformer as the owner of any
+        transformer data that is stored until the next call to this
+        method.  Pass None once collection is complete.
+        """
+        self._collecting_transformer_name = transformer.name() if transformer else None
+        if transformer:
+            self._transformer_data_owners[transformer.name()] = transformer.name()
+
+    def _record_transformer_data_owner(self, transformer):
+        """
+        Records the registered transformer that is currently collecting
+        data as the owner of the given transformer's data.
+        """
+        if self._collecting_transformer_name and transformer.name() not in self._transformer_data_owners:
+            self._transformer_data_owners[transformer.name()] = self._collecting_transformer_name
+
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
     """
@@ -1,60 +1,147 @@
 """
 Module for the Cache class for BlockStructure objects.
+
+A collected block structure is stored as a set of independently
+serialized slices rather than as a single blob:
+
+    relations - The structure's block relations (graph nodes and edges).
+    xblock_fields - The collected xBlock fields of all blocks.
+    transformer.<name>.v<version> - The data collected by a single
+        registered transformer (including the data of any transformers
+        nested within it), for both the transformer and its blocks.
+
+Each slice is stored in the compact, array-backed representation of
+the compact module, then compressed, pickled and split into chunks
+small enough to fit within the cache's item size limit.  Chunk keys
+include the structure's version stamp (derived from the course's
+published version) and each transformer's VERSION, so chunks are
+immutable and a reader never mixes data from different collections.
+The chunks of the previous version are deleted once the manifest of a
+new version is written.
+
+A small manifest, stored under 'root.key.<root_block_usage_key>',
+records the version stamp, the chunk count of each slice, and the
+versions of the collected transformers.  Readers that only need a few
+transformers deserialize only the slices for those transformers.
+
+When the course is published, the time of the publish is stored under
+'root.published.<root_block_usage_key>'.  A structure collected before
+the latest publish is still returned while it is being updated, but is
+treated as missing once the publish is older than MAX_UPDATE_DELAY.
 """
 # pylint: disable=protected-access
+from collections import defaultdict
 from logging import getLogger
+from time import time
+from uuid import uuid4
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from .block_structure import BlockStructureModulestoreData
+from .block_structure import BlockStructureModulestoreData, TRANSFORMER_VERSION_KEY
+from .compact import (
+    CompactBlockDataMap,
+    CompactBlockRelations,
+    decode_array,
+    encode_block_relations,
+    encode_columns,
+)
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+# Slice names for the data shared by all transformers.
+RELATIONS_SLICE = 'relations'
+XBLOCK_FIELDS_SLICE = 'xblock_fields'
+
+
 class BlockStructureCache(object):
     """
     Cache for BlockStructure objects.
     """
-    def __init__(self, cache):
+    # Maximum number of bytes stored in a single cache entry.  This
+    # leaves room below memcached's default 1MB item size limit for
+    # the key and the backend's own overhead.
+    CHUNK_SIZE = 1000 * 1000
+
+    # Number of seconds after a publish for which a structure collected
+    # before the publish is still returned, giving the update task time
+    # to patch it.
+    MAX_UPDATE_DELAY = 5 * 60
+
+    def __init__(self, cache, persistent_cache=None):
         """
         Arguments:
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            persistent_cache (django.core.cache.backends.base.BaseCache) -
+                An optional durable store (for example, a database or
+                file-based cache) that all writes go through to and
+                that is read from when data is evicted from cache.
         """
         self._cache = cache
+        self._persistent_cache = persistent_cache
 
     def add(self, block_structure):
         """
         Store a compressed and pickled serialization of the given
         block structure into the given cache.
 
-        The key in the cache is 'root.key.<root_block_usage_key>'.
-        The data stored in the cache includes the structure's
-        block relations, transformer data, and block data.
+        The manifest is stored under 'root.key.<root_block_usage_key>'
+        and the structure's block relations, xBlock fields and each
+        transformer's data are stored in separately keyed chunks.
 
         Arguments:
             block_structure (BlockStructure) - The block structure
                 that is to be serialized to the given cache.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure._transformer_data,
-            block_structure._block_data_map
-        )
-        zp_data_to_cache = zpickle(data_to_cache)
-        self._cache.set(
-            self._encode_root_cache_key(block_structure.root_block_usage_key),
-            zp_data_to_cache
-        )
+        root_block_usage_key = block_structure.root_block_usage_key
+        version = block_structure._published_version or uuid4().hex
+        previous_manifest = self._get_manifest(root_block_usage_key)
+        slices = self._serialize_slices(block_structure)
+
+        manifest = {
+            'version': version,
+            'collected_at': block_structure._collected_at,
+            'chunks': {},
+            'transformer_versions': {},
+            'transformer_data_owners': dict(block_structure._transformer_data_owners),
+        }
+        data_to_cache = {}
+        for slice_name, (transformer_name, transformer_version, zp_data) in slices.iteritems():
+            chunks = self._split(zp_data)
+            manifest['chunks'][slice_name] = len(chunks)
+            if transformer_name:
+                manifest['transformer_versions'][transformer_name] = transformer_version
+            for index, chunk in enumerate(chunks):
+                data_to_cache[self._encode_chunk_key(root_block_usage_key, version, slice_name, index)] = chunk
+
+        data_to_cache[self._encode_root_cache_key(root_block_usage_key)] = zpickle(manifest)
+
+        # Write the manifest together with its chunks so that readers
+        # never find a manifest without the data it refers to.
+        self._cache.set_many(data_to_cache)
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_many(data_to_cache, timeout=None)
+
+        # Chunks are stored without expiry in the persistent cache, so
+        # remove the ones no longer referred to by the new manifest.
+        if previous_manifest is not None:
+            stale_keys = set(self._get_chunk_keys(root_block_usage_key, previous_manifest)) - set(data_to_cache)
+            if stale_keys:
+                self._delete_many(list(stale_keys))
+
         logger.debug(
-            "Wrote BlockStructure %s to cache, size: %s",
-            block_structure.root_block_usage_key,
-            len(zp_data_to_cache),
+            "Wrote BlockStructure %s to cache, version: %s, chunks: %s, size: %s",
+            root_block_usage_key,
+            version,
+            len(data_to_cache),
+            sum(len(value) for value in data_to_cache.itervalues()),
         )
 
-    def get(self, root_block_usage_key):
+    def get(self, root_block_usage_key, transformers=None):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key from the given cache, if it's found in the cache.
@@ -67,34 +154,88 @@ class BlockStructureCache(object):
                 of the block structure that is to be deserialized from
                 the given cache.
 
+            transformers ([BlockStructureTransformer]) - If given, only
+                the data collected by these transformers is
+                deserialized.  The stored versions of all collected
+                transformers are always available in the returned
+                structure.  If None, the data of all transformers is
+                deserialized.
+
         Returns:
             BlockStructure - The deserialized block structure starting
             at root_block_usage_key, if found in the cache.
 
             NoneType - If the root_block_usage_key is not found in the cache.
         """
-
-        # Find root_block_usage_key in the cache.
-        zp_data_from_cache = self._cache.get(self._encode_root_cache_key(root_block_usage_key))
-        if not zp_data_from_cache:
+        manifest_key = self._encode_root_cache_key(root_block_usage_key)
+        published_key = self._encode_published_cache_key(root_block_usage_key)
+        values = self._get_many_with_fallback([manifest_key, published_key])
+        if not values.get(manifest_key):
             logger.debug(
                 "Did not find BlockStructure %r in the cache.",
                 root_block_usage_key,
             )
             return None
-        else:
-            logger.debug(
-                "Read BlockStructure %r from cache, size: %s",
+
+        manifest = zunpickle(values[manifest_key])
+        published_at = values.get(published_key)
+        if (
+                published_at is not None and
+                (manifest.get('collected_at') or 0) < published_at and
+                time() - published_at > self.MAX_UPDATE_DELAY
+        ):
+            logger.warning(
+                "Found BlockStructure %r in the cache which was not updated after the publish at %s, version: %s.",
                 root_block_usage_key,
-                len(zp_data_from_cache),
+                published_at,
+                manifest['version'],
             )
+            return None
+
+        slice_names = self._get_slice_names(manifest, transformers)
+        slices = self._get_slices(root_block_usage_key, manifest, slice_names)
+        if slices is None:
+            logger.info(
+                "Found incomplete BlockStructure %r in the cache, version: %s.",
+                root_block_usage_key,
+                manifest['version'],
+            )
+            return None
+
+        logger.debug(
+            "Read BlockStructure %r from cache, version: %s, slices: %s",
+            root_block_usage_key,
+            manifest['version'],
+            slice_names,
+        )
 
         # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
+        block_keys, encoded_relations = slices.pop(RELATIONS_SLICE)
+        block_indices = {block_key: block_index for block_index, block_key in enumerate(block_keys)}
         block_structure = BlockStructureModulestoreData(root_block_usage_key)
-        block_structure._block_relations = block_relations
-        block_structure._transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map
+        block_structure._published_version = manifest['version']
+        block_structure._collected_at = manifest.get('collected_at')
+        block_structure._transformer_data_owners = manifest['transformer_data_owners']
+        block_structure._block_relations = CompactBlockRelations(
+            block_keys,
+            block_indices,
+            *[decode_array(encoded_array) for encoded_array in encoded_relations]
+        )
+        block_structure._block_data_map = CompactBlockDataMap(
+            block_keys,
+            block_indices,
+            slices.pop(XBLOCK_FIELDS_SLICE),
+        )
+        for transformer_slice in slices.itervalues():
+            for data_name, (transformer_data, transformer_block_columns) in transformer_slice.iteritems():
+                block_structure._transformer_data[data_name] = transformer_data
+                block_structure._block_data_map.add_transformer_columns(data_name, transformer_block_columns)
+
+        # Record the versions of all collected transformers, including
+        # the ones whose data was not requested, so the structure can be
+        # checked for outdated data.
+        for transformer_name, transformer_version in manifest['transformer_versions'].iteritems():
+            block_structure._transformer_data[transformer_name][TRANSFORMER_VERSION_KEY] = transformer_version
 
         return block_structure
 
@@ -108,12 +249,195 @@ class BlockStructureCache(object):
                 of the block structure that is to be removed from
                 the cache.
         """
-        self._cache.delete(self._encode_root_cache_key(root_block_usage_key))
+        manifest = self._get_manifest(root_block_usage_key)
+        keys_to_delete = [
+            self._encode_root_cache_key(root_block_usage_key),
+            self._encode_published_cache_key(root_block_usage_key),
+        ]
+        if manifest is not None:
+            keys_to_delete.extend(self._get_chunk_keys(root_block_usage_key, manifest))
+
+        self._delete_many(keys_to_delete)
         logger.debug(
             "Deleted BlockStructure %r from the cache.",
             root_block_usage_key,
         )
 
+    def record_publish(self, root_block_usage_key):
+        """
+        Records the current time as the time at which the block
+        structure for the given root_block_usage_key was last published.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the root
+                of the block structure that was published.
+        """
+        data_to_cache = {self._encode_published_cache_key(root_block_usage_key): time()}
+        self._cache.set_many(data_to_cache)
+        if self._persistent_cache is not None:
+            self._persistent_cache.set_many(data_to_cache, timeout=None)
+
+    def _get_manifest(self, root_block_usage_key):
+        """
+        Returns the deserialized manifest for the given
+        root_block_usage_key, falling back to the persistent cache if it
+        is not found in the cache.  Returns None if not found.
+        """
+        manifest_key = self._encode_root_cache_key(root_block_usage_key)
+        zp_manifest = self._get_many_with_fallback([manifest_key]).get(manifest_key)
+        return zunpickle(zp_manifest) if zp_manifest else None
+
+    def _get_slices(self, root_block_usage_key, manifest, slice_names):
+        """
+        Returns a map of the given slice names to their deserialized
+        data.  Returns None if any of the slices' chunks is missing.
+        """
+        chunk_keys = {
+            slice_name: [
+                self._encode_chunk_key(root_block_usage_key, manifest['version'], slice_name, index)
+                for index in xrange(manifest['chunks'][slice_name])
+            ]
+            for slice_name in slice_names
+        }
+        chunks = self._get_many_with_fallback(
+            [chunk_key for keys in chunk_keys.itervalues() for chunk_key in keys]
+        )
+
+        slices = {}
+        for slice_name, keys in chunk_keys.iteritems():
+            if not all(chunk_key in chunks for chunk_key in keys):
+                return None
+            slices[slice_name] = zunpickle(''.join(chunks[chunk_key] for chunk_key in keys))
+        return slices
+
+    def _get_chunk_keys(self, root_block_usage_key, manifest):
+        """
+        Returns the keys of all chunks referred to by the given manifest.
+        """
+        return [
+            self._encode_chunk_key(root_block_usage_key, manifest['version'], slice_name, index)
+            for slice_name, num_chunks in manifest['chunks'].iteritems()
+            for index in xrange(num_chunks)
+        ]
+
+    def _delete_many(self, keys):
+        """
+        Deletes the given keys from the cache and the persistent cache.
+        """
+        self._cache.delete_many(keys)
+        if self._persistent_cache is not None:
+            self._persistent_cache.delete_many(keys)
+
+    def _get_many_with_fallback(self, keys):
+        """
+        Returns a map of the given keys to their values in the cache.
+        Any keys not found in the cache are read from the persistent
+        cache and written back to the cache.
+        """
+        values = self._cache.get_many(keys)
+        missing_keys = [key for key in keys if key not in values]
+        if missing_keys and self._persistent_cache is not None:
+            persisted_values = self._persistent_cache.get_many(missing_keys)
+            if persisted_values:
+                self._cache.set_many(persisted_values)
+                values.update(persisted_values)
+        return values
+
+    def _split(self, data):
+        """
+        Splits the given serialized data into a list of chunks of at
+        most CHUNK_SIZE bytes.
+        """
+        return [data[index:index + self.CHUNK_SIZE] for index in xrange(0, max(len(data), 1), self.CHUNK_SIZE)]
+
+    @classmethod
+    def _serialize_slices(cls, block_structure):
+        """
+        Returns a map of slice name to a tuple of (transformer name,
+        transformer version, compressed and pickled slice data) for the
+        given block structure.  The transformer name and version are
+        None for the slices shared by all transformers.
+        """
+        # Index the blocks in a deterministic order, so that slices
+        # written by different processes for the same version agree.
+        block_keys = set(block_structure._block_relations.iterkeys())
+        block_keys.update(block_structure._block_data_map.iterkeys())
+        block_keys = sorted(block_keys, key=unicode)
+        block_indices = {block_key: block_index for block_index, block_key in enumerate(block_keys)}
+
+        transformer_slices = defaultdict(dict)
+        transformer_data_names = set(block_structure._transformer_data)
+        for block_data in block_structure._block_data_map.itervalues():
+            transformer_data_names.update(block_data.transformer_data)
+
+        for data_name in transformer_data_names:
+            owner_name = block_structure._transformer_data_owners.get(data_name, data_name)
+            transformer_slices[owner_name][data_name] = (
+                dict(block_structure._transformer_data.get(data_name, {})),
+                encode_columns(
+                    {
+                        usage_key: block_data.transformer_data[data_name]
+                        for usage_key, block_data in block_structure._block_data_map.iteritems()
+                        if data_name in block_data.transformer_data
+                    },
+                    block_indices,
+                ),
+            )
+
+        slices = {
+            RELATIONS_SLICE: (None, None, zpickle((
+                block_keys,
+                encode_block_relations(block_structure._block_relations, block_keys, block_indices),
+            ))),
+            XBLOCK_FIELDS_SLICE: (None, None, zpickle(encode_columns(
+                {
+                    usage_key: block_data.xblock_fields
+                    for usage_key, block_data in block_structure._block_data_map.iteritems()
+                },
+                block_indices,
+            ))),
+        }
+        for transformer_name, transformer_slice in transformer_slices.iteritems():
+            transformer_version = block_structure._transformer_data.get(transformer_name, {}).get(
+                TRANSFORMER_VERSION_KEY, 0
+            )
+            slice_name = cls._encode_transformer_slice_name(transformer_name, transformer_version)
+            slices[slice_name] = (transformer_name, transformer_version, zpickle(transformer_slice))
+        return slices
+
+    @classmethod
+    def _get_slice_names(cls, manifest, transformers):
+        """
+        Returns the names of the slices to deserialize for the given
+        transformers, or for all transformers if transformers is None.
+        """
+        if transformers is None:
+            return manifest['chunks'].keys()
+
+        slice_names = [RELATIONS_SLICE, XBLOCK_FIELDS_SLICE]
+        for transformer in transformers:
+            transformer_version = manifest['transformer_versions'].get(transformer.name())
+            if transformer_version is not None:
+                slice_names.append(cls._encode_transformer_slice_name(transformer.name(), transformer_version))
+        return slice_names
+
+    @classmethod
+    def _encode_transformer_slice_name(cls, transformer_name, transformer_version):
+        """
+        Returns the slice name for the data of the given transformer
+        at the given version.
+        """
+        return u"transformer.{}.v{}".format(transformer_name, transformer_version)
+
+    @classmethod
+    def _encode_chunk_key(cls, root_block_usage_key, version, slice_name, index):
+        """
+        Returns the cache key to use for storing the given chunk of the
+        given slice of the block structure for the given
+        root_block_usage_key and version.
+        """
+        return u"block.structure.{}.{}.{}.{}".format(unicode(root_block_usage_key), version, slice_name, index)
+
     @classmethod
     def _encode_root_cache_key(cls, root_block_usage_key):
         """
@@ -121,3 +445,11 @@ class BlockStructureCache(object):
         for the given root_block_usage_key.
         """
         return "root.key." + unicode(root_block_usage_key)
+
+    @classmethod
+    def _encode_published_cache_key(cls, root_block_usage_key):
+        """
+        Returns the cache key to use for storing the time of the latest
+        publish of the block structure for the given root_block_usage_key.
+        """
+        return "root.published." + unicode(root_block_usage_key)
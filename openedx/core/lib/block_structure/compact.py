@@ -0,0 +1,424 @@
+"""
+Module with compact, array-backed representations of the internal data
+structures of a block structure.
+
+Blocks are identified by their integer index into a list of usage keys.
+Relations are stored as CSR-style (compressed sparse row) adjacency
+arrays and per-block data is stored in columns, one per xBlock field
+and one per transformer data key, rather than in one object per block.
+
+These representations are much smaller to pickle and much faster to
+unpickle than a map of usage keys to per-block objects.  They implement
+the subset of the defaultdict interface that the BlockStructure classes
+use, and build a block's _BlockRelations or _BlockData object only when
+that block is first accessed.  So a request that only traverses a
+sub-structure of the course does not pay for the rest of the course,
+and traversals operate on integer block indices instead of usage keys.
+
+The following classes and functions are implemented:
+    CompactBlockRelations - Map of usage key to _BlockRelations.
+    CompactBlockDataMap - Map of usage key to _BlockData.
+    encode_block_relations, encode_columns, decode_array - Helpers
+        for serializing to and from the compact representation.
+"""
+from array import array
+from collections import defaultdict
+
+from openedx.core.lib.graph_traversals import traverse_topologically, traverse_post_order
+
+from .block_structure import _BlockData, _BlockRelations
+
+
+# Type code of the arrays used for block indices and offsets.
+INDEX_TYPECODE = 'i'
+
+
+def encode_array(values):
+    """
+    Returns a compact string encoding of the given integers.
+    """
+    return array(INDEX_TYPECODE, values).tostring()
+
+
+def decode_array(encoded_values):
+    """
+    Returns an array of the integers in the given string, as encoded
+    by encode_array.
+    """
+    values = array(INDEX_TYPECODE)
+    values.fromstring(encoded_values)
+    return values
+
+
+def encode_block_relations(block_relations, block_keys, block_indices):
+    """
+    Returns a tuple of (child offsets, child indices, parent offsets,
+    parent indices) CSR-style arrays, encoded with encode_array, for the
+    given map of usage key to _BlockRelations.  The children of the
+    block at index i are at child_indices[child_offsets[i]:child_offsets[i + 1]].
+
+    Arguments:
+        block_relations ({UsageKey: _BlockRelations}) - The relations to
+            encode.
+
+        block_keys ([UsageKey]) - The usage keys of all blocks in
+            block_relations, in index order.
+
+        block_indices ({UsageKey: int}) - Map of usage key to its index
+            in block_keys.
+    """
+    encoded = []
+    for relation_name in ('children', 'parents'):
+        offsets = [0]
+        indices = []
+        for block_key in block_keys:
+            relations = block_relations.get(block_key)
+            if relations is not None:
+                indices.extend(block_indices[related_key] for related_key in getattr(relations, relation_name))
+            offsets.append(len(indices))
+        encoded.extend([encode_array(offsets), encode_array(indices)])
+    return tuple(encoded)
+
+
+def encode_columns(block_values, block_indices):
+    """
+    Returns a map of column name to column for the given map of usage
+    key to a dict of per-block values.  A column is a list with a value
+    for every block if each block has a value, or a dict of block index
+    to value otherwise.
+
+    Arguments:
+        block_values ({UsageKey: {string: any picklable type}}) - The
+            values to encode.
+
+        block_indices ({UsageKey: int}) - Map of usage key to the index
+            of the block, for all blocks in block_values.
+    """
+    sparse_columns = defaultdict(dict)
+    for block_key, values in block_values.iteritems():
+        block_index = block_indices[block_key]
+        for name, value in values.iteritems():
+            sparse_columns[name][block_index] = value
+
+    columns = {}
+    for name, column in sparse_columns.iteritems():
+        if len(column) == len(block_indices):
+            columns[name] = [column[block_index] for block_index in xrange(len(block_indices))]
+        else:
+            columns[name] = column
+    return columns
+
+
+def _column_values(columns, block_index):
+    """
+    Returns a dict of the values for the block at the given index in
+    the given columns.
+    """
+    values = {}
+    for name, column in columns.iteritems():
+        if isinstance(column, list):
+            values[name] = column[block_index]
+        elif block_index in column:
+            values[name] = column[block_index]
+    return values
+
+
+class _CompactMap(object):
+    """
+    Base class for a map of usage key to a per-block object that is
+    built from compact storage when the block is first accessed.
+
+    Like a defaultdict, accessing a missing usage key adds a new empty
+    object for it.  Objects are tracked by block index, and blocks that
+    are added after construction are given new indices.
+    """
+    def __init__(self, block_keys, block_indices):
+        """
+        Arguments:
+            block_keys ([UsageKey]) - The usage keys of the blocks in
+                compact storage, in index order.
+
+            block_indices ({UsageKey: int}) - Map of usage key to its
+                index in block_keys.
+        """
+        self._block_keys = block_keys
+        self._block_indices = block_indices
+
+        # Number of blocks in compact storage.
+        # int
+        self._num_compact_blocks = len(block_keys)
+
+        # Whether block_keys and block_indices are owned by this map,
+        # rather than shared with other maps, and so can be extended.
+        # bool
+        self._owns_block_index = False
+
+        # Map of block index to the objects that were built or added
+        # since construction.
+        # dict {int: object}
+        self._objects = {}
+
+        # Indices of blocks in compact storage that were removed.
+        # set(int)
+        self._removed = set()
+
+    def _build(self, block_index):
+        """
+        Returns the object for the block at the given index, built from
+        compact storage.
+        """
+        raise NotImplementedError
+
+    def _create(self):
+        """
+        Returns a new empty object for a block that was not found.
+        """
+        raise NotImplementedError
+
+    def _index_of(self, usage_key):
+        """
+        Returns the index of the given usage key, adding a new index for
+        it if it has none.
+        """
+        block_index = self._block_indices.get(usage_key)
+        if block_index is None:
+            if not self._owns_block_index:
+                self._block_keys = list(self._block_keys)
+                self._block_indices = dict(self._block_indices)
+                self._owns_block_index = True
+            block_index = len(self._block_keys)
+            self._block_keys.append(usage_key)
+            self._block_indices[usage_key] = block_index
+        return block_index
+
+    def _is_present(self, block_index):
+        """
+        Returns whether the block at the given index is in the map.
+        """
+        return block_index in self._objects or (
+            block_index < self._num_compact_blocks and block_index not in self._removed
+        )
+
+    def _get_object(self, block_index):
+        """
+        Returns the object for the block at the given index, building or
+        creating it if needed.
+        """
+        obj = self._objects.get(block_index)
+        if obj is None:
+            if block_index < self._num_compact_blocks and block_index not in self._removed:
+                obj = self._build(block_index)
+            else:
+                obj = self._create()
+            self._objects[block_index] = obj
+        return obj
+
+    def __contains__(self, usage_key):
+        block_index = self._block_indices.get(usage_key)
+        return block_index is not None and self._is_present(block_index)
+
+    def __getitem__(self, usage_key):
+        return self._get_object(self._index_of(usage_key))
+
+    def __setitem__(self, usage_key, obj):
+        self._objects[self._index_of(usage_key)] = obj
+
+    def __len__(self):
+        return sum(1 for _ in self.iterkeys())
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def get(self, usage_key, default=None):
+        """
+        Returns the object for the given usage key, or default if not
+        found.
+        """
+        block_index = self._block_indices.get(usage_key)
+        if block_index is None or not self._is_present(block_index):
+            return default
+        return self._get_object(block_index)
+
+    def pop(self, usage_key, default=None):
+        """
+        Removes and returns the object for the given usage key, or
+        default if not found.
+        """
+        obj = self.get(usage_key)
+        if obj is None:
+            return default
+        block_index = self._block_indices[usage_key]
+        del self._objects[block_index]
+        self._removed.add(block_index)
+        return obj
+
+    def iterkeys(self):
+        """
+        Returns an iterator of the usage keys of all blocks in the map.
+        """
+        for block_index, usage_key in enumerate(self._block_keys):
+            if self._is_present(block_index):
+                yield usage_key
+
+    def itervalues(self):
+        """
+        Returns an iterator of the objects for all blocks in the map.
+        """
+        return (self[usage_key] for usage_key in self.iterkeys())
+
+    def iteritems(self):
+        """
+        Returns an iterator of (usage key, object) for all blocks in
+        the map.
+        """
+        return ((usage_key, self[usage_key]) for usage_key in self.iterkeys())
+
+
+class CompactBlockRelations(_CompactMap):
+    """
+    Map of usage key to _BlockRelations backed by CSR-style adjacency
+    arrays, as encoded by encode_block_relations.
+
+    Also provides traversals of the blocks that operate on block
+    indices rather than on usage keys, which are expensive to hash.
+    Blocks whose relations were accessed through the map, and so may
+    have been modified, are traversed using their _BlockRelations.
+    """
+    def __init__(self, block_keys, block_indices, child_offsets, child_indices, parent_offsets, parent_indices):
+        """
+        Arguments:
+            block_keys, block_indices - See _CompactMap.
+
+            child_offsets, child_indices, parent_offsets,
+            parent_indices (array) - The decoded arrays returned by
+                encode_block_relations.
+        """
+        super(CompactBlockRelations, self).__init__(block_keys, block_indices)
+        self._child_offsets = child_offsets
+        self._child_indices = child_indices
+        self._parent_offsets = parent_offsets
+        self._parent_indices = parent_indices
+
+    def _build(self, block_index):
+        block_keys = self._block_keys
+        relations = _BlockRelations()
+        relations.children = [block_keys[child_index] for child_index in self._get_compact_children(block_index)]
+        relations.parents = [block_keys[parent_index] for parent_index in self._get_compact_parents(block_index)]
+        return relations
+
+    def _create(self):
+        return _BlockRelations()
+
+    def _get_compact_children(self, block_index):
+        """
+        Returns the indices of the children of the given block in
+        compact storage.
+        """
+        return self._child_indices[self._child_offsets[block_index]:self._child_offsets[block_index + 1]]
+
+    def _get_compact_parents(self, block_index):
+        """
+        Returns the indices of the parents of the given block in
+        compact storage.
+        """
+        return self._parent_indices[self._parent_offsets[block_index]:self._parent_offsets[block_index + 1]]
+
+    def _get_child_indices(self, block_index):
+        """
+        Returns the indices of the current children of the given block.
+        """
+        relations = self._objects.get(block_index)
+        if relations is not None:
+            return [self._index_of(child_key) for child_key in relations.children]
+        elif self._is_present(block_index):
+            return self._get_compact_children(block_index)
+        return []
+
+    def _get_parent_indices(self, block_index):
+        """
+        Returns the indices of the current parents of the given block.
+        """
+        relations = self._objects.get(block_index)
+        if relations is not None:
+            return [self._index_of(parent_key) for parent_key in relations.parents]
+        elif self._is_present(block_index):
+            return self._get_compact_parents(block_index)
+        return []
+
+    def _index_filter_func(self, filter_func):
+        """
+        Returns a filter function on block indices for the given filter
+        function on usage keys.
+        """
+        if filter_func is None:
+            return None
+        block_keys = self._block_keys
+        return lambda block_index: filter_func(block_keys[block_index])
+
+    def traverse_topologically(self, start_node, filter_func=None, yield_descendants_of_unyielded=False):
+        """
+        Generator for yielding usage keys in a topological sort.  See
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        for block_index in traverse_topologically(
+                start_node=self._index_of(start_node),
+                get_parents=self._get_parent_indices,
+                get_children=self._get_child_indices,
+                filter_func=self._index_filter_func(filter_func),
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+        ):
+            yield self._block_keys[block_index]
+
+    def traverse_post_order(self, start_node, filter_func=None):
+        """
+        Generator for yielding usage keys in a post-order sort.  See
+        openedx.core.lib.graph_traversals.traverse_post_order.
+        """
+        for block_index in traverse_post_order(
+                start_node=self._index_of(start_node),
+                get_children=self._get_child_indices,
+                filter_func=self._index_filter_func(filter_func),
+        ):
+            yield self._block_keys[block_index]
+
+
+class CompactBlockDataMap(_CompactMap):
+    """
+    Map of usage key to _BlockData backed by columns, as encoded by
+    encode_columns, of xBlock fields and of each transformer's block
+    data.
+    """
+    def __init__(self, block_keys, block_indices, xblock_field_columns):
+        """
+        Arguments:
+            block_keys, block_indices - See _CompactMap.
+
+            xblock_field_columns ({string: column}) - The encoded
+                xBlock fields of the blocks.
+        """
+        super(CompactBlockDataMap, self).__init__(block_keys, block_indices)
+        self._xblock_field_columns = xblock_field_columns
+
+        # Map of transformer name to the encoded columns of the
+        # transformer's block data.
+        # dict {string: {string: column}}
+        self._transformer_columns = {}
+
+    def add_transformer_columns(self, transformer_name, columns):
+        """
+        Adds the encoded columns of the given transformer's block data.
+        Must be called before any block is accessed.
+        """
+        self._transformer_columns[transformer_name] = columns
+
+    def _build(self, block_index):
+        block_data = _BlockData()
+        block_data.xblock_fields = _column_values(self._xblock_field_columns, block_index)
+        for transformer_name, columns in self._transformer_columns.iteritems():
+            transformer_block_data = _column_values(columns, block_index)
+            if transformer_block_data:
+                block_data.transformer_data[transformer_name] = transformer_block_data
+        return block_data
+
+    def _create(self):
+        return _BlockData()
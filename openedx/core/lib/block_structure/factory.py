@@ -1,6 +1,8 @@
 """
 Module for factory class for BlockStructure objects.
 """
+from time import time
+
 from .block_structure import BlockStructureModulestoreData
 
 
@@ -32,6 +34,7 @@ class BlockStructureFactory(object):
                 root_block_usage_key is not found in the modulestore.
         """
         block_structure = BlockStructureModulestoreData(root_block_usage_key)
+        block_structure._collected_at = time()  # pylint: disable=protected-access
         blocks_visited = set()
 
         def build_block_structure(xblock):
@@ -53,12 +56,13 @@ class BlockStructureFactory(object):
                 block_structure._add_relation(xblock.location, child.location)  # pylint: disable=protected-access
                 build_block_structure(child)
 
-        root_xblock = modulestore.get_item(root_block_usage_key, depth=None)
+        root_xblock = modulestore.get_item(root_block_usage_key, depth=None, prefetch_definitions=True)
         build_block_structure(root_xblock)
+        block_structure._published_version = cls._get_published_version(root_xblock)  # pylint: disable=protected-access
         return block_structure
 
     @classmethod
-    def create_from_cache(cls, root_block_usage_key, block_structure_cache):
+    def create_from_cache(cls, root_block_usage_key, block_structure_cache, transformers=None):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key from the given cache, if it's found in the cache.
@@ -75,10 +79,26 @@ class BlockStructureFactory(object):
                 cache from which the block structure is to be
                 deserialized.
 
+            transformers ([BlockStructureTransformer]) - If given, only
+                the data collected by these transformers is
+                deserialized.
+
         Returns:
             BlockStructure - The deserialized block structure starting
             at root_block_usage_key, if found in the cache.
 
             NoneType - If the root_block_usage_key is not found in the cache.
         """
-        return block_structure_cache.get(root_block_usage_key)
+        return block_structure_cache.get(root_block_usage_key, transformers)
+
+    @classmethod
+    def _get_published_version(cls, root_xblock):
+        """
+        Returns a string identifying the version of the content of the
+        given root xBlock and its descendants, or None if the
+        modulestore does not provide one.
+        """
+        subtree_edited_on = getattr(root_xblock, 'subtree_edited_on', None)
+        if subtree_edited_on is None:
+            return None
+        return subtree_edited_on.strftime('%Y%m%d%H%M%S%f')
@@ -2,18 +2,28 @@
 Top-level module for the Block Structure framework with a class for managing
 BlockStructures.
 """
+from logging import getLogger
+
+from .block_structure import BlockStructureModulestoreData
 from .cache import BlockStructureCache
 from .factory import BlockStructureFactory
 from .exceptions import UsageKeyNotInBlockStructure
-from .transformers import BlockStructureTransformers
+from .transformers import BlockStructureTransformers, EDITED_ON_XBLOCK_FIELD
+
+
+logger = getLogger(__name__)  # pylint: disable=C0103
 
 
 class BlockStructureManager(object):
     """
     Top-level class for managing Block Structures.
     """
+    # If more than this ratio of a structure's blocks is affected by
+    # changes, update_collected re-collects the entire structure
+    # instead of patching the previously collected one.
+    MAX_INCREMENTAL_COLLECT_RATIO = 0.5
 
-    def __init__(self, root_block_usage_key, modulestore, cache):
+    def __init__(self, root_block_usage_key, modulestore, cache, persistent_cache=None):
         """
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the root
@@ -26,10 +36,14 @@ class BlockStructureManager(object):
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache to use for storing/retrieving the block structure's
                 collected data.
+
+            persistent_cache (django.core.cache.backends.base.BaseCache) -
+                An optional durable store that the collected data is
+                written through to and read from on a cache miss.
         """
         self.root_block_usage_key = root_block_usage_key
         self.modulestore = modulestore
-        self.block_structure_cache = BlockStructureCache(cache)
+        self.block_structure_cache = BlockStructureCache(cache, persistent_cache)
 
     def get_transformed(self, transformers, starting_block_usage_key=None):
         """
@@ -52,7 +66,7 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = self.get_collected()
+        block_structure = self.get_collected(transformers)
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
             # requested location.  The rest of the structure will be pruned
@@ -67,7 +81,7 @@ class BlockStructureManager(object):
         transformers.transform(block_structure)
         return block_structure
 
-    def get_collected(self):
+    def get_collected(self, transformers=None):
         """
         Returns the collected Block Structure for the root_block_usage_key,
         getting block data from the cache and modulestore, as needed.
@@ -76,6 +90,12 @@ class BlockStructureManager(object):
         the modulestore is accessed if needed (at cache miss), and the
         transformers data is collected if needed.
 
+        Arguments:
+            transformers (BlockStructureTransformers) - If given, only
+                the collected data of these transformers is read from
+                the cache.  If None, the data of all registered
+                transformers is read.
+
         Returns:
             BlockStructureBlockData - A collected block structure,
                 starting at root_block_usage_key, with collected data
@@ -83,7 +103,8 @@ class BlockStructureManager(object):
         """
         block_structure = BlockStructureFactory.create_from_cache(
             self.root_block_usage_key,
-            self.block_structure_cache
+            self.block_structure_cache,
+            list(transformers) if transformers is not None else None,
         )
         cache_miss = block_structure is None
         if cache_miss or BlockStructureTransformers.is_collected_outdated(block_structure):
@@ -99,11 +120,48 @@ class BlockStructureManager(object):
         """
         Updates the collected Block Structure for the root_block_usage_key.
 
-        Details: The cache is cleared and updated by collecting transformers
-        data from the modulestore.
+        Details: The block structure is read from the modulestore and
+        compared with the previously collected block structure in the
+        cache.  Transformers data is collected only for the blocks
+        affected by changes since the previous collection and the
+        previously collected structure is patched with it.  Until the
+        updated structure is written, readers continue to use the
+        previously collected structure rather than re-collecting it.
+
+        All blocks are collected if there is no previously collected
+        structure, if its data is outdated, or if most of its blocks are
+        affected.
         """
-        self.clear()
-        self.get_collected()
+        block_structure = BlockStructureFactory.create_from_modulestore(
+            self.root_block_usage_key,
+            self.modulestore
+        )
+        collected_block_structure = BlockStructureFactory.create_from_cache(
+            self.root_block_usage_key,
+            self.block_structure_cache
+        )
+        if (
+                collected_block_structure is not None and
+                not BlockStructureTransformers.is_collected_outdated(collected_block_structure)
+        ):
+            affected_blocks = self._get_affected_blocks(block_structure, collected_block_structure)
+            num_blocks = sum(1 for _ in block_structure.get_block_keys())
+            if not affected_blocks:
+                logger.debug("BlockStructure %r is unchanged.", self.root_block_usage_key)
+                return
+            elif len(affected_blocks) <= num_blocks * self.MAX_INCREMENTAL_COLLECT_RATIO:
+                logger.info(
+                    "Collecting %d of %d blocks of BlockStructure %r.",
+                    len(affected_blocks),
+                    num_blocks,
+                    self.root_block_usage_key,
+                )
+                block_structure = self._patch_collected(block_structure, collected_block_structure, affected_blocks)
+                self.block_structure_cache.add(block_structure)
+                return
+
+        BlockStructureTransformers.collect(block_structure)
+        self.block_structure_cache.add(block_structure)
 
     def clear(self):
         """
@@ -111,3 +169,101 @@ class BlockStructureManager(object):
         root block key.
         """
         self.block_structure_cache.delete(self.root_block_usage_key)
+
+    def record_publish(self):
+        """
+        Records that the block structure's content was published.
+
+        Readers continue to use the previously collected structure while
+        update_collected is expected to patch it, but re-collect it
+        themselves once it is outdated by more than the cache's
+        MAX_UPDATE_DELAY, so a failed or delayed update does not leave
+        it stale indefinitely.
+        """
+        self.block_structure_cache.record_publish(self.root_block_usage_key)
+
+    @classmethod
+    def _get_affected_blocks(cls, block_structure, collected_block_structure):
+        """
+        Returns the set of usage keys of the blocks in the given block
+        structure whose collected data may differ from that in the given
+        previously collected block structure.
+
+        A block is changed if it is new, if its relations changed or if
+        it was edited since it was collected.  Since transformers
+        percolate collected data down from a block's ancestors, all
+        descendants of changed blocks are affected.  All ancestors of
+        affected blocks are also included, so that the affected blocks
+        can be collected within a block structure containing them.
+        """
+        changed_blocks = set()
+        for block_key in block_structure.get_block_keys():
+            edited_on = getattr(block_structure.get_xblock(block_key), EDITED_ON_XBLOCK_FIELD, None)
+            if (
+                    block_key not in collected_block_structure or
+                    edited_on is None or
+                    edited_on != collected_block_structure.get_xblock_field(block_key, EDITED_ON_XBLOCK_FIELD) or
+                    block_structure.get_children(block_key) != collected_block_structure.get_children(block_key) or
+                    set(block_structure.get_parents(block_key)) !=
+                    set(collected_block_structure.get_parents(block_key))
+            ):
+                changed_blocks.add(block_key)
+
+        affected_blocks = cls._get_closure(changed_blocks, block_structure.get_children)
+        return cls._get_closure(affected_blocks, block_structure.get_parents)
+
+    @staticmethod
+    def _get_closure(block_keys, get_related):
+        """
+        Returns the set of the given usage keys and all usage keys that
+        are reachable from them using the given get_related function.
+        """
+        closure = set(block_keys)
+        stack = list(block_keys)
+        while stack:
+            for related_key in get_related(stack.pop()):
+                if related_key not in closure:
+                    closure.add(related_key)
+                    stack.append(related_key)
+        return closure
+
+    def _patch_collected(self, block_structure, collected_block_structure, affected_blocks):
+        """
+        Collects transformers data for the given affected blocks of the
+        given block structure, and returns the given previously collected
+        block structure updated with it and with the relations of the
+        given block structure.
+        """
+        # pylint: disable=protected-access
+        affected_block_structure = BlockStructureModulestoreData(self.root_block_usage_key)
+        for block_key in block_structure.topological_traversal(filter_func=lambda key: key in affected_blocks):
+            affected_block_structure._add_xblock(block_key, block_structure.get_xblock(block_key))
+            for child_key in block_structure.get_children(block_key):
+                if child_key in affected_blocks:
+                    affected_block_structure._add_relation(block_key, child_key)
+                elif child_key not in affected_block_structure._xblock_map:
+                    # Transformers may look up the xBlocks of all the
+                    # children of a block (e.g. the split_test
+                    # transformer), so the unaffected children are
+                    # available too, outside of the block relations.
+                    affected_block_structure._add_xblock(child_key, block_structure.get_xblock(child_key))
+        BlockStructureTransformers.collect(affected_block_structure)
+
+        # Remove the data of deleted and affected blocks.
+        for block_key in list(collected_block_structure._block_data_map.iterkeys()):
+            if block_key in affected_blocks or block_key not in block_structure:
+                collected_block_structure._block_data_map.pop(block_key, None)
+
+        # Add the newly collected data of affected blocks.
+        for block_key in affected_blocks:
+            if block_key in affected_block_structure._block_data_map:
+                collected_block_structure._block_data_map[block_key] = (
+                    affected_block_structure._block_data_map[block_key]
+                )
+
+        collected_block_structure._block_relations = block_structure._block_relations
+        collected_block_structure._transformer_data = affected_block_structure._transformer_data
+        collected_block_structure._transformer_data_owners = affected_block_structure._transformer_data_owners
+        collected_block_structure._published_version = block_structure._published_version
+        collected_block_structure._collected_at = block_structure._collected_at
+        return collected_block_structure
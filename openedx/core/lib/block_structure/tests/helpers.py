@@ -55,7 +55,7 @@ class MockModulestore(object):
         """
         self.blocks = blocks
 
-    def get_item(self, block_key, depth=None):  # pylint: disable=unused-argument
+    def get_item(self, block_key, depth=None, **kwargs):  # pylint: disable=unused-argument
         """
         Returns the mock XBlock (MockXBlock) associated with the
         given block_key.
@@ -99,6 +99,28 @@ class MockCache(object):
         """
         del self.map[key]
 
+    def set_many(self, data, timeout=None):  # pylint: disable=unused-argument
+        """
+        Associates each of the given keys with its given value in the
+        cache.
+        """
+        self.set_call_count += 1
+        self.map.update(data)
+
+    def get_many(self, keys):
+        """
+        Returns a map of the given keys that are found in the cache to
+        their values.
+        """
+        return {key: self.map[key] for key in keys if key in self.map}
+
+    def delete_many(self, keys):
+        """
+        Deletes the given keys from the cache, if present.
+        """
+        for key in keys:
+            self.map.pop(key, None)
+
 
 class MockModulestoreFactory(object):
     """
@@ -49,3 +49,115 @@ class TestBlockStructureCache(ChildrenMapTestMixin, TestCase):
         self.assertIsNone(
             self.cache.get(self.block_structure.root_block_usage_key)
         )
+
+
+class MockNestedTransformer(MockTransformer):
+    """
+    A mock transformer that is nested within MockOuterTransformer.
+    """
+    pass
+
+
+class MockOuterTransformer(MockTransformer):
+    """
+    A mock higher-order transformer that collects data for a nested
+    transformer.
+    """
+    @classmethod
+    def collect(cls, block_structure):
+        block_structure.set_transformer_data(cls, 'outer', 'outer val')
+        block_structure.set_transformer_block_field(1, MockNestedTransformer, 'nested', 'nested val')
+
+
+@attr('shard_2')
+class TestBlockStructureCacheSlices(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the chunked, versioned and per-transformer storage of
+    BlockStructureCache.
+    """
+    def setUp(self):
+        super(TestBlockStructureCacheSlices, self).setUp()
+        self.children_map = self.SIMPLE_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        self.mock_cache = MockCache()
+        self.persistent_cache = MockCache()
+        self.cache = BlockStructureCache(self.mock_cache, self.persistent_cache)
+
+        for transformer in [MockTransformer, MockOuterTransformer]:
+            self.block_structure._set_collecting_transformer(transformer)  # pylint: disable=protected-access
+            self.block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+            self.block_structure.set_transformer_block_field(0, transformer, 'test', transformer.name())
+            transformer.collect(self.block_structure)
+        self.block_structure._set_collecting_transformer(None)  # pylint: disable=protected-access
+
+    def test_get_subset_of_transformers(self):
+        self.cache.add(self.block_structure)
+        cached_value = self.cache.get(self.block_structure.root_block_usage_key, [MockOuterTransformer])
+        self.assert_block_structure(cached_value, self.children_map)
+
+        # Data of the requested transformer and its nested transformer
+        # is deserialized.
+        self.assertEquals(cached_value.get_transformer_data(MockOuterTransformer, 'outer'), 'outer val')
+        self.assertEquals(
+            cached_value.get_transformer_block_field(1, MockNestedTransformer, 'nested'), 'nested val'
+        )
+
+        # Data of other transformers is not, though their versions are.
+        self.assertIsNone(cached_value.get_transformer_block_field(0, MockTransformer, 'test'))
+        self.assertEquals(
+            cached_value._get_transformer_data_version(MockTransformer),  # pylint: disable=protected-access
+            MockTransformer.VERSION,
+        )
+
+    def test_chunks(self):
+        self.cache.CHUNK_SIZE = 10
+        self.cache.add(self.block_structure)
+        self.assertTrue(all(len(value) <= 10 for key, value in self.mock_cache.map.iteritems() if 'root' not in key))
+        cached_value = self.cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(cached_value.get_transformer_block_field(0, MockTransformer, 'test'), MockTransformer.name())
+
+    def test_missing_chunk(self):
+        self.cache.CHUNK_SIZE = 10
+        self.cache.add(self.block_structure)
+        chunk_key = next(key for key in self.mock_cache.map if key.endswith('.1'))
+        self.mock_cache.delete(chunk_key)
+        self.persistent_cache.delete(chunk_key)
+        self.assertIsNone(self.cache.get(self.block_structure.root_block_usage_key))
+
+    def test_persistent_fallback(self):
+        self.cache.add(self.block_structure)
+        self.assertEquals(self.mock_cache.map, self.persistent_cache.map)
+
+        # Mimic eviction from the cache.
+        self.mock_cache.map.clear()
+        cached_value = self.cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(self.mock_cache.map, self.persistent_cache.map)
+
+    def test_versioned_keys(self):
+        self.block_structure._published_version = 'version1'  # pylint: disable=protected-access
+        self.cache.add(self.block_structure)
+        self.assertTrue(any('version1' in key for key in self.mock_cache.map))
+        self.assertTrue(any(
+            'transformer.{}.v{}'.format(MockTransformer.name(), MockTransformer.VERSION) in key
+            for key in self.mock_cache.map
+        ))
+
+    def test_delete(self):
+        self.cache.add(self.block_structure)
+        self.cache.delete(self.block_structure.root_block_usage_key)
+        self.assertEquals(self.mock_cache.map, {})
+        self.assertEquals(self.persistent_cache.map, {})
+
+    def test_add_deletes_previous_version(self):
+        self.block_structure._published_version = 'version1'  # pylint: disable=protected-access
+        self.cache.add(self.block_structure)
+        self.block_structure._published_version = 'version2'  # pylint: disable=protected-access
+        self.cache.add(self.block_structure)
+
+        for cache in (self.mock_cache, self.persistent_cache):
+            self.assertFalse(any('version1' in key for key in cache.map))
+            self.assertTrue(any('version2' in key for key in cache.map))
+        cached_value = self.cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
@@ -0,0 +1,112 @@
+"""
+Tests for block_structure/compact.py
+"""
+# pylint: disable=protected-access
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from ..block_structure import BlockStructureModulestoreData
+from ..compact import (
+    CompactBlockDataMap,
+    CompactBlockRelations,
+    decode_array,
+    encode_block_relations,
+    encode_columns,
+)
+from .helpers import ChildrenMapTestMixin, MockTransformer
+
+
+@attr('shard_2')
+class TestCompactBlockStructure(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact, array-backed block structure representation.
+    """
+    def create_compact_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map whose
+        relations and block data use the compact representation.
+        """
+        block_structure = self.create_block_structure(children_map, BlockStructureModulestoreData)
+        for block_key in block_structure:
+            block_structure._block_data_map[block_key].xblock_fields['name'] = 'block {}'.format(block_key)
+        block_structure.set_transformer_block_field(1, MockTransformer, 'test', 'test val')
+
+        block_keys = sorted(block_structure)
+        block_indices = {block_key: block_index for block_index, block_key in enumerate(block_keys)}
+        compact_block_structure = BlockStructureModulestoreData(root_block_usage_key=0)
+        compact_block_structure._block_relations = CompactBlockRelations(
+            block_keys,
+            block_indices,
+            *[
+                decode_array(encoded_array)
+                for encoded_array in encode_block_relations(block_structure._block_relations, block_keys, block_indices)
+            ]
+        )
+        compact_block_structure._block_data_map = CompactBlockDataMap(
+            block_keys,
+            block_indices,
+            encode_columns(
+                {
+                    block_key: block_data.xblock_fields
+                    for block_key, block_data in block_structure._block_data_map.iteritems()
+                },
+                block_indices,
+            ),
+        )
+        compact_block_structure._block_data_map.add_transformer_columns(
+            MockTransformer.name(),
+            encode_columns({1: {'test': 'test val'}}, block_indices),
+        )
+        return compact_block_structure
+
+    def test_relations(self):
+        for children_map in (self.SIMPLE_CHILDREN_MAP, self.LINEAR_CHILDREN_MAP, self.DAG_CHILDREN_MAP):
+            block_structure = self.create_compact_block_structure(children_map)
+            self.assert_block_structure(block_structure, children_map)
+            self.assertEquals(
+                list(block_structure.topological_traversal()),
+                list(self.create_block_structure(children_map).topological_traversal()),
+            )
+
+    def test_block_data(self):
+        block_structure = self.create_compact_block_structure(self.SIMPLE_CHILDREN_MAP)
+        self.assertEquals(block_structure.get_xblock_field(3, 'name'), 'block 3')
+        self.assertEquals(block_structure.get_transformer_block_field(1, MockTransformer, 'test'), 'test val')
+        self.assertIsNone(block_structure.get_transformer_block_field(2, MockTransformer, 'test'))
+
+    def test_lazy_build(self):
+        block_structure = self.create_compact_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_structure.set_root_block(1)
+        list(block_structure.topological_traversal())
+        self.assertEquals(set(block_structure._block_relations._objects), {1})
+
+    def test_remove_block(self):
+        block_structure = self.create_compact_block_structure(self.DAG_CHILDREN_MAP)
+        block_structure.remove_block(3, keep_descendants=True)
+        self.assert_block_structure(
+            block_structure, [[1, 2], [5, 6], [4, 5, 6], [], [], [], []], missing_blocks=[3],
+        )
+        self.assertIsNone(block_structure.get_xblock_field(3, 'name'))
+        self.assertNotIn(3, list(block_structure.get_block_keys()))
+
+    def test_prune(self):
+        block_structure = self.create_compact_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_structure.remove_block(1, keep_descendants=False)
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, [[2], [], [], [], []], missing_blocks=[1, 3, 4])
+
+    def test_remove_block_if(self):
+        for keep_descendants in (True, False):
+            block_structure = self.create_block_structure(self.DAG_CHILDREN_MAP)
+            compact_block_structure = self.create_compact_block_structure(self.DAG_CHILDREN_MAP)
+            for structure in (block_structure, compact_block_structure):
+                structure.remove_block_if(lambda block_key: block_key in (2, 3), keep_descendants=keep_descendants)
+                structure._prune_unreachable()
+            self.assertEquals(
+                list(block_structure.topological_traversal()),
+                list(compact_block_structure.topological_traversal()),
+            )
+            self.assertEquals(
+                list(block_structure.post_order_traversal()),
+                list(compact_block_structure.post_order_traversal()),
+            )
@@ -1,7 +1,9 @@
 """
 Tests for manager.py
 """
+from mock import patch
 from nose.plugins.attrib import attr
+from time import time
 from unittest import TestCase
 
 from ..exceptions import UsageKeyNotInBlockStructure
@@ -20,6 +22,7 @@ class TestTransformer1(MockTransformer):
     collect_data_key = 't1.collect'
     transform_data_key = 't1.transform'
     collect_call_count = 0
+    collected_block_keys = set()
 
     @classmethod
     def collect(cls, block_structure):
@@ -28,6 +31,7 @@ class TestTransformer1(MockTransformer):
         """
         cls._set_block_values(block_structure, cls.collect_data_key)
         cls.collect_call_count += 1
+        cls.collected_block_keys = set(block_structure.get_block_keys())
 
     def transform(self, usage_info, block_structure):
         """
@@ -84,6 +88,21 @@ class TestTransformer1(MockTransformer):
         return data_key + 't1.val1.' + unicode(block_key)
 
 
+class TestChildrenTransformer(MockTransformer):
+    """
+    Test Transformer class which, like the split_test transformer, looks up
+    the xBlocks of the children of each block when collecting.
+    """
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Looks up the xBlocks of the children of each block.
+        """
+        for block_key in block_structure.topological_traversal():
+            for child_key in block_structure.get_xblock(block_key).children:
+                block_structure.get_xblock(child_key)
+
+
 @attr('shard_2')
 class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
     """
@@ -159,3 +178,76 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    def test_record_publish(self):
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        self.bs_manager.record_publish()
+
+        # The previously collected structure is used while it is expected
+        # to be updated.
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+
+        # Once the update is overdue, the structure is re-collected.
+        overdue_time = time() + self.bs_manager.block_structure_cache.MAX_UPDATE_DELAY + 1
+        with patch('openedx.core.lib.block_structure.cache.time', return_value=overdue_time):
+            self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+            self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+        self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    def set_edited_on(self, block_keys, edited_on):
+        """
+        Sets the edited_on value of the given blocks in the modulestore.
+        """
+        for block_key in block_keys:
+            self.modulestore.blocks[block_key].field_map['edited_on'] = edited_on
+
+    def update_collected(self):
+        """
+        Calls the manager's update_collected method.
+        """
+        self.cache.set_call_count = 0
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected()
+
+    def test_update_collected_incrementally(self):
+        self.bs_manager.MAX_INCREMENTAL_COLLECT_RATIO = 0.8
+        self.set_edited_on(range(len(self.children_map)), 1)
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+
+        # Edit a leaf block, so only it and its ancestors are collected.
+        self.set_edited_on([3], 2)
+        self.update_collected()
+        self.assertEquals(self.cache.set_call_count, 1)
+        self.assertEquals(TestTransformer1.collected_block_keys, {0, 1, 3})
+
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+        self.assertEquals(TestTransformer1.collect_call_count, 2)
+        block_structure = self.bs_manager.get_collected()
+        self.assertEquals(block_structure.get_xblock_field(3, 'edited_on'), 2)
+        self.assertEquals(block_structure.get_xblock_field(4, 'edited_on'), 1)
+
+    def test_update_collected_unchanged(self):
+        self.set_edited_on(range(len(self.children_map)), 1)
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        self.update_collected()
+        self.assertEquals(self.cache.set_call_count, 0)
+        self.assertEquals(TestTransformer1.collect_call_count, 1)
+
+    def test_update_collected_without_edit_info(self):
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        self.update_collected()
+        self.assertEquals(self.cache.set_call_count, 1)
+        self.assertEquals(TestTransformer1.collected_block_keys, set(range(len(self.children_map))))
+
+    def test_update_collected_incrementally_with_unaffected_children(self):
+        self.registered_transformers.append(TestChildrenTransformer())
+        self.bs_manager.MAX_INCREMENTAL_COLLECT_RATIO = 0.8
+        self.set_edited_on(range(len(self.children_map)), 1)
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+
+        # Edit a child of block 1, whose other child is unaffected.
+        self.set_edited_on([3], 2)
+        self.update_collected()
+        self.assertEquals(self.cache.set_call_count, 1)
+        self.assertEquals(TestTransformer1.collected_block_keys, {0, 1, 3})
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
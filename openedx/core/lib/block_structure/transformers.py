@@ -10,6 +10,11 @@ from .transformer_registry import TransformerRegistry
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+# Name of the xBlock field that is collected for every block so that
+# changed blocks can be detected when a structure is re-collected.
+EDITED_ON_XBLOCK_FIELD = 'edited_on'
+
+
 class BlockStructureTransformers(object):
     """
     The BlockStructureTransformers class encapsulates an ordered list of block
@@ -64,14 +69,24 @@ class BlockStructureTransformers(object):
         self._transformers.extend(transformers)
         return self
 
+    def __iter__(self):
+        """
+        Returns an iterator over the transformers in the collection, in
+        the order that they were added.
+        """
+        return iter(self._transformers)
+
     @classmethod
     def collect(cls, block_structure):
         """
         Collects data for each registered transformer.
         """
+        block_structure.request_xblock_fields(EDITED_ON_XBLOCK_FIELD)
         for transformer in TransformerRegistry.get_registered_transformers():
+            block_structure._set_collecting_transformer(transformer)  # pylint: disable=protected-access
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
+        block_structure._set_collecting_transformer(None)  # pylint: disable=protected-access
 
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
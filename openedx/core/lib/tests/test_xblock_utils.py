@@ -23,6 +23,7 @@ from openedx.core.lib.xblock_utils import (
     replace_jump_to_id_urls,
     replace_course_urls,
     replace_static_urls,
+    replace_urls,
     grade_histogram,
     sanitize_html_id
 )
@@ -175,6 +176,32 @@ class TestXblockUtils(SharedModuleStoreTestCase):
         self.assertIsInstance(test_replace, Fragment)
         self.assertEqual(test_replace.content, anchor_tag)
 
+    @ddt.data(
+        ('course_mongo', '<a href="/c4x/TestX/TS01/asset/id"><a href="/courses/TestX/TS01/2015/id"><a href="/base_url/id">'),
+        (
+            'course_split',
+            '<a href="/asset-v1:TestX+TS02+2015+type@asset+block/id">'
+            '<a href="/courses/course-v1:TestX+TS02+2015/id"><a href="/base_url/id">'
+        )
+    )
+    @ddt.unpack
+    def test_replace_urls(self, course_id, anchor_tags):
+        """
+        Verify that the static, course and jump-to URLs have been replaced.
+        """
+        course = getattr(self, course_id)
+        test_replace = replace_urls(
+            data_dir=None,
+            course_id=course.id,
+            jump_to_id_base_url='/base_url/',
+            block=course,
+            view='baseview',
+            frag=Fragment('<a href="/static/id"><a href="/course/id"><a href="/jump_to_id/id">'),
+            context=None
+        )
+        self.assertIsInstance(test_replace, Fragment)
+        self.assertEqual(test_replace.content, anchor_tags)
+
     def test_sanitize_html_id(self):
         """
         Verify that colons and dashes are replaced.